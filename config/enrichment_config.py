@@ -20,6 +20,12 @@ class EnrichmentConfig:
     # Assistant IDs (for OpenAI Assistants API)
     MESSAGE_ENRICHMENT_ASSISTANT_ID = os.getenv("MESSAGE_ENRICHMENT_ASSISTANT_ID", None)
     CHAT_CLASSIFICATION_ASSISTANT_ID = os.getenv("CHAT_CLASSIFICATION_ASSISTANT_ID", None)
+    # Assistant instructions (uploaded by scripts/setup_assistants.py)
+    CLASSIFICATION_INSTRUCTIONS_PATH = "prompts/assistants/classification_instructions.txt"
+    RISK_ASSESSMENT_INSTRUCTIONS_PATH = "prompts/assistants/risk_assessment_instructions.txt"
+    # With an assistant ID configured, send its instructions and the prompt in one chat completion instead of
+    # a thread run (create thread, add message, run, poll, list messages): same JSON, one round-trip
+    ASSISTANT_SINGLE_CALL = os.getenv("ENRICHMENT_ASSISTANT_SINGLE_CALL", "false").lower() == "true"
 
     # Model Configuration (fallback for direct chat completions)
     DEFAULT_CLASSIFICATION_MODEL = os.getenv("CLASSIFICATION_MODEL", EnrichmentModels.GPT_4_NANO)
@@ -41,6 +47,8 @@ class EnrichmentConfig:
     # Batch limits
     MAX_CHAT_BATCH_SIZE = 50
     MAX_MESSAGE_BATCH_SIZE = 100
+    # Messages of a batch assessed at the same time (bounded to stay under the provider's rate limits)
+    MESSAGE_BATCH_CONCURRENCY = int(os.getenv("ENRICHMENT_MESSAGE_BATCH_CONCURRENCY", "8"))
 
     # Risk Assessment Configuration
     RISK_LEVEL_THRESHOLDS = {"critical": 80.0, "high": 60.0, "medium": 40.0, "low": 20.0, "none": 0.0}
@@ -61,10 +69,35 @@ class EnrichmentConfig:
     # Retry configuration
     MAX_LLM_RETRIES = 2
     LLM_RETRY_DELAY_SECONDS = 1
+    # Retries wait a random delay up to LLM_RETRY_DELAY_SECONDS * 2^attempt, capped here (or the server's retry-after)
+    LLM_RETRY_MAX_DELAY_SECONDS = 30
+
+    # Rate limiting (services/enrichment/rate_limiter.py), shared by classification and risk assessment
+    # Starting rate; the x-ratelimit-* headers of each response then adjust it to the account's quota
+    LLM_REQUESTS_PER_MINUTE = int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "500"))
+    LLM_RATE_LIMIT_BURST = int(os.getenv("OPENAI_RATE_LIMIT_BURST", "20"))
 
     # Timeout configuration
     LLM_REQUEST_TIMEOUT_SECONDS = 30
 
+    # Result cache (enrichment_cache, migrations/create_enrichment_cache.sql)
+    # Chats / messages whose normalized content, model and prompt version were already enriched reuse that result
+    CACHE_ENABLED = os.getenv("ENRICHMENT_CACHE_ENABLED", "false").lower() == "true"
+    # Part of every key: bump to stop reusing cached results
+    CACHE_VERSION = os.getenv("ENRICHMENT_CACHE_VERSION", "1")
+    CACHE_SIZE = int(os.getenv("ENRICHMENT_CACHE_SIZE", "5000"))  # In-process LRU entries
+    CACHE_TTL_SECONDS = int(os.getenv("ENRICHMENT_CACHE_TTL_SECONDS", str(30 * 86400)))
+
+    # Job queue (enrichment_jobs, migrations/create_enrichment_jobs.sql)
+    # Filled by the authenticated POST /enrichment/jobs endpoints, processed by scripts/run_enrichment_worker.py
+    WORKER_CONCURRENCY = int(os.getenv("ENRICHMENT_WORKER_CONCURRENCY", "4"))
+    WORKER_POLL_SECONDS = float(os.getenv("ENRICHMENT_WORKER_POLL_SECONDS", "2"))
+    JOB_MAX_ATTEMPTS = int(os.getenv("ENRICHMENT_JOB_MAX_ATTEMPTS", "5"))
+    # Failed attempts are retried after JOB_RETRY_DELAY_SECONDS * 2^(attempt - 1)
+    JOB_RETRY_DELAY_SECONDS = int(os.getenv("ENRICHMENT_JOB_RETRY_DELAY_SECONDS", "30"))
+    # Running jobs not finished after this long (worker stopped) are claimed again
+    JOB_LOCK_TIMEOUT_SECONDS = int(os.getenv("ENRICHMENT_JOB_LOCK_TIMEOUT_SECONDS", "600"))
+
     @classmethod
     def get_risk_level_from_score(cls, score: float) -> str:
         """Determine risk level from numeric score"""
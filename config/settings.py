@@ -26,6 +26,75 @@ class BaseSettings:
     SUPABASE_URL: str = os.getenv("SUPABASE_URL", "")
     SUPABASE_SECRET_KEY: str = os.getenv("SUPABASE_SECRET_KEY", "")
     SUPABASE_JWT_SECRET: str = os.getenv("SUPABASE_JWT_SECRET", "")
+    SUPABASE_JWT_AUDIENCE: str = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+
+    # JWT verification
+    # Tokens are verified locally against SUPABASE_JWT_SECRET; remote fallback asks Supabase Auth
+    # when local verification is unavailable (no secret, asymmetric signing keys) or the signature does not match.
+    # Signed-out tokens are refused by the instance that signed them out; others accept them until they expire.
+    JWT_LOCAL_VERIFICATION: bool = os.getenv("JWT_LOCAL_VERIFICATION", "true").lower() == "true"
+    JWT_REMOTE_FALLBACK: bool = os.getenv("JWT_REMOTE_FALLBACK", "true").lower() == "true"
+    JWT_CACHE_TTL_SECONDS: int = int(os.getenv("JWT_CACHE_TTL_SECONDS", "300"))
+    JWT_CACHE_MAX_SIZE: int = int(os.getenv("JWT_CACHE_MAX_SIZE", "10000"))
+
+    # Supabase connection pooling (per-user clients share one HTTP transport)
+    SUPABASE_HTTP_MAX_CONNECTIONS: int = int(os.getenv("SUPABASE_HTTP_MAX_CONNECTIONS", "100"))
+    SUPABASE_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("SUPABASE_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    SUPABASE_CLIENT_CACHE_SIZE: int = int(os.getenv("SUPABASE_CLIENT_CACHE_SIZE", "1000"))
+    SUPABASE_CLIENT_CACHE_TTL_SECONDS: int = int(os.getenv("SUPABASE_CLIENT_CACHE_TTL_SECONDS", "300"))
+
+    # Shared thread pool for blocking Supabase calls made from async code
+    BLOCKING_EXECUTOR_MAX_WORKERS: int = int(os.getenv("BLOCKING_EXECUTOR_MAX_WORKERS", "32"))
+    BLOCKING_EXECUTOR_QUEUE_WARNING: int = int(os.getenv("BLOCKING_EXECUTOR_QUEUE_WARNING", "100"))
+    # Separate pool for requests issued (and waited on) by code already running on the shared pool
+    PREFETCH_EXECUTOR_MAX_WORKERS: int = int(os.getenv("PREFETCH_EXECUTOR_MAX_WORKERS", "16"))
+
+    # Bulk reads (repositories/bulk_reader.py): keyset page size should not exceed PostgREST max-rows
+    BULK_READ_PAGE_SIZE: int = int(os.getenv("BULK_READ_PAGE_SIZE", "1000"))
+    BULK_READ_PARALLEL_SLICES: int = int(os.getenv("BULK_READ_PARALLEL_SLICES", "4"))
+    BULK_READ_PREFETCH_PAGES: int = int(os.getenv("BULK_READ_PREFETCH_PAGES", "2"))
+    # Max URL-encoded length of one in_() value list; longer lists are split into chunked requests
+    IN_FILTER_MAX_CHARS: int = int(os.getenv("IN_FILTER_MAX_CHARS", "2000"))
+
+    # Organization audit KPIs are aggregated in Postgres (get_audit_kpis RPC) instead of in Python
+    # Requires migrations/create_audit_aggregation_functions.sql
+    AUDIT_SQL_AGGREGATION: bool = os.getenv("AUDIT_SQL_AGGREGATION", "false").lower() == "true"
+
+    # Organization audit results (services/audit_cache.py): in-process LRU tier plus an optional shared tier,
+    # invalidated by enrichment writes and team/member changes; with a shared tier, ranges ending before today
+    # are kept longer. Off until a shared backend is configured: invalidations only reach the current process.
+    AUDIT_CACHE: bool = os.getenv("AUDIT_CACHE", "false").lower() == "true"
+    AUDIT_CACHE_TTL_SECONDS: int = int(os.getenv("AUDIT_CACHE_TTL_SECONDS", "300"))
+    AUDIT_CACHE_CLOSED_TTL_SECONDS: int = int(os.getenv("AUDIT_CACHE_CLOSED_TTL_SECONDS", "86400"))
+    AUDIT_CACHE_SIZE: int = int(os.getenv("AUDIT_CACHE_SIZE", "1000"))
+    # Organization members, teams and team members resolved by every audit call (services/membership_service.py)
+    # Invalidated by member and team changes; 0 disables the cache
+    MEMBERSHIP_CACHE_TTL_SECONDS: int = int(os.getenv("MEMBERSHIP_CACHE_TTL_SECONDS", "60"))
+    MEMBERSHIP_CACHE_SIZE: int = int(os.getenv("MEMBERSHIP_CACHE_SIZE", "2000"))
+
+    # Per-user daily audit facts (user_audit_daily), requires migrations/create_user_audit_daily.sql
+    # Writes count new batches and enrichments; enable reads once scripts/rebuild_user_audit_daily.py has filled past days
+    AUDIT_FACTS_WRITES: bool = os.getenv("AUDIT_FACTS_WRITES", "false").lower() == "true"
+    AUDIT_FACTS_READS: bool = os.getenv("AUDIT_FACTS_READS", "false").lower() == "true"
+
+    # Message sizes (messages.char_count / estimated_tokens), requires migrations/add_message_size_columns.sql
+    # Writes store sizes at ingest; enable reads once scripts/backfill_message_size_columns.py has filled past rows
+    MESSAGE_SIZE_WRITES: bool = os.getenv("MESSAGE_SIZE_WRITES", "false").lower() == "true"
+    MESSAGE_SIZE_READS: bool = os.getenv("MESSAGE_SIZE_READS", "false").lower() == "true"
+
+    # Per-user daily usage rollup (user_usage_daily), requires migrations/create_user_usage_daily.sql
+    # Writes count new batches; enable reads once scripts/rebuild_user_usage_daily.py has filled past days
+    USAGE_ROLLUP_WRITES: bool = os.getenv("USAGE_ROLLUP_WRITES", "false").lower() == "true"
+    USAGE_ROLLUP_READS: bool = os.getenv("USAGE_ROLLUP_READS", "false").lower() == "true"
+    # Usage overview / timeline / patterns share one cached window per user (services/usage_engine.py)
+    USAGE_ENGINE_CACHE_TTL_SECONDS: int = int(os.getenv("USAGE_ENGINE_CACHE_TTL_SECONDS", "30"))
+    USAGE_ENGINE_CACHE_SIZE: int = int(os.getenv("USAGE_ENGINE_CACHE_SIZE", "500"))
+
+    # Stats/usage endpoint responses cached per ingest watermark, served with ETags (services/stats_response_cache.py)
+    # Requires migrations/create_user_stats_watermarks.sql; the TTL bounds how far the moving windows may lag
+    STATS_RESPONSE_CACHE: bool = os.getenv("STATS_RESPONSE_CACHE", "false").lower() == "true"
+    STATS_RESPONSE_CACHE_TTL_SECONDS: int = int(os.getenv("STATS_RESPONSE_CACHE_TTL_SECONDS", "300"))
+    STATS_RESPONSE_CACHE_SIZE: int = int(os.getenv("STATS_RESPONSE_CACHE_SIZE", "2000"))
 
     # App
     APP_VERSION: str = "2.0.1"
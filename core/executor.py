@@ -0,0 +1,140 @@
+"""
+Shared executor for blocking I/O
+The supabase client is synchronous; async code offloads its calls here instead of
+creating a ThreadPoolExecutor per query
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BlockingExecutor:
+    """
+    Application-wide bounded thread pool, started and stopped with the app lifespan.
+    Tracks queue depth so saturation under concurrent dashboard load is visible.
+    """
+
+    def __init__(self, max_workers: int, queue_warning_threshold: int, thread_name_prefix: str = "blocking-io"):
+        self.max_workers = max_workers
+        self.queue_warning_threshold = queue_warning_threshold
+        self.thread_name_prefix = thread_name_prefix
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._max_queued = 0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Underlying pool, created on first use if the lifespan hook has not started it"""
+        if self._executor is None:
+            self.start()
+        return self._executor  # type: ignore[return-value]
+
+    def start(self) -> None:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix=self.thread_name_prefix
+                )
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking callable on the shared pool and await its result"""
+        loop = asyncio.get_running_loop()
+        return await asyncio.wrap_future(self.submit(func, *args, **kwargs), loop=loop)
+
+    def submit(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """
+        Schedule a blocking callable on the pool and return its future, for sync callers
+        overlapping round-trips. Never wait on the future from inside a task of the same pool:
+        nested waits can exhaust it (code running on blocking_executor submits to prefetch_executor).
+        """
+        call = functools.partial(func, *args, **kwargs)
+
+        with self._lock:
+            self._queued += 1
+            self._max_queued = max(self._max_queued, self._queued)
+            queued = self._queued
+        if queued > self.queue_warning_threshold:
+            logger.warning(f"Blocking executor saturated: {queued} queued tasks for {self.max_workers} workers")
+
+        def _tracked() -> Any:
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+            try:
+                return call()
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+
+        def _on_done(future) -> None:
+            # Tasks cancelled before a worker picked them up never ran _tracked
+            if future.cancelled():
+                with self._lock:
+                    self._queued -= 1
+
+        future = self.executor.submit(_tracked)
+        future.add_done_callback(_on_done)
+        return future
+
+    def stats(self) -> dict:
+        """Queue-depth metrics"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "active": self._active,
+                "queued": self._queued,
+                "max_queued": self._max_queued,
+                "completed": self._completed,
+            }
+
+
+blocking_executor = BlockingExecutor(
+    max_workers=settings.BLOCKING_EXECUTOR_MAX_WORKERS,
+    queue_warning_threshold=settings.BLOCKING_EXECUTOR_QUEUE_WARNING,
+)
+
+# Single requests overlapped by sync code that may itself run on blocking_executor (page prefetch,
+# concurrent reads). Its tasks never wait on other tasks, so waiting on them cannot deadlock.
+prefetch_executor = BlockingExecutor(
+    max_workers=settings.PREFETCH_EXECUTOR_MAX_WORKERS,
+    queue_warning_threshold=settings.BLOCKING_EXECUTOR_QUEUE_WARNING,
+    thread_name_prefix="prefetch-io",
+)
+
+
+async def run_blocking(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Shortcut for blocking_executor.run"""
+    return await blocking_executor.run(func, *args, **kwargs)
+
+
+def offload(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Decorator turning a blocking function into a coroutine function run on the shared executor
+    Async code awaits the wrapper; the original stays available as .blocking for sync callers
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        return await blocking_executor.run(func, *args, **kwargs)
+
+    wrapper.blocking = func  # type: ignore[attr-defined]
+    return wrapper
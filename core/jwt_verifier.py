@@ -0,0 +1,116 @@
+"""
+Local verification of Supabase access tokens
+Checks signature and expiry against SUPABASE_JWT_SECRET and keeps a bounded TTL cache
+of verified tokens so authenticated requests skip the Supabase Auth round-trip
+"""
+
+import hashlib
+import logging
+import time
+
+import jwt
+
+from config.settings import settings
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Supabase signs access tokens with the project JWT secret (HS256) unless asymmetric
+# signing keys are enabled, in which case we have to ask Supabase Auth
+LOCAL_ALGORITHMS = ["HS256"]
+
+# Signed-out tokens without a readable exp are refused for Supabase's default access token lifetime
+DEFAULT_TOKEN_LIFETIME_SECONDS = 3600
+
+
+class JWTVerificationUnavailable(Exception):
+    """Raised when a token cannot be verified locally and needs remote validation"""
+
+
+class JWTVerifier:
+    """Verifies access tokens locally and caches the resulting user IDs"""
+
+    def __init__(self, secret: str, audience: str | None, cache_ttl_seconds: int, cache_max_size: int):
+        self.secret = secret
+        self.audience = audience or None
+        self._cache = TTLCache(max_size=cache_max_size, ttl_seconds=cache_ttl_seconds)
+        # Tokens signed out through this process, refused until they expire
+        self._revoked = TTLCache(max_size=cache_max_size, ttl_seconds=DEFAULT_TOKEN_LIFETIME_SECONDS)
+
+    @staticmethod
+    def _cache_key(token: str) -> str:
+        # Never keep raw bearer tokens in memory longer than the request
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get_cached_user_id(self, token: str) -> str | None:
+        """Return the user ID of a previously verified, still valid token"""
+        return self._cache.get(self._cache_key(token))
+
+    def remember(self, token: str, user_id: str, expires_at: float | None) -> None:
+        """Cache a verified token, never beyond its own expiry"""
+        ttl = self._cache.ttl_seconds
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - time.time())
+        self._cache.set(self._cache_key(token), user_id, ttl_seconds=ttl)
+
+    def forget(self, token: str) -> None:
+        """Drop a token from the cache"""
+        self._cache.delete(self._cache_key(token))
+
+    def revoke(self, token: str) -> None:
+        """
+        Refuse a signed-out token until its expiry. The denylist lives in this process only (and is bounded):
+        other instances keep accepting a locally verified token until it expires.
+        """
+        self.forget(token)
+        expires_at = self.peek_expiry(token)
+        ttl = expires_at - time.time() if expires_at is not None else None
+        self._revoked.set(self._cache_key(token), True, ttl_seconds=ttl)
+
+    def is_revoked(self, token: str) -> bool:
+        return self._revoked.get(self._cache_key(token), False)
+
+    def verify_locally(self, token: str) -> tuple[str, float]:
+        """
+        Verify signature, expiry and audience of a token without any network call
+
+        Returns:
+            Tuple of (user_id, expires_at epoch seconds)
+
+        Raises:
+            JWTVerificationUnavailable: no secret configured or token signed with an unsupported algorithm
+            jwt.InvalidTokenError: token is malformed, expired or has a bad signature
+        """
+        if not self.secret:
+            raise JWTVerificationUnavailable("SUPABASE_JWT_SECRET is not configured")
+
+        header = jwt.get_unverified_header(token)
+        if header.get("alg") not in LOCAL_ALGORITHMS:
+            raise JWTVerificationUnavailable(f"Unsupported JWT algorithm: {header.get('alg')}")
+
+        claims = jwt.decode(
+            token,
+            self.secret,
+            algorithms=LOCAL_ALGORITHMS,
+            audience=self.audience,
+            options={"require": ["exp", "sub"], "verify_aud": self.audience is not None},
+        )
+        return claims["sub"], float(claims["exp"])
+
+    @staticmethod
+    def peek_expiry(token: str) -> float | None:
+        """Read the exp claim without verifying the signature (only for tokens validated remotely)"""
+        try:
+            claims = jwt.decode(token, options={"verify_signature": False})
+        except jwt.InvalidTokenError:
+            return None
+        exp = claims.get("exp")
+        return float(exp) if exp is not None else None
+
+
+jwt_verifier = JWTVerifier(
+    secret=settings.SUPABASE_JWT_SECRET,
+    audience=settings.SUPABASE_JWT_AUDIENCE,
+    cache_ttl_seconds=settings.JWT_CACHE_TTL_SECONDS,
+    cache_max_size=settings.JWT_CACHE_MAX_SIZE,
+)
@@ -2,10 +2,17 @@
 Supabase client initialization
 """
 
+import hashlib
 import os
 
 import dotenv
-from supabase import Client, ClientOptions, create_client
+import httpx
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_TIMEOUT
+from supabase import Client, create_client
+from supabase.lib.client_options import SyncClientOptions
+
+from config.settings import settings
+from utils.cache import TTLCache
 
 # Load .env.local first (higher priority), then .env as fallback
 dotenv.load_dotenv(".env.local")
@@ -31,10 +38,79 @@ else:
     supabase_admin: Client = None  # type: ignore
 
 
+class SupabaseClientFactory:
+    """
+    Builds per-user Supabase clients on top of one shared, connection-pooled HTTP transport.
+    Only the Authorization header differs between users, so keep-alive connections (and their
+    TLS sessions) to PostgREST are reused across requests. Per-token client wrappers are kept
+    in an LRU cache so repeated requests from the same session skip client construction.
+    """
+
+    def __init__(self, url: str, key: str, max_clients: int, client_ttl_seconds: int):
+        self.url = url
+        self.key = key
+        self._http_client: httpx.Client | None = None
+        self._clients = TTLCache(max_size=max_clients, ttl_seconds=client_ttl_seconds)
+
+    @property
+    def http_client(self) -> httpx.Client:
+        """Shared HTTP transport, created lazily so it can be reopened after shutdown"""
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.Client(
+                http2=True,
+                follow_redirects=True,
+                timeout=DEFAULT_POSTGREST_CLIENT_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=settings.SUPABASE_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.SUPABASE_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                ),
+            )
+        return self._http_client
+
+    def get_client(self, access_token: str) -> Client:
+        """Return a Supabase client that sends the user's access token (RLS applies)"""
+        cache_key = hashlib.sha256(access_token.encode()).hexdigest()
+        client = self._clients.get(cache_key)
+        if client is not None:
+            return client
+
+        options = SyncClientOptions(
+            headers={"Authorization": f"Bearer {access_token}"},
+            httpx_client=self.http_client,
+            auto_refresh_token=False,
+            persist_session=False,
+        )
+        client = create_client(self.url, self.key, options)
+        self._clients.set(cache_key, client)
+        return client
+
+    def forget(self, access_token: str) -> None:
+        """Drop the cached client of a token (e.g. on sign out)"""
+        self._clients.delete(hashlib.sha256(access_token.encode()).hexdigest())
+
+    def close(self) -> None:
+        """Release pooled connections (application shutdown)"""
+        self._clients.clear()
+        if self._http_client is not None and not self._http_client.is_closed:
+            self._http_client.close()
+
+
+if SUPABASE_URL and SUPABASE_PUBLISHABLE_KEY:
+    client_factory: SupabaseClientFactory | None = SupabaseClientFactory(
+        SUPABASE_URL,
+        SUPABASE_PUBLISHABLE_KEY,
+        max_clients=settings.SUPABASE_CLIENT_CACHE_SIZE,
+        client_ttl_seconds=settings.SUPABASE_CLIENT_CACHE_TTL_SECONDS,
+    )
+else:
+    client_factory = None
+
+
 def create_authenticated_client(access_token: str) -> Client:
     """
-    Create a Supabase client authenticated with a user's access token.
+    Get a Supabase client authenticated with a user's access token.
     This client will respect RLS policies for the authenticated user.
+    Clients share one pooled HTTP transport and are reused per token.
 
     Args:
         access_token: The user's JWT access token
@@ -42,9 +118,7 @@ def create_authenticated_client(access_token: str) -> Client:
     Returns:
         Authenticated Supabase client
     """
-    if not SUPABASE_URL or not SUPABASE_PUBLISHABLE_KEY:
+    if client_factory is None:
         # In test mode, return the mock client
         return supabase  # type: ignore
-    options = ClientOptions()
-    options.headers = {"Authorization": f"Bearer {access_token}"}
-    return create_client(SUPABASE_URL, SUPABASE_PUBLISHABLE_KEY, options)
+    return client_factory.get_client(access_token)
@@ -1,7 +1,7 @@
 from .auth_entities import Session, User
 from .block_entities import Block, BlockTitle, BlockSummary
 from .folder_entities import Folder, FolderWithItems, FolderTitle
-from .message_entities import Chat, Message
+from .message_entities import Chat, Message, MessageUsage
 from .organizations import (
     Organization,
     OrganizationDetail,
@@ -35,6 +35,7 @@ __all__ = [
     "TemplateUsage",
     "UserProfile",
     "Message",
+    "MessageUsage",
     "Chat",
     "Organization",
     "OrganizationMember",
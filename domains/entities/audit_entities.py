@@ -2,7 +2,7 @@
 Domain entities for audit functionality
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 
 
@@ -155,3 +155,23 @@ class OrganizationAudit:
             self.top_prompts = []
         if self.riskiest_prompts is None:
             self.riskiest_prompts = []
+
+
+@dataclass
+class AuditDay:
+    """One user_audit_daily row: a user's audit counters for a UTC day (JSON counters: key -> rows)"""
+
+    user_id: str
+    day: str
+    chats: int = 0
+    messages: int = 0
+    chats_by_provider: dict[str, int] = field(default_factory=dict)
+    messages_by_provider: dict[str, int] = field(default_factory=dict)
+    messages_by_model: dict[str, int] = field(default_factory=dict)
+    messages_by_hour: dict[str, int] = field(default_factory=dict)  # UTC hour "0".."23"
+    quality_scores: dict[str, int] = field(default_factory=dict)  # quality_score -> enriched chats
+    themes: dict[str, int] = field(default_factory=dict)
+    intents: dict[str, int] = field(default_factory=dict)
+    risky_messages: int = 0
+    risk_levels: dict[str, int] = field(default_factory=dict)
+    risk_types: dict[str, int] = field(default_factory=dict)  # detected risk category -> risky messages
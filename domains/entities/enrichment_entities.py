@@ -71,6 +71,8 @@ class EnrichedChat:
     model_used: str | None = None
     user_override_quality: bool = False
     user_quality_score: int | None = None
+    cache_key: str | None = None  # enrichment_cache key of the result
+    from_cache: bool = False  # Copied from enrichment_cache instead of an LLM call
 
 
 @dataclass
@@ -114,6 +116,8 @@ class EnrichedMessage:
     user_whitelist: bool = False
     processing_time_ms: int | None = None
     model_used: str | None = None
+    cache_key: str | None = None  # enrichment_cache key of the result
+    from_cache: bool = False  # Copied from enrichment_cache instead of an LLM call
 
     def __post_init__(self):
         if self.risk_categories is None:
@@ -122,3 +126,22 @@ class EnrichedMessage:
             self.risk_summary = []
         if self.detected_issues is None:
             self.detected_issues = []
+
+
+@dataclass
+class EnrichmentJob:
+    """Queued enrichment of one chat or message (enrichment_jobs row)"""
+
+    id: int
+    kind: str  # chat, message
+    provider_id: str  # chat_provider_id or message_provider_id
+    payload: dict  # ChatEnrichmentRequestDTO / EnrichMessageRequestDTO fields
+    user_id: str | None = None
+    status: str = "pending"  # pending, running, done, failed
+    attempts: int = 0
+    max_attempts: int = 5
+    last_error: str | None = None
+    result: dict | None = None  # Enrichment response once done
+    created_at: str | None = None
+    updated_at: str | None = None
+    completed_at: str | None = None
@@ -14,6 +14,22 @@ class Message:
     parent_message_provider_id: str | None = None
 
 
+@dataclass
+class MessageUsage:
+    """Message row without its content, for usage statistics"""
+
+    id: str
+    user_id: str
+    message_provider_id: str
+    role: str
+    chat_provider_id: str
+    model: str
+    created_at: str | None = None
+    parent_message_provider_id: str | None = None
+    char_count: int = 0
+    estimated_tokens: int = 0
+
+
 @dataclass
 class Chat:
     id: str
@@ -134,3 +134,19 @@ class UsagePatterns:
     daily_distribution: dict[str, int]
     peak_hour: str
     peak_day: str
+
+
+@dataclass
+class UsageDay:
+    """One user_usage_daily row: a user's totals for a UTC day, model and provider"""
+
+    user_id: str
+    day: str
+    model: str
+    provider: str
+    messages: int
+    chats: int
+    input_tokens: int
+    output_tokens: int
+    cost_usd: float
+    energy_wh: float
@@ -548,6 +548,30 @@ class RiskCategoriesResponseDTO(BaseModel):
     generated_at: datetime
 
 
+# Dashboard DTOs (several panels from one request)
+
+
+class AuditDashboardResponseDTO(BaseModel):
+    """Requested dashboard panels, computed from one shared read of members and rows"""
+
+    organization_id: str
+    date_range: dict[str, str]
+    team_filter: list[str] | None = None
+    panels: list[str]
+    adoption_curve: AdoptionCurveResponseDTO | None = None
+    risk_timeline: RiskTimelineResponseDTO | None = None
+    quality_timeline: QualityTimelineResponseDTO | None = None
+    theme_distribution: ThemeTimelineResponseDTO | None = None
+    intent_distribution: IntentTimelineResponseDTO | None = None
+    model_distribution: ModelDistributionResponseDTO | None = None
+    provider_distribution: ProviderDistributionResponseDTO | None = None
+    quality_metrics_timeline: QualityMetricsTimelineResponseDTO | None = None
+    quality_distribution: QualityDistributionResponseDTO | None = None
+    usage_by_hour: UsageByHourResponseDTO | None = None
+    risk_categories: RiskCategoriesResponseDTO | None = None
+    generated_at: datetime
+
+
 # User Profile DTOs
 
 
@@ -185,3 +185,28 @@ class RatedChatDTO(BaseModel):
     created_at: datetime
     user_override_quality: bool = False
     user_quality_score: int | None = None
+
+
+class EnrichmentJobDTO(BaseModel):
+    """Status of a queued chat or message enrichment"""
+
+    id: int
+    kind: str = Field(..., description="chat or message")
+    provider_id: str = Field(..., description="chat_provider_id (chat jobs) or message_provider_id (message jobs)")
+    user_id: str | None = None
+    status: str = Field(..., description="pending, running, done or failed")
+    attempts: int
+    last_error: str | None = None
+    result: dict | None = Field(
+        None,
+        description="ChatEnrichmentResponseDTO or EnrichMessageResponseDTO fields once done",
+    )
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+    completed_at: datetime | None = None
+
+
+class EnrichmentJobsResponseDTO(BaseModel):
+    """Queued enrichments, in request order"""
+
+    jobs: list[EnrichmentJobDTO]
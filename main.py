@@ -31,6 +31,11 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting up Jaydai API...")
 
+    from core.executor import blocking_executor, prefetch_executor
+
+    blocking_executor.start()
+    prefetch_executor.start()
+
     try:
         # TODO faire un call à chaque composant utilisé dans le BE (définit dans core/ (ou core/startup.py))
 
@@ -50,6 +55,14 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("Shutting down Jaydai API...")
+
+    from core.supabase import client_factory
+
+    blocking_executor.shutdown(wait=False)
+    prefetch_executor.shutdown(wait=False)
+    if client_factory:
+        client_factory.close()
+
     logger.info("Jaydai API shutdown completed")
 
 
@@ -3,9 +3,8 @@ import logging
 from fastapi import Request, status
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
-from supabase import ClientOptions, create_client
 
-from core.supabase import SUPABASE_PUBLISHABLE_KEY, SUPABASE_URL
+from core.supabase import create_authenticated_client
 from services import AuthService
 from utils.auth_helpers import ACCESS_COOKIE_KEY
 
@@ -32,6 +31,12 @@ class AuthenticationMiddleware(BaseHTTPMiddleware):
         "/openapi.json",
     ]
 
+    # Routes under a public prefix that still require authentication: (method, path prefix)
+    AUTHENTICATED_ROUTES = [
+        ("GET", "/enrichment/jobs"),  # Job payloads and results belong to their user
+        ("POST", "/enrichment/jobs"),  # Workers enrich jobs with the service role for their user_id
+    ]
+
     async def dispatch(self, request: Request, call_next):
         # Allow CORS preflight requests to pass through without authentication
         if request.method == "OPTIONS":
@@ -81,12 +86,8 @@ class AuthenticationMiddleware(BaseHTTPMiddleware):
                     content={"detail": "Authentication required. Please provide a valid JWT token in cookies."},
                 )
 
-            # Create an authenticated Supabase client for this request
-            authenticated_client = create_client(
-                SUPABASE_URL,
-                SUPABASE_PUBLISHABLE_KEY,
-                options=ClientOptions(headers={"Authorization": f"Bearer {access_token}"}),
-            )
+            # Reuse a pooled Supabase client authenticated with this token
+            authenticated_client = create_authenticated_client(access_token)
 
             request.state.user_id = user_id
             request.state.supabase_client = authenticated_client
@@ -107,6 +108,10 @@ class AuthenticationMiddleware(BaseHTTPMiddleware):
     def _is_public_route(self, request: Request) -> bool:
         path = request.url.path
 
+        for method, authenticated_path in self.AUTHENTICATED_ROUTES:
+            if request.method == method and path.startswith(authenticated_path):
+                return False
+
         if path in self.PUBLIC_PATHS_WITHOUT_AUTH:
             return True
 
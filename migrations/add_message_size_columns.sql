@@ -0,0 +1,28 @@
+-- Migration: Persist message sizes
+-- Description: Add char_count and estimated_tokens to messages so usage stats select two integers
+--              instead of downloading every message body. Values are computed at ingest by
+--              MessageService (utils/stats_helpers.py: message_size_fields); existing rows are filled by
+--              scripts/backfill_message_size_columns.py.
+-- Date: 2025-12-18
+--
+-- Rollout: apply this migration, set MESSAGE_SIZE_WRITES=true, run the backfill script, then set
+-- MESSAGE_SIZE_READS=true.
+
+-- Step 1: Add the columns (nullable until the backfill has run)
+ALTER TABLE messages
+ADD COLUMN IF NOT EXISTS char_count INTEGER,
+ADD COLUMN IF NOT EXISTS estimated_tokens INTEGER;
+
+-- Step 2: Let the backfill find rows that still need sizes
+CREATE INDEX IF NOT EXISTS idx_messages_missing_size
+ON messages (id)
+WHERE estimated_tokens IS NULL;
+
+-- Same estimate as utils/stats_helpers.py: estimate_tokens (1 token per 4 characters, at least 1)
+COMMENT ON COLUMN messages.char_count IS 'Length of content in characters, computed at ingest';
+COMMENT ON COLUMN messages.estimated_tokens IS 'max(1, char_count / 4) for non-empty content, 0 otherwise';
+
+DO $$
+BEGIN
+  RAISE NOTICE 'Migration completed successfully! Run scripts/backfill_message_size_columns.py to fill existing rows.';
+END $$;
@@ -0,0 +1,277 @@
+-- Migration: Audit KPI aggregation functions
+-- Description: Server-side aggregation of the organization audit KPIs (quality, risk, usage, themes, intents)
+--              so the API receives a handful of numbers instead of every message / enriched row.
+--              Semantics mirror utils/enrichment/aggregators.py (the Python reference implementation):
+--              enriched chats are restricted to chats that have at least one message of the users in the window,
+--              trends compare against the p_trend_days preceding p_start_date.
+-- Date: 2025-12-15
+--
+-- Functions run as SECURITY INVOKER: RLS of the calling user still applies.
+-- Called via client.rpc(...) (POST body), so large user_id arrays never hit URL length limits.
+
+-- =====================================================
+-- Helper: chats with messages from the users in [p_start_date, p_end_date] (or [p_start_date, p_end_date))
+-- =====================================================
+CREATE OR REPLACE FUNCTION public.audit_window_chat_ids(
+    p_user_ids UUID[],
+    p_start_date TIMESTAMPTZ,
+    p_end_date TIMESTAMPTZ,
+    p_include_end BOOLEAN DEFAULT TRUE
+)
+RETURNS TABLE(chat_provider_id TEXT)
+LANGUAGE sql STABLE
+AS $$
+    SELECT DISTINCT m.chat_provider_id
+    FROM public.messages m
+    WHERE m.user_id = ANY(p_user_ids)
+      AND m.chat_provider_id IS NOT NULL
+      AND m.created_at >= p_start_date
+      AND (m.created_at < p_end_date OR (p_include_end AND m.created_at = p_end_date));
+$$;
+
+-- =====================================================
+-- Quality: {total_rated, score_sum, median_score, distribution, trend_count, trend_sum}
+-- median_score is the upper median (sorted[n / 2]) like the Python aggregator
+-- =====================================================
+CREATE OR REPLACE FUNCTION public.audit_quality_stats(
+    p_user_ids UUID[],
+    p_start_date TIMESTAMPTZ,
+    p_end_date TIMESTAMPTZ,
+    p_trend_days INTEGER DEFAULT 7
+)
+RETURNS JSONB
+LANGUAGE sql STABLE
+AS $$
+    WITH current_scores AS (
+        SELECT ec.quality_score
+        FROM public.enriched_chats ec
+        WHERE ec.user_id = ANY(p_user_ids)
+          AND ec.quality_score IS NOT NULL
+          AND ec.chat_provider_id IN (
+              SELECT chat_provider_id FROM public.audit_window_chat_ids(p_user_ids, p_start_date, p_end_date)
+          )
+    ),
+    trend_scores AS (
+        SELECT ec.quality_score
+        FROM public.enriched_chats ec
+        WHERE ec.user_id = ANY(p_user_ids)
+          AND ec.quality_score IS NOT NULL
+          AND ec.chat_provider_id IN (
+              SELECT chat_provider_id FROM public.audit_window_chat_ids(
+                  p_user_ids, p_start_date - make_interval(days => p_trend_days), p_start_date, FALSE
+              )
+          )
+    ),
+    sorted AS (
+        SELECT array_agg(quality_score ORDER BY quality_score) AS scores FROM current_scores
+    )
+    SELECT jsonb_build_object(
+        'total_rated', (SELECT COUNT(*) FROM current_scores),
+        'score_sum', (SELECT COALESCE(SUM(quality_score), 0) FROM current_scores),
+        'median_score', (SELECT scores[array_length(scores, 1) / 2 + 1] FROM sorted),
+        'distribution', jsonb_build_object(
+            'excellent', (SELECT COUNT(*) FROM current_scores WHERE quality_score BETWEEN 80 AND 100),
+            'good', (SELECT COUNT(*) FROM current_scores WHERE quality_score BETWEEN 60 AND 79),
+            'medium', (SELECT COUNT(*) FROM current_scores WHERE quality_score BETWEEN 40 AND 59),
+            'poor', (SELECT COUNT(*) FROM current_scores WHERE quality_score NOT BETWEEN 40 AND 100)
+        ),
+        'trend_count', (SELECT COUNT(*) FROM trend_scores),
+        'trend_sum', (SELECT COALESCE(SUM(quality_score), 0) FROM trend_scores)
+    );
+$$;
+
+-- =====================================================
+-- Risk: {total_assessed, level_counts, risk_score_sum, risk_score_count, pii_count, credentials_count, sensitive_count}
+-- =====================================================
+CREATE OR REPLACE FUNCTION public.audit_risk_stats(
+    p_user_ids UUID[],
+    p_start_date TIMESTAMPTZ,
+    p_end_date TIMESTAMPTZ
+)
+RETURNS JSONB
+LANGUAGE sql STABLE
+AS $$
+    WITH assessed AS (
+        SELECT em.overall_risk_level, em.overall_risk_score, em.detected_issues
+        FROM public.enriched_messages em
+        WHERE em.user_id = ANY(p_user_ids)
+          AND em.created_at >= p_start_date
+          AND em.created_at <= p_end_date
+    ),
+    issues AS (
+        SELECT lower(COALESCE(issue->>'category', '')) AS category
+        FROM assessed a,
+             jsonb_array_elements(CASE WHEN jsonb_typeof(a.detected_issues) = 'array' THEN a.detected_issues ELSE '[]'::jsonb END) issue
+        WHERE jsonb_typeof(issue) = 'object'
+    )
+    SELECT jsonb_build_object(
+        'total_assessed', (SELECT COUNT(*) FROM assessed),
+        'level_counts', COALESCE(
+            (SELECT jsonb_object_agg(overall_risk_level, cnt)
+             FROM (SELECT overall_risk_level, COUNT(*) AS cnt FROM assessed GROUP BY overall_risk_level) levels),
+            '{}'::jsonb
+        ),
+        'risk_score_sum', (SELECT COALESCE(SUM(overall_risk_score), 0) FROM assessed WHERE overall_risk_score > 0),
+        'risk_score_count', (SELECT COUNT(*) FROM assessed WHERE overall_risk_score > 0),
+        'pii_count', (SELECT COUNT(*) FROM issues WHERE category LIKE '%pii%'),
+        'credentials_count', (
+            SELECT COUNT(*) FROM issues
+            WHERE category NOT LIKE '%pii%' AND (category LIKE '%security%' OR category LIKE '%credential%')
+        ),
+        'sensitive_count', (
+            SELECT COUNT(*) FROM issues
+            WHERE category NOT LIKE '%pii%'
+              AND category NOT LIKE '%security%'
+              AND category NOT LIKE '%credential%'
+              AND (category LIKE '%confidential%' OR category LIKE '%data_leakage%')
+        )
+    );
+$$;
+
+-- =====================================================
+-- Usage: {total_prompts, active_users, total_chats, work_related_count}
+-- =====================================================
+CREATE OR REPLACE FUNCTION public.audit_usage_stats(
+    p_user_ids UUID[],
+    p_start_date TIMESTAMPTZ,
+    p_end_date TIMESTAMPTZ
+)
+RETURNS JSONB
+LANGUAGE sql STABLE
+AS $$
+    WITH window_messages AS (
+        SELECT m.user_id
+        FROM public.messages m
+        WHERE m.user_id = ANY(p_user_ids)
+          AND m.created_at >= p_start_date
+          AND m.created_at <= p_end_date
+    ),
+    work AS (
+        SELECT ec.is_work_related
+        FROM public.enriched_chats ec
+        WHERE ec.user_id = ANY(p_user_ids)
+          AND ec.chat_provider_id IN (
+              SELECT chat_provider_id FROM public.audit_window_chat_ids(p_user_ids, p_start_date, p_end_date)
+          )
+    )
+    SELECT jsonb_build_object(
+        'total_prompts', (SELECT COUNT(*) FROM window_messages),
+        'active_users', (SELECT COUNT(DISTINCT user_id) FROM window_messages),
+        'total_chats', (SELECT COUNT(*) FROM work),
+        'work_related_count', (SELECT COUNT(*) FROM work WHERE is_work_related)
+    );
+$$;
+
+-- =====================================================
+-- Themes: {current: {theme: count}, trend: {theme: count}}
+-- =====================================================
+CREATE OR REPLACE FUNCTION public.audit_theme_stats(
+    p_user_ids UUID[],
+    p_start_date TIMESTAMPTZ,
+    p_end_date TIMESTAMPTZ,
+    p_trend_days INTEGER DEFAULT 7
+)
+RETURNS JSONB
+LANGUAGE sql STABLE
+AS $$
+    SELECT jsonb_build_object(
+        'current', COALESCE(
+            (SELECT jsonb_object_agg(theme, cnt) FROM (
+                SELECT ec.theme, COUNT(*) AS cnt
+                FROM public.enriched_chats ec
+                WHERE ec.user_id = ANY(p_user_ids)
+                  AND ec.theme IS NOT NULL AND ec.theme <> ''
+                  AND ec.chat_provider_id IN (
+                      SELECT chat_provider_id FROM public.audit_window_chat_ids(p_user_ids, p_start_date, p_end_date)
+                  )
+                GROUP BY ec.theme
+            ) current_themes),
+            '{}'::jsonb
+        ),
+        'trend', COALESCE(
+            (SELECT jsonb_object_agg(theme, cnt) FROM (
+                SELECT ec.theme, COUNT(*) AS cnt
+                FROM public.enriched_chats ec
+                WHERE ec.user_id = ANY(p_user_ids)
+                  AND ec.theme IS NOT NULL AND ec.theme <> ''
+                  AND ec.chat_provider_id IN (
+                      SELECT chat_provider_id FROM public.audit_window_chat_ids(
+                          p_user_ids, p_start_date - make_interval(days => p_trend_days), p_start_date, FALSE
+                      )
+                  )
+                GROUP BY ec.theme
+            ) trend_themes),
+            '{}'::jsonb
+        )
+    );
+$$;
+
+-- =====================================================
+-- Intents: {total_categorized, intents: [{intent, count, total_quality}]}
+-- count/total_quality only include chats with a quality score, like the Python aggregator
+-- =====================================================
+CREATE OR REPLACE FUNCTION public.audit_intent_stats(
+    p_user_ids UUID[],
+    p_start_date TIMESTAMPTZ,
+    p_end_date TIMESTAMPTZ
+)
+RETURNS JSONB
+LANGUAGE sql STABLE
+AS $$
+    WITH categorized AS (
+        SELECT ec.intent, ec.quality_score
+        FROM public.enriched_chats ec
+        WHERE ec.user_id = ANY(p_user_ids)
+          AND ec.intent IS NOT NULL
+          AND ec.chat_provider_id IN (
+              SELECT chat_provider_id FROM public.audit_window_chat_ids(p_user_ids, p_start_date, p_end_date)
+          )
+    )
+    SELECT jsonb_build_object(
+        'total_categorized', (SELECT COUNT(*) FROM categorized),
+        'intents', COALESCE(
+            (SELECT jsonb_agg(jsonb_build_object('intent', intent, 'count', cnt, 'total_quality', total_quality))
+             FROM (
+                 SELECT intent, COUNT(*) AS cnt, SUM(quality_score) AS total_quality
+                 FROM categorized
+                 WHERE intent <> '' AND quality_score IS NOT NULL
+                 GROUP BY intent
+             ) grouped),
+            '[]'::jsonb
+        )
+    );
+$$;
+
+-- =====================================================
+-- All KPIs in one round-trip
+-- =====================================================
+CREATE OR REPLACE FUNCTION public.get_audit_kpis(
+    p_user_ids UUID[],
+    p_start_date TIMESTAMPTZ,
+    p_end_date TIMESTAMPTZ,
+    p_trend_days INTEGER DEFAULT 7
+)
+RETURNS JSONB
+LANGUAGE sql STABLE
+AS $$
+    SELECT jsonb_build_object(
+        'quality', public.audit_quality_stats(p_user_ids, p_start_date, p_end_date, p_trend_days),
+        'risk', public.audit_risk_stats(p_user_ids, p_start_date, p_end_date),
+        'usage', public.audit_usage_stats(p_user_ids, p_start_date, p_end_date),
+        'themes', public.audit_theme_stats(p_user_ids, p_start_date, p_end_date, p_trend_days),
+        'intents', public.audit_intent_stats(p_user_ids, p_start_date, p_end_date)
+    );
+$$;
+
+-- Indexes backing the window lookups
+CREATE INDEX IF NOT EXISTS idx_messages_user_id_created_at ON public.messages(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_enriched_chats_chat_provider_id ON public.enriched_chats(chat_provider_id);
+CREATE INDEX IF NOT EXISTS idx_enriched_messages_user_id_created_at ON public.enriched_messages(user_id, created_at);
+
+GRANT EXECUTE ON FUNCTION public.audit_window_chat_ids(UUID[], TIMESTAMPTZ, TIMESTAMPTZ, BOOLEAN) TO authenticated;
+GRANT EXECUTE ON FUNCTION public.audit_quality_stats(UUID[], TIMESTAMPTZ, TIMESTAMPTZ, INTEGER) TO authenticated;
+GRANT EXECUTE ON FUNCTION public.audit_risk_stats(UUID[], TIMESTAMPTZ, TIMESTAMPTZ) TO authenticated;
+GRANT EXECUTE ON FUNCTION public.audit_usage_stats(UUID[], TIMESTAMPTZ, TIMESTAMPTZ) TO authenticated;
+GRANT EXECUTE ON FUNCTION public.audit_theme_stats(UUID[], TIMESTAMPTZ, TIMESTAMPTZ, INTEGER) TO authenticated;
+GRANT EXECUTE ON FUNCTION public.audit_intent_stats(UUID[], TIMESTAMPTZ, TIMESTAMPTZ) TO authenticated;
+GRANT EXECUTE ON FUNCTION public.get_audit_kpis(UUID[], TIMESTAMPTZ, TIMESTAMPTZ, INTEGER) TO authenticated;
@@ -0,0 +1,47 @@
+-- Migration: Enrichment result cache
+-- Description: Classification and risk assessment results keyed by a hash of the normalized, truncated
+--              content the LLM sees (plus role / context / assistant response), the model and the prompt
+--              version. EnrichmentService looks a chat or message up here (behind an in-process LRU)
+--              before calling the LLM: repeated prompts and template-generated messages are enriched
+--              from the cache and copied into enriched_chats / enriched_messages with their cache_key.
+-- Date: 2026-01-05
+--
+-- Rollout: apply this migration, then set ENRICHMENT_CACHE_ENABLED=true. Bump ENRICHMENT_CACHE_VERSION
+-- to stop reusing cached results (e.g. after editing an assistant's instructions on OpenAI).
+
+-- Step 1: Cache table
+CREATE TABLE IF NOT EXISTS enrichment_cache (
+    -- '<kind>:' + sha256 of (kind, cache version, prompt version, model, normalized content)
+    cache_key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL CHECK (kind IN ('chat', 'message')),
+    prompt_version TEXT NOT NULL,
+    model TEXT,
+    -- Classification / risk assessment result, as returned by the enrichment services
+    result JSONB NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Expired entries (ENRICHMENT_CACHE_TTL_SECONDS) can be purged by age
+CREATE INDEX IF NOT EXISTS idx_enrichment_cache_created_at ON enrichment_cache(created_at);
+
+COMMENT ON TABLE enrichment_cache IS 'LLM enrichment results shared across users, keyed by content hash';
+
+-- Step 2: Row level security
+-- Entries are shared across users: only the service role (enrichment endpoints and workers) reads and writes them
+ALTER TABLE enrichment_cache ENABLE ROW LEVEL SECURITY;
+
+-- Step 3: Provenance on the enrichment tables
+ALTER TABLE enriched_chats ADD COLUMN IF NOT EXISTS cache_key TEXT;
+ALTER TABLE enriched_chats ADD COLUMN IF NOT EXISTS from_cache BOOLEAN NOT NULL DEFAULT false;
+ALTER TABLE enriched_messages ADD COLUMN IF NOT EXISTS cache_key TEXT;
+ALTER TABLE enriched_messages ADD COLUMN IF NOT EXISTS from_cache BOOLEAN NOT NULL DEFAULT false;
+
+COMMENT ON COLUMN enriched_chats.cache_key IS 'enrichment_cache key of the result (set while the cache is enabled)';
+COMMENT ON COLUMN enriched_chats.from_cache IS 'True when the result was copied from enrichment_cache instead of an LLM call';
+COMMENT ON COLUMN enriched_messages.cache_key IS 'enrichment_cache key of the result (set while the cache is enabled)';
+COMMENT ON COLUMN enriched_messages.from_cache IS 'True when the result was copied from enrichment_cache instead of an LLM call';
+
+DO $$
+BEGIN
+  RAISE NOTICE 'Migration completed successfully! Set ENRICHMENT_CACHE_ENABLED=true to reuse enrichment results.';
+END $$;
@@ -0,0 +1,139 @@
+-- Migration: Enrichment job queue
+-- Description: Durable queue for chat classification and message risk assessment. Authenticated users
+--              queue one job per chat / message (POST /enrichment/jobs/chats, /enrichment/jobs/messages)
+--              and get 202 right away; scripts/run_enrichment_worker.py claims jobs with SKIP LOCKED,
+--              calls the LLM, saves the enrichment and stores the response on the job. Jobs are unique
+--              per (kind, user_id, provider_id): a chat or message is queued again only once its job
+--              is done or failed.
+-- Date: 2025-12-29
+--
+-- Rollout: apply this migration and start at least one worker before clients use the job endpoints.
+
+-- Step 1: Job table
+CREATE TABLE IF NOT EXISTS enrichment_jobs (
+    id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    kind TEXT NOT NULL CHECK (kind IN ('chat', 'message')),
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    -- chat_provider_id for chat jobs, message_provider_id for message jobs
+    provider_id TEXT NOT NULL,
+    -- ChatEnrichmentRequestDTO / EnrichMessageRequestDTO
+    payload JSONB NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'running', 'done', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    available_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    locked_by TEXT,
+    locked_at TIMESTAMPTZ,
+    last_error TEXT,
+    -- ChatEnrichmentResponseDTO / EnrichMessageResponseDTO once done
+    result JSONB,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    completed_at TIMESTAMPTZ,
+    CONSTRAINT enrichment_jobs_key UNIQUE (kind, user_id, provider_id)
+);
+
+-- Workers claim the oldest available pending jobs
+CREATE INDEX IF NOT EXISTS idx_enrichment_jobs_pending
+    ON enrichment_jobs(available_at, id) WHERE status = 'pending';
+-- and reclaim running jobs whose worker stopped
+CREATE INDEX IF NOT EXISTS idx_enrichment_jobs_running
+    ON enrichment_jobs(locked_at) WHERE status = 'running';
+
+COMMENT ON TABLE enrichment_jobs IS 'Queued chat / message enrichments, processed by scripts/run_enrichment_worker.py';
+
+-- Step 2: Row level security
+-- Users queue and follow their own jobs with their own client: the workers save enrichments with
+-- the service role for the job's user_id, so a job can only be created for the caller. Workers
+-- claim and complete jobs with the service role.
+ALTER TABLE enrichment_jobs ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view their own enrichment jobs" ON enrichment_jobs;
+DROP POLICY IF EXISTS "Users can queue their own enrichment jobs" ON enrichment_jobs;
+DROP POLICY IF EXISTS "Users can requeue their own finished enrichment jobs" ON enrichment_jobs;
+
+CREATE POLICY "Users can view their own enrichment jobs"
+    ON enrichment_jobs FOR SELECT
+    USING (auth.uid() = user_id);
+
+CREATE POLICY "Users can queue their own enrichment jobs"
+    ON enrichment_jobs FOR INSERT
+    WITH CHECK (auth.uid() = user_id AND status = 'pending' AND attempts = 0);
+
+-- Used by enqueue_enrichment_jobs to queue a done or failed chat / message again
+CREATE POLICY "Users can requeue their own finished enrichment jobs"
+    ON enrichment_jobs FOR UPDATE
+    USING (auth.uid() = user_id AND status IN ('done', 'failed'))
+    WITH CHECK (auth.uid() = user_id AND status = 'pending' AND attempts = 0);
+
+-- Step 3: Enqueue (idempotent)
+-- Inserts the jobs not queued yet, queues done and failed jobs again with the new payload (after a
+-- prompt change, or once the error is fixed) and returns every requested job. Pending and running
+-- jobs are left as they are. SECURITY INVOKER: runs under the caller's RLS policies.
+CREATE OR REPLACE FUNCTION public.enqueue_enrichment_jobs(p_jobs JSONB, p_max_attempts INTEGER)
+RETURNS SETOF public.enrichment_jobs
+LANGUAGE sql
+AS $$
+    WITH requested AS (
+        SELECT DISTINCT ON (r.kind, r.user_id, r.provider_id) r.kind, r.user_id, r.provider_id, r.payload
+        FROM jsonb_to_recordset(p_jobs) AS r(kind TEXT, user_id UUID, provider_id TEXT, payload JSONB)
+    ),
+    queued AS (
+        INSERT INTO public.enrichment_jobs (kind, user_id, provider_id, payload, max_attempts)
+        SELECT kind, user_id, provider_id, payload, p_max_attempts FROM requested
+        ON CONFLICT (kind, user_id, provider_id) DO UPDATE
+        SET status = 'pending',
+            attempts = 0,
+            max_attempts = EXCLUDED.max_attempts,
+            available_at = now(),
+            payload = EXCLUDED.payload,
+            last_error = NULL,
+            result = NULL,
+            completed_at = NULL,
+            updated_at = now()
+        WHERE enrichment_jobs.status IN ('failed', 'done')
+        RETURNING *
+    )
+    SELECT * FROM queued
+    UNION ALL
+    -- This scan sees the jobs as they were before the statement: pending and running jobs only
+    SELECT j.*
+    FROM public.enrichment_jobs j
+    JOIN requested r
+        ON j.kind = r.kind AND j.provider_id = r.provider_id AND j.user_id = r.user_id
+    WHERE NOT EXISTS (SELECT 1 FROM queued q WHERE q.id = j.id);
+$$;
+
+-- Step 4: Claim
+-- Locks up to p_limit available jobs for one worker. Running jobs locked for longer than
+-- p_lock_timeout_seconds (their worker died) are claimed again while attempts remain.
+CREATE OR REPLACE FUNCTION public.claim_enrichment_jobs(p_worker TEXT, p_limit INTEGER, p_lock_timeout_seconds INTEGER)
+RETURNS SETOF public.enrichment_jobs
+LANGUAGE sql
+AS $$
+    UPDATE public.enrichment_jobs AS j
+    SET status = 'running',
+        attempts = j.attempts + 1,
+        locked_by = p_worker,
+        locked_at = now(),
+        updated_at = now()
+    WHERE j.id IN (
+        SELECT id
+        FROM public.enrichment_jobs
+        WHERE (status = 'pending' AND available_at <= now())
+           OR (
+               status = 'running'
+               AND locked_at < now() - make_interval(secs => p_lock_timeout_seconds)
+               AND attempts < max_attempts
+           )
+        ORDER BY available_at, id
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING j.*;
+$$;
+
+DO $$
+BEGIN
+  RAISE NOTICE 'Migration completed successfully! Start scripts/run_enrichment_worker.py to process queued jobs.';
+END $$;
@@ -0,0 +1,175 @@
+-- Migration: Per-user daily audit facts
+-- Description: One row per (user, UTC day) with the counters the audit time-series panels aggregate:
+--              chat and message counts, messages per hour / model / provider, quality score
+--              histogram, theme and intent counts, risky message counts per level and risk type.
+--              Organization and team panels sum the rows of their members, so 30/90-day panels read
+--              one row per member and day instead of every message and enrichment.
+--              Rows are incremented on batch ingest (UsageRollupService) and after each saved
+--              enrichment (EnrichmentService), with utils/audit_facts.py: build_audit_days.
+--              Past days are rebuilt from raw rows by scripts/rebuild_user_audit_daily.py.
+-- Date: 2025-12-23
+--
+-- Rollout: apply this migration, set AUDIT_FACTS_WRITES=true, run the rebuild script, then set
+-- AUDIT_FACTS_READS=true. Panels always scan raw rows for the current day.
+
+-- Step 1: Fact table
+CREATE TABLE IF NOT EXISTS user_audit_daily (
+    id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    chats INTEGER NOT NULL DEFAULT 0,
+    messages INTEGER NOT NULL DEFAULT 0,
+    risky_messages INTEGER NOT NULL DEFAULT 0,
+    -- JSON counters: { key: rows }
+    chats_by_provider JSONB NOT NULL DEFAULT '{}'::jsonb,
+    messages_by_provider JSONB NOT NULL DEFAULT '{}'::jsonb,
+    messages_by_model JSONB NOT NULL DEFAULT '{}'::jsonb,
+    messages_by_hour JSONB NOT NULL DEFAULT '{}'::jsonb,
+    quality_scores JSONB NOT NULL DEFAULT '{}'::jsonb,
+    themes JSONB NOT NULL DEFAULT '{}'::jsonb,
+    intents JSONB NOT NULL DEFAULT '{}'::jsonb,
+    risk_levels JSONB NOT NULL DEFAULT '{}'::jsonb,
+    risk_types JSONB NOT NULL DEFAULT '{}'::jsonb,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    CONSTRAINT user_audit_daily_key UNIQUE (user_id, day)
+);
+
+-- Panels read their members' days in (day, id) order
+CREATE INDEX IF NOT EXISTS idx_user_audit_daily_day ON user_audit_daily(day, id);
+
+COMMENT ON TABLE user_audit_daily IS 'Per-user daily audit counters, incremented on ingest and enrichment';
+COMMENT ON COLUMN user_audit_daily.messages_by_hour IS 'Messages per UTC hour of day ("0".."23")';
+COMMENT ON COLUMN user_audit_daily.quality_scores IS 'Enriched chats per quality_score (histogram, for averages and medians)';
+COMMENT ON COLUMN user_audit_daily.risk_types IS 'Risky messages per detected risk category';
+
+-- Step 2: Row level security
+-- Reads mirror the tables it summarizes (messages, chats, enriched_chats, enriched_messages are
+-- readable by all users): organization panels read every member's days with the admin's client.
+-- Users only write their own days.
+ALTER TABLE user_audit_daily ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view their own audit facts" ON user_audit_daily;
+DROP POLICY IF EXISTS "Enable read access for all users" ON user_audit_daily;
+DROP POLICY IF EXISTS "Users can insert their own audit facts" ON user_audit_daily;
+DROP POLICY IF EXISTS "Users can update their own audit facts" ON user_audit_daily;
+
+CREATE POLICY "Enable read access for all users"
+    ON user_audit_daily FOR SELECT
+    USING (true);
+
+CREATE POLICY "Users can insert their own audit facts"
+    ON user_audit_daily FOR INSERT
+    WITH CHECK (auth.uid() = user_id);
+
+CREATE POLICY "Users can update their own audit facts"
+    ON user_audit_daily FOR UPDATE
+    USING (auth.uid() = user_id)
+    WITH CHECK (auth.uid() = user_id);
+
+-- Step 3: Additive upsert
+-- JSON counters are summed key by key; like increment_user_usage_daily, concurrent writers for the
+-- same day add their deltas in a single statement. SECURITY INVOKER: RLS still applies.
+CREATE OR REPLACE FUNCTION public.jsonb_add_counts(a JSONB, b JSONB)
+RETURNS JSONB
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT COALESCE(jsonb_object_agg(key, total), '{}'::jsonb)
+    FROM (
+        SELECT key, SUM(value::BIGINT) AS total
+        FROM (
+            SELECT key, value FROM jsonb_each_text(COALESCE(a, '{}'::jsonb))
+            UNION ALL
+            SELECT key, value FROM jsonb_each_text(COALESCE(b, '{}'::jsonb))
+        ) AS counts
+        GROUP BY key
+    ) AS sums;
+$$;
+
+CREATE OR REPLACE FUNCTION public.increment_user_audit_daily(p_rows JSONB)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    INSERT INTO public.user_audit_daily AS u (
+        user_id, day, chats, messages, risky_messages,
+        chats_by_provider, messages_by_provider, messages_by_model, messages_by_hour,
+        quality_scores, themes, intents, risk_levels, risk_types
+    )
+    SELECT
+        r.user_id, r.day, r.chats, r.messages, r.risky_messages,
+        COALESCE(r.chats_by_provider, '{}'), COALESCE(r.messages_by_provider, '{}'),
+        COALESCE(r.messages_by_model, '{}'), COALESCE(r.messages_by_hour, '{}'),
+        COALESCE(r.quality_scores, '{}'), COALESCE(r.themes, '{}'), COALESCE(r.intents, '{}'),
+        COALESCE(r.risk_levels, '{}'), COALESCE(r.risk_types, '{}')
+    FROM jsonb_to_recordset(p_rows) AS r(
+        user_id UUID, day DATE, chats INTEGER, messages INTEGER, risky_messages INTEGER,
+        chats_by_provider JSONB, messages_by_provider JSONB, messages_by_model JSONB, messages_by_hour JSONB,
+        quality_scores JSONB, themes JSONB, intents JSONB, risk_levels JSONB, risk_types JSONB
+    )
+    ON CONFLICT (user_id, day) DO UPDATE SET
+        chats = u.chats + EXCLUDED.chats,
+        messages = u.messages + EXCLUDED.messages,
+        risky_messages = u.risky_messages + EXCLUDED.risky_messages,
+        chats_by_provider = public.jsonb_add_counts(u.chats_by_provider, EXCLUDED.chats_by_provider),
+        messages_by_provider = public.jsonb_add_counts(u.messages_by_provider, EXCLUDED.messages_by_provider),
+        messages_by_model = public.jsonb_add_counts(u.messages_by_model, EXCLUDED.messages_by_model),
+        messages_by_hour = public.jsonb_add_counts(u.messages_by_hour, EXCLUDED.messages_by_hour),
+        quality_scores = public.jsonb_add_counts(u.quality_scores, EXCLUDED.quality_scores),
+        themes = public.jsonb_add_counts(u.themes, EXCLUDED.themes),
+        intents = public.jsonb_add_counts(u.intents, EXCLUDED.intents),
+        risk_levels = public.jsonb_add_counts(u.risk_levels, EXCLUDED.risk_levels),
+        risk_types = public.jsonb_add_counts(u.risk_types, EXCLUDED.risk_types),
+        updated_at = now();
+$$;
+
+-- Step 4: Rebuild replace
+-- Same as replace_user_usage_daily: a user's days before p_before_day are set to the rebuilt counters
+-- and the days the rebuild no longer produces are deleted, in one transaction.
+CREATE OR REPLACE FUNCTION public.replace_user_audit_daily(p_user_id UUID, p_before_day DATE, p_rows JSONB)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    INSERT INTO public.user_audit_daily AS u (
+        user_id, day, chats, messages, risky_messages,
+        chats_by_provider, messages_by_provider, messages_by_model, messages_by_hour,
+        quality_scores, themes, intents, risk_levels, risk_types
+    )
+    SELECT
+        r.user_id, r.day, r.chats, r.messages, r.risky_messages,
+        COALESCE(r.chats_by_provider, '{}'), COALESCE(r.messages_by_provider, '{}'),
+        COALESCE(r.messages_by_model, '{}'), COALESCE(r.messages_by_hour, '{}'),
+        COALESCE(r.quality_scores, '{}'), COALESCE(r.themes, '{}'), COALESCE(r.intents, '{}'),
+        COALESCE(r.risk_levels, '{}'), COALESCE(r.risk_types, '{}')
+    FROM jsonb_to_recordset(p_rows) AS r(
+        user_id UUID, day DATE, chats INTEGER, messages INTEGER, risky_messages INTEGER,
+        chats_by_provider JSONB, messages_by_provider JSONB, messages_by_model JSONB, messages_by_hour JSONB,
+        quality_scores JSONB, themes JSONB, intents JSONB, risk_levels JSONB, risk_types JSONB
+    )
+    WHERE r.user_id = p_user_id AND r.day < p_before_day
+    ON CONFLICT (user_id, day) DO UPDATE SET
+        chats = EXCLUDED.chats,
+        messages = EXCLUDED.messages,
+        risky_messages = EXCLUDED.risky_messages,
+        chats_by_provider = EXCLUDED.chats_by_provider,
+        messages_by_provider = EXCLUDED.messages_by_provider,
+        messages_by_model = EXCLUDED.messages_by_model,
+        messages_by_hour = EXCLUDED.messages_by_hour,
+        quality_scores = EXCLUDED.quality_scores,
+        themes = EXCLUDED.themes,
+        intents = EXCLUDED.intents,
+        risk_levels = EXCLUDED.risk_levels,
+        risk_types = EXCLUDED.risk_types,
+        updated_at = now();
+
+    DELETE FROM public.user_audit_daily u
+    WHERE u.user_id = p_user_id
+      AND u.day < p_before_day
+      AND NOT EXISTS (
+          SELECT 1 FROM jsonb_to_recordset(p_rows) AS r(day DATE) WHERE r.day = u.day
+      );
+$$;
+
+DO $$
+BEGIN
+  RAISE NOTICE 'Migration completed successfully! Run scripts/rebuild_user_audit_daily.py to fill past days.';
+END $$;
@@ -0,0 +1,57 @@
+-- Migration: Per-user stats watermark
+-- Description: One version counter per user, bumped whenever messages or chats are ingested
+--              (routes/batch/save_messages_and_chats.py, routes/messages/create.py, routes/chats/create.py).
+--              Stats and usage endpoints key their response cache and ETags on it
+--              (services/stats_response_cache.py), so a repeat dashboard view costs one primary key
+--              lookup instead of a full recompute, and answers If-None-Match with 304.
+-- Date: 2025-12-22
+--
+-- Rollout: apply this migration, then set STATS_RESPONSE_CACHE=true.
+
+-- Step 1: Watermark table
+CREATE TABLE IF NOT EXISTS user_stats_watermarks (
+    user_id UUID PRIMARY KEY REFERENCES auth.users(id) ON DELETE CASCADE,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+COMMENT ON TABLE user_stats_watermarks IS 'Per-user ingest counter, bumped on every saved batch';
+
+-- Step 2: Row level security
+ALTER TABLE user_stats_watermarks ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view their own stats watermark" ON user_stats_watermarks;
+DROP POLICY IF EXISTS "Users can insert their own stats watermark" ON user_stats_watermarks;
+DROP POLICY IF EXISTS "Users can update their own stats watermark" ON user_stats_watermarks;
+
+CREATE POLICY "Users can view their own stats watermark"
+    ON user_stats_watermarks FOR SELECT
+    USING (auth.uid() = user_id);
+
+CREATE POLICY "Users can insert their own stats watermark"
+    ON user_stats_watermarks FOR INSERT
+    WITH CHECK (auth.uid() = user_id);
+
+CREATE POLICY "Users can update their own stats watermark"
+    ON user_stats_watermarks FOR UPDATE
+    USING (auth.uid() = user_id)
+    WITH CHECK (auth.uid() = user_id);
+
+-- Step 3: Atomic bump
+-- Concurrent batches each get their own version. SECURITY INVOKER: RLS still applies.
+CREATE OR REPLACE FUNCTION public.bump_user_stats_watermark(p_user_id UUID)
+RETURNS BIGINT
+LANGUAGE sql
+AS $$
+    INSERT INTO public.user_stats_watermarks AS w (user_id, version)
+    VALUES (p_user_id, 1)
+    ON CONFLICT (user_id) DO UPDATE SET
+        version = w.version + 1,
+        updated_at = now()
+    RETURNING version;
+$$;
+
+DO $$
+BEGIN
+  RAISE NOTICE 'Migration completed successfully! Set STATS_RESPONSE_CACHE=true to cache stats responses.';
+END $$;
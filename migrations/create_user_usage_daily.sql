@@ -0,0 +1,125 @@
+-- Migration: Per-user daily usage rollup
+-- Description: One row per (user, UTC day, model, provider) with message, chat, token, cost and energy
+--              totals, so 30/90-day usage stats read a few rows per day instead of every message.
+--              Rows are incremented on batch ingest (routes/batch/save_messages_and_chats.py ->
+--              UsageRollupService) with the same formulas as utils/stats_helpers.py: build_usage_days.
+--              Past days are rebuilt from raw rows by scripts/rebuild_user_usage_daily.py.
+-- Date: 2025-12-19
+--
+-- Rollout: apply this migration, set USAGE_ROLLUP_WRITES=true, run the rebuild script, then set
+-- USAGE_ROLLUP_READS=true. Stats always scan raw rows for the current day.
+
+-- Step 1: Rollup table
+CREATE TABLE IF NOT EXISTS user_usage_daily (
+    id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    model TEXT NOT NULL DEFAULT 'unknown',
+    provider TEXT NOT NULL DEFAULT 'unknown',
+    messages INTEGER NOT NULL DEFAULT 0,
+    chats INTEGER NOT NULL DEFAULT 0,
+    input_tokens BIGINT NOT NULL DEFAULT 0,
+    output_tokens BIGINT NOT NULL DEFAULT 0,
+    cost_usd NUMERIC(20, 10) NOT NULL DEFAULT 0,
+    energy_wh NUMERIC(20, 10) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    CONSTRAINT user_usage_daily_key UNIQUE (user_id, day, model, provider)
+);
+
+-- Stats read one user's days in (day, id) order: served by the unique key's index
+
+COMMENT ON TABLE user_usage_daily IS 'Per-user daily usage totals, incremented on ingest';
+COMMENT ON COLUMN user_usage_daily.chats IS 'Chats created that day (chat rows use model ''unknown'')';
+
+-- Step 2: Row level security (same policies as the tables it summarizes)
+ALTER TABLE user_usage_daily ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view their own usage rollup" ON user_usage_daily;
+DROP POLICY IF EXISTS "Users can insert their own usage rollup" ON user_usage_daily;
+DROP POLICY IF EXISTS "Users can update their own usage rollup" ON user_usage_daily;
+
+CREATE POLICY "Users can view their own usage rollup"
+    ON user_usage_daily FOR SELECT
+    USING (auth.uid() = user_id);
+
+CREATE POLICY "Users can insert their own usage rollup"
+    ON user_usage_daily FOR INSERT
+    WITH CHECK (auth.uid() = user_id);
+
+CREATE POLICY "Users can update their own usage rollup"
+    ON user_usage_daily FOR UPDATE
+    USING (auth.uid() = user_id)
+    WITH CHECK (auth.uid() = user_id);
+
+-- Step 3: Additive upsert
+-- PostgREST upserts overwrite, so concurrent batches for the same day would lose counts;
+-- this adds each delta in a single statement instead. SECURITY INVOKER: RLS still applies.
+CREATE OR REPLACE FUNCTION public.increment_user_usage_daily(p_rows JSONB)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    INSERT INTO public.user_usage_daily AS u (
+        user_id, day, model, provider, messages, chats, input_tokens, output_tokens, cost_usd, energy_wh
+    )
+    SELECT
+        r.user_id, r.day, r.model, r.provider,
+        r.messages, r.chats, r.input_tokens, r.output_tokens, r.cost_usd, r.energy_wh
+    FROM jsonb_to_recordset(p_rows) AS r(
+        user_id UUID, day DATE, model TEXT, provider TEXT,
+        messages INTEGER, chats INTEGER, input_tokens BIGINT, output_tokens BIGINT,
+        cost_usd NUMERIC, energy_wh NUMERIC
+    )
+    ON CONFLICT (user_id, day, model, provider) DO UPDATE SET
+        messages = u.messages + EXCLUDED.messages,
+        chats = u.chats + EXCLUDED.chats,
+        input_tokens = u.input_tokens + EXCLUDED.input_tokens,
+        output_tokens = u.output_tokens + EXCLUDED.output_tokens,
+        cost_usd = u.cost_usd + EXCLUDED.cost_usd,
+        energy_wh = u.energy_wh + EXCLUDED.energy_wh,
+        updated_at = now();
+$$;
+
+-- Step 4: Rebuild replace
+-- Sets a user's rows for every day before p_before_day to the rebuilt absolute totals and deletes
+-- the keys the rebuild no longer produces, in one transaction: readers never see the user without
+-- rows, a failure leaves the previous rows in place, and increments from concurrent batches wait
+-- on the row locks instead of landing between a delete and an insert.
+CREATE OR REPLACE FUNCTION public.replace_user_usage_daily(p_user_id UUID, p_before_day DATE, p_rows JSONB)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    INSERT INTO public.user_usage_daily AS u (
+        user_id, day, model, provider, messages, chats, input_tokens, output_tokens, cost_usd, energy_wh
+    )
+    SELECT
+        r.user_id, r.day, r.model, r.provider,
+        r.messages, r.chats, r.input_tokens, r.output_tokens, r.cost_usd, r.energy_wh
+    FROM jsonb_to_recordset(p_rows) AS r(
+        user_id UUID, day DATE, model TEXT, provider TEXT,
+        messages INTEGER, chats INTEGER, input_tokens BIGINT, output_tokens BIGINT,
+        cost_usd NUMERIC, energy_wh NUMERIC
+    )
+    WHERE r.user_id = p_user_id AND r.day < p_before_day
+    ON CONFLICT (user_id, day, model, provider) DO UPDATE SET
+        messages = EXCLUDED.messages,
+        chats = EXCLUDED.chats,
+        input_tokens = EXCLUDED.input_tokens,
+        output_tokens = EXCLUDED.output_tokens,
+        cost_usd = EXCLUDED.cost_usd,
+        energy_wh = EXCLUDED.energy_wh,
+        updated_at = now();
+
+    DELETE FROM public.user_usage_daily u
+    WHERE u.user_id = p_user_id
+      AND u.day < p_before_day
+      AND NOT EXISTS (
+          SELECT 1
+          FROM jsonb_to_recordset(p_rows) AS r(day DATE, model TEXT, provider TEXT)
+          WHERE r.day = u.day AND r.model = u.model AND r.provider = u.provider
+      );
+$$;
+
+DO $$
+BEGIN
+  RAISE NOTICE 'Migration completed successfully! Run scripts/rebuild_user_usage_daily.py to fill past days.';
+END $$;
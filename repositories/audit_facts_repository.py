@@ -0,0 +1,51 @@
+from datetime import date
+
+from supabase import Client
+
+from domains.entities.audit_entities import AuditDay
+from repositories.bulk_reader import read_all_in
+from utils.audit_facts import AUDIT_DAY_COUNTERS
+
+AUDIT_DAY_COLUMNS = "id, user_id, day, chats, messages, risky_messages, " + ", ".join(AUDIT_DAY_COUNTERS)
+
+
+class AuditFactsRepository:
+    @staticmethod
+    def increment_days(client: Client, rows: list[dict]) -> None:
+        """Add per-day deltas to user_audit_daily (atomic, safe under concurrent writes)"""
+        if not rows:
+            return
+        client.rpc("increment_user_audit_daily", {"p_rows": rows}).execute()
+
+    @staticmethod
+    def replace_user_days(client: Client, user_id: str, before_day: date, rows: list[dict]) -> None:
+        """Replace a user's rows for every day before before_day with freshly computed counters (atomic)"""
+        client.rpc(
+            "replace_user_audit_daily",
+            {"p_user_id": user_id, "p_before_day": before_day.isoformat(), "p_rows": rows},
+        ).execute()
+
+    @staticmethod
+    def get_days(client: Client, user_ids: list[str], first_day: date, last_day: date) -> list[AuditDay]:
+        """Get the fact rows of several users for the days in [first_day, last_day]"""
+        rows = read_all_in(
+            client,
+            "user_audit_daily",
+            AUDIT_DAY_COLUMNS,
+            "user_id",
+            user_ids,
+            filters=lambda query: query.gte("day", first_day.isoformat()).lte("day", last_day.isoformat()),
+            time_column="day",
+        )
+
+        return [
+            AuditDay(
+                user_id=row["user_id"],
+                day=row["day"],
+                chats=row["chats"] or 0,
+                messages=row["messages"] or 0,
+                risky_messages=row["risky_messages"] or 0,
+                **{counter: row[counter] or {} for counter in AUDIT_DAY_COUNTERS},
+            )
+            for row in rows
+        ]
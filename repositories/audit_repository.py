@@ -1,17 +1,30 @@
 """
 Repository for audit data access with async parallel queries
 Database operations only - no business logic
+Blocking supabase calls run on the shared application executor (core.executor)
+Unbounded row sets are read through the keyset bulk reader (repositories.bulk_reader)
 """
 
 import asyncio
 import logging
-from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 from supabase import Client
 
+from config.settings import settings
+from core.executor import run_blocking
+from repositories.bulk_reader import chunk_values, execute_in_chunks, fetch_all_rows_in, read_all, read_all_in
+
 logger = logging.getLogger(__name__)
 
+# Quality and theme trends compare against the 7 days preceding the audit window
+TREND_WINDOW_DAYS = 7
+
+
+def _unique_chat_ids(messages: list[dict]) -> list[str]:
+    """Extract unique chat_provider_ids from message rows"""
+    return list({msg["chat_provider_id"] for msg in messages if msg.get("chat_provider_id")})
+
 
 class AuditRepository:
     """
@@ -32,347 +45,246 @@ class AuditRepository:
         return [row["user_id"] for row in response.data]
 
     @staticmethod
-    async def get_quality_stats_async(
-        client: Client, user_ids: list[str], start_date: datetime, end_date: datetime
-    ) -> dict:
-        """Get quality statistics with trend comparison (async)"""
-        loop = asyncio.get_event_loop()
+    def get_user_organization_ids(client: Client, user_id: str) -> list[str]:
+        """Get the IDs of every organization a user belongs to"""
+        response = client.table("user_organization_roles").select("organization_id").eq("user_id", user_id).execute()
 
-        def _fetch():
-            # Get messages in current period to determine which chats to include
-            current_messages = (
-                client.table("messages")
-                .select("chat_provider_id")
-                .in_("user_id", user_ids)
-                .gte("created_at", start_date.isoformat())
-                .lte("created_at", end_date.isoformat())
-                .execute()
-            )
+        return [row["organization_id"] for row in response.data or []]
 
-            current_chat_ids = list(
-                {msg["chat_provider_id"] for msg in (current_messages.data or []) if msg.get("chat_provider_id")}
-            )
-
-            # Get quality stats for chats that have messages in current period
-            current_data = []
-            if current_chat_ids:
-                current_response = (
-                    client.table("enriched_chats")
-                    .select("quality_score, clarity_score, context_score, specificity_score, actionability_score")
-                    .in_("chat_provider_id", current_chat_ids)
-                    .in_("user_id", user_ids)
-                    .execute()
-                )
-                current_data = current_response.data or []
+    @staticmethod
+    async def get_messages_in_range_async(
+        client: Client,
+        user_ids: list[str],
+        start_date: datetime,
+        end_date: datetime,
+        columns: str = "id, user_id, chat_provider_id",
+        include_end: bool = True,
+    ) -> list[dict]:
+        """Get messages of the given users created in [start_date, end_date] (or [start_date, end_date))"""
+        return await fetch_all_rows_in(
+            client, "messages", columns, "user_id", user_ids, start=start_date, end=end_date, include_end=include_end
+        )
 
-            # Previous period for trend (7 days before start_date)
-            trend_start = start_date - timedelta(days=7)
-            trend_end = start_date
+    @staticmethod
+    async def resolve_chat_window_async(
+        client: Client, user_ids: list[str], start_date: datetime, end_date: datetime, include_trend: bool = True
+    ) -> dict:
+        """
+        Resolve the messages and chat IDs of an audit window once per request.
+        Every aggregation that restricts enriched chats to "chats with messages in range"
+        consumes this instead of re-scanning the messages table.
 
-            trend_messages = (
-                client.table("messages")
-                .select("chat_provider_id")
-                .in_("user_id", user_ids)
-                .gte("created_at", trend_start.isoformat())
-                .lt("created_at", trend_end.isoformat())
-                .execute()
+        Returns:
+            {"messages": [...], "chat_ids": [...], "trend_chat_ids": [...]}
+        """
+        trend_start = start_date - timedelta(days=TREND_WINDOW_DAYS)
+
+        if include_trend:
+            messages, trend_messages = await asyncio.gather(
+                AuditRepository.get_messages_in_range_async(client, user_ids, start_date, end_date),
+                AuditRepository.get_messages_in_range_async(
+                    client, user_ids, trend_start, start_date, columns="chat_provider_id", include_end=False
+                ),
             )
+        else:
+            messages = await AuditRepository.get_messages_in_range_async(client, user_ids, start_date, end_date)
+            trend_messages = []
 
-            trend_chat_ids = list(
-                {msg["chat_provider_id"] for msg in (trend_messages.data or []) if msg.get("chat_provider_id")}
-            )
+        return {
+            "messages": messages,
+            "chat_ids": _unique_chat_ids(messages),
+            "trend_chat_ids": _unique_chat_ids(trend_messages),
+        }
 
-            trend_data = []
-            if trend_chat_ids:
-                trend_response = (
-                    client.table("enriched_chats")
-                    .select("quality_score")
-                    .in_("chat_provider_id", trend_chat_ids)
-                    .in_("user_id", user_ids)
-                    .execute()
-                )
-                trend_data = trend_response.data or []
+    @staticmethod
+    async def get_window_chats_async(
+        client: Client, columns: str, chat_ids: list[str], user_ids: list[str], filters=None
+    ) -> list[dict]:
+        """
+        Get enriched chats of the given chat IDs owned by user_ids
+        Only the chat ID list goes in the URL (chunked); ownership is checked on the returned rows
+        """
+        if not chat_ids:
+            return []
 
-            return {"current": current_data, "trend": trend_data}
+        if "user_id" not in [column.strip() for column in columns.split(",")]:
+            columns = f"{columns}, user_id"
 
-        with ThreadPoolExecutor() as executor:
-            result = await loop.run_in_executor(executor, _fetch)
+        members = set(user_ids)
+        rows = await fetch_all_rows_in(client, "enriched_chats", columns, "chat_provider_id", chat_ids, filters=filters)
+        return [row for row in rows if row.get("user_id") in members]
+
+    @staticmethod
+    async def get_quality_stats_async(
+        client: Client, user_ids: list[str], start_date: datetime, end_date: datetime, chat_window: dict | None = None
+    ) -> dict:
+        """Get quality statistics with trend comparison (async)"""
+        if chat_window is None:
+            chat_window = await AuditRepository.resolve_chat_window_async(client, user_ids, start_date, end_date)
+
+        # Chats that have messages in the current period, and in the 7 days before start_date for the trend
+        current_data, trend_data = await asyncio.gather(
+            AuditRepository.get_window_chats_async(
+                client,
+                "quality_score, clarity_score, context_score, specificity_score, actionability_score",
+                chat_window["chat_ids"],
+                user_ids,
+            ),
+            AuditRepository.get_window_chats_async(client, "quality_score", chat_window["trend_chat_ids"], user_ids),
+        )
 
-        return result
+        return {"current": current_data, "trend": trend_data}
 
     @staticmethod
     async def get_risk_stats_async(
         client: Client, user_ids: list[str], start_date: datetime, end_date: datetime
     ) -> dict:
         """Get risk statistics (async)"""
-        loop = asyncio.get_event_loop()
-
-        def _fetch():
-            response = (
-                client.table("enriched_messages")
-                .select("overall_risk_level, overall_risk_score, detected_issues")
-                .in_("user_id", user_ids)
-                .gte("created_at", start_date.isoformat())
-                .lte("created_at", end_date.isoformat())
-                .execute()
-            )
-
-            return response.data
-
-        with ThreadPoolExecutor() as executor:
-            result = await loop.run_in_executor(executor, _fetch)
-
-        return result
+        return await fetch_all_rows_in(
+            client,
+            "enriched_messages",
+            "overall_risk_level, overall_risk_score, detected_issues",
+            "user_id",
+            user_ids,
+            start=start_date,
+            end=end_date,
+        )
 
     @staticmethod
     async def get_usage_stats_async(
-        client: Client, user_ids: list[str], start_date: datetime, end_date: datetime
+        client: Client, user_ids: list[str], start_date: datetime, end_date: datetime, chat_window: dict | None = None
     ) -> dict:
         """Get usage statistics (async)"""
-        loop = asyncio.get_event_loop()
-
-        def _fetch():
-            # Total messages/chats with chat_provider_id
-            messages_response = (
-                client.table("messages")
-                .select("id, user_id, chat_provider_id")
-                .in_("user_id", user_ids)
-                .gte("created_at", start_date.isoformat())
-                .lte("created_at", end_date.isoformat())
-                .execute()
+        if chat_window is None:
+            chat_window = await AuditRepository.resolve_chat_window_async(
+                client, user_ids, start_date, end_date, include_trend=False
             )
 
-            # Extract unique chat_provider_ids from messages in date range
-            chat_provider_ids = list(
-                {msg["chat_provider_id"] for msg in (messages_response.data or []) if msg.get("chat_provider_id")}
-            )
-
-            # Work-related stats for chats that have messages in the date range
-            work_data = []
-            if chat_provider_ids:
-                work_response = (
-                    client.table("enriched_chats")
-                    .select("is_work_related, chat_provider_id")
-                    .in_("chat_provider_id", chat_provider_ids)
-                    .in_("user_id", user_ids)
-                    .execute()
-                )
-                work_data = work_response.data or []
-
-            return {"messages": messages_response.data, "work_classification": work_data}
-
-        with ThreadPoolExecutor() as executor:
-            result = await loop.run_in_executor(executor, _fetch)
+        # Work-related stats for chats that have messages in the date range
+        work_data = await AuditRepository.get_window_chats_async(
+            client, "is_work_related, chat_provider_id", chat_window["chat_ids"], user_ids
+        )
 
-        return result
+        return {"messages": chat_window["messages"], "work_classification": work_data}
 
     @staticmethod
     async def get_theme_stats_async(
-        client: Client, user_ids: list[str], start_date: datetime, end_date: datetime
+        client: Client, user_ids: list[str], start_date: datetime, end_date: datetime, chat_window: dict | None = None
     ) -> dict:
         """Get theme distribution stats with trends (async)"""
-        loop = asyncio.get_event_loop()
-
-        def _fetch():
-            # Get messages in current period to determine which chats to include
-            current_messages = (
-                client.table("messages")
-                .select("chat_provider_id")
-                .in_("user_id", user_ids)
-                .gte("created_at", start_date.isoformat())
-                .lte("created_at", end_date.isoformat())
-                .execute()
-            )
-
-            current_chat_ids = list(
-                {msg["chat_provider_id"] for msg in (current_messages.data or []) if msg.get("chat_provider_id")}
-            )
+        if chat_window is None:
+            chat_window = await AuditRepository.resolve_chat_window_async(client, user_ids, start_date, end_date)
 
-            # Get themes for chats that have messages in current period
-            current_data = []
-            if current_chat_ids:
-                current_response = (
-                    client.table("enriched_chats")
-                    .select("theme")
-                    .in_("chat_provider_id", current_chat_ids)
-                    .in_("user_id", user_ids)
-                    .not_.is_("theme", "null")
-                    .execute()
-                )
-                current_data = current_response.data or []
+        def has_theme(query):
+            return query.not_.is_("theme", "null")
 
-            # Previous period for trend
-            trend_start = start_date - timedelta(days=7)
-            trend_end = start_date
-
-            trend_messages = (
-                client.table("messages")
-                .select("chat_provider_id")
-                .in_("user_id", user_ids)
-                .gte("created_at", trend_start.isoformat())
-                .lt("created_at", trend_end.isoformat())
-                .execute()
-            )
-
-            trend_chat_ids = list(
-                {msg["chat_provider_id"] for msg in (trend_messages.data or []) if msg.get("chat_provider_id")}
-            )
-
-            trend_data = []
-            if trend_chat_ids:
-                trend_response = (
-                    client.table("enriched_chats")
-                    .select("theme")
-                    .in_("chat_provider_id", trend_chat_ids)
-                    .in_("user_id", user_ids)
-                    .not_.is_("theme", "null")
-                    .execute()
-                )
-                trend_data = trend_response.data or []
-
-            return {"current": current_data, "trend": trend_data}
-
-        with ThreadPoolExecutor() as executor:
-            result = await loop.run_in_executor(executor, _fetch)
+        # Themes for chats that have messages in the current period, and in the previous period for trend
+        current_data, trend_data = await asyncio.gather(
+            AuditRepository.get_window_chats_async(client, "theme", chat_window["chat_ids"], user_ids, has_theme),
+            AuditRepository.get_window_chats_async(client, "theme", chat_window["trend_chat_ids"], user_ids, has_theme),
+        )
 
-        return result
+        return {"current": current_data, "trend": trend_data}
 
     @staticmethod
     async def get_intent_stats_async(
-        client: Client, user_ids: list[str], start_date: datetime, end_date: datetime
+        client: Client, user_ids: list[str], start_date: datetime, end_date: datetime, chat_window: dict | None = None
     ) -> dict:
         """Get intent distribution stats with quality (async)"""
-        loop = asyncio.get_event_loop()
-
-        def _fetch():
-            # Get messages in date range to determine which chats to include
-            messages_response = (
-                client.table("messages")
-                .select("chat_provider_id")
-                .in_("user_id", user_ids)
-                .gte("created_at", start_date.isoformat())
-                .lte("created_at", end_date.isoformat())
-                .execute()
+        if chat_window is None:
+            chat_window = await AuditRepository.resolve_chat_window_async(
+                client, user_ids, start_date, end_date, include_trend=False
             )
 
-            chat_provider_ids = list(
-                {msg["chat_provider_id"] for msg in (messages_response.data or []) if msg.get("chat_provider_id")}
-            )
-
-            # Get intent stats for chats that have messages in date range
-            if chat_provider_ids:
-                response = (
-                    client.table("enriched_chats")
-                    .select("intent, quality_score")
-                    .in_("chat_provider_id", chat_provider_ids)
-                    .in_("user_id", user_ids)
-                    .not_.is_("intent", "null")
-                    .execute()
-                )
-                return response.data or []
-
-            return []
-
-        with ThreadPoolExecutor() as executor:
-            result = await loop.run_in_executor(executor, _fetch)
-
-        return result
+        # Get intent stats for chats that have messages in date range
+        return await AuditRepository.get_window_chats_async(
+            client,
+            "intent, quality_score",
+            chat_window["chat_ids"],
+            user_ids,
+            lambda query: query.not_.is_("intent", "null"),
+        )
 
     @staticmethod
     async def get_top_users_async(
-        client: Client, user_ids: list[str], start_date: datetime, end_date: datetime, limit: int = 10
+        client: Client,
+        user_ids: list[str],
+        start_date: datetime,
+        end_date: datetime,
+        limit: int = 10,
+        chat_window: dict | None = None,
     ) -> list[dict]:
         """Get top users by activity with quality and risk metrics (async)"""
-        loop = asyncio.get_event_loop()
-
-        def _fetch():
-            # Get message counts per user  with chat_provider_id
-            messages_response = (
-                client.table("messages")
-                .select("user_id, chat_provider_id")
-                .in_("user_id", user_ids)
-                .gte("created_at", start_date.isoformat())
-                .lte("created_at", end_date.isoformat())
-                .execute()
-            )
-
-            # Extract unique chat_provider_ids from messages in date range
-            chat_provider_ids = list(
-                {msg["chat_provider_id"] for msg in (messages_response.data or []) if msg.get("chat_provider_id")}
-            )
-
-            # Get quality scores for chats that have messages in the date range
-            quality_data = []
-            if chat_provider_ids:
-                quality_response = (
-                    client.table("enriched_chats")
-                    .select("user_id, quality_score, is_work_related, chat_provider_id")
-                    .in_("chat_provider_id", chat_provider_ids)
-                    .in_("user_id", user_ids)
-                    .execute()
-                )
-                quality_data = quality_response.data or []
-
-            # Get risk levels for messages in date range
-            risk_response = (
-                client.table("enriched_messages")
-                .select("user_id, overall_risk_level")
-                .in_("user_id", user_ids)
-                .gte("created_at", start_date.isoformat())
-                .lte("created_at", end_date.isoformat())
-                .in_("overall_risk_level", ["high", "critical"])
-                .execute()
+        if chat_window is None:
+            chat_window = await AuditRepository.resolve_chat_window_async(
+                client, user_ids, start_date, end_date, include_trend=False
             )
 
-            return {"messages": messages_response.data, "quality": quality_data, "risks": risk_response.data}
-
-        with ThreadPoolExecutor() as executor:
-            result = await loop.run_in_executor(executor, _fetch)
+        # Quality scores for chats that have messages in the date range, and risk levels for messages in range
+        quality_data, risk_data = await asyncio.gather(
+            AuditRepository.get_window_chats_async(
+                client, "user_id, quality_score, is_work_related, chat_provider_id", chat_window["chat_ids"], user_ids
+            ),
+            fetch_all_rows_in(
+                client,
+                "enriched_messages",
+                "user_id, overall_risk_level",
+                "user_id",
+                user_ids,
+                filters=lambda query: query.in_("overall_risk_level", ["high", "critical"]),
+                start=start_date,
+                end=end_date,
+            ),
+        )
 
-        return result
+        return {"messages": chat_window["messages"], "quality": quality_data, "risks": risk_data}
 
     @staticmethod
     async def get_top_prompts_async(
-        client: Client, user_ids: list[str], start_date: datetime, end_date: datetime, limit: int = 10
+        client: Client,
+        user_ids: list[str],
+        start_date: datetime,
+        end_date: datetime,
+        limit: int = 10,
+        chat_window: dict | None = None,
     ) -> list[dict]:
         """Get highest quality prompts (async)"""
-        loop = asyncio.get_event_loop()
-
-        def _fetch():
-            # Get messages in date range to determine which chats to include
-            messages_in_range = (
-                client.table("messages")
-                .select("chat_provider_id, message_provider_id, created_at")
-                .in_("user_id", user_ids)
-                .gte("created_at", start_date.isoformat())
-                .lte("created_at", end_date.isoformat())
-                .execute()
+        if chat_window is None:
+            chat_window = await AuditRepository.resolve_chat_window_async(
+                client, user_ids, start_date, end_date, include_trend=False
             )
 
-            chat_provider_ids = list(
-                {msg["chat_provider_id"] for msg in (messages_in_range.data or []) if msg.get("chat_provider_id")}
-            )
+        # Get top quality chats that have messages in date range
+        if not chat_window["chat_ids"]:
+            return {"chats": [], "messages": []}
 
-            # Get top quality chats that have messages in date range
-            if not chat_provider_ids:
-                return {"chats": [], "messages": []}
-
-            chats_response = (
-                client.table("enriched_chats")
-                .select("chat_provider_id, message_provider_id, quality_score, theme, intent")
-                .in_("chat_provider_id", chat_provider_ids)
-                .in_("user_id", user_ids)
-                .not_.is_("quality_score", "null")
-                .order("quality_score", desc=True)
-                .limit(limit)
-                .execute()
+        # Top N per (member chunk, chat ID chunk), then top N overall. Members are filtered in the
+        # query: rows of non-members must not take the per-chunk limit. Both lists share the URL budget.
+        max_chars = settings.IN_FILTER_MAX_CHARS // 2
+        results = await asyncio.gather(
+            *(
+                execute_in_chunks(
+                    lambda chunk, members=members: client.table("enriched_chats")
+                    .select("chat_provider_id, message_provider_id, quality_score, theme, intent, user_id")
+                    .in_("user_id", members)
+                    .in_("chat_provider_id", chunk)
+                    .not_.is_("quality_score", "null")
+                    .order("quality_score", desc=True)
+                    .limit(limit),
+                    chat_window["chat_ids"],
+                    max_chars,
+                )
+                for members in chunk_values(user_ids, max_chars)
             )
+        )
+        chats = sorted(
+            (chat for rows in results for chat in rows), key=lambda chat: chat["quality_score"], reverse=True
+        )[:limit]
 
+        def _fetch():
             # Get message content for these chats
-            if chats_response.data:
-                message_ids = [
-                    chat["message_provider_id"] for chat in chats_response.data if chat.get("message_provider_id")
-                ]
+            if chats:
+                message_ids = [chat["message_provider_id"] for chat in chats if chat.get("message_provider_id")]
 
                 if message_ids:
                     messages_response = (
@@ -386,45 +298,41 @@ class AuditRepository:
                     msg_dates = {
                         msg["message_provider_id"]: msg["created_at"] for msg in (messages_response.data or [])
                     }
-                    for chat in chats_response.data:
+                    for chat in chats:
                         chat["created_at"] = msg_dates.get(chat.get("message_provider_id"))
 
-                    return {"chats": chats_response.data, "messages": messages_response.data or []}
+                    return {"chats": chats, "messages": messages_response.data or []}
 
-            return {"chats": chats_response.data or [], "messages": []}
+            return {"chats": chats, "messages": []}
 
-        with ThreadPoolExecutor() as executor:
-            result = await loop.run_in_executor(executor, _fetch)
-
-        return result
+        return await run_blocking(_fetch)
 
     @staticmethod
     async def get_riskiest_prompts_async(
         client: Client, user_ids: list[str], start_date: datetime, end_date: datetime, limit: int = 10
     ) -> list[dict]:
         """Get highest risk prompts (async)"""
-        loop = asyncio.get_event_loop()
-
-        def _fetch():
-            # Get top risk messages (including low risks)
-            risks_response = (
-                client.table("enriched_messages")
-                .select(
-                    "message_provider_id, overall_risk_level, overall_risk_score, risk_categories, created_at, user_whitelist, user_id"
-                )
-                .in_("user_id", user_ids)
-                .gte("created_at", start_date.isoformat())
-                .lte("created_at", end_date.isoformat())
-                .in_("overall_risk_level", ["low", "medium", "high", "critical"])
-                .order("overall_risk_score", desc=True)
-                .limit(limit)
-                .execute()
+        # Get top risk messages (including low risks): top N per user ID chunk, then top N overall
+        candidates = await execute_in_chunks(
+            lambda chunk: client.table("enriched_messages")
+            .select(
+                "message_provider_id, overall_risk_level, overall_risk_score, risk_categories, created_at, user_whitelist, user_id"
             )
+            .in_("user_id", chunk)
+            .gte("created_at", start_date.isoformat())
+            .lte("created_at", end_date.isoformat())
+            .in_("overall_risk_level", ["low", "medium", "high", "critical"])
+            .order("overall_risk_score", desc=True)
+            .limit(limit),
+            user_ids,
+        )
+        risks = sorted(candidates, key=lambda risk: risk.get("overall_risk_score") or 0, reverse=True)[:limit]
 
+        def _fetch():
             # Get message content and user info
-            if risks_response.data:
-                message_ids = [risk["message_provider_id"] for risk in risks_response.data]
-                risk_user_ids = list({risk["user_id"] for risk in risks_response.data})
+            if risks:
+                message_ids = [risk["message_provider_id"] for risk in risks]
+                risk_user_ids = list({risk["user_id"] for risk in risks})
 
                 messages_response = (
                     client.table("messages")
@@ -442,17 +350,14 @@ class AuditRepository:
                 )
 
                 return {
-                    "risks": risks_response.data,
+                    "risks": risks,
                     "messages": messages_response.data,
                     "users": users_response.data or [],
                 }
 
-            return {"risks": risks_response.data, "messages": [], "users": []}
-
-        with ThreadPoolExecutor() as executor:
-            result = await loop.run_in_executor(executor, _fetch)
+            return {"risks": risks, "messages": [], "users": []}
 
-        return result
+        return await run_blocking(_fetch)
 
     @staticmethod
     async def get_user_profile_data_async(
@@ -463,23 +368,23 @@ class AuditRepository:
         end_date: datetime,
     ) -> dict:
         """Get comprehensive profile data for a single user (async)"""
-        loop = asyncio.get_event_loop()
 
         def _fetch():
             # Get user metadata
-            user_response = client.table("users_metadata").select("user_id, email, name").eq("user_id", user_id).execute()
+            user_response = (
+                client.table("users_metadata").select("user_id, email, name").eq("user_id", user_id).execute()
+            )
             user_info = user_response.data[0] if user_response.data else {"user_id": user_id, "email": "", "name": None}
 
             # Get user messages in date range with chat info
-            messages_response = (
-                client.table("messages")
-                .select("id, chat_provider_id, created_at")
-                .eq("user_id", user_id)
-                .gte("created_at", start_date.isoformat())
-                .lte("created_at", end_date.isoformat())
-                .execute()
+            user_messages = read_all(
+                client,
+                "messages",
+                "id, chat_provider_id, created_at",
+                filters=lambda query: query.eq("user_id", user_id),
+                start=start_date,
+                end=end_date,
             )
-            user_messages = messages_response.data or []
             user_chat_ids = list({msg["chat_provider_id"] for msg in user_messages if msg.get("chat_provider_id")})
 
             # Get quality and work data for user's chats
@@ -487,25 +392,21 @@ class AuditRepository:
             provider_map = {}
             if user_chat_ids:
                 # Get enriched chat data (quality, work, theme, intent)
-                quality_response = (
-                    client.table("enriched_chats")
-                    .select("chat_provider_id, quality_score, is_work_related, theme, intent")
-                    .in_("chat_provider_id", user_chat_ids)
-                    .eq("user_id", user_id)
-                    .execute()
+                user_quality_data = read_all_in(
+                    client,
+                    "enriched_chats",
+                    "chat_provider_id, quality_score, is_work_related, theme, intent",
+                    "chat_provider_id",
+                    user_chat_ids,
+                    filters=lambda query: query.eq("user_id", user_id),
                 )
-                user_quality_data = quality_response.data or []
 
                 # Get provider info from chats table
-                provider_response = (
-                    client.table("chats")
-                    .select("chat_provider_id, provider_name")
-                    .in_("chat_provider_id", user_chat_ids)
-                    .execute()
+                provider_rows = read_all_in(
+                    client, "chats", "chat_provider_id, provider_name", "chat_provider_id", user_chat_ids
                 )
                 provider_map = {
-                    chat["chat_provider_id"]: chat.get("provider_name", "Unknown")
-                    for chat in (provider_response.data or [])
+                    chat["chat_provider_id"]: chat.get("provider_name", "Unknown") for chat in provider_rows
                 }
 
                 # Merge provider info into quality data
@@ -513,63 +414,67 @@ class AuditRepository:
                     item["provider"] = provider_map.get(item.get("chat_provider_id"), "Unknown")
 
             # Get user risk data
-            risk_response = (
-                client.table("enriched_messages")
-                .select("overall_risk_level, overall_risk_score")
-                .eq("user_id", user_id)
-                .gte("created_at", start_date.isoformat())
-                .lte("created_at", end_date.isoformat())
-                .in_("overall_risk_level", ["high", "critical"])
-                .execute()
+            user_risk_data = read_all(
+                client,
+                "enriched_messages",
+                "overall_risk_level, overall_risk_score",
+                filters=lambda query: query.eq("user_id", user_id).in_("overall_risk_level", ["high", "critical"]),
+                start=start_date,
+                end=end_date,
             )
-            user_risk_data = risk_response.data or []
 
             # Get previous period data for trend (7 days before start)
             trend_start = start_date - timedelta(days=7)
             trend_end = start_date
-            trend_messages = (
-                client.table("messages")
-                .select("chat_provider_id")
-                .eq("user_id", user_id)
-                .gte("created_at", trend_start.isoformat())
-                .lt("created_at", trend_end.isoformat())
-                .execute()
+            trend_messages = read_all(
+                client,
+                "messages",
+                "chat_provider_id",
+                filters=lambda query: query.eq("user_id", user_id),
+                start=trend_start,
+                end=trend_end,
+                include_end=False,
             )
-            trend_chat_ids = list({msg["chat_provider_id"] for msg in (trend_messages.data or []) if msg.get("chat_provider_id")})
+            trend_chat_ids = _unique_chat_ids(trend_messages)
 
             trend_quality_data = []
             if trend_chat_ids:
-                trend_response = (
-                    client.table("enriched_chats")
-                    .select("quality_score")
-                    .in_("chat_provider_id", trend_chat_ids)
-                    .eq("user_id", user_id)
-                    .execute()
+                trend_quality_data = read_all_in(
+                    client,
+                    "enriched_chats",
+                    "quality_score",
+                    "chat_provider_id",
+                    trend_chat_ids,
+                    filters=lambda query: query.eq("user_id", user_id),
                 )
-                trend_quality_data = trend_response.data or []
 
             # Get org-wide stats for comparison (all org users)
-            org_messages_response = (
-                client.table("messages")
-                .select("id, user_id, chat_provider_id")
-                .in_("user_id", org_user_ids)
-                .gte("created_at", start_date.isoformat())
-                .lte("created_at", end_date.isoformat())
-                .execute()
+            org_messages = read_all_in(
+                client,
+                "messages",
+                "id, user_id, chat_provider_id",
+                "user_id",
+                org_user_ids,
+                start=start_date,
+                end=end_date,
             )
-            org_messages = org_messages_response.data or []
-            org_chat_ids = list({msg["chat_provider_id"] for msg in org_messages if msg.get("chat_provider_id")})
+            org_chat_ids = _unique_chat_ids(org_messages)
 
             org_quality_data = []
             if org_chat_ids:
-                org_quality_response = (
-                    client.table("enriched_chats")
-                    .select("user_id, quality_score, is_work_related")
-                    .in_("chat_provider_id", org_chat_ids)
-                    .in_("user_id", org_user_ids)
-                    .execute()
-                )
-                org_quality_data = org_quality_response.data or []
+                # Chunk on chat IDs only; membership is checked on the returned rows
+                org_members = set(org_user_ids)
+                org_quality_data = [
+                    row
+                    for row in read_all_in(
+                        client,
+                        "enriched_chats",
+                        "user_id, quality_score, is_work_related",
+                        "chat_provider_id",
+                        org_chat_ids,
+                    )
+                    if row.get("user_id") in org_members
+                ]
 
             return {
                 "user_info": user_info,
@@ -582,10 +487,73 @@ class AuditRepository:
                 "org_user_ids": org_user_ids,
             }
 
-        with ThreadPoolExecutor() as executor:
-            result = await loop.run_in_executor(executor, _fetch)
+        return await run_blocking(_fetch)
 
-        return result
+    @staticmethod
+    async def get_audit_kpis_async(
+        client: Client, user_ids: list[str], start_date: datetime, end_date: datetime
+    ) -> dict:
+        """
+        Get pre-aggregated quality, risk, usage, theme and intent summaries (async)
+        Calls the get_audit_kpis Postgres function: one round-trip instead of every row
+        """
+
+        def _fetch():
+            response = client.rpc(
+                "get_audit_kpis",
+                {
+                    "p_user_ids": user_ids,
+                    "p_start_date": start_date.isoformat(),
+                    "p_end_date": end_date.isoformat(),
+                    "p_trend_days": TREND_WINDOW_DAYS,
+                },
+            ).execute()
+
+            return response.data or {}
+
+        return await run_blocking(_fetch)
+
+    @staticmethod
+    async def fetch_audit_data_with_sql_kpis(
+        client: Client, user_ids: list[str], start_date: datetime, end_date: datetime
+    ) -> dict:
+        """
+        Fetch audit data with KPIs aggregated server-side
+        Top users / prompts and riskiest prompts still need rows and use the regular queries;
+        a KPI failure propagates so the caller can fall back to fetch_all_audit_data_parallel
+        """
+        kpis_task = asyncio.ensure_future(AuditRepository.get_audit_kpis_async(client, user_ids, start_date, end_date))
+        risky_prompts_task = asyncio.ensure_future(
+            AuditRepository.get_riskiest_prompts_async(client, user_ids, start_date, end_date)
+        )
+
+        # Trend chats are only needed by the quality/theme queries the RPC replaces
+        try:
+            chat_window = await AuditRepository.resolve_chat_window_async(
+                client, user_ids, start_date, end_date, include_trend=False
+            )
+        except Exception as e:
+            logger.error(f"Failed to resolve audit chat window: {str(e)}")
+            chat_window = {"messages": [], "chat_ids": [], "trend_chat_ids": []}
+
+        top_users_data, top_prompts_data, risky_prompts_data = await asyncio.gather(
+            AuditRepository.get_top_users_async(client, user_ids, start_date, end_date, chat_window=chat_window),
+            AuditRepository.get_top_prompts_async(client, user_ids, start_date, end_date, chat_window=chat_window),
+            risky_prompts_task,
+            return_exceptions=True,
+        )
+        kpis = await kpis_task
+
+        return {
+            "kpis": kpis,
+            "top_users": top_users_data if not isinstance(top_users_data, Exception) else {},
+            "top_prompts": top_prompts_data
+            if not isinstance(top_prompts_data, Exception)
+            else {"chats": [], "messages": []},
+            "risky_prompts": risky_prompts_data
+            if not isinstance(risky_prompts_data, Exception)
+            else {"risks": [], "messages": []},
+        }
 
     @staticmethod
     async def fetch_all_audit_data_parallel(
@@ -595,16 +563,29 @@ class AuditRepository:
         Fetch all audit data in parallel for maximum performance
         This is the main entry point for audit repository
         """
+        # Risk queries do not depend on the chat window: start them alongside the resolver
+        risk_task = asyncio.ensure_future(AuditRepository.get_risk_stats_async(client, user_ids, start_date, end_date))
+        risky_prompts_task = asyncio.ensure_future(
+            AuditRepository.get_riskiest_prompts_async(client, user_ids, start_date, end_date)
+        )
+
+        # Scan messages once for the audit window and once for the trend window
+        try:
+            chat_window = await AuditRepository.resolve_chat_window_async(client, user_ids, start_date, end_date)
+        except Exception as e:
+            logger.error(f"Failed to resolve audit chat window: {str(e)}")
+            chat_window = {"messages": [], "chat_ids": [], "trend_chat_ids": []}
+
         # Execute all queries in parallel
         results = await asyncio.gather(
-            AuditRepository.get_quality_stats_async(client, user_ids, start_date, end_date),
-            AuditRepository.get_risk_stats_async(client, user_ids, start_date, end_date),
-            AuditRepository.get_usage_stats_async(client, user_ids, start_date, end_date),
-            AuditRepository.get_theme_stats_async(client, user_ids, start_date, end_date),
-            AuditRepository.get_intent_stats_async(client, user_ids, start_date, end_date),
-            AuditRepository.get_top_users_async(client, user_ids, start_date, end_date),
-            AuditRepository.get_top_prompts_async(client, user_ids, start_date, end_date),
-            AuditRepository.get_riskiest_prompts_async(client, user_ids, start_date, end_date),
+            AuditRepository.get_quality_stats_async(client, user_ids, start_date, end_date, chat_window=chat_window),
+            risk_task,
+            AuditRepository.get_usage_stats_async(client, user_ids, start_date, end_date, chat_window=chat_window),
+            AuditRepository.get_theme_stats_async(client, user_ids, start_date, end_date, chat_window=chat_window),
+            AuditRepository.get_intent_stats_async(client, user_ids, start_date, end_date, chat_window=chat_window),
+            AuditRepository.get_top_users_async(client, user_ids, start_date, end_date, chat_window=chat_window),
+            AuditRepository.get_top_prompts_async(client, user_ids, start_date, end_date, chat_window=chat_window),
+            risky_prompts_task,
             return_exceptions=True,
         )
 
@@ -0,0 +1,292 @@
+"""
+Pagination-safe bulk reader
+PostgREST caps every response at its max-rows setting, so a plain .execute() on a large
+table silently truncates. Rows are read in keyset pages ordered by (created_at, id):
+each page is an index range scan starting after the last row seen, unlike OFFSET which
+re-reads every skipped row and shifts when rows are inserted mid-read.
+
+Filters go in the query string, so the *_in variants split large in_() value lists into
+URL-safe chunks (one request per chunk) instead of failing with URI too long.
+"""
+
+import asyncio
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
+from datetime import datetime
+from typing import Any
+from urllib.parse import quote
+
+from supabase import Client
+
+from config.settings import settings
+from core.executor import prefetch_executor, run_blocking
+
+# Applies the caller's filters (eq, in_, not_.is_, ...) to a fresh select query
+QueryFilters = Callable[[Any], Any]
+
+_END_OF_SLICE = object()
+
+
+def _with_key_columns(columns: str, time_column: str, id_column: str) -> str:
+    """Make sure the keyset columns are selected"""
+    if columns.strip() == "*":
+        return columns
+    selected = [column.strip() for column in columns.split(",")]
+    missing = [column for column in (time_column, id_column) if column not in selected]
+    return ", ".join(selected + missing)
+
+
+def _keyset_condition(last_row: dict, time_column: str, id_column: str) -> str:
+    """PostgREST filter for rows strictly after last_row in (time_column, id_column) order"""
+    last_time = last_row[time_column]
+    last_id = last_row[id_column]
+    return f'{time_column}.gt."{last_time}",and({time_column}.eq."{last_time}",{id_column}.gt.{last_id})'
+
+
+def iter_pages(
+    client: Client,
+    table: str,
+    columns: str,
+    filters: QueryFilters | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    include_end: bool = True,
+    page_size: int | None = None,
+    time_column: str = "created_at",
+    id_column: str = "id",
+) -> Iterator[list[dict]]:
+    """
+    Yield pages of rows matching the filters, optionally bounded to [start, end] (or [start, end))
+    Selected rows always include time_column and id_column
+    """
+    page_size = page_size or settings.BULK_READ_PAGE_SIZE
+    select = _with_key_columns(columns, time_column, id_column)
+    last_row = None
+
+    while True:
+        query = client.table(table).select(select)
+        if filters is not None:
+            query = filters(query)
+        if start is not None:
+            query = query.gte(time_column, start.isoformat())
+        if end is not None:
+            query = query.lte(time_column, end.isoformat()) if include_end else query.lt(time_column, end.isoformat())
+        if last_row is not None:
+            query = query.or_(_keyset_condition(last_row, time_column, id_column))
+
+        page = query.order(time_column).order(id_column).limit(page_size).execute().data or []
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        last_row = page[-1]
+
+
+def iter_rows(client: Client, table: str, columns: str, **kwargs: Any) -> Iterator[dict]:
+    """Yield every matching row, one keyset page in memory at a time (blocking)"""
+    for page in iter_pages(client, table, columns, **kwargs):
+        yield from page
+
+
+def read_all(client: Client, table: str, columns: str, **kwargs: Any) -> list[dict]:
+    """Read every matching row (blocking)"""
+    return list(iter_rows(client, table, columns, **kwargs))
+
+
+def iter_pages_prefetched(client: Client, table: str, columns: str, **kwargs: Any) -> Iterator[list[dict]]:
+    """
+    iter_pages for sync callers that keeps the next page request in flight on the prefetch executor,
+    so each round-trip overlaps with the caller's work on the current page. Safe from blocking_executor
+    tasks; not from prefetch_executor tasks, which must not wait on their own pool.
+    """
+    pages = iter_pages(client, table, columns, **kwargs)
+    pending = prefetch_executor.submit(next, pages, None)
+    try:
+        while True:
+            page = pending.result()
+            if page is None:
+                return
+            pending = prefetch_executor.submit(next, pages, None)
+            yield page
+    finally:
+        # Early exit: drop the request if it has not started (a running one finishes harmlessly)
+        pending.cancel()
+
+
+def _time_slices(start: datetime, end: datetime, include_end: bool, count: int) -> list[tuple]:
+    """Split [start, end] into count contiguous half-open slices, the last one keeping include_end"""
+    step = (end - start) / count
+    bounds = [start + step * i for i in range(count)] + [end]
+    return [(bounds[i], bounds[i + 1], include_end if i == count - 1 else False) for i in range(count)]
+
+
+async def _produce_slice(queue: asyncio.Queue, pages: Iterator[list[dict]]) -> None:
+    """Pull keyset pages on the blocking executor into a bounded queue"""
+    try:
+        while True:
+            page = await run_blocking(next, pages, None)
+            if page is None:
+                break
+            await queue.put(page)
+        await queue.put(_END_OF_SLICE)
+    except Exception as e:
+        await queue.put(e)
+
+
+async def stream_rows(
+    client: Client,
+    table: str,
+    columns: str,
+    filters: QueryFilters | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    include_end: bool = True,
+    page_size: int | None = None,
+    parallel_slices: int | None = None,
+    prefetch_pages: int | None = None,
+    time_column: str = "created_at",
+    id_column: str = "id",
+) -> AsyncIterator[dict]:
+    """
+    Async generator over every matching row, in (time_column, id_column) order
+
+    When both start and end are given, the range is split into parallel_slices time slices
+    paginated concurrently; each slice buffers at most prefetch_pages pages, so memory stays
+    flat however many rows match.
+    """
+    parallel_slices = parallel_slices or settings.BULK_READ_PARALLEL_SLICES
+    prefetch_pages = prefetch_pages or settings.BULK_READ_PREFETCH_PAGES
+
+    if start is not None and end is not None and end > start and parallel_slices > 1:
+        slices = _time_slices(start, end, include_end, parallel_slices)
+    else:
+        slices = [(start, end, include_end)]
+
+    queues = [asyncio.Queue(maxsize=prefetch_pages) for _ in slices]
+    producers = [
+        asyncio.ensure_future(
+            _produce_slice(
+                queue,
+                iter_pages(
+                    client,
+                    table,
+                    columns,
+                    filters=filters,
+                    start=slice_start,
+                    end=slice_end,
+                    include_end=slice_include_end,
+                    page_size=page_size,
+                    time_column=time_column,
+                    id_column=id_column,
+                ),
+            )
+        )
+        for queue, (slice_start, slice_end, slice_include_end) in zip(queues, slices, strict=True)
+    ]
+
+    try:
+        for queue in queues:
+            while True:
+                page = await queue.get()
+                if page is _END_OF_SLICE:
+                    break
+                if isinstance(page, Exception):
+                    raise page
+                for row in page:
+                    yield row
+    finally:
+        for producer in producers:
+            producer.cancel()
+        await asyncio.gather(*producers, return_exceptions=True)
+
+
+async def fetch_all_rows(client: Client, table: str, columns: str, **kwargs: Any) -> list[dict]:
+    """Collect stream_rows into a list, for consumers that need every row at once"""
+    return [row async for row in stream_rows(client, table, columns, **kwargs)]
+
+
+# ==================== CHUNKED in_() FILTERS ====================
+
+
+def chunk_values(values: Iterable[Any], max_chars: int | None = None) -> list[list]:
+    """
+    Split in_() filter values into chunks whose URL-encoded list stays under max_chars
+    Duplicates and None are dropped; an empty input gives no chunks
+    """
+    max_chars = max_chars or settings.IN_FILTER_MAX_CHARS
+    chunks: list[list] = []
+    current: list = []
+    size = 0
+
+    for value in dict.fromkeys(value for value in values if value is not None):
+        # Encoded value plus its encoded comma separator
+        cost = len(quote(str(value), safe="")) + 3
+        if current and size + cost > max_chars:
+            chunks.append(current)
+            current, size = [], 0
+        current.append(value)
+        size += cost
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _chunk_filters(filters: QueryFilters | None, column: str, chunk: list) -> QueryFilters:
+    def apply(query: Any) -> Any:
+        if filters is not None:
+            query = filters(query)
+        return query.in_(column, chunk)
+
+    return apply
+
+
+def read_all_in(
+    client: Client, table: str, columns: str, column: str, values: Iterable[Any], **kwargs: Any
+) -> list[dict]:
+    """read_all restricted to column IN values, one chunk after the other (blocking)"""
+    filters = kwargs.pop("filters", None)
+    rows: list[dict] = []
+    for chunk in chunk_values(values):
+        rows.extend(read_all(client, table, columns, filters=_chunk_filters(filters, column, chunk), **kwargs))
+    return rows
+
+
+async def fetch_all_rows_in(
+    client: Client, table: str, columns: str, column: str, values: Iterable[Any], **kwargs: Any
+) -> list[dict]:
+    """fetch_all_rows restricted to column IN values, chunks read concurrently and concatenated"""
+    filters = kwargs.pop("filters", None)
+    results = await asyncio.gather(
+        *(
+            fetch_all_rows(client, table, columns, filters=_chunk_filters(filters, column, chunk), **kwargs)
+            for chunk in chunk_values(values)
+        )
+    )
+    return [row for rows in results for row in rows]
+
+
+async def stream_rows_in(
+    client: Client, table: str, columns: str, column: str, values: Iterable[Any], **kwargs: Any
+) -> AsyncIterator[dict]:
+    """stream_rows restricted to column IN values, chunk by chunk (each chunk still time-sliced)"""
+    filters = kwargs.pop("filters", None)
+    for chunk in chunk_values(values):
+        async for row in stream_rows(client, table, columns, filters=_chunk_filters(filters, column, chunk), **kwargs):
+            yield row
+
+
+async def execute_in_chunks(
+    build_query: Callable[[list], Any], values: Iterable[Any], max_chars: int | None = None
+) -> list[dict]:
+    """
+    Run a single-page query (e.g. order + limit) once per chunk of values, concurrently
+    build_query receives a chunk and returns the query to execute; results are concatenated.
+    max_chars lowers the chunk size when the query has other in_() filters.
+    """
+    results = await asyncio.gather(
+        *(
+            run_blocking(lambda chunk=chunk: build_query(chunk).execute().data or [])
+            for chunk in chunk_values(values, max_chars)
+        )
+    )
+    return [row for rows in results for row in rows]
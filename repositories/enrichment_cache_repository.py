@@ -0,0 +1,46 @@
+"""
+Repository for the enrichment result cache (enrichment_cache)
+Database operations only - no business logic
+"""
+
+from datetime import UTC, datetime, timedelta
+
+from supabase import Client
+
+from core.supabase import supabase_admin
+
+
+class EnrichmentCacheRepository:
+    # Entries are shared across users (RLS without policies): read and written with the admin client
+
+    @staticmethod
+    def get(client: Client, cache_key: str, max_age_seconds: int) -> dict | None:
+        """Cached result for a key, None if missing or older than max_age_seconds"""
+        admin_client = supabase_admin if supabase_admin else client
+        cutoff = datetime.now(UTC) - timedelta(seconds=max_age_seconds)
+        response = (
+            admin_client.table("enrichment_cache")
+            .select("result")
+            .eq("cache_key", cache_key)
+            .gte("created_at", cutoff.isoformat())
+            .limit(1)
+            .execute()
+        )
+        return response.data[0]["result"] if response.data else None
+
+    @staticmethod
+    def put(client: Client, cache_key: str, kind: str, prompt_version: str, model: str | None, result: dict) -> None:
+        """Store a result (an entry written concurrently by another worker wins)"""
+        admin_client = supabase_admin if supabase_admin else client
+        admin_client.table("enrichment_cache").upsert(
+            {
+                "cache_key": cache_key,
+                "kind": kind,
+                "prompt_version": prompt_version,
+                "model": model,
+                "result": result,
+                "created_at": datetime.now(UTC).isoformat(),
+            },
+            on_conflict="cache_key",
+            ignore_duplicates=True,
+        ).execute()
@@ -0,0 +1,128 @@
+"""
+Repository for the enrichment job queue (enrichment_jobs)
+Database operations only - no business logic
+"""
+
+from datetime import UTC, datetime, timedelta
+
+from supabase import Client
+
+from core.supabase import supabase_admin
+from domains.entities.enrichment_entities import EnrichmentJob
+
+ENRICHMENT_JOB_COLUMNS = (
+    "id, kind, user_id, provider_id, payload, status, attempts, max_attempts, last_error, result, "
+    "created_at, updated_at, completed_at"
+)
+
+
+def _to_job(row: dict) -> EnrichmentJob:
+    return EnrichmentJob(
+        id=row["id"],
+        kind=row["kind"],
+        provider_id=row["provider_id"],
+        payload=row.get("payload") or {},
+        user_id=row.get("user_id"),
+        status=row.get("status", "pending"),
+        attempts=row.get("attempts") or 0,
+        max_attempts=row.get("max_attempts") or 1,
+        last_error=row.get("last_error"),
+        result=row.get("result"),
+        created_at=row.get("created_at"),
+        updated_at=row.get("updated_at"),
+        completed_at=row.get("completed_at"),
+    )
+
+
+class EnrichmentJobRepository:
+    # Users queue and read their own jobs with their RLS client. Workers run outside any user
+    # session: they claim, complete and fail jobs with the admin client.
+
+    @staticmethod
+    def enqueue(client: Client, jobs: list[dict], max_attempts: int) -> list[EnrichmentJob]:
+        """
+        Queue jobs ({kind, user_id, provider_id, payload}) not queued yet, and done or failed ones again
+        Returns every requested job, the ones pending or running included (in no particular order)
+        """
+        if not jobs:
+            return []
+        response = client.rpc("enqueue_enrichment_jobs", {"p_jobs": jobs, "p_max_attempts": max_attempts}).execute()
+        return [_to_job(row) for row in response.data or []]
+
+    @staticmethod
+    def claim(client: Client, worker_id: str, limit: int, lock_timeout_seconds: int) -> list[EnrichmentJob]:
+        """Lock up to limit available jobs for a worker (status running, attempts + 1)"""
+        admin_client = supabase_admin if supabase_admin else client
+        response = admin_client.rpc(
+            "claim_enrichment_jobs",
+            {"p_worker": worker_id, "p_limit": limit, "p_lock_timeout_seconds": lock_timeout_seconds},
+        ).execute()
+        return [_to_job(row) for row in response.data or []]
+
+    @staticmethod
+    def complete(client: Client, job_id: int, result: dict) -> None:
+        """Mark a job done with the enrichment response"""
+        admin_client = supabase_admin if supabase_admin else client
+        now = datetime.now(UTC).isoformat()
+        admin_client.table("enrichment_jobs").update(
+            {
+                "status": "done",
+                "result": result,
+                "last_error": None,
+                "locked_by": None,
+                "locked_at": None,
+                "completed_at": now,
+                "updated_at": now,
+            }
+        ).eq("id", job_id).execute()
+
+    @staticmethod
+    def fail(client: Client, job: EnrichmentJob, error: str, retry_delay_seconds: float) -> str:
+        """
+        Record a failed attempt: the job is retried after retry_delay_seconds, or marked failed
+        once it has used max_attempts. Returns the new status.
+        """
+        admin_client = supabase_admin if supabase_admin else client
+        now = datetime.now(UTC)
+        status = "failed" if job.attempts >= job.max_attempts else "pending"
+        data = {
+            "status": status,
+            "last_error": error,
+            "locked_by": None,
+            "locked_at": None,
+            "updated_at": now.isoformat(),
+        }
+        if status == "pending":
+            data["available_at"] = (now + timedelta(seconds=retry_delay_seconds)).isoformat()
+        else:
+            data["completed_at"] = now.isoformat()
+        admin_client.table("enrichment_jobs").update(data).eq("id", job.id).execute()
+        return status
+
+    @staticmethod
+    def get_job(client: Client, user_id: str, job_id: int) -> EnrichmentJob | None:
+        """Get one of a user's jobs by ID"""
+        response = (
+            client.table("enrichment_jobs")
+            .select(ENRICHMENT_JOB_COLUMNS)
+            .eq("id", job_id)
+            .eq("user_id", user_id)
+            .execute()
+        )
+        return _to_job(response.data[0]) if response.data else None
+
+    @staticmethod
+    def get_jobs(client: Client, user_id: str, kind: str, provider_ids: list[str]) -> list[EnrichmentJob]:
+        """Get a user's jobs of chats or messages by provider ID"""
+        if not provider_ids:
+            return []
+        response = (
+            client.table("enrichment_jobs")
+            .select(ENRICHMENT_JOB_COLUMNS)
+            .eq("user_id", user_id)
+            .eq("kind", kind)
+            .in_("provider_id", provider_ids)
+            .order("id")
+            .execute()
+        )
+        return [_to_job(row) for row in response.data or []]
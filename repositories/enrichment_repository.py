@@ -76,6 +76,10 @@ class EnrichmentRepository:
                 }
             )
 
+        # Cache provenance (columns added by create_enrichment_cache.sql, only written while the cache is enabled)
+        if enriched_chat.cache_key:
+            data.update({"cache_key": enriched_chat.cache_key, "from_cache": enriched_chat.from_cache})
+
         response = client.table("enriched_chats").insert(data).execute()
 
         if not response.data:
@@ -139,6 +143,10 @@ class EnrichmentRepository:
             "user_whitelist": enriched_message.user_whitelist,
         }
 
+        # Cache provenance (columns added by create_enrichment_cache.sql, only written while the cache is enabled)
+        if enriched_message.cache_key:
+            data.update({"cache_key": enriched_message.cache_key, "from_cache": enriched_message.from_cache})
+
         response = client.table("enriched_messages").insert(data).execute()
 
         if not response.data:
@@ -323,6 +331,8 @@ class EnrichmentRepository:
             model_used=row.get("model_used"),
             user_override_quality=row.get("user_override_quality", False),
             user_quality_score=row.get("user_quality_score"),
+            cache_key=row.get("cache_key"),
+            from_cache=row.get("from_cache") or False,
         )
 
     @staticmethod
@@ -363,4 +373,6 @@ class EnrichmentRepository:
             risk_summary=row.get("risk_summary", []),
             detected_issues=detected_issues,
             user_whitelist=row.get("user_whitelist", False),
+            cache_key=row.get("cache_key"),
+            from_cache=row.get("from_cache") or False,
         )
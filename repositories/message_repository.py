@@ -175,6 +175,22 @@ class ChatRepository:
 
         return {row["chat_provider_id"] for row in response.data}
 
+    @staticmethod
+    def get_chat_providers(client: Client, user_id: str, chat_ids: list[str]) -> dict[str, str]:
+        """chat_provider_id -> provider_name for the user's existing chats"""
+        if not chat_ids:
+            return {}
+
+        response = (
+            client.table("chats")
+            .select("chat_provider_id, provider_name")
+            .eq("user_id", user_id)
+            .in_("chat_provider_id", chat_ids)
+            .execute()
+        )
+
+        return {row["chat_provider_id"]: row["provider_name"] for row in response.data or []}
+
     @staticmethod
     def create_chats_batch(client: Client, chats_data: list[dict]) -> list[Chat]:
         if not chats_data:
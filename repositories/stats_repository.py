@@ -1,168 +1,170 @@
+from datetime import datetime
+
 from supabase import Client
 
-from domains.entities.message_entities import Chat, Message
+from config.settings import settings
+from domains.entities.message_entities import Chat, MessageUsage
+from repositories.bulk_reader import iter_pages_prefetched, read_all, read_all_in
+from utils.stats_helpers import message_size_fields
+
+# Stats only need sizes persisted at ingest, never the message content
+MESSAGE_USAGE_COLUMNS = (
+    "id, user_id, message_provider_id, role, chat_provider_id, model, created_at, "
+    "parent_message_provider_id, char_count, estimated_tokens"
+)
+# Until MESSAGE_SIZE_READS is enabled sizes are measured on the content, as before the size columns existed
+MESSAGE_CONTENT_USAGE_COLUMNS = (
+    "id, user_id, message_provider_id, role, chat_provider_id, model, created_at, parent_message_provider_id, content"
+)
+
+
+def _message_usage_columns() -> str:
+    return MESSAGE_USAGE_COLUMNS if settings.MESSAGE_SIZE_READS else MESSAGE_CONTENT_USAGE_COLUMNS
+
+
+def _to_chat(row: dict) -> Chat:
+    return Chat(
+        id=row["id"],
+        user_id=row["user_id"],
+        chat_provider_id=row["chat_provider_id"],
+        title=row["title"],
+        provider_name=row["provider_name"],
+        created_at=row.get("created_at"),
+    )
+
+
+def _to_message_usage(row: dict) -> MessageUsage:
+    sizes = message_size_fields(row["content"]) if "content" in row else row
+    return MessageUsage(
+        id=row["id"],
+        user_id=row["user_id"],
+        message_provider_id=row["message_provider_id"],
+        role=row["role"],
+        chat_provider_id=row["chat_provider_id"],
+        model=row["model"],
+        created_at=row.get("created_at"),
+        parent_message_provider_id=row.get("parent_message_provider_id"),
+        char_count=sizes.get("char_count") or 0,
+        estimated_tokens=sizes.get("estimated_tokens") or 0,
+    )
 
 
 class StatsRepository:
     @staticmethod
     def get_user_chats(client: Client, user_id: str, start_date: str | None = None) -> list[Chat]:
         """Get all chats for a user, optionally filtered by start date"""
-        query = (
-            client.table("chats")
-            .select("id, created_at, title, provider_name, chat_provider_id, user_id")
-            .eq("user_id", user_id)
-        )
 
-        if start_date:
-            query = query.gte("created_at", start_date)
+        def filters(query):
+            query = query.eq("user_id", user_id)
+            return query.gte("created_at", start_date) if start_date else query
 
-        response = query.execute()
-        data = response.data or []
+        rows = read_all(
+            client, "chats", "id, created_at, title, provider_name, chat_provider_id, user_id", filters=filters
+        )
 
-        return [
-            Chat(
-                id=row["id"],
-                user_id=row["user_id"],
-                chat_provider_id=row["chat_provider_id"],
-                title=row["title"],
-                provider_name=row["provider_name"],
-                created_at=row.get("created_at"),
-            )
-            for row in data
-        ]
+        return [_to_chat(row) for row in rows]
 
     @staticmethod
-    def get_user_messages(client: Client, user_id: str, start_date: str | None = None) -> list[Message]:
+    def get_user_messages(client: Client, user_id: str, start_date: str | None = None) -> list[MessageUsage]:
         """Get all messages for a user, optionally filtered by start date"""
-        query = (
-            client.table("messages")
-            .select(
-                "id, user_id, chat_provider_id, role, content, created_at, parent_message_provider_id, message_provider_id, model"
-            )
-            .eq("user_id", user_id)
-        )
 
-        if start_date:
-            query = query.gte("created_at", start_date)
-
-        response = query.execute()
-        data = response.data or []
-
-        return [
-            Message(
-                id=row["id"],
-                user_id=row["user_id"],
-                message_provider_id=row["message_provider_id"],
-                content=row["content"],
-                role=row["role"],
-                chat_provider_id=row["chat_provider_id"],
-                model=row["model"],
-                created_at=row.get("created_at"),
-                parent_message_provider_id=row.get("parent_message_provider_id"),
-            )
-            for row in data
-        ]
+        def filters(query):
+            query = query.eq("user_id", user_id)
+            return query.gte("created_at", start_date) if start_date else query
+
+        rows = read_all(client, "messages", _message_usage_columns(), filters=filters)
+
+        return [_to_message_usage(row) for row in rows]
 
     @staticmethod
     def get_chat_message_count(
         client: Client, user_id: str, chat_provider_ids: list[str], start_date: str | None = None
-    ) -> list[Message]:
-        """Get messages for chats within a date range - only returns chat_provider_id and created_at for counting"""
-        query = (
-            client.table("messages")
-            .select(
-                "id, user_id, message_provider_id, content, role, chat_provider_id, model, created_at, parent_message_provider_id"
-            )
-            .eq("user_id", user_id)
+    ) -> list[MessageUsage]:
+        """Get messages for chats within a date range, for counting"""
+        columns = _message_usage_columns()
+
+        def filters(query):
+            query = query.eq("user_id", user_id)
+            return query.gte("created_at", start_date) if start_date else query
+
+        # Large chat ID lists are split into URL-safe in_() chunks (a single list causes URI too long)
+        if chat_provider_ids:
+            data = read_all_in(client, "messages", columns, "chat_provider_id", chat_provider_ids, filters=filters)
+        else:
+            data = read_all(client, "messages", columns, filters=filters)
+
+        return [_to_message_usage(row) for row in data]
+
+    @staticmethod
+    def get_messages_paginated(client: Client, user_id: str, start_date: datetime) -> list[MessageUsage]:
+        """Get messages since start_date, keyset-paginated; each page converts while the next one downloads"""
+        pages = iter_pages_prefetched(
+            client,
+            "messages",
+            _message_usage_columns(),
+            filters=lambda query: query.eq("user_id", user_id),
+            start=start_date,
         )
 
-        # Don't use .in_() if there are too many IDs (causes URI too long error)
-        # Instead, rely on start_date filtering and filter by chat IDs in Python
-        if start_date:
-            query = query.gte("created_at", start_date)
+        return [_to_message_usage(row) for page in pages for row in page]
 
-        response = query.execute()
-        data = response.data or []
+    @staticmethod
+    def get_chats_paginated(client: Client, user_id: str, start_date: datetime) -> list[Chat]:
+        """
+        Get chats since start_date, keyset-paginated without prefetch: UsageEngine already reads them
+        on the prefetch executor, whose tasks must not wait on it
+        """
+        rows = read_all(
+            client,
+            "chats",
+            "id, user_id, chat_provider_id, created_at, provider_name, title",
+            filters=lambda query: query.eq("user_id", user_id),
+            start=start_date,
+        )
 
-        # Filter by chat_provider_ids in Python if provided
-        if chat_provider_ids:
-            chat_ids_set = set(chat_provider_ids)
-            data = [row for row in data if row.get("chat_provider_id") in chat_ids_set]
-
-        return [
-            Message(
-                id=row["id"],
-                user_id=row["user_id"],
-                message_provider_id=row["message_provider_id"],
-                content=row["content"],
-                role=row["role"],
-                chat_provider_id=row["chat_provider_id"],
-                model=row["model"],
-                created_at=row.get("created_at"),
-                parent_message_provider_id=row.get("parent_message_provider_id"),
-            )
-            for row in data
-        ]
+        return [_to_chat(row) for row in rows]
+
+    @staticmethod
+    def get_messages_in_range(
+        client: Client, user_id: str, start: datetime, end: datetime | None = None
+    ) -> list[MessageUsage]:
+        """Get messages created in [start, end), or since start when end is None"""
+        rows = read_all(
+            client,
+            "messages",
+            _message_usage_columns(),
+            filters=lambda query: query.eq("user_id", user_id),
+            start=start,
+            end=end,
+            include_end=False,
+        )
+
+        return [_to_message_usage(row) for row in rows]
 
     @staticmethod
-    def get_messages_paginated(
-        client: Client, user_id: str, start_date: str, offset: int = 0, limit: int = 1000
-    ) -> list[Message]:
-        """Get messages with pagination for large datasets"""
-        response = (
-            client.table("messages")
-            .select(
-                "id, user_id, message_provider_id, chat_provider_id, role, content, created_at, model, parent_message_provider_id"
-            )
-            .eq("user_id", user_id)
-            .gte("created_at", start_date)
-            .order("created_at", desc=False)
-            .range(offset, offset + limit - 1)
-            .execute()
+    def get_chats_in_range(client: Client, user_id: str, start: datetime, end: datetime | None = None) -> list[Chat]:
+        """Get chats created in [start, end), or since start when end is None"""
+        rows = read_all(
+            client,
+            "chats",
+            "id, user_id, chat_provider_id, created_at, provider_name, title",
+            filters=lambda query: query.eq("user_id", user_id),
+            start=start,
+            end=end,
+            include_end=False,
         )
 
-        data = response.data or []
-
-        return [
-            Message(
-                id=row["id"],
-                user_id=row["user_id"],
-                message_provider_id=row["message_provider_id"],
-                content=row["content"],
-                role=row["role"],
-                chat_provider_id=row["chat_provider_id"],
-                model=row["model"],
-                created_at=row.get("created_at"),
-                parent_message_provider_id=row.get("parent_message_provider_id"),
-            )
-            for row in data
-        ]
+        return [_to_chat(row) for row in rows]
 
     @staticmethod
-    def get_chats_paginated(
-        client: Client, user_id: str, start_date: str, offset: int = 0, limit: int = 1000
-    ) -> list[Chat]:
-        """Get chats with pagination for large datasets"""
-        response = (
-            client.table("chats")
-            .select("id, user_id, chat_provider_id, created_at, provider_name, title")
-            .eq("user_id", user_id)
-            .gte("created_at", start_date)
-            .order("created_at", desc=False)
-            .range(offset, offset + limit - 1)
-            .execute()
+    def get_message_chat_ids(client: Client, user_id: str, start: datetime) -> list[str | None]:
+        """chat_provider_id of every message since start, for per-chat message counts"""
+        pages = iter_pages_prefetched(
+            client,
+            "messages",
+            "id, chat_provider_id, created_at",
+            filters=lambda query: query.eq("user_id", user_id),
+            start=start,
         )
 
-        data = response.data or []
-
-        return [
-            Chat(
-                id=row["id"],
-                user_id=row["user_id"],
-                chat_provider_id=row["chat_provider_id"],
-                title=row["title"],
-                provider_name=row["provider_name"],
-                created_at=row.get("created_at"),
-            )
-            for row in data
-        ]
+        return [row["chat_provider_id"] for page in pages for row in page]
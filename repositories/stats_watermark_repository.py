@@ -0,0 +1,15 @@
+from supabase import Client
+
+
+class StatsWatermarkRepository:
+    @staticmethod
+    def get_version(client: Client, user_id: str) -> int:
+        """Get a user's stats watermark, 0 before the first bump"""
+        response = client.table("user_stats_watermarks").select("version").eq("user_id", user_id).limit(1).execute()
+        return response.data[0]["version"] if response.data else 0
+
+    @staticmethod
+    def bump(client: Client, user_id: str) -> int:
+        """Increment a user's stats watermark, returns the new version"""
+        response = client.rpc("bump_user_stats_watermark", {"p_user_id": user_id}).execute()
+        return response.data
@@ -5,6 +5,7 @@ Repository for team-related database operations
 from supabase import Client
 
 from domains.entities.team_entities import Team, TeamMember, TeamTreeNode, UserTeamPermission
+from repositories.bulk_reader import read_all_in
 
 
 class TeamRepository:
@@ -171,6 +172,28 @@ class TeamRepository:
 
         return members
 
+    @staticmethod
+    def get_team_member_ids_map(client: Client, team_ids: list[str]) -> dict[str, list[str]]:
+        """
+        Get member user IDs for many teams in one query (per URL-safe chunk of team IDs)
+        Returns team_id -> user_ids, with an empty list for teams without members
+        """
+        members_map: dict[str, list[str]] = {team_id: [] for team_id in team_ids}
+        if not team_ids:
+            return members_map
+
+        rows = read_all_in(client, "user_team_permissions", "team_id, user_id", "team_id", team_ids)
+        for row in rows:
+            members_map.setdefault(row["team_id"], []).append(row["user_id"])
+
+        return members_map
+
+    @staticmethod
+    def get_user_ids_for_teams(client: Client, team_ids: list[str]) -> list[str]:
+        """Get the unique user IDs belonging to any of the given teams"""
+        members_map = TeamRepository.get_team_member_ids_map(client, team_ids)
+        return list(dict.fromkeys(user_id for user_ids in members_map.values() for user_id in user_ids))
+
     @staticmethod
     def get_user_teams(client: Client, user_id: str, organization_id: str | None = None) -> list[Team]:
         """Get all teams a user belongs to"""
@@ -0,0 +1,57 @@
+from datetime import date
+
+from supabase import Client
+
+from domains.entities.stats_entities import UsageDay
+from repositories.bulk_reader import read_all
+
+USAGE_DAY_COLUMNS = (
+    "id, user_id, day, model, provider, messages, chats, input_tokens, output_tokens, cost_usd, energy_wh"
+)
+
+
+class UsageRollupRepository:
+    @staticmethod
+    def increment_days(client: Client, rows: list[dict]) -> None:
+        """Add per-day deltas to user_usage_daily (atomic, safe under concurrent batches)"""
+        if not rows:
+            return
+        client.rpc("increment_user_usage_daily", {"p_rows": rows}).execute()
+
+    @staticmethod
+    def replace_user_days(client: Client, user_id: str, before_day: date, rows: list[dict]) -> None:
+        """Replace a user's rows for every day before before_day with freshly computed totals (atomic)"""
+        client.rpc(
+            "replace_user_usage_daily",
+            {"p_user_id": user_id, "p_before_day": before_day.isoformat(), "p_rows": rows},
+        ).execute()
+
+    @staticmethod
+    def get_user_days(client: Client, user_id: str, first_day: date, last_day: date) -> list[UsageDay]:
+        """Get a user's rollup rows for the days in [first_day, last_day]"""
+        rows = read_all(
+            client,
+            "user_usage_daily",
+            USAGE_DAY_COLUMNS,
+            filters=lambda query: query.eq("user_id", user_id)
+            .gte("day", first_day.isoformat())
+            .lte("day", last_day.isoformat()),
+            time_column="day",
+        )
+
+        return [
+            UsageDay(
+                user_id=row["user_id"],
+                day=row["day"],
+                model=row["model"],
+                provider=row["provider"],
+                messages=row["messages"] or 0,
+                chats=row["chats"] or 0,
+                input_tokens=row["input_tokens"] or 0,
+                output_tokens=row["output_tokens"] or 0,
+                # NUMERIC columns come back as strings from PostgREST
+                cost_usd=float(row["cost_usd"] or 0),
+                energy_wh=float(row["energy_wh"] or 0),
+            )
+            for row in rows
+        ]
@@ -12,6 +12,7 @@ router = APIRouter()
 from . import (  # noqa: E402
     adoption_curve,
     analytics,
+    dashboard,
     intent_distribution,
     intents,
     organization_audit,
@@ -5,6 +5,7 @@ import logging
 from fastapi import HTTPException, Query, Request
 
 from dtos.audit_dto import AdoptionCurveResponseDTO
+from services.audit_cache import AuditCache
 from services.audit_timeseries_service import AuditTimeSeriesService
 
 from . import router
@@ -37,8 +38,20 @@ async def get_adoption_curve(
     - models: Show breakdown by specific models
     """
     try:
-        result = await AuditTimeSeriesService.get_adoption_curve(
-            request.state.supabase_client, organization_id, start_date, end_date, days, team_ids, granularity, view_mode
+        result = await AuditCache.serve(
+            request,
+            organization_id,
+            AdoptionCurveResponseDTO,
+            lambda: AuditTimeSeriesService.get_adoption_curve(
+                request.state.supabase_client,
+                organization_id,
+                start_date,
+                end_date,
+                days,
+                team_ids,
+                granularity,
+                view_mode,
+            ),
         )
 
         return result
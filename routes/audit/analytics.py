@@ -13,6 +13,7 @@ from dtos.audit_dto import (
     UsageByHourResponseDTO,
 )
 from services.audit_analytics_service import AuditAnalyticsService
+from services.audit_cache import AuditCache
 
 from . import router
 
@@ -35,8 +36,13 @@ async def get_model_distribution(
     and their relative proportions.
     """
     try:
-        result = await AuditAnalyticsService.get_model_distribution(
-            request.state.supabase_client, organization_id, start_date, end_date, days, team_ids
+        result = await AuditCache.serve(
+            request,
+            organization_id,
+            ModelDistributionResponseDTO,
+            lambda: AuditAnalyticsService.get_model_distribution(
+                request.state.supabase_client, organization_id, start_date, end_date, days, team_ids
+            ),
         )
         return result
     except HTTPException:
@@ -62,8 +68,13 @@ async def get_provider_distribution(
     and their relative proportions by number of chats and messages.
     """
     try:
-        result = await AuditAnalyticsService.get_provider_distribution(
-            request.state.supabase_client, organization_id, start_date, end_date, days, team_ids
+        result = await AuditCache.serve(
+            request,
+            organization_id,
+            ProviderDistributionResponseDTO,
+            lambda: AuditAnalyticsService.get_provider_distribution(
+                request.state.supabase_client, organization_id, start_date, end_date, days, team_ids
+            ),
         )
         return result
     except HTTPException:
@@ -92,8 +103,13 @@ async def get_quality_timeline(
     and actionability_score over time to show improvement trends.
     """
     try:
-        result = await AuditAnalyticsService.get_quality_timeline(
-            request.state.supabase_client, organization_id, start_date, end_date, days, team_ids, granularity
+        result = await AuditCache.serve(
+            request,
+            organization_id,
+            QualityMetricsTimelineResponseDTO,
+            lambda: AuditAnalyticsService.get_quality_timeline(
+                request.state.supabase_client, organization_id, start_date, end_date, days, team_ids, granularity
+            ),
         )
         return result
     except HTTPException:
@@ -119,8 +135,13 @@ async def get_quality_distribution(
     0-20, 21-40, 41-60, 61-80, 81-100
     """
     try:
-        result = await AuditAnalyticsService.get_quality_distribution(
-            request.state.supabase_client, organization_id, start_date, end_date, days, team_ids
+        result = await AuditCache.serve(
+            request,
+            organization_id,
+            QualityDistributionResponseDTO,
+            lambda: AuditAnalyticsService.get_quality_distribution(
+                request.state.supabase_client, organization_id, start_date, end_date, days, team_ids
+            ),
         )
         return result
     except HTTPException:
@@ -146,8 +167,13 @@ async def get_usage_by_hour(
     split by weekday vs weekend patterns.
     """
     try:
-        result = await AuditAnalyticsService.get_usage_by_hour(
-            request.state.supabase_client, organization_id, start_date, end_date, days, team_ids
+        result = await AuditCache.serve(
+            request,
+            organization_id,
+            UsageByHourResponseDTO,
+            lambda: AuditAnalyticsService.get_usage_by_hour(
+                request.state.supabase_client, organization_id, start_date, end_date, days, team_ids
+            ),
         )
         return result
     except HTTPException:
@@ -173,8 +199,13 @@ async def get_risk_categories(
     with severity breakdown for each category.
     """
     try:
-        result = await AuditAnalyticsService.get_risk_categories(
-            request.state.supabase_client, organization_id, start_date, end_date, days, team_ids
+        result = await AuditCache.serve(
+            request,
+            organization_id,
+            RiskCategoriesResponseDTO,
+            lambda: AuditAnalyticsService.get_risk_categories(
+                request.state.supabase_client, organization_id, start_date, end_date, days, team_ids
+            ),
         )
         return result
     except HTTPException:
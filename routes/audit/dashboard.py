@@ -0,0 +1,70 @@
+"""Composite dashboard endpoint: several audit panels from one shared read"""
+
+import logging
+
+from fastapi import HTTPException, Query, Request
+
+from dtos.audit_dto import AuditDashboardResponseDTO
+from services.audit_cache import AuditCache
+from services.audit_dashboard_service import AuditDashboardService
+
+from . import router
+
+logger = logging.getLogger(__name__)
+
+
+@router.get("/organizations/{organization_id}/dashboard", response_model=AuditDashboardResponseDTO)
+async def get_dashboard(
+    request: Request,
+    organization_id: str,
+    panels: list[str] = Query(
+        description="Panels to compute: adoption_curve, risk_timeline, quality_timeline, theme_distribution, "
+        "intent_distribution, model_distribution, provider_distribution, quality_metrics_timeline, "
+        "quality_distribution, usage_by_hour, risk_categories",
+    ),
+    start_date: str | None = Query(default=None, description="Start date (YYYY-MM-DD)"),
+    end_date: str | None = Query(default=None, description="End date (YYYY-MM-DD)"),
+    days: int = Query(default=30, ge=1, le=365, description="Number of days to look back"),
+    team_ids: list[str] | None = Query(default=None, description="Filter by team IDs"),
+    granularity: str = Query(default="day", pattern="^(day|week|month)$", description="Time granularity"),
+    view_mode: str = Query(
+        default="chats",
+        pattern="^(chats|messages|providers|models)$",
+        description="Adoption curve view mode: chats, messages, providers, or models",
+    ),
+    top_n: int = Query(default=10, ge=1, le=50, description="Number of top themes / intents to track"),
+):
+    """
+    Get several dashboard panels in one request
+
+    Organization members and the rows of every table the panels need are read once, and each
+    panel is computed with the same aggregation as its own endpoint over that shared snapshot.
+    """
+    try:
+        result = await AuditCache.serve(
+            request,
+            organization_id,
+            AuditDashboardResponseDTO,
+            lambda: AuditDashboardService.get_dashboard(
+                request.state.supabase_client,
+                organization_id,
+                panels,
+                start_date,
+                end_date,
+                days,
+                team_ids,
+                granularity,
+                view_mode,
+                top_n,
+            ),
+        )
+
+        return result
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting audit dashboard: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to get audit dashboard: {str(e)}")
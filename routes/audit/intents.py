@@ -6,6 +6,7 @@ import time
 from fastapi import HTTPException, Query, Request
 
 from dtos.audit_dto import IntentStatsWithContextDTO
+from services.audit_cache import AuditCache
 from services.audit_service import AuditService
 
 from . import router
@@ -37,8 +38,13 @@ async def get_organization_intent_stats(
         # TODO: Add permission check - verify user has admin/owner role in organization
 
         logger.info("[AUDIT:intents] Calling AuditService.get_organization_intent_stats...")
-        result = await AuditService.get_organization_intent_stats(
-            request.state.supabase_client, user_id, organization_id, start_date, end_date, days
+        result = await AuditCache.serve(
+            request,
+            organization_id,
+            IntentStatsWithContextDTO,
+            lambda: AuditService.get_organization_intent_stats(
+                request.state.supabase_client, user_id, organization_id, start_date, end_date, days
+            ),
         )
 
         duration_ms = int((time.time() - start_time) * 1000)
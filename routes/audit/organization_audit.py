@@ -5,6 +5,7 @@ import logging
 from fastapi import HTTPException, Query, Request
 
 from dtos.audit_dto import OrganizationAuditResponseDTO
+from services.audit_cache import AuditCache
 from services.audit_service import AuditService
 
 from . import router
@@ -39,14 +40,19 @@ async def get_organization_audit(
         if team_ids:
             parsed_team_ids = [t.strip() for t in team_ids.split(",") if t.strip()]
 
-        result = await AuditService.get_organization_audit(
-            request.state.supabase_client,
-            user_id,
+        result = await AuditCache.serve(
+            request,
             organization_id,
-            start_date,
-            end_date,
-            days,
-            team_ids=parsed_team_ids,
+            OrganizationAuditResponseDTO,
+            lambda: AuditService.get_organization_audit(
+                request.state.supabase_client,
+                user_id,
+                organization_id,
+                start_date,
+                end_date,
+                days,
+                team_ids=parsed_team_ids,
+            ),
         )
 
         return result
@@ -5,6 +5,7 @@ import logging
 from fastapi import HTTPException, Query, Request
 
 from dtos.audit_dto import QualityTimelineResponseDTO
+from services.audit_cache import AuditCache
 from services.audit_timeseries_service import AuditTimeSeriesService
 
 from . import router
@@ -26,8 +27,13 @@ async def get_quality_timeline(
     Get quality score evolution over time with optional team breakdown
     """
     try:
-        result = await AuditTimeSeriesService.get_quality_timeline(
-            request.state.supabase_client, organization_id, start_date, end_date, days, team_ids, granularity
+        result = await AuditCache.serve(
+            request,
+            organization_id,
+            QualityTimelineResponseDTO,
+            lambda: AuditTimeSeriesService.get_quality_timeline(
+                request.state.supabase_client, organization_id, start_date, end_date, days, team_ids, granularity
+            ),
         )
 
         return result
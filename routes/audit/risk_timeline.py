@@ -5,6 +5,7 @@ import logging
 from fastapi import HTTPException, Query, Request
 
 from dtos.audit_dto import RiskTimelineResponseDTO
+from services.audit_cache import AuditCache
 from services.audit_timeseries_service import AuditTimeSeriesService
 
 from . import router
@@ -26,8 +27,13 @@ async def get_risk_timeline(
     Get risk timeline showing risky messages over time with breakdown by risk type
     """
     try:
-        result = await AuditTimeSeriesService.get_risk_timeline(
-            request.state.supabase_client, organization_id, start_date, end_date, days, team_ids, granularity
+        result = await AuditCache.serve(
+            request,
+            organization_id,
+            RiskTimelineResponseDTO,
+            lambda: AuditTimeSeriesService.get_risk_timeline(
+                request.state.supabase_client, organization_id, start_date, end_date, days, team_ids, granularity
+            ),
         )
 
         return result
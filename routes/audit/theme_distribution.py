@@ -5,6 +5,7 @@ import logging
 from fastapi import HTTPException, Query, Request
 
 from dtos.audit_dto import ThemeTimelineResponseDTO
+from services.audit_cache import AuditCache
 from services.audit_timeseries_service import AuditTimeSeriesService
 
 from . import router
@@ -28,8 +29,13 @@ async def get_theme_distribution(
     try:
         # TODO: Add permission check - verify user has admin/owner role in organization
 
-        result = await AuditTimeSeriesService.get_theme_distribution(
-            request.state.supabase_client, organization_id, start_date, end_date, days, team_ids or [], top_n=10
+        result = await AuditCache.serve(
+            request,
+            organization_id,
+            ThemeTimelineResponseDTO,
+            lambda: AuditTimeSeriesService.get_theme_distribution(
+                request.state.supabase_client, organization_id, start_date, end_date, days, team_ids or [], top_n=10
+            ),
         )
 
         return result
@@ -6,6 +6,7 @@ import time
 from fastapi import HTTPException, Query, Request
 
 from dtos.audit_dto import UserProfileResponseDTO
+from services.audit_cache import AuditCache
 from services.audit_service import AuditService
 
 from . import router
@@ -40,14 +41,13 @@ async def get_user_profile(
         # TODO: Add permission check - verify requesting user has admin/owner role in organization
 
         logger.info("[AUDIT:user-profile] Calling AuditService.get_user_profile...")
-        result = await AuditService.get_user_profile(
-            request.state.supabase_client,
-            requesting_user_id,
+        result = await AuditCache.serve(
+            request,
             organization_id,
-            user_id,
-            start_date,
-            end_date,
-            days,
+            UserProfileResponseDTO,
+            lambda: AuditService.get_user_profile(
+                request.state.supabase_client, requesting_user_id, organization_id, user_id, start_date, end_date, days
+            ),
         )
 
         duration_ms = int((time.time() - start_time) * 1000)
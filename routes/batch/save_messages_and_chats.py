@@ -3,7 +3,7 @@ import logging
 from fastapi import HTTPException, Request, status
 
 from dtos import CombinedBatchDTO, CombinedBatchResponseDTO
-from services import ChatService, MessageService
+from services import ChatService, MessageService, StatsResponseCache, UsageRollupService
 
 from . import router
 
@@ -44,6 +44,12 @@ async def save_messages_and_chats(request: Request, batch_data: CombinedBatchDTO
                 "total_count": chat_result.total_count,
             }
 
+        UsageRollupService.record_batch(
+            request.state.supabase_client, user_id, message_responses, chat_responses, batch_data.chats
+        )
+        if message_responses or chat_responses:
+            StatsResponseCache.bump(request.state.supabase_client, user_id)
+
         logger.info(
             f"Combined batch completed for user {user_id}: "
             f"messages={message_stats['saved_count']}/{message_stats['total_count']}, "
@@ -3,7 +3,7 @@ import logging
 from fastapi import HTTPException, Request, status
 
 from dtos import ChatResponseDTO, SaveChatDTO
-from services import ChatService
+from services import ChatService, StatsResponseCache, UsageRollupService
 
 from . import router
 
@@ -21,6 +21,9 @@ async def create_chats(
             logger.info(f"User {user_id} creating/updating batch of {len(body)} chats")
 
             chats_list, batch_result = ChatService.save_chats_batch(request.state.supabase_client, user_id, body)
+            UsageRollupService.record_batch(request.state.supabase_client, user_id, [], chats_list)
+            if chats_list:
+                StatsResponseCache.bump(request.state.supabase_client, user_id)
 
             logger.info(
                 f"Batch operation completed: {batch_result.inserted_count} inserted, "
@@ -31,6 +34,7 @@ async def create_chats(
             logger.info(f"User {user_id} creating/updating chat {body.chat_provider_id}")
 
             result = ChatService.save_chat(request.state.supabase_client, user_id, body)
+            StatsResponseCache.bump(request.state.supabase_client, user_id)
 
             logger.info(f"Chat {body.chat_provider_id} created/updated successfully")
             return result
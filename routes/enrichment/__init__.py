@@ -12,6 +12,7 @@ from . import (  # noqa: E402
     enrich_chat_batch,
     enrich_message,
     enrich_message_batch,
+    jobs,
     override_quality,
     rated_chats,
     risky_messages,
@@ -22,7 +22,7 @@ async def enrich_message(request: Request, dto: EnrichMessageRequestDTO):
     try:
         # Allow unauthenticated access for scripts - user_id will be None
         user_id = getattr(request.state, "user_id", None)
-        result = EnrichmentService.enrich_message(request.state.supabase_client, user_id, dto)
+        result = await EnrichmentService.enrich_message_async(request.state.supabase_client, user_id, dto)
         return result
     except HTTPException:
         raise
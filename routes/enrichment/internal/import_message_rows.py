@@ -5,10 +5,19 @@ import logging
 from fastapi import HTTPException, Request, status
 from pydantic import BaseModel
 
+from core.executor import blocking_executor
+from dtos.enrichment_dto import ChatEnrichmentRequestDTO, EnrichMessageRequestDTO
+from services.enrichment_queue_service import EnrichmentQueueService
+from utils.enrichment import truncate_message
+
 from .. import router as parent_router
 
 logger = logging.getLogger(__name__)
 
+# Request DTO limits (EnrichMessageRequestDTO.content, ChatEnrichmentRequestDTO.user_message)
+MESSAGE_CONTENT_MAX_LENGTH = 20000
+CHAT_MESSAGE_MAX_LENGTH = 50000
+
 
 class MessageRow(BaseModel):
     id: str | int  # Accept both string and int IDs from database
@@ -37,34 +46,48 @@ class ImportChatRowsRequest(BaseModel):
     rows: list[ChatRow]
 
 
+def _first_content(messages: list[dict], role: str) -> str | None:
+    """Content of the first message with this role"""
+    for message in messages:
+        if message.get("role") == role and message.get("content"):
+            return message["content"]
+    return None
+
+
 @parent_router.post("/internal/import-message-rows", status_code=status.HTTP_200_OK)
 async def import_message_rows(request: Request, body: ImportMessageRowsRequest) -> dict:
     """
     Import message rows for enrichment processing.
 
     This endpoint is for internal scripts and doesn't require authentication.
-    It accepts batches of message rows and queues them for enrichment.
+    It accepts batches of message rows and queues them for enrichment (enrichment_jobs),
+    keyed on message_provider_id.
     """
     try:
         logger.info(f"Received {len(body.rows)} message rows for import")
 
-        # For now, we'll just log the import
-        # In a production system, you would:
-        # 1. Insert into a queue table
-        # 2. Trigger enrichment processing
-        # 3. Update enrichment status
-
-        # Example: If you have an enrichment queue table, uncomment and use:
-        # client = request.state.supabase_client
-        # rows_to_insert = [row.dict() for row in body.rows]
-        # response = client.table("enrichment_message_queue").insert(rows_to_insert).execute()
+        # Rows without a message_provider_id cannot be deduplicated: they are skipped
+        requests = [
+            EnrichMessageRequestDTO(
+                content=truncate_message(row.content, MESSAGE_CONTENT_MAX_LENGTH),
+                role=row.role,
+                message_provider_id=row.message_provider_id,
+                message_id=row.id if isinstance(row.id, int) else None,
+                user_id=row.user_id,
+            )
+            for row in body.rows
+            if row.message_provider_id and row.content
+        ]
+        jobs = await blocking_executor.run(
+            EnrichmentQueueService.enqueue_messages, request.state.supabase_client, None, requests
+        )
 
-        logger.info(f"Successfully processed {len(body.rows)} message rows")
+        logger.info(f"Queued {len(jobs)} of {len(body.rows)} message rows")
 
         return {
             "success": True,
-            "imported_count": len(body.rows),
-            "message": f"Successfully queued {len(body.rows)} message rows for enrichment",
+            "imported_count": len(jobs),
+            "message": f"Successfully queued {len(jobs)} message rows for enrichment",
         }
 
     except Exception as e:
@@ -80,19 +103,37 @@ async def import_chat_rows(request: Request, body: ImportChatRowsRequest) -> dic
     Import chat rows for enrichment processing.
 
     This endpoint is for internal scripts and doesn't require authentication.
+    Chats are queued for enrichment (enrichment_jobs), keyed on chat_provider_id.
     """
     try:
         logger.info(f"Received {len(body.rows)} chat rows for import")
 
-        # For now, we'll just log the import
-        # In production, insert into enrichment queue
+        # Chats are classified from their first user message and first assistant response
+        requests = []
+        for row in body.rows:
+            user_message = _first_content(row.messages, "user")
+            if not user_message:
+                continue
+            assistant_response = _first_content(row.messages, "assistant")
+            requests.append(
+                ChatEnrichmentRequestDTO(
+                    user_message=truncate_message(user_message, CHAT_MESSAGE_MAX_LENGTH),
+                    assistant_response=assistant_response,
+                    chat_provider_id=row.chat_provider_id,
+                    chat_id=row.id if isinstance(row.id, int) else None,
+                    user_id=row.user_id,
+                )
+            )
+        jobs = await blocking_executor.run(
+            EnrichmentQueueService.enqueue_chats, request.state.supabase_client, None, requests
+        )
 
-        logger.info(f"Successfully processed {len(body.rows)} chat rows")
+        logger.info(f"Queued {len(jobs)} of {len(body.rows)} chat rows")
 
         return {
             "success": True,
-            "imported_count": len(body.rows),
-            "message": f"Successfully queued {len(body.rows)} chat rows for enrichment",
+            "imported_count": len(jobs),
+            "message": f"Successfully queued {len(jobs)} chat rows for enrichment",
         }
 
     except Exception as e:
@@ -0,0 +1,99 @@
+"""Enrichment job queue endpoints: queue chats / messages and follow their jobs"""
+
+import logging
+
+from fastapi import HTTPException, Query, Request, status
+
+from core.executor import blocking_executor
+from dtos.enrichment_dto import (
+    ChatEnrichmentBatchRequestDTO,
+    EnrichmentJobDTO,
+    EnrichmentJobsResponseDTO,
+    EnrichMessageBatchRequestDTO,
+)
+from services.enrichment_queue_service import EnrichmentQueueService
+from utils.enrichment import enrichment_job_to_dto
+
+from . import router
+
+logger = logging.getLogger(__name__)
+
+
+@router.post("/jobs/chats", response_model=EnrichmentJobsResponseDTO, status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_chat_jobs(request: Request, dto: ChatEnrichmentBatchRequestDTO):
+    """
+    Queue the caller's chats for enrichment (1-50 chats), keyed on chat_provider_id
+    Chats pending or running are not queued again: their existing job is returned. Chats whose job
+    is done or failed are queued again.
+    """
+    try:
+        jobs = await blocking_executor.run(
+            EnrichmentQueueService.enqueue_chats, request.state.supabase_client, request.state.user_id, dto.chats
+        )
+        return EnrichmentJobsResponseDTO(jobs=[enrichment_job_to_dto(job) for job in jobs])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error queueing chat enrichments: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to queue chat enrichments: {str(e)}")
+
+
+@router.post("/jobs/messages", response_model=EnrichmentJobsResponseDTO, status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_message_jobs(request: Request, dto: EnrichMessageBatchRequestDTO):
+    """
+    Queue the caller's messages for risk assessment (1-100 messages), keyed on message_provider_id
+    Messages pending or running are not queued again: their existing job is returned. Messages whose
+    job is done or failed are queued again.
+    """
+    try:
+        jobs = await blocking_executor.run(
+            EnrichmentQueueService.enqueue_messages,
+            request.state.supabase_client,
+            request.state.user_id,
+            dto.messages,
+        )
+        return EnrichmentJobsResponseDTO(jobs=[enrichment_job_to_dto(job) for job in jobs])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error queueing message enrichments: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to queue message enrichments: {str(e)}")
+
+
+@router.get("/jobs/{job_id}", response_model=EnrichmentJobDTO)
+async def get_job(request: Request, job_id: int):
+    """
+    Get the status of one of the caller's queued enrichments, with its response once done
+    """
+    try:
+        job = await blocking_executor.run(
+            EnrichmentQueueService.get_job, request.state.supabase_client, request.state.user_id, job_id
+        )
+    except Exception as e:
+        logger.error(f"Error getting enrichment job {job_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to get enrichment job: {str(e)}")
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Enrichment job not found")
+    return enrichment_job_to_dto(job)
+
+
+@router.get("/jobs", response_model=EnrichmentJobsResponseDTO)
+async def get_jobs(
+    request: Request,
+    kind: str = Query(..., description="chat or message"),
+    provider_ids: list[str] = Query(..., max_length=100, description="chat_provider_id or message_provider_id"),
+):
+    """
+    Get the caller's jobs of chats or messages by provider ID (for callers polling a batch)
+    """
+    try:
+        jobs = await blocking_executor.run(
+            EnrichmentQueueService.get_jobs, request.state.supabase_client, request.state.user_id, kind, provider_ids
+        )
+        return EnrichmentJobsResponseDTO(jobs=[enrichment_job_to_dto(job) for job in jobs])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error getting enrichment jobs: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to get enrichment jobs: {str(e)}")
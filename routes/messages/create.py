@@ -3,7 +3,7 @@ import logging
 from fastapi import HTTPException, Request, status
 
 from dtos import MessageResponseDTO, SaveMessageDTO
-from services import MessageService
+from services import MessageService, StatsResponseCache, UsageRollupService
 
 from . import router
 
@@ -23,6 +23,9 @@ async def create_messages(
             messages_list, batch_result = MessageService.save_messages_batch(
                 request.state.supabase_client, user_id, body
             )
+            UsageRollupService.record_batch(request.state.supabase_client, user_id, messages_list, [])
+            if messages_list:
+                StatsResponseCache.bump(request.state.supabase_client, user_id)
 
             logger.info(
                 f"Batch creation completed: {batch_result.saved_count} saved, {batch_result.skipped_count} skipped"
@@ -32,6 +35,8 @@ async def create_messages(
             logger.info(f"User {user_id} creating message {body.message_provider_id}")
 
             result = MessageService.save_message(request.state.supabase_client, user_id, body)
+            UsageRollupService.record_batch(request.state.supabase_client, user_id, [result], [])
+            StatsResponseCache.bump(request.state.supabase_client, user_id)
 
             logger.info(f"Message {body.message_provider_id} created successfully")
             return result
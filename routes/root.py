@@ -3,6 +3,7 @@ import os
 from fastapi import APIRouter
 
 from config import settings
+from core.executor import blocking_executor
 
 router = APIRouter()
 
@@ -16,4 +17,5 @@ async def root():
         "status": "running",
         "environment": os.getenv("ENVIRONMENT"),
         "supabase_url": os.getenv("SUPABASE_URL"),
+        "blocking_executor": blocking_executor.stats(),
     }
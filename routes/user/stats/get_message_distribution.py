@@ -1,8 +1,10 @@
 import logging
 
-from fastapi import HTTPException, Request, status
+from fastapi import HTTPException, Request, Response, status
 
+from core.executor import blocking_executor
 from dtos.stats_dto import MessageDistributionDTO
+from services.stats_response_cache import StatsResponseCache
 from services.stats_service import StatsService
 
 from . import router
@@ -11,7 +13,7 @@ logger = logging.getLogger(__name__)
 
 
 @router.get("/messages/distribution", response_model=MessageDistributionDTO, status_code=status.HTTP_200_OK)
-async def get_message_distribution(request: Request) -> MessageDistributionDTO:
+async def get_message_distribution(request: Request, response: Response) -> MessageDistributionDTO | Response:
     """
     Get message distribution statistics by role and model.
 
@@ -26,8 +28,10 @@ async def get_message_distribution(request: Request) -> MessageDistributionDTO:
 
         logger.info(f"User {user_id} fetching message distribution")
 
-        # Service now returns DTO directly
-        return StatsService.get_message_distribution(client, user_id)
+        # Cached per stats watermark, 304 when the client already has this version
+        return await blocking_executor.run(
+            StatsResponseCache.serve, request, response, lambda: StatsService.get_message_distribution(client, user_id)
+        )
 
     except Exception as e:
         logger.error(f"Error getting message distribution for {user_id}: {str(e)}")
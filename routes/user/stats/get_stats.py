@@ -1,8 +1,10 @@
 import logging
 
-from fastapi import HTTPException, Query, Request, status
+from fastapi import HTTPException, Query, Request, Response, status
 
+from core.executor import blocking_executor
 from dtos.stats_dto import UserStatsDTO
+from services.stats_response_cache import StatsResponseCache
 from services.stats_service import StatsService
 
 from . import router
@@ -12,8 +14,10 @@ logger = logging.getLogger(__name__)
 
 @router.get("", response_model=UserStatsDTO, status_code=status.HTTP_200_OK)
 async def get_user_stats(
-    request: Request, recent_days: int = Query(7, description="Number of recent days to compare", ge=1, le=30)
-) -> UserStatsDTO:
+    request: Request,
+    response: Response,
+    recent_days: int = Query(7, description="Number of recent days to compare", ge=1, le=30),
+) -> UserStatsDTO | Response:
     """
     Get comprehensive user statistics including messages, chats, tokens, energy usage, and model usage.
 
@@ -25,8 +29,13 @@ async def get_user_stats(
 
         logger.info(f"User {user_id} fetching statistics with {recent_days} recent days")
 
-        # Service now returns DTO directly
-        return StatsService.get_user_stats(client, user_id, recent_days)
+        # Cached per stats watermark, 304 when the client already has this version
+        return await blocking_executor.run(
+            StatsResponseCache.serve,
+            request,
+            response,
+            lambda: StatsService.get_user_stats(client, user_id, recent_days),
+        )
 
     except Exception as e:
         logger.error(f"Error getting user stats for {user_id}: {str(e)}")
@@ -1,8 +1,10 @@
 import logging
 
-from fastapi import HTTPException, Query, Request, status
+from fastapi import HTTPException, Query, Request, Response, status
 
+from core.executor import blocking_executor
 from dtos.stats_dto import WeeklyConversationStatsDTO
+from services.stats_response_cache import StatsResponseCache
 from services.stats_service import StatsService
 
 from . import router
@@ -12,8 +14,8 @@ logger = logging.getLogger(__name__)
 
 @router.get("/chats/weekly", response_model=WeeklyConversationStatsDTO, status_code=status.HTTP_200_OK)
 async def get_weekly_chat_stats(
-    request: Request, days: int = Query(7, description="Number of days to analyze", ge=1, le=30)
-) -> WeeklyConversationStatsDTO:
+    request: Request, response: Response, days: int = Query(7, description="Number of days to analyze", ge=1, le=30)
+) -> WeeklyConversationStatsDTO | Response:
     """
     Get chat statistics with daily breakdown for the specified period.
 
@@ -27,8 +29,13 @@ async def get_weekly_chat_stats(
 
         logger.info(f"User {user_id} fetching chat statistics for {days} days")
 
-        # Service now returns DTO directly
-        return StatsService.get_weekly_conversation_stats(client, user_id, days)
+        # Cached per stats watermark, 304 when the client already has this version
+        return await blocking_executor.run(
+            StatsResponseCache.serve,
+            request,
+            response,
+            lambda: StatsService.get_weekly_conversation_stats(client, user_id, days),
+        )
 
     except Exception as e:
         logger.error(f"Error getting weekly chat stats for {user_id}: {str(e)}")
@@ -1,8 +1,10 @@
 import logging
 
-from fastapi import HTTPException, Query, Request, status
+from fastapi import HTTPException, Query, Request, Response, status
 
+from core.executor import blocking_executor
 from dtos.stats_dto import UsageOverviewDTO
+from services.stats_response_cache import StatsResponseCache
 from services.stats_service import StatsService
 
 from . import router
@@ -12,8 +14,8 @@ logger = logging.getLogger(__name__)
 
 @router.get("/overview", response_model=UsageOverviewDTO, status_code=status.HTTP_200_OK)
 async def get_usage_overview(
-    request: Request, days: int = Query(30, description="Number of days to analyze", ge=1, le=365)
-) -> UsageOverviewDTO:
+    request: Request, response: Response, days: int = Query(30, description="Number of days to analyze", ge=1, le=365)
+) -> UsageOverviewDTO | Response:
     """
     Get comprehensive usage overview for the specified time period.
 
@@ -30,8 +32,10 @@ async def get_usage_overview(
 
         logger.info(f"User {user_id} fetching usage overview for {days} days")
 
-        # Service now returns DTO directly
-        return StatsService.get_usage_overview(client, user_id, days)
+        # Cached per stats watermark, 304 when the client already has this version
+        return await blocking_executor.run(
+            StatsResponseCache.serve, request, response, lambda: StatsService.get_usage_overview(client, user_id, days)
+        )
 
     except Exception as e:
         logger.error(f"Error getting usage overview for {user_id}: {str(e)}")
@@ -1,8 +1,10 @@
 import logging
 
-from fastapi import HTTPException, Query, Request, status
+from fastapi import HTTPException, Query, Request, Response, status
 
+from core.executor import blocking_executor
 from dtos.stats_dto import UsagePatternsDTO
+from services.stats_response_cache import StatsResponseCache
 from services.stats_service import StatsService
 
 from . import router
@@ -12,8 +14,8 @@ logger = logging.getLogger(__name__)
 
 @router.get("/patterns", response_model=UsagePatternsDTO, status_code=status.HTTP_200_OK)
 async def get_usage_patterns(
-    request: Request, days: int = Query(30, description="Number of days to analyze", ge=1, le=365)
-) -> UsagePatternsDTO:
+    request: Request, response: Response, days: int = Query(30, description="Number of days to analyze", ge=1, le=365)
+) -> UsagePatternsDTO | Response:
     """
     Get usage patterns showing when the user is most active.
 
@@ -29,8 +31,10 @@ async def get_usage_patterns(
 
         logger.info(f"User {user_id} fetching usage patterns for {days} days")
 
-        # Service now returns DTO directly
-        return StatsService.get_usage_patterns(client, user_id, days)
+        # Cached per stats watermark, 304 when the client already has this version
+        return await blocking_executor.run(
+            StatsResponseCache.serve, request, response, lambda: StatsService.get_usage_patterns(client, user_id, days)
+        )
 
     except Exception as e:
         logger.error(f"Error getting usage patterns for {user_id}: {str(e)}")
@@ -1,8 +1,10 @@
 import logging
 
-from fastapi import HTTPException, Query, Request, status
+from fastapi import HTTPException, Query, Request, Response, status
 
+from core.executor import blocking_executor
 from dtos.stats_dto import UsageTimelineDTO
+from services.stats_response_cache import StatsResponseCache
 from services.stats_service import StatsService
 
 from . import router
@@ -13,9 +15,10 @@ logger = logging.getLogger(__name__)
 @router.get("/timeline", response_model=UsageTimelineDTO, status_code=status.HTTP_200_OK)
 async def get_usage_timeline(
     request: Request,
+    response: Response,
     days: int = Query(30, description="Number of days to analyze", ge=1, le=365),
     granularity: str = Query("daily", description="Timeline granularity", regex="^(hourly|daily|weekly)$"),
-) -> UsageTimelineDTO:
+) -> UsageTimelineDTO | Response:
     """
     Get usage timeline data for charts with specified granularity.
 
@@ -33,8 +36,13 @@ async def get_usage_timeline(
 
         logger.info(f"User {user_id} fetching usage timeline for {days} days with {granularity} granularity")
 
-        # Service now returns DTO directly
-        return StatsService.get_usage_timeline(client, user_id, days, granularity)
+        # Cached per stats watermark, 304 when the client already has this version
+        return await blocking_executor.run(
+            StatsResponseCache.serve,
+            request,
+            response,
+            lambda: StatsService.get_usage_timeline(client, user_id, days, granularity),
+        )
 
     except Exception as e:
         logger.error(f"Error getting usage timeline for {user_id}: {str(e)}")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Backfill messages.char_count and messages.estimated_tokens for rows saved before
+migrations/add_message_size_columns.sql.
+
+Rows are read in id order, one batch at a time, and updated with one request per distinct
+(char_count, estimated_tokens) pair in the batch. Running it again only touches rows still missing sizes.
+
+Usage:
+    python scripts/backfill_message_size_columns.py [--batch-size 500] [--dry-run]
+"""
+
+import argparse
+import os
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+# Add parent directory to path to import from backend modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+from supabase import Client, create_client
+
+from repositories.bulk_reader import chunk_values
+from utils.stats_helpers import message_size_fields
+
+# Load environment variables
+load_dotenv()
+
+
+def get_supabase_admin_client() -> Client:
+    """Get Supabase admin client."""
+    url = os.getenv("SUPABASE_URL")
+    service_key = os.getenv("SUPABASE_SECRET_KEY") or os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+    if not url or not service_key:
+        raise ValueError("SUPABASE_URL and SUPABASE_SECRET_KEY (or SUPABASE_SERVICE_ROLE_KEY) must be set")
+
+    return create_client(url, service_key)
+
+
+def backfill(client: Client, batch_size: int, dry_run: bool = False) -> int:
+    """Fill sizes for every message missing them, returns the number of rows processed"""
+    processed = 0
+    last_id = None
+
+    while True:
+        query = client.table("messages").select("id, content").is_("estimated_tokens", "null")
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.order("id").limit(batch_size).execute().data or []
+        if not rows:
+            break
+
+        # Group ids by size so the batch costs one update per distinct size, not one per row
+        ids_by_size = defaultdict(list)
+        for row in rows:
+            sizes = message_size_fields(row.get("content"))
+            ids_by_size[(sizes["char_count"], sizes["estimated_tokens"])].append(row["id"])
+
+        if not dry_run:
+            for (char_count, estimated_tokens), ids in ids_by_size.items():
+                for chunk in chunk_values(ids):
+                    client.table("messages").update(
+                        {"char_count": char_count, "estimated_tokens": estimated_tokens}
+                    ).in_("id", chunk).execute()
+
+        processed += len(rows)
+        last_id = rows[-1]["id"]
+        print(f"   {processed} messages processed ({len(ids_by_size)} updates in last batch)")
+
+        if len(rows) < batch_size:
+            break
+
+    return processed
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Backfill message char_count / estimated_tokens")
+    parser.add_argument("--batch-size", type=int, default=500, help="Messages read per request")
+    parser.add_argument("--dry-run", action="store_true", help="Compute sizes without writing them")
+    args = parser.parse_args()
+
+    print("🔧 Message size backfill\n")
+
+    try:
+        client = get_supabase_admin_client()
+        print("✅ Connected to Supabase\n")
+
+        processed = backfill(client, args.batch_size, args.dry_run)
+
+        suffix = " (dry run, nothing written)" if args.dry_run else ""
+        print(f"\n✅ Backfill complete: {processed} messages{suffix}")
+
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Rebuild the user_audit_daily facts (migrations/create_user_audit_daily.sql) from raw rows.
+
+Every closed day (before today, UTC) of each user is recomputed from their chats, messages,
+enriched chats and enriched messages and replaced, with the same function used on ingest and
+enrichment (utils/audit_facts.py: build_audit_days). Today is left to the incremental updates:
+audit panels always read it from raw rows. Running it again gives the same counters.
+
+Usage:
+    python scripts/rebuild_user_audit_daily.py [--user-id <uuid>] [--dry-run]
+"""
+
+import argparse
+import os
+import sys
+from datetime import UTC, datetime, time
+from pathlib import Path
+
+# Add parent directory to path to import from backend modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv  # noqa: I001
+from supabase import Client, create_client
+
+# services first: importing the repositories package on its own runs into a circular import
+from services.audit_snapshot import SNAPSHOT_COLUMNS
+from repositories.audit_facts_repository import AuditFactsRepository
+from repositories.bulk_reader import read_all
+from utils.audit_facts import build_audit_days
+from utils.stats_helpers import usage_days
+
+# Load environment variables
+load_dotenv()
+
+
+def get_supabase_admin_client() -> Client:
+    """Get Supabase admin client."""
+    url = os.getenv("SUPABASE_URL")
+    service_key = os.getenv("SUPABASE_SECRET_KEY") or os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+    if not url or not service_key:
+        raise ValueError("SUPABASE_URL and SUPABASE_SECRET_KEY (or SUPABASE_SERVICE_ROLE_KEY) must be set")
+
+    return create_client(url, service_key)
+
+
+def get_user_ids(client: Client, batch_size: int = 1000) -> list[str]:
+    """Every user ID in users_metadata, read in user_id order"""
+    user_ids = []
+    while True:
+        query = client.table("users_metadata").select("user_id")
+        if user_ids:
+            query = query.gt("user_id", user_ids[-1])
+        rows = query.order("user_id").limit(batch_size).execute().data or []
+        user_ids.extend(row["user_id"] for row in rows)
+        if len(rows) < batch_size:
+            return user_ids
+
+
+def rebuild_user(client: Client, user_id: str, dry_run: bool = False) -> int:
+    """Recompute a user's closed days, returns the number of fact rows"""
+    today = datetime.now(UTC).date()
+    before = datetime.combine(today, time.min)
+
+    def closed_rows(table: str) -> list[dict]:
+        return read_all(
+            client,
+            table,
+            SNAPSHOT_COLUMNS[table],
+            filters=lambda query: query.eq("user_id", user_id),
+            end=before,
+            include_end=False,
+        )
+
+    # Providers come from all chats, closed-day chat counts only from chats created before today
+    chats = read_all(client, "chats", SNAPSHOT_COLUMNS["chats"], filters=lambda query: query.eq("user_id", user_id))
+    chat_providers = {chat["chat_provider_id"]: chat.get("provider_name") for chat in chats}
+    chat_days = usage_days(chat["created_at"] for chat in chats)
+    closed_chats = [chat for chat, day in zip(chats, chat_days, strict=True) if day < today.isoformat()]
+
+    rows = build_audit_days(
+        closed_chats,
+        closed_rows("messages"),
+        closed_rows("enriched_chats"),
+        closed_rows("enriched_messages"),
+        chat_providers,
+    )
+    if not dry_run:
+        AuditFactsRepository.replace_user_days(client, user_id, today, rows)
+    return len(rows)
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Rebuild the user_audit_daily facts from raw rows")
+    parser.add_argument("--user-id", help="Only rebuild this user")
+    parser.add_argument("--dry-run", action="store_true", help="Compute rows without writing them")
+    args = parser.parse_args()
+
+    print("🔧 Audit facts rebuild\n")
+
+    try:
+        client = get_supabase_admin_client()
+        print("✅ Connected to Supabase\n")
+
+        user_ids = [args.user_id] if args.user_id else get_user_ids(client)
+        total_rows = 0
+        for i, user_id in enumerate(user_ids, start=1):
+            rows = rebuild_user(client, user_id, args.dry_run)
+            total_rows += rows
+            print(f"   [{i}/{len(user_ids)}] {user_id}: {rows} rows")
+
+        suffix = " (dry run, nothing written)" if args.dry_run else ""
+        print(f"\n✅ Rebuild complete: {len(user_ids)} users, {total_rows} rows{suffix}")
+
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Rebuild the user_usage_daily rollup (migrations/create_user_usage_daily.sql) from raw messages and chats.
+
+Every closed day (before today, UTC) of each user is recomputed and replaced, with the same
+formulas used on ingest (utils/stats_helpers.py: build_usage_days). Today is left to the
+incremental updates: stats always read it from raw rows. Running it again gives the same totals.
+
+Usage:
+    python scripts/rebuild_user_usage_daily.py [--user-id <uuid>] [--dry-run]
+"""
+
+import argparse
+import os
+import sys
+from datetime import UTC, datetime, time
+from pathlib import Path
+
+# Add parent directory to path to import from backend modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+from supabase import Client, create_client
+
+from repositories.stats_repository import StatsRepository
+from repositories.usage_rollup_repository import UsageRollupRepository
+from utils.stats_helpers import build_usage_days, usage_days
+
+# Load environment variables
+load_dotenv()
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def get_supabase_admin_client() -> Client:
+    """Get Supabase admin client."""
+    url = os.getenv("SUPABASE_URL")
+    service_key = os.getenv("SUPABASE_SECRET_KEY") or os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+    if not url or not service_key:
+        raise ValueError("SUPABASE_URL and SUPABASE_SECRET_KEY (or SUPABASE_SERVICE_ROLE_KEY) must be set")
+
+    return create_client(url, service_key)
+
+
+def get_user_ids(client: Client, batch_size: int = 1000) -> list[str]:
+    """Every user ID in users_metadata, read in user_id order"""
+    user_ids = []
+    while True:
+        query = client.table("users_metadata").select("user_id")
+        if user_ids:
+            query = query.gt("user_id", user_ids[-1])
+        rows = query.order("user_id").limit(batch_size).execute().data or []
+        user_ids.extend(row["user_id"] for row in rows)
+        if len(rows) < batch_size:
+            return user_ids
+
+
+def rebuild_user(client: Client, user_id: str, dry_run: bool = False) -> int:
+    """Recompute a user's closed days, returns the number of rollup rows"""
+    today = datetime.now(UTC).date()
+    before = datetime.combine(today, time.min)
+
+    messages = StatsRepository.get_messages_in_range(client, user_id, EPOCH, before)
+    # Providers come from all chats, closed-day chat counts only from chats created before today
+    chats = StatsRepository.get_chats_in_range(client, user_id, EPOCH)
+    chat_providers = {chat.chat_provider_id: chat.provider_name for chat in chats}
+    chat_days = usage_days(chat.created_at for chat in chats)
+    closed_chats = [chat for chat, day in zip(chats, chat_days, strict=True) if day < today.isoformat()]
+
+    rows = build_usage_days(user_id, messages, closed_chats, chat_providers)
+    if not dry_run:
+        UsageRollupRepository.replace_user_days(client, user_id, today, rows)
+    return len(rows)
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Rebuild the user_usage_daily rollup from raw rows")
+    parser.add_argument("--user-id", help="Only rebuild this user")
+    parser.add_argument("--dry-run", action="store_true", help="Compute rows without writing them")
+    args = parser.parse_args()
+
+    print("🔧 Usage rollup rebuild\n")
+
+    try:
+        client = get_supabase_admin_client()
+        print("✅ Connected to Supabase\n")
+
+        user_ids = [args.user_id] if args.user_id else get_user_ids(client)
+        total_rows = 0
+        for i, user_id in enumerate(user_ids, start=1):
+            rows = rebuild_user(client, user_id, args.dry_run)
+            total_rows += rows
+            print(f"   [{i}/{len(user_ids)}] {user_id}: {rows} rows")
+
+        suffix = " (dry run, nothing written)" if args.dry_run else ""
+        print(f"\n✅ Rebuild complete: {len(user_ids)} users, {total_rows} rows{suffix}")
+
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
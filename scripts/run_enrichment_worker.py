@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Enrichment worker: processes the enrichment_jobs queue (migrations/create_enrichment_jobs.sql).
+
+Claims pending jobs with SKIP LOCKED, so any number of workers can run side by side, enriches
+each chat or message with the LLM, saves the enrichment and stores the response on its job.
+Failed attempts are retried with exponential backoff up to ENRICHMENT_JOB_MAX_ATTEMPTS.
+
+Usage:
+    python scripts/run_enrichment_worker.py [--concurrency 4] [--poll-seconds 2] [--once]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import from backend modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv  # noqa: I001
+from supabase import Client, create_client
+
+from config.enrichment_config import enrichment_config
+from services.enrichment_queue_service import EnrichmentWorker
+
+# Load environment variables
+load_dotenv()
+
+
+def get_supabase_admin_client() -> Client:
+    """Get Supabase admin client."""
+    url = os.getenv("SUPABASE_URL")
+    service_key = os.getenv("SUPABASE_SECRET_KEY") or os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+    if not url or not service_key:
+        raise ValueError("SUPABASE_URL and SUPABASE_SECRET_KEY (or SUPABASE_SERVICE_ROLE_KEY) must be set")
+
+    return create_client(url, service_key)
+
+
+async def run(worker: EnrichmentWorker, once: bool) -> None:
+    """Run until SIGINT / SIGTERM (jobs in progress are finished), or until the queue is empty with once"""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await worker.run(stop=stop, drain=once)
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Process queued chat and message enrichments")
+    parser.add_argument(
+        "--concurrency", type=int, default=enrichment_config.WORKER_CONCURRENCY, help="LLM calls in flight"
+    )
+    parser.add_argument(
+        "--poll-seconds",
+        type=float,
+        default=enrichment_config.WORKER_POLL_SECONDS,
+        help="Wait between polls when the queue is empty",
+    )
+    parser.add_argument("--once", action="store_true", help="Exit once no job is available")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    print("🔧 Enrichment worker\n")
+
+    try:
+        client = get_supabase_admin_client()
+        print("✅ Connected to Supabase\n")
+
+        worker = EnrichmentWorker(client, concurrency=args.concurrency, poll_seconds=args.poll_seconds)
+        print(f"   Worker {worker.worker_id}: {worker.concurrency} slots\n")
+        asyncio.run(run(worker, args.once))
+
+        print(f"\n✅ Worker stopped: {worker.processed} jobs done, {worker.failed} failed attempts")
+
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
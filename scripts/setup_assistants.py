@@ -11,12 +11,22 @@ Usage:
     python scripts/setup_assistants.py --create-classification
     python scripts/setup_assistants.py --update-risk <assistant_id>
     python scripts/setup_assistants.py --update-classification <assistant_id>
+
+With ENRICHMENT_ASSISTANT_SINGLE_CALL=true the enrichment services read the same instruction
+files and send them with each prompt in one chat completion, instead of running the assistant.
 """
 
 import argparse
+import sys
+from pathlib import Path
 
 from openai import OpenAI
 
+# Add parent directory to path to import from backend modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.enrichment_config import enrichment_config  # noqa: E402
+
 # Model to use for assistants
 DEFAULT_MODEL = "gpt-4.1-nano"
 
@@ -29,7 +39,7 @@ def load_instructions(file_path: str) -> str:
 
 def create_risk_assessment_assistant(client: OpenAI, model: str = DEFAULT_MODEL) -> str:
     """Create risk assessment assistant"""
-    instructions = load_instructions("prompts/assistants/risk_assessment_instructions.txt")
+    instructions = load_instructions(enrichment_config.RISK_ASSESSMENT_INSTRUCTIONS_PATH)
 
     assistant = client.beta.assistants.create(
         name="Message Risk Assessment", instructions=instructions, model=model, response_format={"type": "json_object"}
@@ -42,7 +52,7 @@ def create_risk_assessment_assistant(client: OpenAI, model: str = DEFAULT_MODEL)
 
 def create_classification_assistant(client: OpenAI, model: str = DEFAULT_MODEL) -> str:
     """Create classification assistant"""
-    instructions = load_instructions("prompts/assistants/classification_instructions.txt")
+    instructions = load_instructions(enrichment_config.CLASSIFICATION_INSTRUCTIONS_PATH)
 
     assistant = client.beta.assistants.create(
         name="Chat Classification & Quality",
@@ -58,7 +68,7 @@ def create_classification_assistant(client: OpenAI, model: str = DEFAULT_MODEL)
 
 def update_risk_assessment_assistant(client: OpenAI, assistant_id: str, model: str = DEFAULT_MODEL) -> None:
     """Update existing risk assessment assistant"""
-    instructions = load_instructions("prompts/assistants/risk_assessment_instructions.txt")
+    instructions = load_instructions(enrichment_config.RISK_ASSESSMENT_INSTRUCTIONS_PATH)
 
     client.beta.assistants.update(
         assistant_id=assistant_id, instructions=instructions, model=model, response_format={"type": "json_object"}
@@ -69,7 +79,7 @@ def update_risk_assessment_assistant(client: OpenAI, assistant_id: str, model: s
 
 def update_classification_assistant(client: OpenAI, assistant_id: str, model: str = DEFAULT_MODEL) -> None:
     """Update existing classification assistant"""
-    instructions = load_instructions("prompts/assistants/classification_instructions.txt")
+    instructions = load_instructions(enrichment_config.CLASSIFICATION_INSTRUCTIONS_PATH)
 
     client.beta.assistants.update(
         assistant_id=assistant_id, instructions=instructions, model=model, response_format={"type": "json_object"}
@@ -1,18 +1,24 @@
+from .audit_cache import AuditCache
 from .audit_service import AuditService
 from .auth_service import AuthService
+from .block_service import BlockService
+from .enrichment_cache import EnrichmentCache
 from .enrichment_service import EnrichmentService
 from .folder_service import FolderService
 from .invitation_service import InvitationService
 from .locale_service import LocaleService
+from .membership_service import MembershipService
 from .message_service import ChatService, MessageService
 from .notification_service import NotificationService
 from .onboarding_service import OnboardingService
 from .organization_service import OrganizationService
 from .permission_service import PermissionService
+from .stats_response_cache import StatsResponseCache
 from .stats_service import StatsService
 from .template_service import TemplateService
-from .block_service import BlockService
 from .template_version_service import TemplateVersionService
+from .usage_engine import UsageEngine
+from .usage_rollup_service import UsageRollupService
 from .user_service import UserService
 
 __all__ = [
@@ -25,7 +31,13 @@ __all__ = [
     "OrganizationService",
     "InvitationService",
     "UserService",
+    "StatsResponseCache",
+    "UsageEngine",
+    "UsageRollupService",
     "EnrichmentService",
+    "EnrichmentCache",
     "AuditService",
+    "AuditCache",
+    "MembershipService",
     "LocaleService",
 ]
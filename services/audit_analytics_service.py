@@ -9,6 +9,7 @@ from datetime import datetime, timedelta
 
 from supabase import Client
 
+from config.settings import settings
 from dtos.audit_dto import (
     ModelDistributionItemDTO,
     ModelDistributionResponseDTO,
@@ -23,6 +24,9 @@ from dtos.audit_dto import (
     UsageByHourDataPointDTO,
     UsageByHourResponseDTO,
 )
+from services.audit_facts_service import AuditFactsService
+from services.audit_snapshot import RISKY, AuditSnapshot, fetch_audit_rows, not_null, stream_audit_rows
+from services.membership_service import MembershipService
 
 logger = logging.getLogger(__name__)
 
@@ -42,23 +46,20 @@ def _calculate_date_range(start_date: str | None, end_date: str | None, days: in
     return start_dt, end_dt
 
 
-def _get_user_ids_for_teams(client: Client, organization_id: str, team_ids: list[str] | None) -> list[str]:
-    """Get user IDs filtered by teams, or all organization members if no teams specified"""
-    if not team_ids or len(team_ids) == 0:
-        response = (
-            client.table("user_organization_roles").select("user_id").eq("organization_id", organization_id).execute()
-        )
-        return [row["user_id"] for row in response.data] if response.data else []
-
-    # Get users in specified teams
-    from repositories.team_repository import TeamRepository
-
-    user_ids_set = set()
-    for team_id in team_ids:
-        members = TeamRepository.get_team_members(client, team_id)
-        user_ids_set.update([m.user_id for m in members])
-
-    return list(user_ids_set)
+async def _scope(
+    client: Client,
+    organization_id: str,
+    start_date: str | None,
+    end_date: str | None,
+    days: int,
+    team_ids: list[str] | None,
+    snapshot: AuditSnapshot | None,
+) -> tuple[datetime, datetime, list[str]]:
+    """Date range and user IDs of a request, the snapshot's when it is served from one"""
+    if snapshot is not None:
+        return snapshot.start_dt, snapshot.end_dt, snapshot.user_ids
+    start_dt, end_dt = _calculate_date_range(start_date, end_date, days)
+    return start_dt, end_dt, await MembershipService.get_user_ids(client, organization_id, team_ids)
 
 
 class AuditAnalyticsService:
@@ -72,10 +73,12 @@ class AuditAnalyticsService:
         end_date: str | None,
         days: int,
         team_ids: list[str] | None,
+        snapshot: AuditSnapshot | None = None,
     ) -> ModelDistributionResponseDTO:
         """Get distribution of AI models being used"""
-        start_dt, end_dt = _calculate_date_range(start_date, end_date, days)
-        user_ids = _get_user_ids_for_teams(client, organization_id, team_ids)
+        start_dt, end_dt, user_ids = await _scope(
+            client, organization_id, start_date, end_date, days, team_ids, snapshot
+        )
 
         if not user_ids:
             return ModelDistributionResponseDTO(
@@ -87,19 +90,25 @@ class AuditAnalyticsService:
                 generated_at=datetime.now(),
             )
 
-        # Fetch messages with model information
-        response = (
-            client.table("messages")
-            .select("model")
-            .in_("user_id", user_ids)
-            .gte("created_at", start_dt.isoformat())
-            .lte("created_at", end_dt.isoformat())
-            .execute()
+        if snapshot is None and settings.AUDIT_FACTS_READS:
+            return await AuditFactsService.get_model_distribution(
+                client, organization_id, start_dt, end_dt, team_ids, user_ids
+            )
+
+        # Stream messages with model information
+        rows = stream_audit_rows(
+            client,
+            snapshot,
+            "messages",
+            "model",
+            user_ids,
+            start=start_dt,
+            end=end_dt,
         )
 
         # Count models
         model_counts = Counter()
-        for row in response.data or []:
+        async for row in rows:
             model = row.get("model") or "Unknown"
             model_counts[model] += 1
 
@@ -130,10 +139,12 @@ class AuditAnalyticsService:
         end_date: str | None,
         days: int,
         team_ids: list[str] | None,
+        snapshot: AuditSnapshot | None = None,
     ) -> ProviderDistributionResponseDTO:
         """Get distribution of chat providers being used"""
-        start_dt, end_dt = _calculate_date_range(start_date, end_date, days)
-        user_ids = _get_user_ids_for_teams(client, organization_id, team_ids)
+        start_dt, end_dt, user_ids = await _scope(
+            client, organization_id, start_date, end_date, days, team_ids, snapshot
+        )
 
         if not user_ids:
             return ProviderDistributionResponseDTO(
@@ -146,23 +157,14 @@ class AuditAnalyticsService:
             )
 
         # Fetch chats with provider information
-        chats_result = (
-            client.table("chats")
-            .select("chat_provider_id, provider_name")
-            .in_("user_id", user_ids)
-            .gte("created_at", start_dt.isoformat())
-            .lte("created_at", end_dt.isoformat())
-            .execute()
-        )
-
-        # Fetch messages to count messages per provider
-        messages_result = (
-            client.table("messages")
-            .select("id, chat_provider_id")
-            .in_("user_id", user_ids)
-            .gte("created_at", start_dt.isoformat())
-            .lte("created_at", end_dt.isoformat())
-            .execute()
+        chat_rows = await fetch_audit_rows(
+            client,
+            snapshot,
+            "chats",
+            "chat_provider_id, provider_name",
+            user_ids,
+            start=start_dt,
+            end=end_dt,
         )
 
         # Calculate provider distribution
@@ -170,15 +172,24 @@ class AuditAnalyticsService:
         chat_provider_to_name = {}
 
         # Count chats and build mapping
-        for row in chats_result.data or []:
+        for row in chat_rows:
             provider_name = row.get("provider_name") or "Unknown"
             chat_provider_id = row.get("chat_provider_id")
             provider_counts[provider_name]["chats"] += 1
             if chat_provider_id:
                 chat_provider_to_name[chat_provider_id] = provider_name
 
-        # Count messages per provider
-        for row in messages_result.data or []:
+        # Count messages per provider, streaming messages
+        message_rows = stream_audit_rows(
+            client,
+            snapshot,
+            "messages",
+            "id, chat_provider_id",
+            user_ids,
+            start=start_dt,
+            end=end_dt,
+        )
+        async for row in message_rows:
             chat_provider_id = row.get("chat_provider_id")
             if chat_provider_id and chat_provider_id in chat_provider_to_name:
                 provider = chat_provider_to_name[chat_provider_id]
@@ -216,10 +227,12 @@ class AuditAnalyticsService:
         days: int,
         team_ids: list[str] | None,
         granularity: str,
+        snapshot: AuditSnapshot | None = None,
     ) -> QualityMetricsTimelineResponseDTO:
         """Get quality score trends over time with all dimensions"""
-        start_dt, end_dt = _calculate_date_range(start_date, end_date, days)
-        user_ids = _get_user_ids_for_teams(client, organization_id, team_ids)
+        start_dt, end_dt, user_ids = await _scope(
+            client, organization_id, start_date, end_date, days, team_ids, snapshot
+        )
 
         if not user_ids:
             return QualityMetricsTimelineResponseDTO(
@@ -232,14 +245,15 @@ class AuditAnalyticsService:
                 generated_at=datetime.now(),
             )
 
-        # Fetch quality data
-        response = (
-            client.table("enriched_chats")
-            .select("created_at, quality_score, clarity_score, context_score, specificity_score, actionability_score")
-            .in_("user_id", user_ids)
-            .gte("created_at", start_dt.isoformat())
-            .lte("created_at", end_dt.isoformat())
-            .execute()
+        # Stream quality data
+        rows = stream_audit_rows(
+            client,
+            snapshot,
+            "enriched_chats",
+            "created_at, quality_score, clarity_score, context_score, specificity_score, actionability_score",
+            user_ids,
+            start=start_dt,
+            end=end_dt,
         )
 
         # Group by date
@@ -255,7 +269,7 @@ class AuditAnalyticsService:
 
         all_scores = defaultdict(list)
 
-        for row in response.data or []:
+        async for row in rows:
             date = row["created_at"].split("T")[0]
 
             if row.get("quality_score") is not None:
@@ -328,10 +342,12 @@ class AuditAnalyticsService:
         end_date: str | None,
         days: int,
         team_ids: list[str] | None,
+        snapshot: AuditSnapshot | None = None,
     ) -> QualityDistributionResponseDTO:
         """Get distribution of quality scores in bins"""
-        start_dt, end_dt = _calculate_date_range(start_date, end_date, days)
-        user_ids = _get_user_ids_for_teams(client, organization_id, team_ids)
+        start_dt, end_dt, user_ids = await _scope(
+            client, organization_id, start_date, end_date, days, team_ids, snapshot
+        )
 
         if not user_ids:
             return QualityDistributionResponseDTO(
@@ -344,22 +360,23 @@ class AuditAnalyticsService:
                 generated_at=datetime.now(),
             )
 
-        # Fetch quality scores
-        response = (
-            client.table("enriched_chats")
-            .select("quality_score")
-            .in_("user_id", user_ids)
-            .gte("created_at", start_dt.isoformat())
-            .lte("created_at", end_dt.isoformat())
-            .not_.is_("quality_score", "null")
-            .execute()
+        # Stream quality scores
+        rows = stream_audit_rows(
+            client,
+            snapshot,
+            "enriched_chats",
+            "quality_score",
+            user_ids,
+            row_filter=not_null("quality_score"),
+            start=start_dt,
+            end=end_dt,
         )
 
         # Bin the scores
         bins_data = {"0-20": 0, "21-40": 0, "41-60": 0, "61-80": 0, "81-100": 0}
 
         scores = []
-        for row in response.data or []:
+        async for row in rows:
             score = row.get("quality_score")
             if score is not None:
                 scores.append(score)
@@ -403,10 +420,12 @@ class AuditAnalyticsService:
         end_date: str | None,
         days: int,
         team_ids: list[str] | None,
+        snapshot: AuditSnapshot | None = None,
     ) -> UsageByHourResponseDTO:
         """Get usage patterns by hour of day"""
-        start_dt, end_dt = _calculate_date_range(start_date, end_date, days)
-        user_ids = _get_user_ids_for_teams(client, organization_id, team_ids)
+        start_dt, end_dt, user_ids = await _scope(
+            client, organization_id, start_date, end_date, days, team_ids, snapshot
+        )
 
         if not user_ids:
             return UsageByHourResponseDTO(
@@ -419,20 +438,26 @@ class AuditAnalyticsService:
                 generated_at=datetime.now(),
             )
 
-        # Fetch messages
-        response = (
-            client.table("messages")
-            .select("created_at")
-            .in_("user_id", user_ids)
-            .gte("created_at", start_dt.isoformat())
-            .lte("created_at", end_dt.isoformat())
-            .execute()
+        if snapshot is None and settings.AUDIT_FACTS_READS:
+            return await AuditFactsService.get_usage_by_hour(
+                client, organization_id, start_dt, end_dt, team_ids, user_ids
+            )
+
+        # Stream messages
+        rows = stream_audit_rows(
+            client,
+            snapshot,
+            "messages",
+            "created_at",
+            user_ids,
+            start=start_dt,
+            end=end_dt,
         )
 
         # Count by hour and weekday/weekend
         hour_counts = defaultdict(lambda: {"weekday": 0, "weekend": 0})
 
-        for row in response.data or []:
+        async for row in rows:
             dt = datetime.fromisoformat(row["created_at"].replace("Z", "+00:00"))
             hour = dt.hour
             is_weekend = dt.weekday() >= 5  # Saturday = 5, Sunday = 6
@@ -480,10 +505,12 @@ class AuditAnalyticsService:
         end_date: str | None,
         days: int,
         team_ids: list[str] | None,
+        snapshot: AuditSnapshot | None = None,
     ) -> RiskCategoriesResponseDTO:
         """Get breakdown of risk categories"""
-        start_dt, end_dt = _calculate_date_range(start_date, end_date, days)
-        user_ids = _get_user_ids_for_teams(client, organization_id, team_ids)
+        start_dt, end_dt, user_ids = await _scope(
+            client, organization_id, start_date, end_date, days, team_ids, snapshot
+        )
 
         if not user_ids:
             return RiskCategoriesResponseDTO(
@@ -495,22 +522,25 @@ class AuditAnalyticsService:
                 generated_at=datetime.now(),
             )
 
-        # Fetch risk data
-        response = (
-            client.table("enriched_messages")
-            .select("risk_categories, overall_risk_level")
-            .in_("user_id", user_ids)
-            .gte("created_at", start_dt.isoformat())
-            .lte("created_at", end_dt.isoformat())
-            .neq("overall_risk_level", "none")
-            .execute()
+        # Stream risk data
+        rows = stream_audit_rows(
+            client,
+            snapshot,
+            "enriched_messages",
+            "risk_categories, overall_risk_level",
+            user_ids,
+            row_filter=RISKY,
+            start=start_dt,
+            end=end_dt,
         )
 
         # Parse risk categories
         category_counts = defaultdict(int)
         category_severity = defaultdict(lambda: defaultdict(int))
+        total_risky_messages = 0
 
-        for row in response.data or []:
+        async for row in rows:
+            total_risky_messages += 1
             risk_categories = row.get("risk_categories", {})
             risk_level = row.get("overall_risk_level", "none")
 
@@ -539,6 +569,6 @@ class AuditAnalyticsService:
             date_range={"start_date": start_dt.isoformat(), "end_date": end_dt.isoformat()},
             team_filter=team_ids,
             categories=categories,
-            total_risky_messages=len(response.data or []),
+            total_risky_messages=total_risky_messages,
             generated_at=datetime.now(),
         )
@@ -0,0 +1,166 @@
+"""
+Organization audit result cache
+
+Audit results are keyed by (organization, generation, requesting user, path, query): the query
+carries the team filter, date range and granularity, and the requesting user is part of the key
+because audits are read through their RLS-scoped client. Entries live in an in-process LRU tier
+and, once a shared backend is configured (see SharedCacheBackend), in a tier every worker reads.
+
+Invalidation moves an organization to a new generation instead of deleting keys: enrichment
+writes invalidate every organization of the enriched user, team and member changes their
+organization. With a shared backend the generation lives there as well, so an invalidation on
+one worker reaches all of them. Ranges that ended before today only change through late
+enrichment, so with a shared backend they are kept far longer than ranges ending today. Without
+one, enrichments saved by other instances or the enrichment worker are never seen here: every
+range gets the short TTL.
+"""
+
+import logging
+import uuid
+from collections.abc import Awaitable, Callable
+from datetime import UTC, date, datetime
+from typing import Protocol, TypeVar
+
+from fastapi import Request
+from pydantic import BaseModel
+from supabase import Client
+
+from config.settings import settings
+from core.executor import blocking_executor
+from repositories.audit_repository import AuditRepository
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+DTO = TypeVar("DTO", bound=BaseModel)
+
+INITIAL_GENERATION = "0"
+
+
+class SharedCacheBackend(Protocol):
+    """Cache shared by every worker (Redis or similar); values are JSON strings"""
+
+    def get(self, key: str) -> str | None: ...
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None: ...
+
+
+_local = TTLCache(settings.AUDIT_CACHE_SIZE, settings.AUDIT_CACHE_CLOSED_TTL_SECONDS)
+_generations: dict[str, str] = {}
+_user_organizations = TTLCache(settings.AUDIT_CACHE_SIZE, settings.AUDIT_CACHE_TTL_SECONDS)
+_shared: SharedCacheBackend | None = None
+
+
+def _generation_key(organization_id: str) -> str:
+    return f"audit:generation:{organization_id}"
+
+
+def _is_closed_range(end_date: str | None) -> bool:
+    """True when an explicit end date lies before today (UTC)"""
+    if not end_date:
+        return False
+    try:
+        return date.fromisoformat(end_date[:10]) < datetime.now(UTC).date()
+    except ValueError:
+        return False
+
+
+class AuditCache:
+    @staticmethod
+    def configure_shared(backend: SharedCacheBackend | None) -> None:
+        """Plug in (or remove, with None) the shared tier"""
+        global _shared
+        _shared = backend
+
+    @staticmethod
+    async def serve(
+        request: Request, organization_id: str, dto_type: type[DTO], compute: Callable[[], Awaitable[DTO]]
+    ) -> DTO:
+        """Return the cached audit result for this request, or compute and cache it"""
+        if not settings.AUDIT_CACHE:
+            return await compute()
+
+        generation = await AuditCache._generation(organization_id)
+        query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+        key = f"audit:{organization_id}:{generation}:{request.state.user_id}:{request.url.path}?{query}"
+
+        result = _local.get(key)
+        if result is not None:
+            return result
+
+        if _shared is not None:
+            try:
+                raw = await blocking_executor.run(_shared.get, key)
+                if raw is not None:
+                    result = dto_type.model_validate_json(raw)
+            except Exception as e:
+                logger.warning(f"Shared audit cache read failed for {organization_id}: {str(e)}")
+
+        # Only a shared generation sees late enrichment saved by other processes
+        closed = _shared is not None and _is_closed_range(request.query_params.get("end_date"))
+        ttl = settings.AUDIT_CACHE_CLOSED_TTL_SECONDS if closed else settings.AUDIT_CACHE_TTL_SECONDS
+        if result is None:
+            result = await compute()
+            if _shared is not None:
+                try:
+                    await blocking_executor.run(_shared.set, key, result.model_dump_json(), ttl)
+                except Exception as e:
+                    logger.warning(f"Shared audit cache write failed for {organization_id}: {str(e)}")
+
+        _local.set(key, result, ttl)
+        return result
+
+    @staticmethod
+    async def _generation(organization_id: str) -> str:
+        if _shared is not None:
+            try:
+                generation = await blocking_executor.run(_shared.get, _generation_key(organization_id))
+                _generations[organization_id] = generation or INITIAL_GENERATION
+            except Exception as e:
+                logger.warning(f"Shared audit cache generation unavailable for {organization_id}: {str(e)}")
+        return _generations.get(organization_id, INITIAL_GENERATION)
+
+    @staticmethod
+    def invalidate_organization(organization_id: str) -> None:
+        """Move an organization to a new generation, its cached results are never read again"""
+        generation = uuid.uuid4().hex[:12]
+        _generations[organization_id] = generation
+        _local.delete_where(lambda key: key.startswith(f"audit:{organization_id}:"))
+        if _shared is not None:
+            try:
+                # Outlives every entry of the previous generation
+                ttl = 2 * settings.AUDIT_CACHE_CLOSED_TTL_SECONDS
+                _shared.set(_generation_key(organization_id), generation, ttl)
+            except Exception as e:
+                logger.error(f"Failed to invalidate shared audit cache for {organization_id}: {str(e)}")
+
+    @staticmethod
+    def invalidate_user(client: Client, user_id: str) -> None:
+        """
+        Invalidate every organization of a user after their enrichment changed
+        Failures are logged, never raised: the enrichment is already saved, and entries expire on their own.
+        """
+        if not settings.AUDIT_CACHE:
+            return
+        try:
+            organization_ids = _user_organizations.get(user_id)
+            if organization_ids is None:
+                organization_ids = AuditRepository.get_user_organization_ids(client, user_id)
+                _user_organizations.set(user_id, organization_ids)
+            for organization_id in organization_ids:
+                AuditCache.invalidate_organization(organization_id)
+        except Exception as e:
+            logger.error(f"Failed to invalidate audit cache for user {user_id}: {str(e)}")
+
+    @staticmethod
+    def invalidate_membership(organization_id: str, user_id: str | None = None) -> None:
+        """Invalidate an organization after a team or member change (and forget the user's organizations)"""
+        if user_id:
+            _user_organizations.delete(user_id)
+        AuditCache.invalidate_organization(organization_id)
+
+    @staticmethod
+    def clear_cache() -> None:
+        _local.clear()
+        _generations.clear()
+        _user_organizations.clear()
@@ -0,0 +1,122 @@
+"""
+Audit Dashboard Service - Several dashboard panels from one request
+Members and rows are read once into an AuditSnapshot, then each requested panel runs the
+aggregation of its own endpoint over the snapshot
+"""
+
+import logging
+from datetime import datetime, timedelta
+
+from supabase import Client
+
+from dtos.audit_dto import AuditDashboardResponseDTO
+from services.audit_analytics_service import AuditAnalyticsService
+from services.audit_snapshot import AuditSnapshot
+from services.audit_timeseries_service import AuditTimeSeriesService
+
+logger = logging.getLogger(__name__)
+
+# Panel -> tables its aggregation reads
+PANEL_TABLES: dict[str, tuple[str, ...]] = {
+    "adoption_curve": ("chats", "messages"),
+    "risk_timeline": ("enriched_messages",),
+    "quality_timeline": ("enriched_chats",),
+    "theme_distribution": ("enriched_chats",),
+    "intent_distribution": ("enriched_chats",),
+    "model_distribution": ("messages",),
+    "provider_distribution": ("chats", "messages"),
+    "quality_metrics_timeline": ("enriched_chats",),
+    "quality_distribution": ("enriched_chats",),
+    "usage_by_hour": ("messages",),
+    "risk_categories": ("enriched_messages",),
+}
+
+
+def _calculate_date_range(start_date: str | None, end_date: str | None, days: int):
+    """Calculate start and end datetime from parameters"""
+    if end_date:
+        end_dt = datetime.fromisoformat(end_date)
+    else:
+        end_dt = datetime.now()
+
+    if start_date:
+        start_dt = datetime.fromisoformat(start_date)
+    else:
+        start_dt = end_dt - timedelta(days=days)
+
+    return start_dt, end_dt
+
+
+class AuditDashboardService:
+    """Service for composite dashboard requests"""
+
+    @staticmethod
+    async def get_dashboard(
+        client: Client,
+        organization_id: str,
+        panels: list[str],
+        start_date: str | None,
+        end_date: str | None,
+        days: int,
+        team_ids: list[str] | None,
+        granularity: str = "day",
+        view_mode: str = "chats",
+        top_n: int = 10,
+    ) -> AuditDashboardResponseDTO:
+        """
+        Compute the requested panels from one snapshot of the organization's members and rows
+        Raises ValueError for an empty or unknown panel list
+        """
+        requested = list(dict.fromkeys(panels))
+        unknown = [panel for panel in requested if panel not in PANEL_TABLES]
+        if not requested or unknown:
+            raise ValueError(
+                f"Unknown dashboard panels: {', '.join(unknown)}" if unknown else "At least one panel is required"
+            )
+
+        start_dt, end_dt = _calculate_date_range(start_date, end_date, days)
+        snapshot = await AuditSnapshot.load(
+            client,
+            organization_id,
+            start_dt,
+            end_dt,
+            team_ids,
+            [table for panel in requested for table in PANEL_TABLES[panel]],
+        )
+
+        scope = (client, organization_id, start_date, end_date, days, team_ids)
+        computations = {
+            "adoption_curve": lambda: AuditTimeSeriesService.get_adoption_curve(
+                *scope, granularity, view_mode, snapshot=snapshot
+            ),
+            "risk_timeline": lambda: AuditTimeSeriesService.get_risk_timeline(*scope, granularity, snapshot=snapshot),
+            "quality_timeline": lambda: AuditTimeSeriesService.get_quality_timeline(
+                *scope, granularity, snapshot=snapshot
+            ),
+            "theme_distribution": lambda: AuditTimeSeriesService.get_theme_distribution(
+                *scope, top_n, snapshot=snapshot
+            ),
+            "intent_distribution": lambda: AuditTimeSeriesService.get_intent_distribution(
+                *scope, top_n, snapshot=snapshot
+            ),
+            "model_distribution": lambda: AuditAnalyticsService.get_model_distribution(*scope, snapshot=snapshot),
+            "provider_distribution": lambda: AuditAnalyticsService.get_provider_distribution(*scope, snapshot=snapshot),
+            "quality_metrics_timeline": lambda: AuditAnalyticsService.get_quality_timeline(
+                *scope, granularity, snapshot=snapshot
+            ),
+            "quality_distribution": lambda: AuditAnalyticsService.get_quality_distribution(*scope, snapshot=snapshot),
+            "usage_by_hour": lambda: AuditAnalyticsService.get_usage_by_hour(*scope, snapshot=snapshot),
+            "risk_categories": lambda: AuditAnalyticsService.get_risk_categories(*scope, snapshot=snapshot),
+        }
+
+        # Panels only aggregate in memory here, one after the other
+        results = {panel: await computations[panel]() for panel in requested}
+
+        return AuditDashboardResponseDTO(
+            organization_id=organization_id,
+            date_range={"start_date": start_dt.isoformat(), "end_date": end_dt.isoformat()},
+            team_filter=team_ids,
+            panels=requested,
+            generated_at=datetime.now(),
+            **results,
+        )
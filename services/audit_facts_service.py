@@ -0,0 +1,578 @@
+"""
+Audit Facts Service - Daily audit facts (user_audit_daily) and the panels served from them
+
+Ingest and enrichment add each saved row to its user's fact row for the day. With AUDIT_FACTS_READS,
+the time-series panels sum the fact rows of the requested members for the closed days fully inside
+the range, and only scan raw rows for the partial first day and for today; every other
+aggregation is the one of the raw-scan panel.
+"""
+
+import logging
+from collections import Counter, defaultdict
+from datetime import UTC, date, datetime, time, timedelta
+
+from supabase import Client
+
+from config.settings import settings
+from core.executor import blocking_executor
+from domains.entities.audit_entities import AuditDay
+from domains.entities.enrichment_entities import EnrichedChat, EnrichedMessage
+from dtos import ChatResponseDTO, MessageResponseDTO
+from dtos.audit_dto import (
+    AdoptionCurveDataDTO,
+    AdoptionCurveResponseDTO,
+    IntentDistributionDTO,
+    IntentTimelineResponseDTO,
+    ModelDistributionItemDTO,
+    ModelDistributionResponseDTO,
+    ProviderDistributionDTO,
+    QualityTimelineDataDTO,
+    QualityTimelineDataPointDTO,
+    QualityTimelineResponseDTO,
+    RiskTimelineDataDTO,
+    RiskTimelineDataPointDTO,
+    RiskTimelineResponseDTO,
+    ThemeDistributionDTO,
+    ThemeTimelineResponseDTO,
+    TimeSeriesDataPointDTO,
+    UsageByHourDataPointDTO,
+    UsageByHourResponseDTO,
+)
+from repositories.audit_facts_repository import AuditFactsRepository
+from repositories.bulk_reader import fetch_all_rows_in
+from services.audit_snapshot import AuditSnapshot
+from services.membership_service import MembershipService
+from utils.audit_facts import build_audit_days
+from utils.timestamps import HOURS_PER_DAY
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_FACT_FIELDS = {"user_id", "created_at", "chat_provider_id", "model"}
+CHAT_FACT_FIELDS = {"user_id", "created_at", "chat_provider_id", "provider_name"}
+
+
+def _period(day: str, granularity: str) -> date:
+    """Timeline bucket of a fact day: the day, the Monday of its week or the first day of its month"""
+    bucket = date.fromisoformat(day)
+    if granularity == "week":
+        return bucket - timedelta(days=bucket.weekday())
+    if granularity == "month":
+        return bucket.replace(day=1)
+    return bucket
+
+
+def _sum(counters) -> Counter:
+    total = Counter()
+    for counter in counters:
+        total.update(counter)
+    return total
+
+
+def _quality_point(day: str, histogram: Counter) -> QualityTimelineDataPointDTO:
+    """Average and median (upper middle, like sorted(scores)[len // 2]) of a score histogram"""
+    scores = sorted((int(score), count) for score, count in histogram.items())
+    total = sum(count for _, count in scores)
+    remaining = total // 2
+    median = None
+    for score, count in scores:
+        remaining -= count
+        if remaining < 0:
+            median = score
+            break
+    return QualityTimelineDataPointDTO(
+        date=day,
+        average_score=sum(score * count for score, count in scores) / total,
+        median_score=median,
+        total_rated=total,
+    )
+
+
+def _timestamp(value: datetime | str | None) -> str | None:
+    """Saved entities carry created_at as returned by PostgREST (a string), or a datetime when built in code"""
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+async def _raw_days(
+    client: Client,
+    organization_id: str,
+    start_dt: datetime,
+    end_dt: datetime,
+    team_ids: list[str] | None,
+    tables: tuple[str, ...],
+) -> list[AuditDay]:
+    """Fact rows of [start_dt, end_dt] computed from raw rows"""
+    snapshot = await AuditSnapshot.load(client, organization_id, start_dt, end_dt, team_ids, tables)
+    rows = snapshot.rows
+    chat_providers = {}
+    if "chats" in rows and rows.get("messages"):
+        chat_providers = {chat["chat_provider_id"]: chat.get("provider_name") for chat in rows["chats"]}
+        # Messages of chats created before the range still count under their chat's provider, as on ingest
+        missing = {msg.get("chat_provider_id") for msg in rows["messages"]} - chat_providers.keys() - {None}
+        if missing:
+            for chat in await fetch_all_rows_in(
+                client, "chats", "chat_provider_id, provider_name", "chat_provider_id", missing
+            ):
+                chat_providers[chat["chat_provider_id"]] = chat.get("provider_name")
+
+    return [
+        AuditDay(**row)
+        for row in build_audit_days(
+            rows.get("chats", ()),
+            rows.get("messages", ()),
+            rows.get("enriched_chats", ()),
+            rows.get("enriched_messages", ()),
+            chat_providers,
+        )
+    ]
+
+
+class AuditFactsService:
+    """Daily audit facts: incremental writes and fact-backed time-series panels"""
+
+    @staticmethod
+    def record_batch(
+        client: Client,
+        user_id: str,
+        saved_messages: list[MessageResponseDTO],
+        saved_chats: list[ChatResponseDTO],
+        chat_providers: dict[str, str | None],
+    ) -> None:
+        """
+        Add a saved ingest batch to user_audit_daily
+        Failures are logged, never raised: the batch is already saved, and the rebuild script fixes the counters.
+        """
+        if not settings.AUDIT_FACTS_WRITES or not (saved_messages or saved_chats):
+            return
+
+        try:
+            rows = build_audit_days(
+                chats=[chat.model_dump(include=CHAT_FACT_FIELDS) for chat in saved_chats],
+                messages=[msg.model_dump(include=MESSAGE_FACT_FIELDS) for msg in saved_messages],
+                chat_providers=chat_providers,
+            )
+            AuditFactsRepository.increment_days(client, rows)
+        except Exception as e:
+            logger.error(f"Failed to update audit facts for user {user_id}: {str(e)}")
+
+    @staticmethod
+    def record_enriched_chat(client: Client, enriched_chat: EnrichedChat) -> None:
+        """Add a saved enriched chat to user_audit_daily (failures are logged, never raised)"""
+        if not settings.AUDIT_FACTS_WRITES:
+            return
+
+        try:
+            row = {
+                "user_id": enriched_chat.user_id,
+                "created_at": _timestamp(enriched_chat.created_at),
+                "quality_score": enriched_chat.quality_metrics.quality_score if enriched_chat.quality_metrics else None,
+                "theme": enriched_chat.theme,
+                "intent": enriched_chat.intent,
+            }
+            AuditFactsRepository.increment_days(client, build_audit_days(enriched_chats=[row]))
+        except Exception as e:
+            logger.error(f"Failed to update audit facts for user {enriched_chat.user_id}: {str(e)}")
+
+    @staticmethod
+    def record_enriched_message(client: Client, enriched_message: EnrichedMessage) -> None:
+        """Add a saved enriched message to user_audit_daily (failures are logged, never raised)"""
+        if not settings.AUDIT_FACTS_WRITES:
+            return
+
+        try:
+            row = {
+                "user_id": enriched_message.user_id,
+                "created_at": _timestamp(enriched_message.created_at),
+                "overall_risk_level": enriched_message.overall_risk_level,
+                "risk_categories": {
+                    category: {"detected": detail.detected}
+                    for category, detail in enriched_message.risk_categories.items()
+                },
+            }
+            AuditFactsRepository.increment_days(client, build_audit_days(enriched_messages=[row]))
+        except Exception as e:
+            logger.error(f"Failed to update audit facts for user {enriched_message.user_id}: {str(e)}")
+
+    @staticmethod
+    def fact_days(start_dt: datetime, end_dt: datetime) -> tuple[date, date] | None:
+        """First and last closed (UTC) day fully inside [start_dt, end_dt]"""
+        first_day = start_dt.date() if start_dt.time() == time.min else start_dt.date() + timedelta(days=1)
+        last_day = min(end_dt.date(), datetime.now(UTC).date()) - timedelta(days=1)
+        return (first_day, last_day) if first_day <= last_day else None
+
+    @staticmethod
+    async def load_days(
+        client: Client,
+        organization_id: str,
+        start_dt: datetime,
+        end_dt: datetime,
+        team_ids: list[str] | None,
+        user_ids: list[str],
+        tables: tuple[str, ...],
+    ) -> list[AuditDay]:
+        """
+        Fact rows of the members over [start_dt, end_dt]: stored rows for closed days, raw rows
+        (of the given tables) for the partial first day and from the day after the last closed one
+        """
+        fact_days = AuditFactsService.fact_days(start_dt, end_dt)
+        if fact_days is None:
+            return await _raw_days(client, organization_id, start_dt, end_dt, team_ids, tables)
+
+        first_day, last_day = fact_days
+        # Members' days read with the requester's client: user_audit_daily is readable like the tables it summarizes
+        days = await blocking_executor.run(AuditFactsRepository.get_days, client, user_ids, first_day, last_day)
+
+        first_midnight = datetime.combine(first_day, time.min, start_dt.tzinfo)
+        if start_dt < first_midnight:
+            # The first day's raw rows end at its midnight inclusive: rows of first_day are dropped
+            head = await _raw_days(client, organization_id, start_dt, first_midnight, team_ids, tables)
+            days += [day for day in head if day.day < first_day.isoformat()]
+
+        tail_start = datetime.combine(last_day + timedelta(days=1), time.min, end_dt.tzinfo)
+        if tail_start <= end_dt:
+            days += await _raw_days(client, organization_id, tail_start, end_dt, team_ids, tables)
+        return days
+
+    @staticmethod
+    async def _team_members(
+        client: Client, organization_id: str, team_ids: list[str]
+    ) -> tuple[dict, dict[str, list[str]]]:
+        """Organization teams by ID and member IDs of the requested ones"""
+        teams = {team.id: team for team in await MembershipService.get_teams(client, organization_id)}
+        return teams, await MembershipService.get_team_member_ids_map(client, [t for t in team_ids if t in teams])
+
+    @staticmethod
+    async def get_adoption_curve(
+        client: Client,
+        organization_id: str,
+        start_dt: datetime,
+        end_dt: datetime,
+        team_ids: list[str] | None,
+        user_ids: list[str],
+        granularity: str,
+        view_mode: str = "chats",
+    ) -> AdoptionCurveResponseDTO:
+        """Adoption curve from the daily facts (same response as AuditTimeSeriesService.get_adoption_curve)"""
+        days = await AuditFactsService.load_days(
+            client, organization_id, start_dt, end_dt, team_ids, user_ids, ("chats", "messages")
+        )
+
+        # Provider distribution
+        provider_counts = defaultdict(lambda: {"chats": 0, "messages": 0})
+        for day in days:
+            for provider, count in day.chats_by_provider.items():
+                provider_counts[provider]["chats"] += count
+            for provider, count in day.messages_by_provider.items():
+                provider_counts[provider]["messages"] += count
+
+        total_chats_for_percentage = sum(p["chats"] for p in provider_counts.values())
+        provider_distribution = [
+            ProviderDistributionDTO(
+                provider_name=provider,
+                chat_count=counts["chats"],
+                message_count=counts["messages"],
+                percentage=(counts["chats"] / total_chats_for_percentage * 100)
+                if total_chats_for_percentage > 0
+                else 0.0,
+            )
+            for provider, counts in sorted(provider_counts.items(), key=lambda x: x[1]["chats"], reverse=True)
+        ]
+
+        total_messages = sum(day.messages for day in days)
+        total_chats = sum(day.chats for day in days)
+        average_messages_per_chat = total_messages / total_chats if total_chats > 0 else 0.0
+
+        # Group by period, counting messages or chats depending on the view mode
+        count_messages = view_mode == "messages"
+        date_counts = defaultdict(int)
+        date_by_provider = defaultdict(lambda: defaultdict(int))
+        user_date_counts = defaultdict(lambda: defaultdict(int))
+        for day in days:
+            period = _period(day.day, granularity)
+            count = day.messages if count_messages else day.chats
+            if count:
+                date_counts[period] += count
+                user_date_counts[day.user_id][period] += count
+            by_provider = day.messages_by_provider if count_messages else day.chats_by_provider
+            for provider, provider_count in by_provider.items():
+                date_by_provider[provider][period] += provider_count
+
+        overall_timeline = [
+            TimeSeriesDataPointDTO(date=str(period), value=float(count))
+            for period, count in sorted(date_counts.items())
+        ]
+
+        by_provider = {}
+        if view_mode == "providers":
+            for provider, date_data in date_by_provider.items():
+                by_provider[provider] = [
+                    TimeSeriesDataPointDTO(date=str(period), value=float(count))
+                    for period, count in sorted(date_data.items())
+                ]
+
+        by_model = dict(_sum(day.messages_by_model for day in days)) if view_mode == "models" else None
+
+        by_team = {}
+        if team_ids:
+            teams, members_map = await AuditFactsService._team_members(client, organization_id, team_ids)
+            for team_id, member_ids in members_map.items():
+                if not member_ids:
+                    continue
+                team_date_counts = _sum(user_date_counts[member_id] for member_id in set(member_ids))
+                by_team[teams[team_id].name] = [
+                    TimeSeriesDataPointDTO(date=str(period), value=float(count))
+                    for period, count in sorted(team_date_counts.items())
+                ]
+
+        total_prompts = sum(point.value for point in overall_timeline)
+        days_in_period = (end_dt - start_dt).days + 1
+        average_daily_prompts = total_prompts / days_in_period if days_in_period > 0 else 0.0
+
+        return AdoptionCurveResponseDTO(
+            organization_id=organization_id,
+            date_range={"start_date": start_dt.isoformat(), "end_date": end_dt.isoformat()},
+            granularity=granularity,
+            team_filter=team_ids,
+            view_mode=view_mode,
+            data=AdoptionCurveDataDTO(
+                overall=overall_timeline,
+                by_team=by_team,
+                total_prompts=int(total_messages) if count_messages else int(total_prompts),
+                total_chats=total_chats,
+                average_daily_prompts=average_daily_prompts,
+                average_messages_per_chat=average_messages_per_chat,
+                provider_distribution=provider_distribution,
+                by_provider=by_provider if by_provider else None,
+                by_model=by_model,
+            ),
+            generated_at=datetime.now(),
+        )
+
+    @staticmethod
+    async def get_risk_timeline(
+        client: Client,
+        organization_id: str,
+        start_dt: datetime,
+        end_dt: datetime,
+        team_ids: list[str] | None,
+        user_ids: list[str],
+        granularity: str,
+    ) -> RiskTimelineResponseDTO:
+        """Risk timeline from the daily facts (same response as AuditTimeSeriesService.get_risk_timeline)"""
+        days = await AuditFactsService.load_days(
+            client, organization_id, start_dt, end_dt, team_ids, user_ids, ("enriched_messages",)
+        )
+
+        timeline_data = defaultdict(lambda: {"total": 0, "by_risk_level": Counter(), "by_risk_type": Counter()})
+        for day in days:
+            if not day.risky_messages:
+                continue
+            timeline_data[day.day]["total"] += day.risky_messages
+            timeline_data[day.day]["by_risk_level"].update(day.risk_levels)
+            timeline_data[day.day]["by_risk_type"].update(day.risk_types)
+
+        timeline = [
+            RiskTimelineDataPointDTO(
+                date=day,
+                total_risky_messages=data["total"],
+                by_risk_level=dict(data["by_risk_level"]),
+                by_risk_type=dict(data["by_risk_type"]),
+            )
+            for day, data in sorted(timeline_data.items())
+        ]
+
+        return RiskTimelineResponseDTO(
+            organization_id=organization_id,
+            date_range={"start_date": start_dt.isoformat(), "end_date": end_dt.isoformat()},
+            granularity=granularity,
+            team_filter=team_ids,
+            data=RiskTimelineDataDTO(
+                timeline=timeline,
+                total_risky_messages=sum(day.risky_messages for day in days),
+                risk_level_totals=dict(_sum(day.risk_levels for day in days)),
+                risk_type_totals=dict(_sum(day.risk_types for day in days)),
+            ),
+            generated_at=datetime.now(),
+        )
+
+    @staticmethod
+    async def get_quality_timeline(
+        client: Client,
+        organization_id: str,
+        start_dt: datetime,
+        end_dt: datetime,
+        team_ids: list[str] | None,
+        user_ids: list[str],
+        granularity: str,
+    ) -> QualityTimelineResponseDTO:
+        """Quality timeline from the daily facts (same response as AuditTimeSeriesService.get_quality_timeline)"""
+        days = await AuditFactsService.load_days(
+            client, organization_id, start_dt, end_dt, team_ids, user_ids, ("enriched_chats",)
+        )
+
+        date_scores = defaultdict(Counter)
+        user_date_scores = defaultdict(lambda: defaultdict(Counter))
+        for day in days:
+            if day.quality_scores:
+                date_scores[day.day].update(day.quality_scores)
+                user_date_scores[day.user_id][day.day].update(day.quality_scores)
+
+        overall_timeline = [_quality_point(day, scores) for day, scores in sorted(date_scores.items())]
+
+        by_team = {}
+        if team_ids:
+            teams, members_map = await AuditFactsService._team_members(client, organization_id, team_ids)
+            for team_id, member_ids in members_map.items():
+                if not member_ids:
+                    continue
+                team_date_scores = defaultdict(Counter)
+                for member_id in set(member_ids):
+                    for day, scores in user_date_scores[member_id].items():
+                        team_date_scores[day].update(scores)
+                by_team[teams[team_id].name] = [
+                    _quality_point(day, scores) for day, scores in sorted(team_date_scores.items())
+                ]
+
+        all_scores = _sum(date_scores.values())
+        total_rated = sum(all_scores.values())
+        overall_average = (
+            sum(int(score) * count for score, count in all_scores.items()) / total_rated if total_rated else 0.0
+        )
+
+        return QualityTimelineResponseDTO(
+            organization_id=organization_id,
+            date_range={"start_date": start_dt.isoformat(), "end_date": end_dt.isoformat()},
+            granularity=granularity,
+            team_filter=team_ids,
+            data=QualityTimelineDataDTO(
+                overall=overall_timeline, by_team=by_team, overall_average=overall_average, total_rated=total_rated
+            ),
+            generated_at=datetime.now(),
+        )
+
+    @staticmethod
+    async def get_theme_distribution(
+        client: Client,
+        organization_id: str,
+        start_dt: datetime,
+        end_dt: datetime,
+        team_ids: list[str] | None,
+        user_ids: list[str],
+        top_n: int,
+    ) -> ThemeTimelineResponseDTO:
+        """Theme distribution from the daily facts"""
+        days = await AuditFactsService.load_days(
+            client, organization_id, start_dt, end_dt, team_ids, user_ids, ("enriched_chats",)
+        )
+        theme_counts = _sum(day.themes for day in days)
+        top_themes = sorted(theme_counts.items(), key=lambda x: x[1], reverse=True)[:top_n]
+
+        return ThemeTimelineResponseDTO(
+            organization_id=organization_id,
+            date_range={"start_date": start_dt.isoformat(), "end_date": end_dt.isoformat()},
+            team_filter=team_ids,
+            top_themes=[theme for theme, _ in top_themes],
+            current_distribution=ThemeDistributionDTO(themes=dict(theme_counts), total=theme_counts.total()),
+            generated_at=datetime.now(),
+        )
+
+    @staticmethod
+    async def get_intent_distribution(
+        client: Client,
+        organization_id: str,
+        start_dt: datetime,
+        end_dt: datetime,
+        team_ids: list[str] | None,
+        user_ids: list[str],
+        top_n: int,
+    ) -> IntentTimelineResponseDTO:
+        """Intent distribution from the daily facts"""
+        days = await AuditFactsService.load_days(
+            client, organization_id, start_dt, end_dt, team_ids, user_ids, ("enriched_chats",)
+        )
+        intent_counts = _sum(day.intents for day in days)
+        top_intents = sorted(intent_counts.items(), key=lambda x: x[1], reverse=True)[:top_n]
+
+        return IntentTimelineResponseDTO(
+            organization_id=organization_id,
+            date_range={"start_date": start_dt.isoformat(), "end_date": end_dt.isoformat()},
+            team_filter=team_ids,
+            top_intents=[intent for intent, _ in top_intents],
+            current_distribution=IntentDistributionDTO(intents=dict(intent_counts), total=intent_counts.total()),
+            generated_at=datetime.now(),
+        )
+
+    @staticmethod
+    async def get_model_distribution(
+        client: Client,
+        organization_id: str,
+        start_dt: datetime,
+        end_dt: datetime,
+        team_ids: list[str] | None,
+        user_ids: list[str],
+    ) -> ModelDistributionResponseDTO:
+        """Model distribution from the daily facts"""
+        days = await AuditFactsService.load_days(
+            client, organization_id, start_dt, end_dt, team_ids, user_ids, ("messages",)
+        )
+        model_counts = _sum(day.messages_by_model for day in days)
+        total = model_counts.total()
+
+        return ModelDistributionResponseDTO(
+            organization_id=organization_id,
+            date_range={"start_date": start_dt.isoformat(), "end_date": end_dt.isoformat()},
+            team_filter=team_ids,
+            models=[
+                ModelDistributionItemDTO(
+                    model_name=model, count=count, percentage=(count / total * 100) if total > 0 else 0.0
+                )
+                for model, count in model_counts.most_common()
+            ],
+            total_messages=total,
+            generated_at=datetime.now(),
+        )
+
+    @staticmethod
+    async def get_usage_by_hour(
+        client: Client,
+        organization_id: str,
+        start_dt: datetime,
+        end_dt: datetime,
+        team_ids: list[str] | None,
+        user_ids: list[str],
+    ) -> UsageByHourResponseDTO:
+        """Usage by hour of day from the daily facts (weekend read from the fact day)"""
+        days = await AuditFactsService.load_days(
+            client, organization_id, start_dt, end_dt, team_ids, user_ids, ("messages",)
+        )
+
+        hour_counts = defaultdict(lambda: {"weekday": 0, "weekend": 0})
+        for day in days:
+            part = "weekend" if date.fromisoformat(day.day).weekday() >= 5 else "weekday"
+            for hour, count in day.messages_by_hour.items():
+                hour_counts[int(hour)][part] += count
+
+        hourly_data = []
+        total_messages = 0
+        max_count = 0
+        peak_hour = 0
+        for hour in range(HOURS_PER_DAY):
+            weekday = hour_counts[hour]["weekday"]
+            weekend = hour_counts[hour]["weekend"]
+            total = weekday + weekend
+            total_messages += total
+            if total > max_count:
+                max_count = total
+                peak_hour = hour
+            hourly_data.append(
+                UsageByHourDataPointDTO(hour=hour, weekday_count=weekday, weekend_count=weekend, total_count=total)
+            )
+
+        return UsageByHourResponseDTO(
+            organization_id=organization_id,
+            date_range={"start_date": start_dt.isoformat(), "end_date": end_dt.isoformat()},
+            team_filter=team_ids,
+            hourly_data=hourly_data,
+            peak_hour=peak_hour,
+            total_messages=total_messages,
+            generated_at=datetime.now(),
+        )
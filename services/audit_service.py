@@ -3,11 +3,14 @@ Audit Service - Business logic for organization audits (REFACTORED with utilitie
 Orchestrates parallel data fetching and aggregation
 """
 
+import asyncio
 import logging
+from collections import Counter, defaultdict
 from datetime import datetime, timedelta
 
 from supabase import Client
 
+from config.settings import settings
 from dtos.audit_dto import (
     IntentStatsWithContextDTO,
     OrganizationAuditResponseDTO,
@@ -19,17 +22,18 @@ from dtos.audit_dto import (
     TopPromptsWithContextDTO,
     TopUsersWithContextDTO,
     UsageStatsWithContextDTO,
-    UserProfileResponseDTO,
+    UserActivityPointDTO,
+    UserIntentDataDTO,
+    UserProfileComparisonDTO,
     UserProfileDataDTO,
     UserProfileKPIsDTO,
-    UserProfileComparisonDTO,
-    UserActivityPointDTO,
+    UserProfileResponseDTO,
     UserProviderUsageDTO,
     UserThemeDataDTO,
-    UserIntentDataDTO,
 )
 from repositories.audit_repository import AuditRepository
-from repositories.team_repository import TeamRepository
+from repositories.bulk_reader import fetch_all_rows_in
+from services.membership_service import MembershipService
 from utils.enrichment import (
     aggregate_intent_stats,
     aggregate_quality_stats,
@@ -39,13 +43,18 @@ from utils.enrichment import (
     aggregate_top_prompts,
     aggregate_top_users,
     aggregate_usage_stats,
+    intent_stats_from_summary,
     intent_stats_to_dto,
+    quality_stats_from_summary,
     quality_stats_to_dto,
+    risk_stats_from_summary,
     risk_stats_to_dto,
     risky_prompt_to_dto,
+    theme_stats_from_summary,
     theme_stats_to_dto,
     top_prompt_to_dto,
     top_user_to_dto,
+    usage_stats_from_summary,
     usage_stats_to_dto,
 )
 
@@ -74,23 +83,40 @@ class AuditService:
 
         # Get user IDs - either filtered by teams or all org members
         if team_ids and len(team_ids) > 0:
-            user_ids = _get_user_ids_for_teams(client, organization_id, team_ids)
+            user_ids = await MembershipService.get_user_ids(client, organization_id, team_ids)
         else:
-            user_ids = AuditRepository.get_organization_member_ids(client, organization_id)
+            user_ids = await MembershipService.get_member_ids(client, organization_id)
 
         if not user_ids:
             logger.warning(f"No members found for organization {organization_id}")
             return _create_empty_audit_response(organization_id, start_dt, end_dt)
 
-        # Fetch all data in parallel
-        audit_data = await AuditRepository.fetch_all_audit_data_parallel(client, user_ids, start_dt, end_dt)
+        audit_data = None
+        if settings.AUDIT_SQL_AGGREGATION:
+            try:
+                # KPIs aggregated in Postgres, only the ranked lists are fetched as rows
+                audit_data = await AuditRepository.fetch_audit_data_with_sql_kpis(client, user_ids, start_dt, end_dt)
+            except Exception as e:
+                logger.warning(f"SQL audit aggregation failed, falling back to Python aggregation: {str(e)}")
+
+        if audit_data is not None:
+            kpis = audit_data["kpis"]
+            quality_stats = quality_stats_from_summary(kpis.get("quality") or {})
+            risk_stats = risk_stats_from_summary(kpis.get("risk") or {})
+            usage_stats = usage_stats_from_summary(kpis.get("usage") or {})
+            theme_stats = theme_stats_from_summary(kpis.get("themes") or {})
+            intent_stats = intent_stats_from_summary(kpis.get("intents") or {})
+        else:
+            # Fetch all data in parallel
+            audit_data = await AuditRepository.fetch_all_audit_data_parallel(client, user_ids, start_dt, end_dt)
+
+            # Aggregate data using utility functions
+            quality_stats = aggregate_quality_stats(audit_data["quality"])
+            risk_stats = aggregate_risk_stats(audit_data["risk"])
+            usage_stats = aggregate_usage_stats(audit_data["usage"])
+            theme_stats = aggregate_theme_stats(audit_data["themes"])
+            intent_stats = aggregate_intent_stats(audit_data["intents"])
 
-        # Aggregate data using utility functions
-        quality_stats = aggregate_quality_stats(audit_data["quality"])
-        risk_stats = aggregate_risk_stats(audit_data["risk"])
-        usage_stats = aggregate_usage_stats(audit_data["usage"])
-        theme_stats = aggregate_theme_stats(audit_data["themes"])
-        intent_stats = aggregate_intent_stats(audit_data["intents"])
         top_users = aggregate_top_users(audit_data["top_users"])
         top_prompts = aggregate_top_prompts(audit_data["top_prompts"])
         risky_prompts = aggregate_risky_prompts(audit_data["risky_prompts"])
@@ -121,7 +147,7 @@ class AuditService:
     ) -> QualityStatsWithContextDTO:
         """Get quality statistics for organization"""
         start_dt, end_dt = _calculate_date_range(start_date, end_date, days)
-        user_ids = AuditRepository.get_organization_member_ids(client, organization_id)
+        user_ids = await MembershipService.get_member_ids(client, organization_id)
 
         if not user_ids:
             from dtos.audit_dto import QualityStatsDTO
@@ -155,7 +181,7 @@ class AuditService:
     ) -> RiskStatsWithContextDTO:
         """Get risk statistics for organization"""
         start_dt, end_dt = _calculate_date_range(start_date, end_date, days)
-        user_ids = AuditRepository.get_organization_member_ids(client, organization_id)
+        user_ids = await MembershipService.get_member_ids(client, organization_id)
 
         if not user_ids:
             from dtos.audit_dto import RiskStatsDTO
@@ -196,7 +222,7 @@ class AuditService:
     ) -> UsageStatsWithContextDTO:
         """Get usage statistics for organization"""
         start_dt, end_dt = _calculate_date_range(start_date, end_date, days)
-        user_ids = AuditRepository.get_organization_member_ids(client, organization_id)
+        user_ids = await MembershipService.get_member_ids(client, organization_id)
 
         if not user_ids:
             from dtos.audit_dto import UsageStatsDTO
@@ -235,7 +261,7 @@ class AuditService:
     ) -> ThemeStatsWithContextDTO:
         """Get theme statistics for organization"""
         start_dt, end_dt = _calculate_date_range(start_date, end_date, days)
-        user_ids = AuditRepository.get_organization_member_ids(client, organization_id)
+        user_ids = await MembershipService.get_member_ids(client, organization_id)
 
         if not user_ids:
             from dtos.audit_dto import ThemeStatsDTO
@@ -264,7 +290,7 @@ class AuditService:
     ) -> IntentStatsWithContextDTO:
         """Get intent statistics for organization"""
         start_dt, end_dt = _calculate_date_range(start_date, end_date, days)
-        user_ids = AuditRepository.get_organization_member_ids(client, organization_id)
+        user_ids = await MembershipService.get_member_ids(client, organization_id)
 
         if not user_ids:
             from dtos.audit_dto import IntentStatsDTO
@@ -293,7 +319,7 @@ class AuditService:
     ) -> TopUsersWithContextDTO:
         """Get top users for organization"""
         start_dt, end_dt = _calculate_date_range(start_date, end_date, days)
-        user_ids = AuditRepository.get_organization_member_ids(client, organization_id)
+        user_ids = await MembershipService.get_member_ids(client, organization_id)
 
         if not user_ids:
             return TopUsersWithContextDTO(
@@ -319,7 +345,7 @@ class AuditService:
     ) -> TopPromptsWithContextDTO:
         """Get top prompts for organization"""
         start_dt, end_dt = _calculate_date_range(start_date, end_date, days)
-        user_ids = AuditRepository.get_organization_member_ids(client, organization_id)
+        user_ids = await MembershipService.get_member_ids(client, organization_id)
 
         if not user_ids:
             return TopPromptsWithContextDTO(
@@ -345,7 +371,7 @@ class AuditService:
     ) -> RiskyPromptsWithContextDTO:
         """Get risky prompts for organization"""
         start_dt, end_dt = _calculate_date_range(start_date, end_date, days)
-        user_ids = AuditRepository.get_organization_member_ids(client, organization_id)
+        user_ids = await MembershipService.get_member_ids(client, organization_id)
 
         if not user_ids:
             return RiskyPromptsWithContextDTO(
@@ -379,7 +405,7 @@ class AuditService:
     ) -> UserProfileResponseDTO:
         """Get comprehensive profile for a specific user in the organization"""
         start_dt, end_dt = _calculate_date_range(start_date, end_date, days)
-        org_user_ids = AuditRepository.get_organization_member_ids(client, organization_id)
+        org_user_ids = await MembershipService.get_member_ids(client, organization_id)
 
         if not org_user_ids:
             raise ValueError("No members found for organization")
@@ -435,7 +461,7 @@ class AuditService:
 
         # Calculate org averages for comparison
         org_total_prompts = len(org_messages)
-        org_active_users = len(set(msg["user_id"] for msg in org_messages))
+        org_active_users = len({msg["user_id"] for msg in org_messages})
         org_avg_prompts = org_total_prompts / org_active_users if org_active_users > 0 else 0
 
         org_quality_scores = [q["quality_score"] for q in org_quality if q.get("quality_score") is not None]
@@ -445,7 +471,9 @@ class AuditService:
         org_work_percentage = (org_work_related / len(org_quality) * 100) if org_quality else 0.0
 
         # Calculate user vs org differences
-        user_quality_vs_org = ((average_quality - org_avg_quality) / org_avg_quality * 100) if org_avg_quality > 0 else 0
+        user_quality_vs_org = (
+            ((average_quality - org_avg_quality) / org_avg_quality * 100) if org_avg_quality > 0 else 0
+        )
         user_prompts_vs_org = ((total_prompts - org_avg_prompts) / org_avg_prompts * 100) if org_avg_prompts > 0 else 0
 
         # Build activity timeline (group by date)
@@ -621,76 +649,48 @@ def _create_empty_audit_response(
     )
 
 
-def _get_user_ids_for_teams(client: Client, organization_id: str, team_ids: list[str] | None) -> list[str]:
-    """Get user IDs filtered by teams, or all organization members if no teams specified"""
-    if not team_ids or len(team_ids) == 0:
-        return AuditRepository.get_organization_member_ids(client, organization_id)
-
-    # Get users in specified teams
-    user_ids_set = set()
-    for team_id in team_ids:
-        members = TeamRepository.get_team_members(client, team_id)
-        user_ids_set.update([m.user_id for m in members])
-
-    return list(user_ids_set)
-
-
 async def _calculate_team_stats(
     client: Client, organization_id: str, start_dt: datetime, end_dt: datetime
 ) -> list[TeamStatsDTO]:
     """Calculate adoption stats for each team in the organization"""
     # Get all teams for the organization
-    teams = TeamRepository.get_organization_teams(client, organization_id)
+    teams = await MembershipService.get_teams(client, organization_id)
 
     if not teams:
         return []
 
+    # Members of every team in one query, then one read per table for all members
+    members_map = await MembershipService.get_team_member_ids_map(client, [team.id for team in teams])
+    all_user_ids = list(dict.fromkeys(user_id for user_ids in members_map.values() for user_id in user_ids))
+
+    messages, quality_data = await asyncio.gather(
+        fetch_all_rows_in(client, "messages", "user_id", "user_id", all_user_ids, start=start_dt, end=end_dt),
+        fetch_all_rows_in(
+            client,
+            "enriched_chats",
+            "user_id, quality_score",
+            "user_id",
+            all_user_ids,
+            filters=lambda query: query.not_.is_("quality_score", "null"),
+            start=start_dt,
+            end=end_dt,
+        ),
+    )
+
+    prompts_by_user = Counter(msg["user_id"] for msg in messages)
+    scores_by_user = defaultdict(list)
+    for q in quality_data:
+        if q.get("quality_score") is not None:
+            scores_by_user[q["user_id"]].append(q["quality_score"])
+
     team_stats = []
     for team in teams:
-        # Get team members
-        members = TeamRepository.get_team_members(client, team.id)
-        member_user_ids = [m.user_id for m in members]
-
-        if not member_user_ids:
-            team_stats.append(
-                TeamStatsDTO(
-                    team_id=team.id,
-                    team_name=team.name,
-                    team_color=team.color,
-                    active_users=0,
-                    total_prompts=0,
-                    average_quality=0.0,
-                )
-            )
-            continue
-
-        # Get messages for team members in date range
-        messages_response = (
-            client.table("messages")
-            .select("user_id")
-            .in_("user_id", member_user_ids)
-            .gte("created_at", start_dt.isoformat())
-            .lte("created_at", end_dt.isoformat())
-            .execute()
-        )
+        member_user_ids = set(members_map.get(team.id, []))
 
-        messages = messages_response.data or []
-        total_prompts = len(messages)
-        active_users = len(set(msg["user_id"] for msg in messages)) if messages else 0
-
-        # Get quality data for team members
-        quality_response = (
-            client.table("enriched_chats")
-            .select("quality_score")
-            .in_("user_id", member_user_ids)
-            .gte("created_at", start_dt.isoformat())
-            .lte("created_at", end_dt.isoformat())
-            .not_.is_("quality_score", "null")
-            .execute()
-        )
+        total_prompts = sum(prompts_by_user[user_id] for user_id in member_user_ids)
+        active_users = sum(1 for user_id in member_user_ids if prompts_by_user[user_id])
 
-        quality_data = quality_response.data or []
-        quality_scores = [q["quality_score"] for q in quality_data if q.get("quality_score") is not None]
+        quality_scores = [score for user_id in member_user_ids for score in scores_by_user.get(user_id, [])]
         average_quality = sum(quality_scores) / len(quality_scores) if quality_scores else 0.0
 
         team_stats.append(
@@ -0,0 +1,169 @@
+"""
+Audit row snapshot shared by the panels of one dashboard request
+
+The audit panels each resolve the organization members and scan messages / enriched tables on
+their own. A snapshot resolves members and team membership once, reads each table the requested
+panels need once (with the union of their columns), and hands the rows to the panels' existing
+aggregations: every panel sees the same members and rows, and each table is scanned one time.
+
+Panels read rows through stream_audit_rows / fetch_audit_rows, which go to the database as before
+when no snapshot is given. A RowFilter carries each filter both as a PostgREST query filter and as
+a row predicate, so the snapshot applies the exact same condition in memory.
+"""
+
+from collections.abc import AsyncIterator, Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from supabase import Client
+
+from domains.entities.team_entities import Team
+from repositories.bulk_reader import QueryFilters, fetch_all_rows_in, stream_rows_in
+from services.membership_service import MembershipService
+
+
+@dataclass(frozen=True)
+class RowFilter:
+    """The same row condition as a PostgREST query filter (apply) and as a predicate (keep)"""
+
+    apply: QueryFilters
+    keep: Callable[[dict], bool]
+
+
+def not_null(column: str) -> RowFilter:
+    return RowFilter(lambda query: query.not_.is_(column, "null"), lambda row: row.get(column) is not None)
+
+
+# neq excludes NULL in SQL, so the predicate does too
+RISKY = RowFilter(
+    lambda query: query.neq("overall_risk_level", "none"),
+    lambda row: row.get("overall_risk_level") not in (None, "none"),
+)
+
+# Union of the columns every panel reads from each table, and the filter all readers of a table share
+SNAPSHOT_COLUMNS = {
+    "chats": "id, created_at, user_id, provider_name, chat_provider_id",
+    "messages": "id, chat_provider_id, created_at, user_id, model",
+    "enriched_chats": (
+        "id, user_id, created_at, quality_score, clarity_score, context_score, "
+        "specificity_score, actionability_score, theme, intent"
+    ),
+    "enriched_messages": "id, user_id, created_at, overall_risk_level, risk_categories",
+}
+SNAPSHOT_FILTERS = {"enriched_messages": RISKY}
+
+
+@dataclass
+class AuditSnapshot:
+    """Members, team membership and rows of one organization over one date range"""
+
+    start_dt: datetime
+    end_dt: datetime
+    user_ids: list[str]
+    teams: dict[str, Team] = field(default_factory=dict)
+    # Requested teams of the organization -> member user IDs
+    team_members: dict[str, list[str]] = field(default_factory=dict)
+    rows: dict[str, list[dict]] = field(default_factory=dict)
+
+    @staticmethod
+    async def load(
+        client: Client,
+        organization_id: str,
+        start_dt: datetime,
+        end_dt: datetime,
+        team_ids: list[str] | None,
+        tables: Iterable[str],
+    ) -> "AuditSnapshot":
+        """Resolve members once and read each table once for [start_dt, end_dt]"""
+        snapshot = AuditSnapshot(start_dt=start_dt, end_dt=end_dt, user_ids=[])
+
+        if team_ids:
+            # One membership lookup for the filter and the per-team breakdowns
+            members_map = await MembershipService.get_team_member_ids_map(client, team_ids)
+            snapshot.user_ids = list(dict.fromkeys(user_id for ids in members_map.values() for user_id in ids))
+            snapshot.teams = {team.id: team for team in await MembershipService.get_teams(client, organization_id)}
+            snapshot.team_members = {
+                team_id: members_map.get(team_id, []) for team_id in team_ids if team_id in snapshot.teams
+            }
+        else:
+            snapshot.user_ids = await MembershipService.get_member_ids(client, organization_id)
+
+        for table in dict.fromkeys(tables):
+            row_filter = SNAPSHOT_FILTERS.get(table)
+            snapshot.rows[table] = (
+                await fetch_all_rows_in(
+                    client,
+                    table,
+                    SNAPSHOT_COLUMNS[table],
+                    "user_id",
+                    snapshot.user_ids,
+                    filters=row_filter.apply if row_filter else None,
+                    start=start_dt,
+                    end=end_dt,
+                )
+                if snapshot.user_ids
+                else []
+            )
+        return snapshot
+
+    def select(self, table: str, user_ids: Iterable[str], row_filter: RowFilter | None = None) -> list[dict]:
+        """Rows of a loaded table for some of the snapshot's users, optionally filtered"""
+        wanted = set(user_ids)
+        return [
+            row for row in self.rows[table] if row["user_id"] in wanted and (row_filter is None or row_filter.keep(row))
+        ]
+
+
+async def stream_audit_rows(
+    client: Client,
+    snapshot: AuditSnapshot | None,
+    table: str,
+    columns: str,
+    user_ids: list[str],
+    row_filter: RowFilter | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> AsyncIterator[dict]:
+    """stream_rows_in over user_ids, or the snapshot's rows (already bounded to its date range) when given"""
+    if snapshot is not None:
+        for row in snapshot.select(table, user_ids, row_filter):
+            yield row
+        return
+
+    async for row in stream_rows_in(
+        client,
+        table,
+        columns,
+        "user_id",
+        user_ids,
+        filters=row_filter.apply if row_filter else None,
+        start=start,
+        end=end,
+    ):
+        yield row
+
+
+async def fetch_audit_rows(
+    client: Client,
+    snapshot: AuditSnapshot | None,
+    table: str,
+    columns: str,
+    user_ids: list[str],
+    row_filter: RowFilter | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> list[dict]:
+    """fetch_all_rows_in over user_ids, or the snapshot's rows when given"""
+    if snapshot is not None:
+        return snapshot.select(table, user_ids, row_filter)
+
+    return await fetch_all_rows_in(
+        client,
+        table,
+        columns,
+        "user_id",
+        user_ids,
+        filters=row_filter.apply if row_filter else None,
+        start=start,
+        end=end,
+    )
@@ -3,12 +3,14 @@ Audit Time-Series Service - Business logic for time-series audit data
 Handles adoption curves, risk timelines, quality evolution, etc.
 """
 
+import asyncio
 import logging
 from collections import defaultdict
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 from supabase import Client
 
+from config.settings import settings
 from dtos.audit_dto import (
     AdoptionCurveDataDTO,
     AdoptionCurveResponseDTO,
@@ -25,7 +27,10 @@ from dtos.audit_dto import (
     ThemeTimelineResponseDTO,
     TimeSeriesDataPointDTO,
 )
-from repositories.team_repository import TeamRepository
+from services.audit_facts_service import AuditFactsService
+from services.audit_snapshot import RISKY, AuditSnapshot, fetch_audit_rows, not_null, stream_audit_rows
+from services.membership_service import MembershipService
+from utils.timestamps import day_buckets
 
 logger = logging.getLogger(__name__)
 
@@ -45,6 +50,16 @@ def _calculate_date_range(start_date: str | None, end_date: str | None, days: in
     return start_dt, end_dt
 
 
+def _date_keys(rows: list[dict], granularity: str) -> list[date]:
+    """Timeline bucket of each row's created_at: its day, the Monday of its week or the first day of its month"""
+    days = day_buckets(row["created_at"] for row in rows)
+    if granularity == "week":
+        return [day - timedelta(days=day.weekday()) for day in days]
+    if granularity == "month":
+        return [day.replace(day=1) for day in days]
+    return days
+
+
 def _get_date_trunc_sql(granularity: str) -> str:
     """Get SQL date truncation expression based on granularity"""
     if granularity == "week":
@@ -55,22 +70,30 @@ def _get_date_trunc_sql(granularity: str) -> str:
         return "DATE_TRUNC('day', created_at)"
 
 
-def _get_user_ids_for_teams(client: Client, organization_id: str, team_ids: list[str] | None) -> list[str]:
-    """Get user IDs filtered by teams, or all organization members if no teams specified"""
-    if not team_ids or len(team_ids) == 0:
-        # Get all organization members
-        response = (
-            client.table("user_organization_roles").select("user_id").eq("organization_id", organization_id).execute()
-        )
-        return [row["user_id"] for row in response.data] if response.data else []
-
-    # Get users in specified teams
-    user_ids_set = set()
-    for team_id in team_ids:
-        members = TeamRepository.get_team_members(client, team_id)
-        user_ids_set.update([m.user_id for m in members])
-
-    return list(user_ids_set)
+async def _scope(
+    client: Client,
+    organization_id: str,
+    start_date: str | None,
+    end_date: str | None,
+    days: int,
+    team_ids: list[str] | None,
+    snapshot: AuditSnapshot | None,
+) -> tuple[datetime, datetime, list[str]]:
+    """Date range and user IDs of a request, the snapshot's when it is served from one"""
+    if snapshot is not None:
+        return snapshot.start_dt, snapshot.end_dt, snapshot.user_ids
+    start_dt, end_dt = _calculate_date_range(start_date, end_date, days)
+    return start_dt, end_dt, await MembershipService.get_user_ids(client, organization_id, team_ids)
+
+
+async def _team_members(
+    client: Client, organization_id: str, team_ids: list[str], snapshot: AuditSnapshot | None
+) -> tuple[dict, dict[str, list[str]]]:
+    """Organization teams by ID and member IDs of the requested ones"""
+    if snapshot is not None:
+        return snapshot.teams, snapshot.team_members
+    teams = {team.id: team for team in await MembershipService.get_teams(client, organization_id)}
+    return teams, await MembershipService.get_team_member_ids_map(client, [t for t in team_ids if t in teams])
 
 
 class AuditTimeSeriesService:
@@ -86,10 +109,12 @@ class AuditTimeSeriesService:
         team_ids: list[str] | None,
         granularity: str,
         view_mode: str = "chats",
+        snapshot: AuditSnapshot | None = None,
     ) -> AdoptionCurveResponseDTO:
         """Get adoption curve (usage over time) with team breakdown"""
-        start_dt, end_dt = _calculate_date_range(start_date, end_date, days)
-        user_ids = _get_user_ids_for_teams(client, organization_id, team_ids)
+        start_dt, end_dt, user_ids = await _scope(
+            client, organization_id, start_date, end_date, days, team_ids, snapshot
+        )
 
         if not user_ids:
             return AdoptionCurveResponseDTO(
@@ -112,24 +137,31 @@ class AuditTimeSeriesService:
                 generated_at=datetime.now(),
             )
 
-        # Fetch chats data with provider information
-        chats_result = (
-            client.table("chats")
-            .select("id, created_at, user_id, provider_name, chat_provider_id")
-            .in_("user_id", user_ids)
-            .gte("created_at", start_dt.isoformat())
-            .lte("created_at", end_dt.isoformat())
-            .execute()
-        )
+        if snapshot is None and settings.AUDIT_FACTS_READS:
+            return await AuditFactsService.get_adoption_curve(
+                client, organization_id, start_dt, end_dt, team_ids, user_ids, granularity, view_mode
+            )
 
-        # Fetch messages data for calculating average messages per chat
-        messages_result = (
-            client.table("messages")
-            .select("id, chat_provider_id, created_at, user_id, model")
-            .in_("user_id", user_ids)
-            .gte("created_at", start_dt.isoformat())
-            .lte("created_at", end_dt.isoformat())
-            .execute()
+        # Fetch chats data with provider information, and messages for average messages per chat
+        chat_rows, message_rows = await asyncio.gather(
+            fetch_audit_rows(
+                client,
+                snapshot,
+                "chats",
+                "id, created_at, user_id, provider_name, chat_provider_id",
+                user_ids,
+                start=start_dt,
+                end=end_dt,
+            ),
+            fetch_audit_rows(
+                client,
+                snapshot,
+                "messages",
+                "id, chat_provider_id, created_at, user_id, model",
+                user_ids,
+                start=start_dt,
+                end=end_dt,
+            ),
         )
 
         # Calculate provider distribution
@@ -137,7 +169,7 @@ class AuditTimeSeriesService:
 
         # Build mapping from chat_provider_id to provider_name
         chat_provider_to_name = {}
-        for row in chats_result.data or []:
+        for row in chat_rows:
             provider_name = row.get("provider_name") or "Unknown"
             chat_provider_id = row.get("chat_provider_id")
             provider_counts[provider_name]["chats"] += 1
@@ -145,7 +177,7 @@ class AuditTimeSeriesService:
                 chat_provider_to_name[chat_provider_id] = provider_name
 
         # Count messages per provider based on chat_provider_id
-        for row in messages_result.data or []:
+        for row in message_rows:
             chat_provider_id = row.get("chat_provider_id")
             if chat_provider_id and chat_provider_id in chat_provider_to_name:
                 provider = chat_provider_to_name[chat_provider_id]
@@ -168,27 +200,19 @@ class AuditTimeSeriesService:
         ]
 
         # Calculate average messages per chat
-        total_messages = len(messages_result.data or [])
-        total_chats = len(chats_result.data or [])
+        total_messages = len(message_rows)
+        total_chats = len(chat_rows)
         average_messages_per_chat = total_messages / total_chats if total_chats > 0 else 0.0
 
         # Group by date based on granularity and view mode
+        counted_rows = message_rows if view_mode == "messages" else chat_rows
+        date_keys = _date_keys(counted_rows, granularity)
         date_counts = defaultdict(int)
         date_by_provider = defaultdict(lambda: defaultdict(int))
 
         if view_mode == "messages":
             # Count messages over time
-            for row in messages_result.data or []:
-                created_at = datetime.fromisoformat(row["created_at"].replace("Z", "+00:00"))
-
-                # Truncate date based on granularity
-                if granularity == "week":
-                    date_key = (created_at - timedelta(days=created_at.weekday())).date()
-                elif granularity == "month":
-                    date_key = created_at.replace(day=1).date()
-                else:  # day
-                    date_key = created_at.date()
-
+            for row, date_key in zip(message_rows, date_keys, strict=True):
                 date_counts[date_key] += 1
 
                 # Track by provider
@@ -198,17 +222,7 @@ class AuditTimeSeriesService:
                     date_by_provider[provider][date_key] += 1
         else:
             # Count chats over time (default)
-            for row in chats_result.data or []:
-                created_at = datetime.fromisoformat(row["created_at"].replace("Z", "+00:00"))
-
-                # Truncate date based on granularity
-                if granularity == "week":
-                    date_key = (created_at - timedelta(days=created_at.weekday())).date()
-                elif granularity == "month":
-                    date_key = created_at.replace(day=1).date()
-                else:  # day
-                    date_key = created_at.date()
-
+            for row, date_key in zip(chat_rows, date_keys, strict=True):
                 date_counts[date_key] += 1
 
                 # Track by provider
@@ -233,7 +247,7 @@ class AuditTimeSeriesService:
         by_model = None
         if view_mode == "models":
             model_counts = defaultdict(int)
-            for row in messages_result.data or []:
+            for row in message_rows:
                 model = row.get("model") or "Unknown"
                 model_counts[model] += 1
             by_model = dict(model_counts)
@@ -241,51 +255,18 @@ class AuditTimeSeriesService:
         # Get by-team breakdown if teams specified
         by_team = {}
         if team_ids and len(team_ids) > 0:
-            teams = TeamRepository.get_organization_teams(client, organization_id)
-            for team_id in team_ids:
-                team = next((t for t in teams if t.id == team_id), None)
-                if not team:
-                    continue
-
-                team_members = TeamRepository.get_team_members(client, team_id)
-                team_user_ids = [m.user_id for m in team_members]
+            teams, members_map = await _team_members(client, organization_id, team_ids, snapshot)
+            for team_id, member_ids in members_map.items():
+                team = teams[team_id]
+                team_user_ids = set(member_ids)
 
                 if not team_user_ids:
                     continue
 
                 # Filter data for this team based on view mode
                 team_date_counts = defaultdict(int)
-                if view_mode == "messages":
-                    for row in messages_result.data or []:
-                        if row["user_id"] not in team_user_ids:
-                            continue
-
-                        created_at = datetime.fromisoformat(row["created_at"].replace("Z", "+00:00"))
-
-                        # Truncate date based on granularity
-                        if granularity == "week":
-                            date_key = (created_at - timedelta(days=created_at.weekday())).date()
-                        elif granularity == "month":
-                            date_key = created_at.replace(day=1).date()
-                        else:  # day
-                            date_key = created_at.date()
-
-                        team_date_counts[date_key] += 1
-                else:
-                    for row in chats_result.data or []:
-                        if row["user_id"] not in team_user_ids:
-                            continue
-
-                        created_at = datetime.fromisoformat(row["created_at"].replace("Z", "+00:00"))
-
-                        # Truncate date based on granularity
-                        if granularity == "week":
-                            date_key = (created_at - timedelta(days=created_at.weekday())).date()
-                        elif granularity == "month":
-                            date_key = created_at.replace(day=1).date()
-                        else:  # day
-                            date_key = created_at.date()
-
+                for row, date_key in zip(counted_rows, date_keys, strict=True):
+                    if row["user_id"] in team_user_ids:
                         team_date_counts[date_key] += 1
 
                 by_team[team.name] = [
@@ -328,10 +309,12 @@ class AuditTimeSeriesService:
         days: int,
         team_ids: list[str] | None,
         granularity: str,
+        snapshot: AuditSnapshot | None = None,
     ) -> RiskTimelineResponseDTO:
         """Get risk timeline with breakdown by risk level and type"""
-        start_dt, end_dt = _calculate_date_range(start_date, end_date, days)
-        user_ids = _get_user_ids_for_teams(client, organization_id, team_ids)
+        start_dt, end_dt, user_ids = await _scope(
+            client, organization_id, start_date, end_date, days, team_ids, snapshot
+        )
 
         if not user_ids:
             return RiskTimelineResponseDTO(
@@ -345,17 +328,23 @@ class AuditTimeSeriesService:
                 generated_at=datetime.now(),
             )
 
+        if snapshot is None and settings.AUDIT_FACTS_READS:
+            return await AuditFactsService.get_risk_timeline(
+                client, organization_id, start_dt, end_dt, team_ids, user_ids, granularity
+            )
+
         _get_date_trunc_sql(granularity)
 
-        # Get enriched messages with risk data grouped by date
-        response = (
-            client.table("enriched_messages")
-            .select("created_at, overall_risk_level, risk_categories")
-            .in_("user_id", user_ids)
-            .gte("created_at", start_dt.isoformat())
-            .lte("created_at", end_dt.isoformat())
-            .neq("overall_risk_level", "none")
-            .execute()
+        # Stream enriched messages with risk data, grouped by date below
+        rows = stream_audit_rows(
+            client,
+            snapshot,
+            "enriched_messages",
+            "created_at, overall_risk_level, risk_categories",
+            user_ids,
+            row_filter=RISKY,
+            start=start_dt,
+            end=end_dt,
         )
 
         # Group by date
@@ -367,7 +356,7 @@ class AuditTimeSeriesService:
         risk_type_totals = defaultdict(int)
         total_risky = 0
 
-        for row in response.data or []:
+        async for row in rows:
             date = row["created_at"].split("T")[0]
             risk_level = row.get("overall_risk_level", "none")
             risk_categories = row.get("risk_categories", {})
@@ -418,10 +407,12 @@ class AuditTimeSeriesService:
         days: int,
         team_ids: list[str] | None,
         granularity: str,
+        snapshot: AuditSnapshot | None = None,
     ) -> QualityTimelineResponseDTO:
         """Get quality score evolution over time"""
-        start_dt, end_dt = _calculate_date_range(start_date, end_date, days)
-        user_ids = _get_user_ids_for_teams(client, organization_id, team_ids)
+        start_dt, end_dt, user_ids = await _scope(
+            client, organization_id, start_date, end_date, days, team_ids, snapshot
+        )
 
         if not user_ids:
             return QualityTimelineResponseDTO(
@@ -433,22 +424,28 @@ class AuditTimeSeriesService:
                 generated_at=datetime.now(),
             )
 
+        if snapshot is None and settings.AUDIT_FACTS_READS:
+            return await AuditFactsService.get_quality_timeline(
+                client, organization_id, start_dt, end_dt, team_ids, user_ids, granularity
+            )
+
         # Get overall quality timeline
-        response = (
-            client.table("enriched_chats")
-            .select("created_at, quality_score")
-            .in_("user_id", user_ids)
-            .gte("created_at", start_dt.isoformat())
-            .lte("created_at", end_dt.isoformat())
-            .not_.is_("quality_score", "null")
-            .execute()
+        rows = stream_audit_rows(
+            client,
+            snapshot,
+            "enriched_chats",
+            "created_at, quality_score",
+            user_ids,
+            row_filter=not_null("quality_score"),
+            start=start_dt,
+            end=end_dt,
         )
 
         # Group by date
         date_scores = defaultdict(list)
         all_scores = []
 
-        for row in response.data or []:
+        async for row in rows:
             date = row["created_at"].split("T")[0]
             score = row.get("quality_score")
             if score is not None:
@@ -469,43 +466,45 @@ class AuditTimeSeriesService:
         # Get by-team breakdown if teams specified
         by_team = {}
         if team_ids and len(team_ids) > 0:
-            teams = TeamRepository.get_organization_teams(client, organization_id)
-            for team_id in team_ids:
-                team = next((t for t in teams if t.id == team_id), None)
-                if not team:
-                    continue
+            teams, members_map = await _team_members(client, organization_id, team_ids, snapshot)
+
+            # One read for every member, split per team (a user may belong to several teams)
+            teams_by_user = defaultdict(list)
+            for team_id, member_ids in members_map.items():
+                for member_id in member_ids:
+                    teams_by_user[member_id].append(team_id)
+
+            team_rows = stream_audit_rows(
+                client,
+                snapshot,
+                "enriched_chats",
+                "user_id, created_at, quality_score",
+                list(teams_by_user),
+                row_filter=not_null("quality_score"),
+                start=start_dt,
+                end=end_dt,
+            )
 
-                team_members = TeamRepository.get_team_members(client, team_id)
-                team_user_ids = [m.user_id for m in team_members]
+            team_date_scores = defaultdict(lambda: defaultdict(list))
+            async for row in team_rows:
+                date = row["created_at"].split("T")[0]
+                score = row.get("quality_score")
+                if score is not None:
+                    for team_id in teams_by_user.get(row["user_id"], []):
+                        team_date_scores[team_id][date].append(score)
 
-                if not team_user_ids:
+            for team_id, member_ids in members_map.items():
+                if not member_ids:
                     continue
 
-                team_response = (
-                    client.table("enriched_chats")
-                    .select("created_at, quality_score")
-                    .in_("user_id", team_user_ids)
-                    .gte("created_at", start_dt.isoformat())
-                    .lte("created_at", end_dt.isoformat())
-                    .not_.is_("quality_score", "null")
-                    .execute()
-                )
-
-                team_date_scores = defaultdict(list)
-                for row in team_response.data or []:
-                    date = row["created_at"].split("T")[0]
-                    score = row.get("quality_score")
-                    if score is not None:
-                        team_date_scores[date].append(score)
-
-                by_team[team.name] = [
+                by_team[teams[team_id].name] = [
                     QualityTimelineDataPointDTO(
                         date=date,
                         average_score=sum(scores) / len(scores),
                         median_score=sorted(scores)[len(scores) // 2] if scores else None,
                         total_rated=len(scores),
                     )
-                    for date, scores in sorted(team_date_scores.items())
+                    for date, scores in sorted(team_date_scores[team_id].items())
                 ]
 
         overall_average = sum(all_scores) / len(all_scores) if all_scores else 0.0
@@ -530,10 +529,12 @@ class AuditTimeSeriesService:
         days: int,
         team_ids: list[str] | None,
         top_n: int,
+        snapshot: AuditSnapshot | None = None,
     ) -> ThemeTimelineResponseDTO:
         """Get theme distribution for the period"""
-        start_dt, end_dt = _calculate_date_range(start_date, end_date, days)
-        user_ids = _get_user_ids_for_teams(client, organization_id, team_ids)
+        start_dt, end_dt, user_ids = await _scope(
+            client, organization_id, start_date, end_date, days, team_ids, snapshot
+        )
 
         if not user_ids:
             return ThemeTimelineResponseDTO(
@@ -545,19 +546,25 @@ class AuditTimeSeriesService:
                 generated_at=datetime.now(),
             )
 
-        response = (
-            client.table("enriched_chats")
-            .select("theme")
-            .in_("user_id", user_ids)
-            .gte("created_at", start_dt.isoformat())
-            .lte("created_at", end_dt.isoformat())
-            .not_.is_("theme", "null")
-            .execute()
+        if snapshot is None and settings.AUDIT_FACTS_READS:
+            return await AuditFactsService.get_theme_distribution(
+                client, organization_id, start_dt, end_dt, team_ids, user_ids, top_n
+            )
+
+        rows = stream_audit_rows(
+            client,
+            snapshot,
+            "enriched_chats",
+            "theme",
+            user_ids,
+            row_filter=not_null("theme"),
+            start=start_dt,
+            end=end_dt,
         )
 
         # Count themes
         theme_counts = defaultdict(int)
-        for row in response.data or []:
+        async for row in rows:
             theme = row.get("theme")
             if theme:
                 theme_counts[theme] += 1
@@ -586,10 +593,12 @@ class AuditTimeSeriesService:
         days: int,
         team_ids: list[str] | None,
         top_n: int,
+        snapshot: AuditSnapshot | None = None,
     ) -> IntentTimelineResponseDTO:
         """Get intent distribution for the period"""
-        start_dt, end_dt = _calculate_date_range(start_date, end_date, days)
-        user_ids = _get_user_ids_for_teams(client, organization_id, team_ids)
+        start_dt, end_dt, user_ids = await _scope(
+            client, organization_id, start_date, end_date, days, team_ids, snapshot
+        )
 
         if not user_ids:
             return IntentTimelineResponseDTO(
@@ -601,19 +610,25 @@ class AuditTimeSeriesService:
                 generated_at=datetime.now(),
             )
 
-        response = (
-            client.table("enriched_chats")
-            .select("intent")
-            .in_("user_id", user_ids)
-            .gte("created_at", start_dt.isoformat())
-            .lte("created_at", end_dt.isoformat())
-            .not_.is_("intent", "null")
-            .execute()
+        if snapshot is None and settings.AUDIT_FACTS_READS:
+            return await AuditFactsService.get_intent_distribution(
+                client, organization_id, start_dt, end_dt, team_ids, user_ids, top_n
+            )
+
+        rows = stream_audit_rows(
+            client,
+            snapshot,
+            "enriched_chats",
+            "intent",
+            user_ids,
+            row_filter=not_null("intent"),
+            start=start_dt,
+            end=end_dt,
         )
 
         # Count intents
         intent_counts = defaultdict(int)
-        for row in response.data or []:
+        async for row in rows:
             intent = row.get("intent")
             if intent:
                 intent_counts[intent] += 1
@@ -1,9 +1,17 @@
+import logging
+
+import jwt
 from supabase import Client
 
+from config.settings import settings
+from core.jwt_verifier import JWTVerificationUnavailable, jwt_verifier
+from core.supabase import client_factory
 from domains.entities import Session, User
 from dtos import OAuthSignIn, RefreshTokenDTO, SignInDTO, SignUpDTO
 from repositories import AuthRepository
 
+logger = logging.getLogger(__name__)
+
 
 class AuthService:
     @staticmethod
@@ -20,7 +28,14 @@ class AuthService:
 
     @staticmethod
     def sign_out(access_token: str | None) -> None:
+        """
+        Sign out from Supabase Auth and refuse the access token in this process until it expires
+        Other instances verifying tokens locally accept it until its exp (at most the token lifetime).
+        """
         if access_token:
+            jwt_verifier.revoke(access_token)
+            if client_factory:
+                client_factory.forget(access_token)
             AuthRepository.sign_out()
 
     @staticmethod
@@ -29,7 +44,44 @@ class AuthService:
 
     @staticmethod
     def get_current_user_id(access_token: str) -> str | None:
-        return AuthRepository.get_current_user_id(access_token)
+        """
+        Resolve the user ID of an access token
+        Cached tokens first, then local signature check, then Supabase Auth if fallback is enabled
+        """
+        if jwt_verifier.is_revoked(access_token):
+            return None
+
+        user_id = jwt_verifier.get_cached_user_id(access_token)
+        if user_id:
+            return user_id
+
+        if settings.JWT_LOCAL_VERIFICATION:
+            try:
+                user_id, expires_at = jwt_verifier.verify_locally(access_token)
+                jwt_verifier.remember(access_token, user_id, expires_at)
+                return user_id
+            except JWTVerificationUnavailable:
+                pass
+            except jwt.InvalidSignatureError:
+                # Subclass of DecodeError: a wrong or rotated SUPABASE_JWT_SECRET fails every token here
+                logger.error("Local JWT signature check failed, verify SUPABASE_JWT_SECRET")
+                if not settings.JWT_REMOTE_FALLBACK:
+                    return None
+            except (jwt.ExpiredSignatureError, jwt.DecodeError):
+                # Expired or malformed tokens would be rejected remotely too
+                return None
+            except jwt.InvalidTokenError as e:
+                logger.warning(f"Local JWT verification failed: {str(e)}")
+                if not settings.JWT_REMOTE_FALLBACK:
+                    return None
+
+        if not settings.JWT_REMOTE_FALLBACK:
+            return None
+
+        user_id = AuthRepository.get_current_user_id(access_token)
+        if user_id:
+            jwt_verifier.remember(access_token, user_id, jwt_verifier.peek_expiry(access_token))
+        return user_id
 
     @staticmethod
     def get_user_metadata(client: Client, user_id: str) -> User:
@@ -3,6 +3,14 @@ Enrichment AI services
 """
 
 from .classification_service import ClassificationService, classification_service
+from .rate_limiter import LLMRateLimiter, llm_rate_limiter
 from .risk_assessment_service import RiskAssessmentService, risk_assessment_service
 
-__all__ = ["ClassificationService", "classification_service", "RiskAssessmentService", "risk_assessment_service"]
+__all__ = [
+    "ClassificationService",
+    "classification_service",
+    "RiskAssessmentService",
+    "risk_assessment_service",
+    "LLMRateLimiter",
+    "llm_rate_limiter",
+]
@@ -0,0 +1,148 @@
+"""
+Shared OpenAI rate limiter for the enrichment services
+Token bucket refilled at the account's request rate, tightened by the x-ratelimit-* headers
+of each response and paused on 429s, plus exponential backoff with jitter for retries
+"""
+
+import asyncio
+import logging
+import random
+import re
+import threading
+import time
+from collections.abc import Mapping
+
+from config.enrichment_config import enrichment_config
+
+logger = logging.getLogger(__name__)
+
+# "1s", "6m0s", "120ms", "1h2m3.5s"
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_SECONDS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_reset_duration(value: str | None) -> float | None:
+    """Seconds in an x-ratelimit-reset-* header value, None if missing or unreadable"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_SECONDS[unit] for amount, unit in parts)
+
+
+class LLMRateLimiter:
+    """
+    Token bucket shared by every enrichment call (async and sync, any event loop or thread).
+    Callers reserve a request before calling the API and report the response headers after it.
+    """
+
+    def __init__(self, requests_per_minute: float, burst: int):
+        self.rate = max(requests_per_minute, 1.0) / 60.0
+        self.capacity = float(max(burst, 1))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Take a request from the bucket, returns the seconds to wait before sending it"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # Reservations may overdraw the bucket: later callers queue up behind earlier ones
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    async def acquire(self) -> None:
+        """Wait (without blocking the event loop) until a request may be sent"""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self) -> None:
+        """Blocking acquire, for the synchronous client"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def update_from_headers(self, headers: Mapping[str, str] | None) -> None:
+        """Follow the account's quota from the x-ratelimit-* response headers"""
+        if not headers:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+
+            limit = headers.get("x-ratelimit-limit-requests")
+            if limit and limit.isdigit() and int(limit) > 0:
+                self.rate = int(limit) / 60.0
+
+            remaining = headers.get("x-ratelimit-remaining-requests")
+            if remaining and remaining.isdigit():
+                self._tokens = min(self._tokens, float(remaining))
+                if int(remaining) == 0:
+                    reset = parse_reset_duration(headers.get("x-ratelimit-reset-requests"))
+                    if reset:
+                        self._paused_until = max(self._paused_until, now + reset)
+
+            # Token quota exhausted: no request goes through before it resets
+            remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+            if remaining_tokens and remaining_tokens.isdigit() and int(remaining_tokens) == 0:
+                reset = parse_reset_duration(headers.get("x-ratelimit-reset-tokens"))
+                if reset:
+                    self._paused_until = max(self._paused_until, now + reset)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller for seconds (after a 429)"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    @staticmethod
+    def backoff_delay(attempt: int, retry_after: float | None = None) -> float:
+        """
+        Seconds before retry number attempt (0-based): the server's retry-after when given,
+        otherwise exponential backoff with full jitter, capped at LLM_RETRY_MAX_DELAY_SECONDS
+        """
+        if retry_after is not None:
+            return retry_after
+        ceiling = min(
+            enrichment_config.LLM_RETRY_MAX_DELAY_SECONDS, enrichment_config.LLM_RETRY_DELAY_SECONDS * 2**attempt
+        )
+        return random.uniform(0, ceiling)
+
+
+def retry_after_seconds(error: Exception) -> float | None:
+    """
+    Record a failed API call on the shared limiter, returns the server's retry-after if any
+    Rate limit errors pause every caller until the quota resets.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is None:
+        return None
+
+    llm_rate_limiter.update_from_headers(headers)
+    retry_after = parse_reset_duration(headers.get("retry-after"))
+    if getattr(response, "status_code", None) == 429:
+        pause = retry_after or parse_reset_duration(headers.get("x-ratelimit-reset-requests"))
+        if pause:
+            logger.warning(f"OpenAI rate limit hit, pausing enrichment calls for {pause:.1f}s")
+            llm_rate_limiter.pause(pause)
+    return retry_after
+
+
+# Shared by ClassificationService and RiskAssessmentService
+llm_rate_limiter = LLMRateLimiter(
+    requests_per_minute=enrichment_config.LLM_REQUESTS_PER_MINUTE,
+    burst=enrichment_config.LLM_RATE_LIMIT_BURST,
+)
@@ -2,15 +2,19 @@
 Improved Risk Assessment Service with better error handling and validation
 """
 
+import asyncio
+import hashlib
 import json
 import logging
 import os
 import time
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
 from config.enrichment_config import enrichment_config
 
+from .rate_limiter import llm_rate_limiter, retry_after_seconds
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,19 +24,51 @@ class RiskAssessmentService:
     """
 
     def __init__(self):
-        # In test mode without OpenAI API key, client remains None
+        # In test mode without OpenAI API key, clients remain None
         if os.getenv("OPENAI_API_KEY"):
             self.client = OpenAI()
+            self.async_client = AsyncOpenAI()
         else:
             self.client = None  # type: ignore
+            self.async_client = None  # type: ignore
         self.use_assistant = enrichment_config.MESSAGE_ENRICHMENT_ASSISTANT_ID is not None
-
-        if self.use_assistant:
+        # Assistant prompts sent in one chat completion with the assistant's instructions, instead of a thread run
+        self.single_call = self.use_assistant and enrichment_config.ASSISTANT_SINGLE_CALL
+
+        if self.single_call:
+            logger.info(
+                f"Using single-call chat completions with the instructions of {enrichment_config.RISK_ASSESSMENT_INSTRUCTIONS_PATH}"
+            )
+            self.instructions = self._load_instructions()
+        elif self.use_assistant:
             logger.info(f"Using OpenAI Assistant API with ID: {enrichment_config.MESSAGE_ENRICHMENT_ASSISTANT_ID}")
         else:
             logger.info("Using legacy chat completions (no assistant ID configured)")
             self.prompt_template = self._load_prompt_template()
 
+        # Identifies the prompt in enrichment cache keys (services/enrichment_cache.py)
+        self.prompt_version = self._prompt_version()
+
+    def _prompt_version(self) -> str:
+        """Short hash of the prompt in use: instructions file, assistant ID (its instructions live on OpenAI) or template"""
+        if self.single_call:
+            source = self.instructions
+        elif self.use_assistant:
+            source = f"assistant:{enrichment_config.MESSAGE_ENRICHMENT_ASSISTANT_ID}"
+        else:
+            source = self.prompt_template
+        return hashlib.sha256(source.encode()).hexdigest()[:16]
+
+    @staticmethod
+    def _load_instructions() -> str:
+        """Load the assistant's instructions (the file scripts/setup_assistants.py uploads)"""
+        try:
+            with open(enrichment_config.RISK_ASSESSMENT_INSTRUCTIONS_PATH) as f:
+                return f.read()
+        except FileNotFoundError:
+            logger.error("Risk assessment assistant instructions file not found")
+            raise
+
     @staticmethod
     def _load_prompt_template() -> str:
         """Load risk assessment prompt from file (legacy mode)"""
@@ -43,16 +79,8 @@ class RiskAssessmentService:
             logger.error("Risk assessment prompt file not found")
             raise
 
-    def assess_message_risk(self, content: str, role: str = "user", context: dict | None = None) -> dict:
-        """
-        Assess risks in a message
-
-        Returns dict with risk assessment across all categories
-        Raises exception on failure after retries
-        """
-        logger.info(f"[RISK DEBUG] assess_message_risk called with content length: {len(content)}")
-        start_time = time.time()
-
+    def _build_prompt(self, content: str, role: str, context: dict | None) -> str:
+        """Assistant user prompt, or the filled-in template in legacy mode"""
         # Truncate content if needed
         from utils.enrichment import truncate_message
 
@@ -63,19 +91,15 @@ class RiskAssessmentService:
         context_str = json.dumps(context) if context else "N/A"
 
         if self.use_assistant:
-            # Use Assistants API
-            user_prompt = f"""**MESSAGE TO ANALYZE:**
+            return f"""**MESSAGE TO ANALYZE:**
 {content_truncated}
 
 **CONTEXT:** {context_str}
 
 **ROLE:** {role}"""
-            raw_response = self._call_assistant_with_retry(user_prompt)
-        else:
-            # Legacy: Use chat completions with template
-            prompt = self.prompt_template.format(message_content=content_truncated, context=context_str, role=role)
-            raw_response = self._call_llm_with_retry(prompt)
+        return self.prompt_template.format(message_content=content_truncated, context=context_str, role=role)
 
+    def _finish(self, raw_response: dict, start_time: float) -> dict:
         # Validate and enhance response
         enhanced_result = self._validate_and_enhance_risk_response(raw_response)
 
@@ -86,6 +110,94 @@ class RiskAssessmentService:
 
         return enhanced_result
 
+    def assess_message_risk(self, content: str, role: str = "user", context: dict | None = None) -> dict:
+        """
+        Assess risks in a message
+
+        Returns dict with risk assessment across all categories
+        Raises exception on failure after retries
+        """
+        logger.info(f"[RISK DEBUG] assess_message_risk called with content length: {len(content)}")
+        start_time = time.time()
+        prompt = self._build_prompt(content, role, context)
+
+        if self.use_assistant and not self.single_call:
+            raw_response = self._call_assistant_with_retry(prompt)
+        else:
+            raw_response = self._call_llm_with_retry(prompt)
+
+        return self._finish(raw_response, start_time)
+
+    async def assess_message_risk_async(self, content: str, role: str = "user", context: dict | None = None) -> dict:
+        """
+        Async assess_message_risk on the AsyncOpenAI client: waits for the shared rate limiter and
+        backs off between retries without holding a thread
+        """
+        start_time = time.time()
+        prompt = self._build_prompt(content, role, context)
+
+        if self.use_assistant and not self.single_call:
+            raw_response = await self._call_assistant_async(prompt)
+        else:
+            raw_response = await self._call_llm_async(prompt)
+
+        return self._finish(raw_response, start_time)
+
+    def _completion_request(self, prompt: str) -> dict:
+        """Chat completions arguments: the assistant's instructions in single-call mode, else the legacy template"""
+        if self.single_call:
+            # Same instructions, model and JSON format as the assistant, and no token cap like its runs
+            return {
+                "model": enrichment_config.DEFAULT_RISK_ASSESSMENT_MODEL,
+                "messages": [{"role": "system", "content": self.instructions}, {"role": "user", "content": prompt}],
+                "temperature": enrichment_config.RISK_ASSESSMENT_TEMPERATURE,
+                "response_format": {"type": "json_object"},
+            }
+        return {
+            "model": enrichment_config.DEFAULT_RISK_ASSESSMENT_MODEL,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "You are a security risk assessment expert. Respond only with valid JSON.",
+                },
+                {"role": "user", "content": prompt},
+            ],
+            "temperature": enrichment_config.RISK_ASSESSMENT_TEMPERATURE,
+            "max_tokens": enrichment_config.RISK_ASSESSMENT_MAX_TOKENS,
+            "response_format": {"type": "json_object"},
+        }
+
+    @staticmethod
+    def _parse_json_content(content: str, fix_braces: bool = True) -> dict:
+        """Parse the model's JSON, tolerating markdown code blocks and (chat completions) missing braces"""
+        logger.info(f"[RISK DEBUG] Raw LLM response (first 200 chars): {repr(content[:200])}")
+        content_stripped = content.strip()
+
+        # Remove markdown code blocks if present
+        if content_stripped.startswith("```"):
+            lines = content_stripped.split("\n")
+            # Remove first line (```json or ```)
+            lines = lines[1:]
+            # Remove last line (```)
+            if lines and lines[-1].strip() == "```":
+                lines = lines[:-1]
+            content_stripped = "\n".join(lines).strip()
+
+        # Handle case where LLM returns JSON content without opening/closing braces
+        if fix_braces:
+            if content_stripped and not content_stripped.startswith("{"):
+                logger.info("[RISK DEBUG] Adding opening brace to JSON")
+                content_stripped = "{" + content_stripped + "}"
+            elif content_stripped and not content_stripped.endswith("}"):
+                logger.info("[RISK DEBUG] Adding closing brace to JSON")
+                content_stripped = content_stripped + "}"
+
+        try:
+            return json.loads(content_stripped)
+        except json.JSONDecodeError:
+            logger.warning(f"Raw content (first 500 chars): {content[:500]}")
+            raise
+
     def _call_llm_with_retry(self, prompt: str) -> dict:
         """
         Call LLM with retry logic on failure
@@ -93,65 +205,58 @@ class RiskAssessmentService:
         last_error = None
 
         for attempt in range(enrichment_config.MAX_LLM_RETRIES + 1):
+            retry_after = None
             try:
-                response = self.client.chat.completions.create(
-                    model=enrichment_config.DEFAULT_RISK_ASSESSMENT_MODEL,
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "You are a security risk assessment expert. Respond only with valid JSON.",
-                        },
-                        {"role": "user", "content": prompt},
-                    ],
-                    temperature=enrichment_config.RISK_ASSESSMENT_TEMPERATURE,
-                    max_tokens=enrichment_config.RISK_ASSESSMENT_MAX_TOKENS,
-                    response_format={"type": "json_object"},
-                )
+                llm_rate_limiter.acquire_sync()
+                raw = self.client.chat.completions.with_raw_response.create(**self._completion_request(prompt))
+                llm_rate_limiter.update_from_headers(raw.headers)
+                return self._parse_json_content(raw.parse().choices[0].message.content)
 
-                content = response.choices[0].message.content
-                logger.info(f"[RISK DEBUG] Raw LLM response (first 200 chars): {repr(content[:200])}")
-
-                # Remove markdown code blocks if present
-                if content.strip().startswith("```"):
-                    # Extract JSON from markdown code block
-                    lines = content.strip().split("\n")
-                    # Remove first line (```json or ```)
-                    lines = lines[1:]
-                    # Remove last line (```)
-                    if lines and lines[-1].strip() == "```":
-                        lines = lines[:-1]
-                    content = "\n".join(lines)
-                    logger.info(f"[RISK DEBUG] After markdown strip (first 200 chars): {repr(content[:200])}")
-
-                # Handle case where LLM returns JSON content without opening/closing braces
-                content_stripped = content.strip()
-                if content_stripped and not content_stripped.startswith("{"):
-                    # LLM returned JSON fields without wrapping braces - wrap it
-                    logger.info("[RISK DEBUG] Adding opening brace to JSON")
-                    content = "{" + content_stripped + "}"
-                elif content_stripped and not content_stripped.endswith("}"):
-                    # Missing closing brace
-                    logger.info("[RISK DEBUG] Adding closing brace to JSON")
-                    content = content_stripped + "}"
-                else:
-                    # Use stripped version
-                    content = content_stripped
+            except json.JSONDecodeError as e:
+                last_error = f"Invalid JSON response: {str(e)}"
+                logger.warning(f"Attempt {attempt + 1} failed: {last_error}")
 
-                logger.info(f"[RISK DEBUG] Final content before JSON parse (first 200 chars): {repr(content[:200])}")
-                return json.loads(content)
+            except Exception as e:
+                last_error = f"LLM API error: {str(e)}"
+                logger.warning(f"Attempt {attempt + 1} failed: {last_error}")
+                retry_after = retry_after_seconds(e)
+
+            # Wait before retry
+            if attempt < enrichment_config.MAX_LLM_RETRIES:
+                time.sleep(llm_rate_limiter.backoff_delay(attempt, retry_after))
+
+        # All retries failed
+        logger.error(f"Risk assessment failed after {enrichment_config.MAX_LLM_RETRIES + 1} attempts: {last_error}")
+        raise Exception(f"Risk assessment service failed: {last_error}")
+
+    async def _call_llm_async(self, prompt: str) -> dict:
+        """
+        Async _call_llm_with_retry
+        """
+        last_error = None
+
+        for attempt in range(enrichment_config.MAX_LLM_RETRIES + 1):
+            retry_after = None
+            try:
+                await llm_rate_limiter.acquire()
+                raw = await self.async_client.chat.completions.with_raw_response.create(
+                    **self._completion_request(prompt)
+                )
+                llm_rate_limiter.update_from_headers(raw.headers)
+                return self._parse_json_content(raw.parse().choices[0].message.content)
 
             except json.JSONDecodeError as e:
                 last_error = f"Invalid JSON response: {str(e)}"
                 logger.warning(f"Attempt {attempt + 1} failed: {last_error}")
-                logger.warning(f"Raw content (first 500 chars): {content[:500] if content else 'None'}")
 
             except Exception as e:
                 last_error = f"LLM API error: {str(e)}"
                 logger.warning(f"Attempt {attempt + 1} failed: {last_error}")
+                retry_after = retry_after_seconds(e)
 
             # Wait before retry
             if attempt < enrichment_config.MAX_LLM_RETRIES:
-                time.sleep(enrichment_config.LLM_RETRY_DELAY_SECONDS)
+                await asyncio.sleep(llm_rate_limiter.backoff_delay(attempt, retry_after))
 
         # All retries failed
         logger.error(f"Risk assessment failed after {enrichment_config.MAX_LLM_RETRIES + 1} attempts: {last_error}")
@@ -164,7 +269,10 @@ class RiskAssessmentService:
         last_error = None
 
         for attempt in range(enrichment_config.MAX_LLM_RETRIES + 1):
+            retry_after = None
             try:
+                llm_rate_limiter.acquire_sync()
+
                 # Create a thread
                 thread = self.client.beta.threads.create()
 
@@ -188,20 +296,7 @@ class RiskAssessmentService:
 
                     if assistant_message:
                         content = assistant_message.content[0].text.value
-                        logger.info(f"[RISK DEBUG] Raw assistant response (first 200 chars): {repr(content[:200])}")
-
-                        # Parse JSON
-                        content_stripped = content.strip()
-
-                        # Remove markdown code blocks if present
-                        if content_stripped.startswith("```"):
-                            lines = content_stripped.split("\n")
-                            lines = lines[1:]
-                            if lines and lines[-1].strip() == "```":
-                                lines = lines[:-1]
-                            content_stripped = "\n".join(lines).strip()
-
-                        return json.loads(content_stripped)
+                        return self._parse_json_content(content, fix_braces=False)
                     else:
                         raise Exception("No assistant response found")
                 else:
@@ -214,10 +309,62 @@ class RiskAssessmentService:
             except Exception as e:
                 last_error = f"Assistant API error: {str(e)}"
                 logger.warning(f"Attempt {attempt + 1} failed: {last_error}")
+                retry_after = retry_after_seconds(e)
+
+            # Wait before retry
+            if attempt < enrichment_config.MAX_LLM_RETRIES:
+                time.sleep(llm_rate_limiter.backoff_delay(attempt, retry_after))
+
+        # All retries failed
+        logger.error(
+            f"Assistant risk assessment failed after {enrichment_config.MAX_LLM_RETRIES + 1} attempts: {last_error}"
+        )
+        raise Exception(f"Assistant risk assessment service failed: {last_error}")
+
+    async def _call_assistant_async(self, user_prompt: str) -> dict:
+        """
+        Async _call_assistant_with_retry (polls with asyncio.sleep)
+        """
+        last_error = None
+
+        for attempt in range(enrichment_config.MAX_LLM_RETRIES + 1):
+            retry_after = None
+            try:
+                await llm_rate_limiter.acquire()
+
+                thread = await self.async_client.beta.threads.create()
+                await self.async_client.beta.threads.messages.create(
+                    thread_id=thread.id, role="user", content=user_prompt
+                )
+                run = await self.async_client.beta.threads.runs.create(
+                    thread_id=thread.id, assistant_id=enrichment_config.MESSAGE_ENRICHMENT_ASSISTANT_ID
+                )
+
+                while run.status in ["queued", "in_progress"]:
+                    await asyncio.sleep(0.5)
+                    run = await self.async_client.beta.threads.runs.retrieve(thread_id=thread.id, run_id=run.id)
+
+                if run.status != "completed":
+                    raise Exception(f"Assistant run failed with status: {run.status}")
+
+                messages = await self.async_client.beta.threads.messages.list(thread_id=thread.id)
+                assistant_message = next((msg for msg in messages.data if msg.role == "assistant"), None)
+                if not assistant_message:
+                    raise Exception("No assistant response found")
+                return self._parse_json_content(assistant_message.content[0].text.value, fix_braces=False)
+
+            except json.JSONDecodeError as e:
+                last_error = f"Invalid JSON response: {str(e)}"
+                logger.warning(f"Attempt {attempt + 1} failed: {last_error}")
+
+            except Exception as e:
+                last_error = f"Assistant API error: {str(e)}"
+                logger.warning(f"Attempt {attempt + 1} failed: {last_error}")
+                retry_after = retry_after_seconds(e)
 
             # Wait before retry
             if attempt < enrichment_config.MAX_LLM_RETRIES:
-                time.sleep(enrichment_config.LLM_RETRY_DELAY_SECONDS)
+                await asyncio.sleep(llm_rate_limiter.backoff_delay(attempt, retry_after))
 
         # All retries failed
         logger.error(
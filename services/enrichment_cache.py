@@ -0,0 +1,119 @@
+"""
+Enrichment result cache
+
+Classification and risk assessment results are keyed by a hash of what the LLM is sent: the
+truncated content with collapsed whitespace, its assistant response or role and context, the
+model and the prompt version (plus ENRICHMENT_CACHE_VERSION). Repeated prompts and messages
+generated from the same template are then enriched once. Entries live in an in-process LRU tier
+in front of the enrichment_cache table every worker reads (migrations/create_enrichment_cache.sql).
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import time
+
+from supabase import Client
+
+from config.enrichment_config import enrichment_config
+from core.executor import blocking_executor
+from repositories.enrichment_cache_repository import EnrichmentCacheRepository
+from services.enrichment import classification_service, risk_assessment_service
+from utils.cache import TTLCache
+from utils.enrichment import truncate_message
+
+logger = logging.getLogger(__name__)
+
+_local = TTLCache(enrichment_config.CACHE_SIZE, enrichment_config.CACHE_TTL_SECONDS)
+
+
+def _normalize(text: str | None) -> str:
+    """Collapse whitespace: prompts differing only in spacing or line breaks share an entry"""
+    return " ".join(text.split()) if text else ""
+
+
+def _kind_prompt(kind: str) -> tuple[str, str]:
+    """(prompt version, model) of the service enriching this kind"""
+    if kind == "chat":
+        return classification_service.prompt_version, enrichment_config.DEFAULT_CLASSIFICATION_MODEL
+    return risk_assessment_service.prompt_version, enrichment_config.DEFAULT_RISK_ASSESSMENT_MODEL
+
+
+def _key(kind: str, parts: list[str]) -> str:
+    prompt_version, model = _kind_prompt(kind)
+    payload = json.dumps([kind, enrichment_config.CACHE_VERSION, prompt_version, model, parts])
+    return f"{kind}:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+
+def _hit(result: dict, start_time: float) -> dict:
+    """Copy of a cached result, timed as the lookup instead of the original LLM call"""
+    result = copy.deepcopy(result)
+    result["processing_time_ms"] = int((time.time() - start_time) * 1000)
+    return result
+
+
+class EnrichmentCache:
+    @staticmethod
+    def chat_key(user_message: str, assistant_response: str | None) -> str | None:
+        """Cache key of a chat (already truncated, as sent to the LLM), None while the cache is disabled"""
+        if not enrichment_config.CACHE_ENABLED:
+            return None
+        return _key("chat", [_normalize(user_message), _normalize(assistant_response)])
+
+    @staticmethod
+    def message_key(content: str, role: str | None, context: dict | None) -> str | None:
+        """Cache key of a message, None while the cache is disabled"""
+        if not enrichment_config.CACHE_ENABLED:
+            return None
+        context_str = json.dumps(context, sort_keys=True) if context else ""
+        return _key("message", [_normalize(truncate_message(content)), role or "", context_str])
+
+    @staticmethod
+    def get(client: Client, cache_key: str | None) -> dict | None:
+        """
+        Cached result for a key, from the local tier then the table, None on a miss
+        Table errors are logged and count as a miss: the LLM is called instead.
+        """
+        if not cache_key:
+            return None
+        start_time = time.time()
+
+        result = _local.get(cache_key)
+        if result is None:
+            try:
+                result = EnrichmentCacheRepository.get(client, cache_key, enrichment_config.CACHE_TTL_SECONDS)
+            except Exception as e:
+                logger.warning(f"Enrichment cache read failed for {cache_key}: {str(e)}")
+            if result is None:
+                return None
+            _local.set(cache_key, result)
+
+        return _hit(result, start_time)
+
+    @staticmethod
+    async def get_async(client: Client, cache_key: str | None) -> dict | None:
+        """get, reading the table in a worker thread only on a local miss"""
+        if not cache_key:
+            return None
+        result = _local.get(cache_key)
+        if result is not None:
+            return _hit(result, time.time())
+        return await blocking_executor.run(EnrichmentCache.get, client, cache_key)
+
+    @staticmethod
+    def put(client: Client, cache_key: str | None, result: dict) -> None:
+        """Cache an LLM result in both tiers (failures are logged, never raised)"""
+        if not cache_key:
+            return
+        _local.set(cache_key, copy.deepcopy(result))
+        kind = cache_key.split(":", 1)[0]
+        prompt_version, model = _kind_prompt(kind)
+        try:
+            EnrichmentCacheRepository.put(client, cache_key, kind, prompt_version, model, result)
+        except Exception as e:
+            logger.warning(f"Enrichment cache write failed for {cache_key}: {str(e)}")
+
+    @staticmethod
+    def clear_cache() -> None:
+        _local.clear()
@@ -0,0 +1,176 @@
+"""
+Enrichment queue - chats and messages enriched out of the request path
+Authenticated users queue one job per chat / message in enrichment_jobs; EnrichmentWorker processes
+them with EnrichmentService and stores each response on its job
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+
+from supabase import Client
+
+from config.enrichment_config import enrichment_config
+from core.executor import BlockingExecutor
+from domains.entities.enrichment_entities import EnrichmentJob
+from dtos.enrichment_dto import ChatEnrichmentRequestDTO, EnrichMessageRequestDTO
+from repositories.enrichment_job_repository import EnrichmentJobRepository
+from services.enrichment_service import EnrichmentService
+
+logger = logging.getLogger(__name__)
+
+JOB_KINDS = ("chat", "message")
+
+
+class EnrichmentQueueService:
+    """Queue, process and look up enrichment jobs"""
+
+    @staticmethod
+    def _enqueue(
+        client: Client, kind: str, user_id: str, requests: list, provider_id_field: str
+    ) -> list[EnrichmentJob]:
+        jobs = []
+        for request in requests:
+            provider_id = getattr(request, provider_id_field)
+            if not provider_id:
+                raise ValueError(f"{provider_id_field} is required to queue a {kind} enrichment")
+            # Workers save the enrichment with the service role: only the caller's own chats and messages
+            if request.user_id and request.user_id != user_id:
+                raise ValueError(f"Cannot queue a {kind} enrichment for another user")
+            jobs.append(
+                {
+                    "kind": kind,
+                    "user_id": user_id,
+                    "provider_id": provider_id,
+                    "payload": request.model_dump(exclude_none=True, exclude={"user_id"}),
+                }
+            )
+
+        queued = EnrichmentJobRepository.enqueue(client, jobs, enrichment_config.JOB_MAX_ATTEMPTS)
+
+        # Answer in request order (a chat or message queued twice maps to the same job)
+        by_key = {(job.user_id, job.provider_id): job for job in queued}
+        return [by_key[(job["user_id"], job["provider_id"])] for job in jobs]
+
+    @staticmethod
+    def enqueue_chats(client: Client, user_id: str, requests: list[ChatEnrichmentRequestDTO]) -> list[EnrichmentJob]:
+        """
+        Queue a user's chat enrichments, keyed on chat_provider_id: chats pending or running are not
+        queued again, done or failed ones are
+        Raises ValueError if a chat has no chat_provider_id or belongs to another user
+        """
+        return EnrichmentQueueService._enqueue(client, "chat", user_id, requests, "chat_provider_id")
+
+    @staticmethod
+    def enqueue_messages(client: Client, user_id: str, requests: list[EnrichMessageRequestDTO]) -> list[EnrichmentJob]:
+        """
+        Queue a user's message enrichments, keyed on message_provider_id: messages pending or running
+        are not queued again, done or failed ones are
+        Raises ValueError if a message has no message_provider_id or belongs to another user
+        """
+        return EnrichmentQueueService._enqueue(client, "message", user_id, requests, "message_provider_id")
+
+    @staticmethod
+    def process_job(client: Client, job: EnrichmentJob) -> dict:
+        """Run the enrichment of a job, returns the response stored on the job"""
+        # The job's user_id was checked against its author by RLS, never a user_id from the payload
+        payload = {**job.payload, "user_id": job.user_id}
+        if job.kind == "chat":
+            result = EnrichmentService.enrich_chat(client, job.user_id, ChatEnrichmentRequestDTO(**payload))
+        elif job.kind == "message":
+            result = EnrichmentService.enrich_message(client, job.user_id, EnrichMessageRequestDTO(**payload))
+        else:
+            raise ValueError(f"Unknown enrichment job kind: {job.kind}")
+        return result.model_dump(mode="json")
+
+    @staticmethod
+    def get_job(client: Client, user_id: str, job_id: int) -> EnrichmentJob | None:
+        """Get one of a user's jobs by ID"""
+        return EnrichmentJobRepository.get_job(client, user_id, job_id)
+
+    @staticmethod
+    def get_jobs(client: Client, user_id: str, kind: str, provider_ids: list[str]) -> list[EnrichmentJob]:
+        """Get a user's jobs of chats or messages by provider ID"""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"kind must be one of: {', '.join(JOB_KINDS)}")
+        return EnrichmentJobRepository.get_jobs(client, user_id, kind, provider_ids)
+
+
+class EnrichmentWorker:
+    """
+    Processes queued jobs with up to concurrency LLM calls in flight.
+    Each slot claims one job at a time (SKIP LOCKED, so several worker processes can share the queue),
+    runs it on the worker's own thread pool and records the outcome.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        concurrency: int | None = None,
+        poll_seconds: float | None = None,
+        worker_id: str | None = None,
+    ):
+        self.client = client
+        self.concurrency = max(1, concurrency or enrichment_config.WORKER_CONCURRENCY)
+        self.poll_seconds = enrichment_config.WORKER_POLL_SECONDS if poll_seconds is None else poll_seconds
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.executor = BlockingExecutor(
+            max_workers=self.concurrency,
+            queue_warning_threshold=self.concurrency,
+            thread_name_prefix="enrichment-worker",
+        )
+        self.processed = 0
+        self.failed = 0
+
+    def run_job(self, job: EnrichmentJob) -> bool:
+        """Process one claimed job and record its outcome, returns True if it succeeded"""
+        try:
+            result = EnrichmentQueueService.process_job(self.client, job)
+        except Exception as e:
+            delay = enrichment_config.JOB_RETRY_DELAY_SECONDS * 2 ** max(job.attempts - 1, 0)
+            status = EnrichmentJobRepository.fail(self.client, job, str(e), delay)
+            logger.warning(
+                f"Enrichment job {job.id} ({job.kind} {job.provider_id}) attempt {job.attempts}: {e} -> {status}"
+            )
+            self.failed += 1
+            return False
+
+        EnrichmentJobRepository.complete(self.client, job.id, result)
+        self.processed += 1
+        return True
+
+    def claim_one(self) -> EnrichmentJob | None:
+        jobs = EnrichmentJobRepository.claim(self.client, self.worker_id, 1, enrichment_config.JOB_LOCK_TIMEOUT_SECONDS)
+        return jobs[0] if jobs else None
+
+    async def _slot(self, stop: asyncio.Event, drain: bool) -> None:
+        while not stop.is_set():
+            try:
+                job = await self.executor.run(self.claim_one)
+            except Exception as e:
+                logger.error(f"Failed to claim enrichment jobs: {e}")
+                job = None
+
+            if job is not None:
+                await self.executor.run(self.run_job, job)
+                continue
+            if drain:
+                return
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=self.poll_seconds)
+            except TimeoutError:
+                pass
+
+    async def run(self, stop: asyncio.Event | None = None, drain: bool = False) -> None:
+        """
+        Process jobs until stop is set, or until the queue has no available job when drain is True
+        Jobs in progress are finished before returning.
+        """
+        stop = stop or asyncio.Event()
+        self.executor.start()
+        try:
+            await asyncio.gather(*(self._slot(stop, drain) for _ in range(self.concurrency)))
+        finally:
+            self.executor.shutdown()
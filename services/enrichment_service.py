@@ -8,6 +8,8 @@ import logging
 
 from supabase import Client
 
+from config.enrichment_config import enrichment_config
+from core.executor import blocking_executor
 from dtos.enrichment_dto import (
     ChatEnrichmentRequestDTO,
     ChatEnrichmentResponseDTO,
@@ -19,7 +21,10 @@ from dtos.enrichment_dto import (
     RiskyMessageDTO,
 )
 from repositories.enrichment_repository import EnrichmentRepository
+from services.audit_cache import AuditCache
+from services.audit_facts_service import AuditFactsService
 from services.enrichment import classification_service, risk_assessment_service
+from services.enrichment_cache import EnrichmentCache
 from utils.enrichment import (
     classification_to_enriched_chat,
     classification_to_response_dto,
@@ -43,16 +48,55 @@ class EnrichmentService:
         user_message = truncate_message(request.user_message)
         assistant_response = truncate_message(request.assistant_response) if request.assistant_response else None
 
-        # Call classification service
-        classification_result = classification_service.classify_chat(user_message, assistant_response)
+        # Reuse the result of an identical prompt, otherwise call classification service
+        cache_key = EnrichmentCache.chat_key(user_message, assistant_response)
+        classification_result = EnrichmentCache.get(client, cache_key)
+        from_cache = classification_result is not None
+        if not from_cache:
+            classification_result = classification_service.classify_chat(user_message, assistant_response)
+            EnrichmentCache.put(client, cache_key, classification_result)
 
+        return EnrichmentService._save_chat(client, user_id, request, classification_result, cache_key, from_cache)
+
+    @staticmethod
+    async def enrich_chat_async(
+        client: Client, user_id: str | None, request: ChatEnrichmentRequestDTO
+    ) -> ChatEnrichmentResponseDTO:
+        """enrich_chat with the async classification call: only the database writes take a thread"""
+        user_message = truncate_message(request.user_message)
+        assistant_response = truncate_message(request.assistant_response) if request.assistant_response else None
+
+        cache_key = EnrichmentCache.chat_key(user_message, assistant_response)
+        classification_result = await EnrichmentCache.get_async(client, cache_key)
+        from_cache = classification_result is not None
+        if not from_cache:
+            classification_result = await classification_service.classify_chat_async(user_message, assistant_response)
+            await blocking_executor.run(EnrichmentCache.put, client, cache_key, classification_result)
+
+        return await blocking_executor.run(
+            EnrichmentService._save_chat, client, user_id, request, classification_result, cache_key, from_cache
+        )
+
+    @staticmethod
+    def _save_chat(
+        client: Client,
+        user_id: str | None,
+        request: ChatEnrichmentRequestDTO,
+        classification_result: dict,
+        cache_key: str | None = None,
+        from_cache: bool = False,
+    ) -> ChatEnrichmentResponseDTO:
         # Use user_id from request payload if available (ChatEnrichmentBatchItemDTO), otherwise from auth
         effective_user_id = getattr(request, "user_id", None) or user_id
 
         # Convert to entity and save (only if user_id is provided)
         if effective_user_id:
             enriched_chat = classification_to_enriched_chat(classification_result, request)
-            EnrichmentRepository.save_enriched_chat(client, effective_user_id, enriched_chat)
+            enriched_chat.cache_key, enriched_chat.from_cache = cache_key, from_cache
+            saved = EnrichmentRepository.save_enriched_chat(client, effective_user_id, enriched_chat)
+            if saved:
+                AuditCache.invalidate_user(client, effective_user_id)
+                AuditFactsService.record_enriched_chat(client, saved)
 
         # Return response DTO
         return classification_to_response_dto(classification_result)
@@ -61,8 +105,8 @@ class EnrichmentService:
     async def enrich_chat_batch(
         client: Client, user_id: str | None, requests: list[ChatEnrichmentRequestDTO]
     ) -> list[dict]:
-        """Enrich multiple chats in parallel"""
-        tasks = [EnrichmentService._enrich_chat_async(client, user_id, req) for req in requests]
+        """Enrich multiple chats in parallel (paced by the shared LLM rate limiter)"""
+        tasks = [EnrichmentService.enrich_chat_async(client, user_id, req) for req in requests]
 
         results = await asyncio.gather(*tasks, return_exceptions=True)
 
@@ -77,62 +121,94 @@ class EnrichmentService:
             for i, result in enumerate(results)
         ]
 
-    @staticmethod
-    async def _enrich_chat_async(client: Client, user_id: str | None, request: ChatEnrichmentRequestDTO):
-        """Async wrapper for enrich_chat"""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, EnrichmentService.enrich_chat, client, user_id, request)
-
     @staticmethod
     def enrich_message(
         client: Client, user_id: str | None, request: EnrichMessageRequestDTO
     ) -> EnrichMessageResponseDTO:
         """Enrich a single message with risk assessment"""
-        # Call risk assessment service
-        risk_result = risk_assessment_service.assess_message_risk(
-            content=request.content, role=request.role, context=request.context
+        # Reuse the result of an identical message, otherwise call risk assessment service
+        cache_key = EnrichmentCache.message_key(request.content, request.role, request.context)
+        risk_result = EnrichmentCache.get(client, cache_key)
+        from_cache = risk_result is not None
+        if not from_cache:
+            risk_result = risk_assessment_service.assess_message_risk(
+                content=request.content, role=request.role, context=request.context
+            )
+            EnrichmentCache.put(client, cache_key, risk_result)
+
+        return EnrichmentService._save_message(client, user_id, request, risk_result, cache_key, from_cache)
+
+    @staticmethod
+    async def enrich_message_async(
+        client: Client, user_id: str | None, request: EnrichMessageRequestDTO
+    ) -> EnrichMessageResponseDTO:
+        """enrich_message with the async risk assessment call: only the database writes take a thread"""
+        cache_key = EnrichmentCache.message_key(request.content, request.role, request.context)
+        risk_result = await EnrichmentCache.get_async(client, cache_key)
+        from_cache = risk_result is not None
+        if not from_cache:
+            risk_result = await risk_assessment_service.assess_message_risk_async(
+                content=request.content, role=request.role, context=request.context
+            )
+            await blocking_executor.run(EnrichmentCache.put, client, cache_key, risk_result)
+
+        return await blocking_executor.run(
+            EnrichmentService._save_message, client, user_id, request, risk_result, cache_key, from_cache
         )
 
+    @staticmethod
+    def _save_message(
+        client: Client,
+        user_id: str | None,
+        request: EnrichMessageRequestDTO,
+        risk_result: dict,
+        cache_key: str | None = None,
+        from_cache: bool = False,
+    ) -> EnrichMessageResponseDTO:
         # Use user_id from request payload if available, otherwise from auth
         effective_user_id = request.user_id or user_id
 
         # Convert to entity and save (only if user_id is provided)
         if effective_user_id:
             enriched_message = risk_assessment_to_enriched_message(risk_result, request)
-            EnrichmentRepository.save_enriched_message(client, effective_user_id, enriched_message)
+            enriched_message.cache_key, enriched_message.from_cache = cache_key, from_cache
+            saved = EnrichmentRepository.save_enriched_message(client, effective_user_id, enriched_message)
+            if saved:
+                AuditCache.invalidate_user(client, effective_user_id)
+                AuditFactsService.record_enriched_message(client, saved)
 
         # Return response DTO
         return risk_assessment_to_response_dto(risk_result)
 
     @staticmethod
-    def enrich_message_batch(
+    async def enrich_message_batch(
         client: Client, user_id: str | None, requests: list[EnrichMessageRequestDTO]
     ) -> list[dict]:
-        """Enrich multiple messages sequentially"""
-        results = []
-
-        for request in requests:
-            try:
-                result = EnrichmentService.enrich_message(client, user_id, request)
-                results.append(
-                    {"success": True, "data": result, "error": None, "message_provider_id": request.message_provider_id}
-                )
-            except Exception as e:
-                logger.error(f"Failed to enrich message {request.message_provider_id}: {e}")
-                logger.error(f"Exception type: {type(e).__name__}, Exception args: {e.args}")
-                import traceback
-
-                logger.error(f"Traceback: {traceback.format_exc()}")
-                results.append(
-                    {
+        """
+        Enrich multiple messages concurrently, at most MESSAGE_BATCH_CONCURRENCY LLM calls at a time
+        A failed message does not fail the batch: its result carries the error
+        """
+        semaphore = asyncio.Semaphore(max(1, enrichment_config.MESSAGE_BATCH_CONCURRENCY))
+
+        async def enrich(request: EnrichMessageRequestDTO) -> dict:
+            async with semaphore:
+                try:
+                    result = await EnrichmentService.enrich_message_async(client, user_id, request)
+                except Exception as e:
+                    logger.error(
+                        f"Failed to enrich message {request.message_provider_id}: {type(e).__name__}: {e}",
+                        exc_info=True,
+                    )
+                    return {
                         "success": False,
                         "data": None,
                         "error": str(e),
                         "message_provider_id": request.message_provider_id,
                     }
-                )
+            return {"success": True, "data": result, "error": None, "message_provider_id": request.message_provider_id}
 
-        return results
+        # Results keep the request order
+        return list(await asyncio.gather(*(enrich(request) for request in requests)))
 
     @staticmethod
     def get_risky_messages(
@@ -201,9 +277,15 @@ class EnrichmentService:
     @staticmethod
     def whitelist_message(client: Client, user_id: str, message_provider_id: str) -> bool:
         """Mark a message as whitelisted"""
-        return EnrichmentRepository.whitelist_message(client, user_id, message_provider_id)
+        success = EnrichmentRepository.whitelist_message(client, user_id, message_provider_id)
+        if success:
+            AuditCache.invalidate_user(client, user_id)
+        return success
 
     @staticmethod
     def override_chat_quality(client: Client, user_id: str, chat_provider_id: str, quality_score: int) -> bool:
         """Override chat quality score"""
-        return EnrichmentRepository.override_chat_quality(client, user_id, chat_provider_id, quality_score)
+        success = EnrichmentRepository.override_chat_quality(client, user_id, chat_provider_id, quality_score)
+        if success:
+            AuditCache.invalidate_user(client, user_id)
+        return success
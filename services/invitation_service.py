@@ -4,6 +4,8 @@ from supabase import Client
 
 from dtos import InvitationResponseDTO
 from repositories import InvitationRepository
+from services.audit_cache import AuditCache
+from services.membership_service import MembershipService
 
 from .user_service import UserService
 
@@ -74,6 +76,8 @@ class InvitationService:
                 raise ValueError("This invitation cannot be accepted")
 
             UserService.create_user_organization_role(client, user_id, invitation.organization_id, invitation.role)
+            MembershipService.invalidate(invitation.organization_id)
+            AuditCache.invalidate_membership(invitation.organization_id, user_id)
         elif new_status == "declined":
             if not invitation.can_be_declined():
                 raise ValueError("This invitation cannot be declined")
@@ -0,0 +1,88 @@
+"""
+Organization membership resolver shared by the audit services
+
+Every audit call starts by resolving whose rows to read: the organization members, or the members
+of the requested teams. These lookups are cached for MEMBERSHIP_CACHE_TTL_SECONDS (organization ->
+member IDs, organization -> teams, team -> member IDs) and dropped by the member and team mutations
+in OrganizationService, TeamService and InvitationService. A hit answers on the event loop; only
+misses go to the blocking executor.
+
+Only IDs and team rows are cached: the rows read for these IDs still go through the requester's
+RLS-scoped client.
+"""
+
+from supabase import Client
+
+from config.settings import settings
+from core.executor import blocking_executor
+from domains.entities.team_entities import Team
+from repositories.audit_repository import AuditRepository
+from repositories.team_repository import TeamRepository
+from utils.cache import TTLCache
+
+_organization_members = TTLCache(settings.MEMBERSHIP_CACHE_SIZE, settings.MEMBERSHIP_CACHE_TTL_SECONDS)
+_organization_teams = TTLCache(settings.MEMBERSHIP_CACHE_SIZE, settings.MEMBERSHIP_CACHE_TTL_SECONDS)
+_team_members = TTLCache(settings.MEMBERSHIP_CACHE_SIZE, settings.MEMBERSHIP_CACHE_TTL_SECONDS)
+
+
+class MembershipService:
+    @staticmethod
+    async def get_member_ids(client: Client, organization_id: str) -> list[str]:
+        """User IDs of every member of an organization"""
+        member_ids = _organization_members.get(organization_id)
+        if member_ids is None:
+            member_ids = await blocking_executor.run(
+                AuditRepository.get_organization_member_ids, client, organization_id
+            )
+            _organization_members.set(organization_id, member_ids, settings.MEMBERSHIP_CACHE_TTL_SECONDS)
+        return member_ids
+
+    @staticmethod
+    async def get_teams(client: Client, organization_id: str) -> list[Team]:
+        """Teams of an organization, ordered by name"""
+        teams = _organization_teams.get(organization_id)
+        if teams is None:
+            teams = await blocking_executor.run(TeamRepository.get_organization_teams, client, organization_id)
+            _organization_teams.set(organization_id, teams, settings.MEMBERSHIP_CACHE_TTL_SECONDS)
+        return teams
+
+    @staticmethod
+    async def get_team_member_ids_map(client: Client, team_ids: list[str]) -> dict[str, list[str]]:
+        """team_id -> member user IDs, the uncached teams read in one query"""
+        members_map = {team_id: _team_members.get(team_id) for team_id in dict.fromkeys(team_ids)}
+        missing = [team_id for team_id, member_ids in members_map.items() if member_ids is None]
+        if missing:
+            fetched = await blocking_executor.run(TeamRepository.get_team_member_ids_map, client, missing)
+            for team_id in missing:
+                members_map[team_id] = fetched.get(team_id, [])
+                _team_members.set(team_id, members_map[team_id], settings.MEMBERSHIP_CACHE_TTL_SECONDS)
+        return members_map
+
+    @staticmethod
+    async def get_user_ids(client: Client, organization_id: str, team_ids: list[str] | None) -> list[str]:
+        """User IDs filtered by teams, or all organization members if no teams specified"""
+        if not team_ids:
+            return await MembershipService.get_member_ids(client, organization_id)
+
+        members_map = await MembershipService.get_team_member_ids_map(client, team_ids)
+        return list(dict.fromkeys(user_id for user_ids in members_map.values() for user_id in user_ids))
+
+    @staticmethod
+    def invalidate(organization_id: str, team_id: str | None = None) -> None:
+        """
+        Forget an organization's members and teams after a member or team change
+        Without team_id every cached team membership goes too: team entries are not indexed by organization,
+        and member changes (removal, joining through an invitation) are rare
+        """
+        _organization_members.delete(organization_id)
+        _organization_teams.delete(organization_id)
+        if team_id:
+            _team_members.delete(team_id)
+        else:
+            _team_members.clear()
+
+    @staticmethod
+    def clear_cache() -> None:
+        _organization_members.clear()
+        _organization_teams.clear()
+        _team_members.clear()
@@ -3,6 +3,7 @@ from datetime import UTC, datetime
 
 from supabase import Client
 
+from config.settings import settings
 from dtos import (
     ChatBatchResultDTO,
     ChatResponseDTO,
@@ -12,6 +13,7 @@ from dtos import (
     SaveMessageDTO,
 )
 from repositories import ChatRepository, MessageRepository
+from utils.stats_helpers import message_size_fields
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +35,8 @@ class MessageService:
 
         if message_dto.parent_message_provider_id:
             message_data["parent_message_provider_id"] = message_dto.parent_message_provider_id
+        if settings.MESSAGE_SIZE_WRITES:
+            message_data.update(message_size_fields(message_dto.content))
 
         message = MessageRepository.save_message(client, message_data)
 
@@ -83,10 +87,14 @@ class MessageService:
 
             if message.parent_message_provider_id:
                 message_data["parent_message_provider_id"] = message.parent_message_provider_id
+            if settings.MESSAGE_SIZE_WRITES:
+                message_data.update(message_size_fields(message.content))
 
             messages_to_insert.append(message_data)
 
-        inserted_messages = MessageRepository.save_messages_batch(client, messages_to_insert) if messages_to_insert else []
+        inserted_messages = (
+            MessageRepository.save_messages_batch(client, messages_to_insert) if messages_to_insert else []
+        )
 
         response_dtos = [
             MessageResponseDTO(
@@ -11,6 +11,8 @@ from dtos import (
 )
 from dtos.organization_dto import BulkInviteResponseDTO, CreateOrganizationDTO
 from repositories import OrganizationRepository
+from services.audit_cache import AuditCache
+from services.membership_service import MembershipService
 from services.user_service import UserService
 
 logger = logging.getLogger(__name__)
@@ -75,6 +77,8 @@ class OrganizationService:
     def remove_member(client: Client, organization_id: str, user_id: str) -> None:
         # TODO: est ce qu'on peut se supprimer soi même? est ce qu'on peut supprimer le dernier admin?
         success = OrganizationRepository.remove_member(client, organization_id, user_id)
+        MembershipService.invalidate(organization_id)
+        AuditCache.invalidate_membership(organization_id, user_id)
 
         if not success:
             raise ValueError(
@@ -0,0 +1,100 @@
+"""
+Response cache for the per-user stats and usage endpoints
+
+Responses are keyed by (user, path, query, stats watermark, freshness slot). The watermark is a
+per-user counter bumped on every ingest (migrations/create_user_stats_watermarks.sql), so one
+primary key lookup tells whether anything changed since the last computation. The freshness slot
+rolls every STATS_RESPONSE_CACHE_TTL_SECONDS because the windows ("last 30 days") also move with time.
+
+The key doubles as a weak ETag: a client sending it back in If-None-Match gets a 304.
+"""
+
+import hashlib
+import logging
+import time
+from collections.abc import Callable
+from typing import Any
+
+from fastapi import Request, Response, status
+from supabase import Client
+
+from config.settings import settings
+from repositories.stats_watermark_repository import StatsWatermarkRepository
+from services.usage_engine import UsageEngine
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Browsers keep the body but revalidate with If-None-Match; shared caches must not store it
+CACHE_CONTROL = "private, no-cache"
+
+_responses = TTLCache(settings.STATS_RESPONSE_CACHE_SIZE, settings.STATS_RESPONSE_CACHE_TTL_SECONDS)
+# Last watermark seen per user by this process
+_watermarks = TTLCache(settings.STATS_RESPONSE_CACHE_SIZE, settings.STATS_RESPONSE_CACHE_TTL_SECONDS)
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+class StatsResponseCache:
+    @staticmethod
+    def serve(request: Request, response: Response, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached DTO for this request, a 304 if the client already has it, or compute it
+        Without STATS_RESPONSE_CACHE, or when the watermark cannot be read, compute() is returned as is.
+        """
+        if not settings.STATS_RESPONSE_CACHE:
+            return compute()
+
+        user_id = request.state.user_id
+        try:
+            version = StatsWatermarkRepository.get_version(request.state.supabase_client, user_id)
+        except Exception as e:
+            logger.warning(f"Stats watermark unavailable for user {user_id}, serving uncached: {str(e)}")
+            return compute()
+
+        # Another worker ingested for this user: its usage windows here are stale too
+        if _watermarks.get(user_id) != version:
+            UsageEngine.invalidate(user_id)
+            _responses.delete_where(lambda key: key[0] == user_id)
+            _watermarks.set(user_id, version)
+
+        ttl = settings.STATS_RESPONSE_CACHE_TTL_SECONDS
+        slot = int(time.time() // ttl) if ttl > 0 else 0
+        query = sorted(request.query_params.multi_items())
+        key = (user_id, request.url.path, str(query), version, slot)
+        etag = f'W/"{hashlib.sha256(repr(key).encode()).hexdigest()[:32]}"'
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        dto = _responses.get(key)
+        if dto is None:
+            dto = compute()
+            _responses.set(key, dto)
+        response.headers.update(headers)
+        return dto
+
+    @staticmethod
+    def bump(client: Client, user_id: str) -> None:
+        """
+        Mark a user's stats as changed after an ingest
+        Failures are logged, never raised: the batch is already saved, and cached responses expire on their own.
+        """
+        _responses.delete_where(lambda key: key[0] == user_id)
+        if not settings.STATS_RESPONSE_CACHE:
+            return
+        try:
+            _watermarks.set(user_id, StatsWatermarkRepository.bump(client, user_id))
+        except Exception as e:
+            logger.error(f"Failed to bump stats watermark for user {user_id}: {str(e)}")
+
+    @staticmethod
+    def clear_cache() -> None:
+        _responses.clear()
+        _watermarks.clear()
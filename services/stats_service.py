@@ -31,17 +31,16 @@ from dtos.stats_dto import (
 )
 from mappers.stats_mapper import StatsMapper
 from repositories.stats_repository import StatsRepository
+from services.usage_engine import UsageEngine
 from utils.stats_helpers import (
     CO2_PER_KWH,
     ENERGY_COST_PER_INPUT_TOKEN,
     ENERGY_COST_PER_OUTPUT_TOKEN,
     JOULES_PER_WH,
-    calculate_cost,
+    UserMessageAccumulator,
     energy_to_equivalent,
-    estimate_tokens,
-    fetch_all_paginated,
-    parse_datetime_safe,
 )
+from utils.timestamps import day_buckets
 
 
 class StatsService:
@@ -63,30 +62,16 @@ class StatsService:
         messages = StatsRepository.get_user_messages(client, user_id)
         total_messages = len(messages)
 
-        # Calculate average messages per chat
-        conv_msg_counts = {}
-        for m in messages:
-            cid = m.chat_provider_id
-            if cid:
-                conv_msg_counts[cid] = conv_msg_counts.get(cid, 0) + 1
-
         avg_messages_per_chat = round(total_messages / total_chats, 2) if total_chats else 0
 
-        # Token and energy usage
-        recent_input, recent_output, all_input, all_output = 0, 0, 0, 0
-        recent_messages = [m for m in messages if (m.created_at or "") >= recent_date_str]
-
+        # Token usage, model usage, messages per day (last N days) and thinking time in one pass
+        messages_per_day = {(current_date - timedelta(days=i)).strftime("%Y-%m-%d"): 0 for i in range(recent_days)}
+        totals = UserMessageAccumulator(recent_date_str=recent_date_str, messages_per_day=messages_per_day)
         for msg in messages:
-            tokens = estimate_tokens(msg.content or "")
-            if msg.role == "user":
-                all_input += tokens
-                if msg in recent_messages:
-                    recent_input += tokens
-            else:
-                all_output += tokens
-                if msg in recent_messages:
-                    recent_output += tokens
+            totals.add(msg)
 
+        all_input, all_output = totals.all_input, totals.all_output
+        recent_input, recent_output = totals.recent_input, totals.recent_output
         all_tokens = all_input + all_output
         recent_tokens = recent_input + recent_output
 
@@ -97,36 +82,12 @@ class StatsService:
             recent_input * ENERGY_COST_PER_INPUT_TOKEN + recent_output * ENERGY_COST_PER_OUTPUT_TOKEN
         ) / JOULES_PER_WH
 
-        # Thinking time
-        thinking_times = []
-        msg_lookup = {m.message_provider_id: m for m in messages if m.message_provider_id}
-
-        for msg in messages:
-            if msg.role == "assistant" and msg.parent_message_provider_id and msg.created_at:
-                parent_msg = msg_lookup.get(msg.parent_message_provider_id)
-                if parent_msg and parent_msg.created_at:
-                    try:
-                        t1 = datetime.fromisoformat(msg.created_at.replace("Z", "+00:00"))
-                        t0 = datetime.fromisoformat(parent_msg.created_at.replace("Z", "+00:00"))
-                        diff = (t1 - t0).total_seconds()
-                        if 0.1 <= diff <= 60:
-                            thinking_times.append(diff)
-                    except Exception:
-                        pass
-
+        thinking_times = totals.thinking_times()
         avg_thinking_time = round(sum(thinking_times) / len(thinking_times), 2) if thinking_times else 2.5
         total_thinking_time = (
             round(sum(thinking_times), 2) if thinking_times else round(avg_thinking_time * total_messages, 2)
         )
 
-        # Message count per day (last N days)
-        messages_per_day = {(current_date - timedelta(days=i)).strftime("%Y-%m-%d"): 0 for i in range(recent_days)}
-        for msg in messages:
-            if msg.created_at:
-                date = msg.created_at.split("T")[0]
-                if date in messages_per_day:
-                    messages_per_day[date] += 1
-
         # Efficiency score
         messages_score = 100 - min(abs(avg_messages_per_chat - 5) * 10, 100)
         token_score = (all_output / all_input * 100) if all_input else 50
@@ -135,19 +96,6 @@ class StatsService:
         energy_score = 100 - min(energy_per_token_mwh * 10, 100)
         efficiency_score = round((messages_score + token_score + response_time_score + energy_score) / 4)
 
-        # Model usage
-        model_usage = {}
-        for msg in messages:
-            model = msg.model or "unknown"
-            if model not in model_usage:
-                model_usage[model] = {"count": 0, "input_tokens": 0, "output_tokens": 0}
-            model_usage[model]["count"] += 1
-            tok = estimate_tokens(msg.content or "")
-            if msg.role == "user":
-                model_usage[model]["input_tokens"] += tok
-            else:
-                model_usage[model]["output_tokens"] += tok
-
         # Chats per day
         chats_per_day = {(current_date - timedelta(days=i)).strftime("%Y-%m-%d"): 0 for i in range(recent_days)}
         for chat in chats:
@@ -160,7 +108,7 @@ class StatsService:
         chats_per_day = dict(sorted(chats_per_day.items()))
 
         # Build entity
-        model_usage_entities = {k: ModelUsageStats(**v) for k, v in model_usage.items()}
+        model_usage_entities = {k: ModelUsageStats(**v) for k, v in totals.model_usage.items()}
 
         entity = UserStats(
             total_chats=total_chats,
@@ -214,14 +162,14 @@ class StatsService:
             daily_stats[str(date)] = {"date": str(date), "conversations": 0, "messages": 0}
 
         # Count conversations per day
-        for conv in chats:
-            conv_date = str(parse_datetime_safe(conv.created_at).date())
+        for conv_day in day_buckets(conv.created_at for conv in chats):
+            conv_date = str(conv_day)
             if conv_date in daily_stats:
                 daily_stats[conv_date]["conversations"] += 1
 
         # Count messages per day
-        for msg in messages:
-            msg_date = str(parse_datetime_safe(msg.created_at).date())
+        for msg_day in day_buckets(msg.created_at for msg in messages):
+            msg_date = str(msg_day)
             if msg_date in daily_stats:
                 daily_stats[msg_date]["messages"] += 1
 
@@ -265,73 +213,34 @@ class StatsService:
     @staticmethod
     def get_usage_overview(client: Client, user_id: str, days: int = 30) -> UsageOverviewDTO:
         """Get comprehensive usage overview"""
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
-
-        # Fetch messages with pagination
-        def fetch_messages_batch(offset, limit):
-            return StatsRepository.get_messages_paginated(client, user_id, start_date.isoformat(), offset, limit)
-
-        messages = fetch_all_paginated(fetch_messages_batch)
-
-        # Fetch chats with pagination
-        def fetch_chats_batch(offset, limit):
-            return StatsRepository.get_chats_paginated(client, user_id, start_date.isoformat(), offset, limit)
-
-        chats = fetch_all_paginated(fetch_chats_batch)
+        window = UsageEngine.get_window(client, user_id, days)
+        start_date, end_date = window.start_date, window.end_date
+        chats = window.chats
 
         # Calculate metrics
-        total_messages = len(messages)
+        totals = window.totals()
+        total_messages = totals["messages"]
         total_chats = len(chats)
+        total_input_tokens = totals["input_tokens"]
+        total_output_tokens = totals["output_tokens"]
+        total_cost = totals["cost"]
 
         # Token and cost analysis
-        total_input_tokens = 0
-        total_output_tokens = 0
-        total_cost = 0.0
-        model_usage = defaultdict(lambda: {"messages": 0, "input_tokens": 0, "output_tokens": 0, "cost": 0.0})
+        model_usage = {
+            model: {key: usage[key] for key in ("messages", "input_tokens", "output_tokens", "cost")}
+            for model, usage in window.by_model().items()
+        }
         provider_usage = defaultdict(
             lambda: {"messages": 0, "chats": 0, "input_tokens": 0, "output_tokens": 0, "cost": 0.0}
         )
 
-        # Build chat provider mapping
-        chat_providers = {}
         for chat in chats:
-            chat_provider_id = chat.chat_provider_id
-            provider_name = chat.provider_name
-            if chat_provider_id and provider_name:
-                chat_providers[chat_provider_id] = provider_name
-                provider_usage[provider_name]["chats"] += 1
+            if chat.chat_provider_id and chat.provider_name:
+                provider_usage[chat.provider_name]["chats"] += 1
 
-        for msg in messages:
-            content = msg.content or ""
-            model = msg.model or "unknown"
-            role = msg.role
-            chat_provider_id = msg.chat_provider_id
-
-            tokens = estimate_tokens(content)
-
-            if role == "user":
-                total_input_tokens += tokens
-                model_usage[model]["input_tokens"] += tokens
-            else:
-                total_output_tokens += tokens
-                model_usage[model]["output_tokens"] += tokens
-
-            model_usage[model]["messages"] += 1
-
-            # Calculate cost
-            input_tokens = tokens if role == "user" else 0
-            output_tokens = tokens if role != "user" else 0
-            cost = calculate_cost(model, input_tokens, output_tokens)
-            total_cost += cost
-            model_usage[model]["cost"] += cost
-
-            # Provider analysis
-            provider = chat_providers.get(chat_provider_id, "unknown")
-            provider_usage[provider]["messages"] += 1
-            provider_usage[provider]["input_tokens"] += input_tokens
-            provider_usage[provider]["output_tokens"] += output_tokens
-            provider_usage[provider]["cost"] += cost
+        for provider, usage in window.by_provider().items():
+            for key in ("messages", "input_tokens", "output_tokens", "cost"):
+                provider_usage[provider][key] += usage[key]
 
         # Calculate avg messages per chat for each provider
         for _, stats in provider_usage.items():
@@ -347,7 +256,7 @@ class StatsService:
         co2_emissions_kg = (total_energy_wh / 1000) * CO2_PER_KWH
 
         # Chat statistics
-        chat_stats = StatsService._get_chat_statistics(client, user_id, chats, messages, days)
+        chat_stats = StatsService._get_chat_statistics(client, user_id, chats, window.chat_message_counts, days)
 
         # Top providers
         top_providers = []
@@ -380,7 +289,9 @@ class StatsService:
         return StatsMapper.to_usage_overview_dto(entity)
 
     @staticmethod
-    def _get_chat_statistics(client: Client, user_id: str, chats: list, messages: list, days: int) -> ChatStatistics:
+    def _get_chat_statistics(
+        client: Client, user_id: str, chats: list, chat_message_counts: dict[str, int], days: int
+    ) -> ChatStatistics:
         """Helper to calculate chat statistics"""
         if not chats:
             return ChatStatistics(
@@ -391,15 +302,6 @@ class StatsService:
                 recent_chats=[],
             )
 
-        # Count messages per chat
-        chat_message_counts = defaultdict(int)
-        valid_chat_ids = {chat.chat_provider_id for chat in chats if chat.chat_provider_id}
-
-        for message in messages:
-            chat_provider_id = message.chat_provider_id
-            if chat_provider_id and chat_provider_id in valid_chat_ids:
-                chat_message_counts[chat_provider_id] += 1
-
         # Enrich chats with message counts
         enriched_chats = []
         for chat in chats:
@@ -465,82 +367,11 @@ class StatsService:
         client: Client, user_id: str, days: int = 30, granularity: str = "daily"
     ) -> UsageTimelineDTO:
         """Get usage timeline data"""
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
-
-        # Fetch messages with pagination
-        def fetch_messages_batch(offset, limit):
-            return StatsRepository.get_messages_paginated(client, user_id, start_date.isoformat(), offset, limit)
-
-        messages = fetch_all_paginated(fetch_messages_batch)
-
-        # Fetch chats with pagination
-        def fetch_chats_batch(offset, limit):
-            return StatsRepository.get_chats_paginated(client, user_id, start_date.isoformat(), offset, limit)
-
-        chats = fetch_all_paginated(fetch_chats_batch)
-
-        # Filter chats with messages
-        if chats:
-            chat_ids = {chat.chat_provider_id for chat in chats if chat.chat_provider_id}
-            chat_message_counts = defaultdict(int)
-
-            for message in messages:
-                chat_provider_id = message.chat_provider_id
-                if chat_provider_id and chat_provider_id in chat_ids:
-                    chat_message_counts[chat_provider_id] += 1
-
-            chats = [chat for chat in chats if chat_message_counts.get(chat.chat_provider_id, 0) > 0]
+        window = UsageEngine.get_window(client, user_id, days, hourly=granularity == "hourly")
+        start_date, end_date = window.start_date, window.end_date
 
         # Group by time periods
-        timeline_data = defaultdict(
-            lambda: {"messages": 0, "chats": 0, "input_tokens": 0, "output_tokens": 0, "cost": 0.0, "energy_wh": 0.0}
-        )
-
-        for msg in messages:
-            created_at = parse_datetime_safe(msg.created_at)
-
-            # Determine time bucket
-            if granularity == "hourly":
-                time_key = created_at.strftime("%Y-%m-%d %H:00")
-            elif granularity == "weekly":
-                week_start = created_at - timedelta(days=created_at.weekday())
-                time_key = week_start.strftime("%Y-%m-%d")
-            else:
-                time_key = created_at.strftime("%Y-%m-%d")
-
-            content = msg.content or ""
-            model = msg.model or "unknown"
-            role = msg.role
-            tokens = estimate_tokens(content)
-
-            timeline_data[time_key]["messages"] += 1
-
-            if role == "user":
-                timeline_data[time_key]["input_tokens"] += tokens
-                cost = calculate_cost(model, tokens, 0)
-                energy = tokens * ENERGY_COST_PER_INPUT_TOKEN / JOULES_PER_WH
-            else:
-                timeline_data[time_key]["output_tokens"] += tokens
-                cost = calculate_cost(model, 0, tokens)
-                energy = tokens * ENERGY_COST_PER_OUTPUT_TOKEN / JOULES_PER_WH
-
-            timeline_data[time_key]["cost"] += cost
-            timeline_data[time_key]["energy_wh"] += energy
-
-        # Process chats
-        for chat in chats:
-            created_at = parse_datetime_safe(chat.created_at)
-
-            if granularity == "hourly":
-                time_key = created_at.strftime("%Y-%m-%d %H:00")
-            elif granularity == "weekly":
-                week_start = created_at - timedelta(days=created_at.weekday())
-                time_key = week_start.strftime("%Y-%m-%d")
-            else:
-                time_key = created_at.strftime("%Y-%m-%d")
-
-            timeline_data[time_key]["chats"] += 1
+        timeline_data = window.timeline(granularity)
 
         # Convert to list
         timeline_list = []
@@ -571,29 +402,14 @@ class StatsService:
     @staticmethod
     def get_usage_patterns(client: Client, user_id: str, days: int = 30) -> UsagePatternsDTO:
         """Get usage patterns (time of day, day of week)"""
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
-
-        # Fetch messages with pagination
-        def fetch_messages_batch(offset, limit):
-            return StatsRepository.get_messages_paginated(client, user_id, start_date.isoformat(), offset, limit)
-
-        messages = fetch_all_paginated(fetch_messages_batch)
+        window = UsageEngine.get_window(client, user_id, days, hourly=True)
+        start_date, end_date = window.start_date, window.end_date
 
         # Initialize patterns
-        hourly_usage = {str(i): 0 for i in range(24)}
-        daily_usage = {calendar.day_name[i]: 0 for i in range(7)}
-
-        for msg in messages:
-            created_at = parse_datetime_safe(msg.created_at)
-
-            # Hour of day
-            hour = str(created_at.hour)
-            hourly_usage[hour] += 1
-
-            # Day of week
-            day_name = calendar.day_name[created_at.weekday()]
-            daily_usage[day_name] += 1
+        by_hour = window.messages_by_hour_of_day()
+        by_weekday = window.messages_by_weekday()
+        hourly_usage = {str(i): by_hour[i] for i in range(24)}
+        daily_usage = {calendar.day_name[i]: by_weekday[i] for i in range(7)}
 
         entity = UsagePatterns(
             period=UsagePeriod(days=days, start_date=start_date.isoformat(), end_date=end_date.isoformat()),
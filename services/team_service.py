@@ -6,6 +6,8 @@ from supabase import Client
 
 from dtos.team_dto import OrganizationTeamsResponseDTO, TeamDTO, TeamMemberDTO, TeamTreeNodeDTO
 from repositories.team_repository import TeamRepository
+from services.audit_cache import AuditCache
+from services.membership_service import MembershipService
 
 
 class TeamService:
@@ -16,18 +18,16 @@ class TeamService:
         """Get all teams for an organization with tree structure"""
         teams = TeamRepository.get_organization_teams(client, organization_id)
 
-        # Get member counts for each team
+        # Get member counts for each team (one membership query for all teams)
+        members_map = TeamRepository.get_team_member_ids_map(client, [team.id for team in teams])
         for team in teams:
-            team.member_count = TeamRepository.get_team_member_count(client, team.id)
+            team.member_count = len(members_map.get(team.id, []))
 
         # Build tree structure
         tree = TeamRepository.build_team_tree(teams)
 
         # Count total members across all teams (unique users)
-        all_user_ids = set()
-        for team in teams:
-            members = TeamRepository.get_team_members(client, team.id)
-            all_user_ids.update([m.user_id for m in members])
+        all_user_ids = {user_id for user_ids in members_map.values() for user_id in user_ids}
 
         # Convert to DTOs
         team_dtos = [
@@ -95,6 +95,8 @@ class TeamService:
                 raise ValueError("Parent team must belong to the same organization")
 
         team = TeamRepository.create_team(client, organization_id, name, description, parent_team_id, color)
+        MembershipService.invalidate(organization_id)
+        AuditCache.invalidate_membership(organization_id)
 
         return TeamDTO(
             id=team.id,
@@ -135,6 +137,8 @@ class TeamService:
                 raise ValueError("Parent team must belong to the same organization")
 
         team = TeamRepository.update_team(client, team_id, name, description, parent_team_id, color)
+        MembershipService.invalidate(existing_team.organization_id, team_id)
+        AuditCache.invalidate_membership(existing_team.organization_id)
 
         member_count = TeamRepository.get_team_member_count(client, team_id)
 
@@ -158,7 +162,10 @@ class TeamService:
         if not team:
             raise ValueError(f"Team {team_id} not found")
 
-        return TeamRepository.delete_team(client, team_id)
+        deleted = TeamRepository.delete_team(client, team_id)
+        MembershipService.invalidate(team.organization_id, team_id)
+        AuditCache.invalidate_membership(team.organization_id)
+        return deleted
 
     @staticmethod
     def get_team_members(client: Client, team_id: str) -> list[TeamMemberDTO]:
@@ -187,6 +194,8 @@ class TeamService:
 
         # Add user to team
         permission = TeamRepository.add_user_to_team(client, user_id, team_id, role)
+        MembershipService.invalidate(team.organization_id, team_id)
+        AuditCache.invalidate_membership(team.organization_id, user_id)
 
         # Get member details
         members = TeamRepository.get_team_members(client, team_id)
@@ -210,7 +219,12 @@ class TeamService:
     @staticmethod
     def remove_user_from_team(client: Client, team_id: str, user_id: str) -> bool:
         """Remove a user from a team"""
-        return TeamRepository.remove_user_from_team(client, user_id, team_id)
+        team = TeamRepository.get_team_by_id(client, team_id)
+        removed = TeamRepository.remove_user_from_team(client, user_id, team_id)
+        if team:
+            MembershipService.invalidate(team.organization_id, team_id)
+            AuditCache.invalidate_membership(team.organization_id, user_id)
+        return removed
 
     @staticmethod
     def update_user_team_role(client: Client, team_id: str, user_id: str, role: str) -> TeamMemberDTO:
@@ -237,9 +251,7 @@ class TeamService:
         )
 
     @staticmethod
-    def get_user_teams(
-        client: Client, user_id: str, organization_id: str | None = None
-    ) -> list[TeamDTO]:
+    def get_user_teams(client: Client, user_id: str, organization_id: str | None = None) -> list[TeamDTO]:
         """Get all teams the user belongs to, optionally filtered by organization"""
         teams = TeamRepository.get_user_teams(client, user_id, organization_id)
 
@@ -0,0 +1,320 @@
+"""
+Usage engine shared by the usage overview, timeline and patterns endpoints
+
+A user's window is read once and folded into (hour, model, provider) cells held as columns:
+timestamps become integer hour indexes, models and providers categorical codes. Every view is a
+group-by over the cells instead of a pass over messages, and cost/energy are computed once per
+cell. The dashboard requests the three views together, so windows are cached for a few seconds.
+"""
+
+import threading
+from array import array
+from collections import Counter, defaultdict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+
+from supabase import Client
+
+from config.settings import settings
+from core.executor import prefetch_executor
+from domains.entities.message_entities import Chat, MessageUsage
+from domains.entities.stats_entities import UsageDay
+from repositories.stats_repository import StatsRepository
+from repositories.usage_rollup_repository import UsageRollupRepository
+from utils.cache import TTLCache
+from utils.stats_helpers import (
+    ENERGY_COST_PER_INPUT_TOKEN,
+    ENERGY_COST_PER_OUTPUT_TOKEN,
+    JOULES_PER_WH,
+    calculate_cost,
+)
+from utils.timestamps import HOURS_PER_DAY, hour_buckets
+
+_EMPTY_TOTALS = {"messages": 0, "input_tokens": 0, "output_tokens": 0, "cost": 0.0, "energy_wh": 0.0}
+
+
+def hour_index(moment: datetime) -> int:
+    """Hours since 0001-01-01 of a timestamp's wall-clock time (no timezone conversion, like strftime)"""
+    return moment.toordinal() * HOURS_PER_DAY + moment.hour
+
+
+def hour_day(hour: int) -> date:
+    """Calendar day of an hour index"""
+    return date.fromordinal(hour // HOURS_PER_DAY)
+
+
+def bucket_label(hour: int, granularity: str) -> str:
+    """Timeline bucket of an hour index: the hour, its day, or the Monday of its week"""
+    day = hour_day(hour)
+    if granularity == "hourly":
+        return f"{day.isoformat()} {hour % HOURS_PER_DAY:02d}:00"
+    if granularity == "weekly":
+        return (day - timedelta(days=day.weekday())).isoformat()
+    return day.isoformat()
+
+
+class _Categories:
+    """Categorical codes for repeated strings (models, providers)"""
+
+    def __init__(self):
+        self.values: list[str] = []
+        self._codes: dict[str, int] = {}
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+@dataclass
+class UsageWindow:
+    """
+    A user's usage over [start_date, end_date] as columns, one entry per (hour, model, provider) cell
+    Cells from the daily rollup sit on the first hour of their day, so hourly views need a raw window.
+    """
+
+    start_date: datetime
+    end_date: datetime
+    models: list[str]
+    providers: list[str]
+    hours: array
+    model_codes: array
+    provider_codes: array
+    messages: array
+    input_tokens: array
+    output_tokens: array
+    costs: array
+    energy_wh: array
+    # Chats created in the window, messages per chat, and chats counted by the timeline per hour
+    chats: list[Chat]
+    chat_message_counts: dict[str, int]
+    chats_by_hour: dict[int, int]
+
+    def group_by(self, key: Callable[[int], Hashable]) -> dict[Hashable, dict]:
+        """Sum the cell columns by key(cell index)"""
+        groups = defaultdict(lambda: dict(_EMPTY_TOTALS))
+        for i in range(len(self.hours)):
+            totals = groups[key(i)]
+            totals["messages"] += self.messages[i]
+            totals["input_tokens"] += self.input_tokens[i]
+            totals["output_tokens"] += self.output_tokens[i]
+            totals["cost"] += self.costs[i]
+            totals["energy_wh"] += self.energy_wh[i]
+        return dict(groups)
+
+    def totals(self) -> dict:
+        """Totals over the whole window"""
+        return self.group_by(lambda i: None).get(None, dict(_EMPTY_TOTALS))
+
+    def by_model(self) -> dict[str, dict]:
+        return self.group_by(lambda i: self.models[self.model_codes[i]])
+
+    def by_provider(self) -> dict[str, dict]:
+        return self.group_by(lambda i: self.providers[self.provider_codes[i]])
+
+    def timeline(self, granularity: str) -> dict[str, dict]:
+        """Totals and chat counts per timeline bucket"""
+        labels = {hour: bucket_label(hour, granularity) for hour in {*self.hours, *self.chats_by_hour}}
+        buckets = self.group_by(lambda i: labels[self.hours[i]])
+        for totals in buckets.values():
+            totals["chats"] = 0
+        for hour, count in self.chats_by_hour.items():
+            totals = buckets.setdefault(labels[hour], {**_EMPTY_TOTALS, "chats": 0})
+            totals["chats"] += count
+        return buckets
+
+    def messages_by_hour_of_day(self) -> Counter:
+        """Message count per hour of the day (0-23)"""
+        counts = Counter()
+        for hour, messages in zip(self.hours, self.messages, strict=True):
+            counts[hour % HOURS_PER_DAY] += messages
+        return counts
+
+    def messages_by_weekday(self) -> Counter:
+        """Message count per weekday (0 = Monday)"""
+        counts = Counter()
+        for hour, messages in zip(self.hours, self.messages, strict=True):
+            counts[hour_day(hour).weekday()] += messages
+        return counts
+
+
+class _CellBuilder:
+    """Accumulates messages and rollup rows into (hour, model, provider) cells"""
+
+    def __init__(self):
+        self.models = _Categories()
+        self.providers = _Categories()
+        # cell -> [messages, input_tokens, output_tokens, cost, energy_wh, raw_input_tokens, raw_output_tokens]
+        self.cells: dict[tuple[int, int, int], list] = {}
+
+    def _cell(self, hour: int, model: str, provider: str) -> list:
+        key = (hour, self.models.code(model), self.providers.code(provider))
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = self.cells[key] = [0, 0, 0, 0.0, 0.0, 0, 0]
+        return cell
+
+    def add_message(self, hour: int, msg: MessageUsage, provider: str) -> None:
+        cell = self._cell(hour, msg.model or "unknown", provider)
+        cell[0] += 1
+        # Raw tokens are priced once per cell in build()
+        cell[5 if msg.role == "user" else 6] += msg.estimated_tokens
+
+    def add_rollup_day(self, hour: int, day: UsageDay) -> None:
+        cell = self._cell(hour, day.model, day.provider)
+        cell[0] += day.messages
+        cell[1] += day.input_tokens
+        cell[2] += day.output_tokens
+        cell[3] += day.cost_usd
+        cell[4] += day.energy_wh
+
+    def build(self, start_date: datetime, end_date: datetime, **chat_fields) -> UsageWindow:
+        window = UsageWindow(
+            start_date=start_date,
+            end_date=end_date,
+            models=self.models.values,
+            providers=self.providers.values,
+            hours=array("q"),
+            model_codes=array("I"),
+            provider_codes=array("I"),
+            messages=array("q"),
+            input_tokens=array("q"),
+            output_tokens=array("q"),
+            costs=array("d"),
+            energy_wh=array("d"),
+            **chat_fields,
+        )
+        for (hour, model_code, provider_code), cell in self.cells.items():
+            messages, input_tokens, output_tokens, cost, energy, raw_input, raw_output = cell
+            window.hours.append(hour)
+            window.model_codes.append(model_code)
+            window.provider_codes.append(provider_code)
+            window.messages.append(messages)
+            window.input_tokens.append(input_tokens + raw_input)
+            window.output_tokens.append(output_tokens + raw_output)
+            window.costs.append(cost + calculate_cost(self.models.values[model_code], raw_input, raw_output))
+            window.energy_wh.append(
+                energy
+                + (raw_input * ENERGY_COST_PER_INPUT_TOKEN + raw_output * ENERGY_COST_PER_OUTPUT_TOKEN) / JOULES_PER_WH
+            )
+        return window
+
+
+_windows = TTLCache(max_size=settings.USAGE_ENGINE_CACHE_SIZE, ttl_seconds=settings.USAGE_ENGINE_CACHE_TTL_SECONDS)
+_loading: dict[tuple, threading.Lock] = {}
+_loading_lock = threading.Lock()
+
+
+class UsageEngine:
+    @staticmethod
+    def get_window(client: Client, user_id: str, days: int, hourly: bool = False) -> UsageWindow:
+        """
+        Load (or reuse) a user's usage window for the last days
+        hourly=True requires hour-level cells everywhere, so the daily rollup is not used.
+        Concurrent callers for the same window wait for a single load.
+        """
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=days)
+        rollup_days = None if hourly else UsageEngine.rollup_days(start_date, end_date)
+        key = (user_id, days, "rollup" if rollup_days else "raw")
+
+        window = _windows.get(key)
+        if window is not None:
+            return window
+
+        with _loading_lock:
+            lock = _loading.setdefault(key, threading.Lock())
+        with lock:
+            window = _windows.get(key)
+            if window is None:
+                window = UsageEngine._load(client, user_id, start_date, end_date, rollup_days)
+                _windows.set(key, window)
+        with _loading_lock:
+            _loading.pop(key, None)
+        return window
+
+    @staticmethod
+    def invalidate(user_id: str) -> None:
+        """Drop a user's cached windows"""
+        _windows.delete_where(lambda key: key[0] == user_id)
+
+    @staticmethod
+    def clear_cache() -> None:
+        _windows.clear()
+
+    @staticmethod
+    def rollup_days(start_date: datetime, end_date: datetime) -> tuple[date, date] | None:
+        """First and last closed (UTC) day fully inside [start_date, end_date], when usage rollup reads are enabled"""
+        if not settings.USAGE_ROLLUP_READS:
+            return None
+        first_day = start_date.date() if start_date.time() == time.min else start_date.date() + timedelta(days=1)
+        last_day = end_date.date() - timedelta(days=1)
+        return (first_day, last_day) if first_day <= last_day else None
+
+    @staticmethod
+    def _load(
+        client: Client, user_id: str, start_date: datetime, end_date: datetime, rollup_days: tuple[date, date] | None
+    ) -> UsageWindow:
+        # Chats download on the prefetch executor while messages are read (_load may already run on
+        # blocking_executor, where waiting on another task of the same pool can deadlock)
+        chats_future = prefetch_executor.submit(StatsRepository.get_chats_paginated, client, user_id, start_date)
+        builder = _CellBuilder()
+
+        if rollup_days:
+            # Closed days come from the daily rollup, only the partial first day and today are read raw;
+            # rollup chats count on the day they were created
+            usage_days = UsageRollupRepository.get_user_days(client, user_id, *rollup_days)
+            messages, edge_chats = UsageEngine._read_outside_rollup(client, user_id, start_date, rollup_days)
+            chat_message_counts = Counter(StatsRepository.get_message_chat_ids(client, user_id, start_date))
+        else:
+            usage_days, edge_chats = [], []
+            messages = StatsRepository.get_messages_paginated(client, user_id, start_date)
+            chat_message_counts = Counter(msg.chat_provider_id for msg in messages)
+        chats = chats_future.result()
+
+        chat_providers = {
+            chat.chat_provider_id: chat.provider_name for chat in chats if chat.chat_provider_id and chat.provider_name
+        }
+        for msg, hour in zip(messages, hour_buckets(msg.created_at for msg in messages), strict=True):
+            builder.add_message(hour, msg, chat_providers.get(msg.chat_provider_id, "unknown"))
+
+        chats_by_hour = Counter()
+        for day in usage_days:
+            hour = date.fromisoformat(day.day).toordinal() * HOURS_PER_DAY
+            # Chat-only rows carry no messages and would add empty "unknown" models
+            if day.messages:
+                builder.add_rollup_day(hour, day)
+            if day.chats:
+                chats_by_hour[hour] += day.chats
+
+        # Raw windows only count chats with messages in the window
+        counted_chats = edge_chats if rollup_days else [c for c in chats if chat_message_counts[c.chat_provider_id]]
+        chats_by_hour.update(hour_buckets(chat.created_at for chat in counted_chats))
+
+        return builder.build(
+            start_date,
+            end_date,
+            chats=chats,
+            chat_message_counts=dict(chat_message_counts),
+            chats_by_hour=dict(chats_by_hour),
+        )
+
+    @staticmethod
+    def _read_outside_rollup(
+        client: Client, user_id: str, start_date: datetime, rollup_days: tuple[date, date]
+    ) -> tuple[list[MessageUsage], list[Chat]]:
+        """Raw messages and chats of the partial first day and of today, around the rollup days"""
+        first_day, last_day = rollup_days
+        first_midnight = datetime.combine(first_day, time.min)
+        today = datetime.combine(last_day + timedelta(days=1), time.min)
+
+        messages = StatsRepository.get_messages_in_range(client, user_id, today)
+        chats = StatsRepository.get_chats_in_range(client, user_id, today)
+        if start_date < first_midnight:
+            messages = StatsRepository.get_messages_in_range(client, user_id, start_date, first_midnight) + messages
+            chats = StatsRepository.get_chats_in_range(client, user_id, start_date, first_midnight) + chats
+
+        return messages, chats
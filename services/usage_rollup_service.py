@@ -0,0 +1,69 @@
+import logging
+
+from supabase import Client
+
+from config.settings import settings
+from domains.entities import MessageUsage
+from dtos import ChatResponseDTO, MessageResponseDTO, SaveChatDTO
+from repositories import ChatRepository
+from repositories.usage_rollup_repository import UsageRollupRepository
+from services.audit_facts_service import AuditFactsService
+from services.usage_engine import UsageEngine
+from utils.stats_helpers import build_usage_days, message_size_fields
+
+logger = logging.getLogger(__name__)
+
+
+class UsageRollupService:
+    @staticmethod
+    def record_batch(
+        client: Client,
+        user_id: str,
+        saved_messages: list[MessageResponseDTO],
+        saved_chats: list[ChatResponseDTO],
+        batch_chats: list[SaveChatDTO] | None = None,
+    ) -> None:
+        """
+        Add a saved batch to the user_usage_daily rollup and the user_audit_daily facts
+        Only rows actually inserted are counted, so a retried batch is never counted twice.
+        Failures are logged, never raised: the batch is already saved, and the rebuild scripts fix the totals.
+        Cached usage windows of the user are dropped either way.
+        """
+        if saved_messages or saved_chats:
+            UsageEngine.invalidate(user_id)
+        if not (settings.USAGE_ROLLUP_WRITES or settings.AUDIT_FACTS_WRITES) or not (saved_messages or saved_chats):
+            return
+
+        try:
+            chat_providers = {chat.chat_provider_id: chat.provider_name for chat in batch_chats or []}
+            chat_providers.update({chat.chat_provider_id: chat.provider_name for chat in saved_chats})
+            missing = list({msg.chat_provider_id for msg in saved_messages} - chat_providers.keys())
+            chat_providers.update(ChatRepository.get_chat_providers(client, user_id, missing))
+        except Exception as e:
+            logger.error(f"Failed to read chat providers for user {user_id}: {str(e)}")
+            return
+
+        AuditFactsService.record_batch(client, user_id, saved_messages, saved_chats, chat_providers)
+        if not settings.USAGE_ROLLUP_WRITES:
+            return
+
+        try:
+            messages = [
+                MessageUsage(
+                    id=msg.id,
+                    user_id=msg.user_id,
+                    message_provider_id=msg.message_provider_id,
+                    role=msg.role,
+                    chat_provider_id=msg.chat_provider_id,
+                    model=msg.model,
+                    created_at=msg.created_at,
+                    parent_message_provider_id=msg.parent_message_provider_id,
+                    **message_size_fields(msg.content),
+                )
+                for msg in saved_messages
+            ]
+
+            rows = build_usage_days(user_id, messages, saved_chats, chat_providers)
+            UsageRollupRepository.increment_days(client, rows)
+        except Exception as e:
+            logger.error(f"Failed to update usage rollup for user {user_id}: {str(e)}")
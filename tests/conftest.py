@@ -17,7 +17,14 @@ from tests.mocks import MockSupabaseClient
 os.environ["TESTING_MODE"] = "true"
 
 from main import app
-from services import AuthService
+from services import (
+    AuditCache,
+    AuthService,
+    EnrichmentCache,
+    MembershipService,
+    StatsResponseCache,
+    UsageEngine,
+)
 
 dotenv.load_dotenv()
 
@@ -52,12 +59,14 @@ def supabase_admin(shared_test_storage) -> Client:
 @pytest.fixture
 def mock_auth_service(shared_test_storage):
     """
-    Mock AuthService to accept mock tokens and create_client to use service key
+    Mock AuthService to accept mock tokens and the authenticated client factory to use service key
     """
     from supabase import create_client as original_create_client
 
     import middleware.auth_middleware
 
+    original_create_authenticated_client = middleware.auth_middleware.create_authenticated_client
+
     original_get_current_user_id = AuthService.get_current_user_id
 
     def mock_get_current_user_id(access_token: str):
@@ -66,18 +75,20 @@ def mock_auth_service(shared_test_storage):
             return access_token.replace("mock_token_", "")
         return original_get_current_user_id(access_token)
 
-    def mock_create_client_for_middleware(url, key, options=None):
+    def mock_create_client_for_middleware(access_token: str):
         """When middleware creates authenticated client with mock token, use service key instead"""
-        if options and hasattr(options, "headers"):
-            auth_header = options.headers.get("Authorization", "")
-            if "mock_token_" in auth_header:
-                # Use service key instead of mock token for real Supabase
-                return original_create_client(url, SUPABASE_SERVICE_KEY)
-        return original_create_client(url, key, options)
+        if access_token and access_token.startswith("mock_token_"):
+            # Use service key instead of mock token for real Supabase
+            return original_create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+        return original_create_authenticated_client(access_token)
 
     with (
         patch.object(AuthService, "get_current_user_id", side_effect=mock_get_current_user_id),
-        patch.object(middleware.auth_middleware, "create_client", side_effect=mock_create_client_for_middleware),
+        patch.object(
+            middleware.auth_middleware,
+            "create_authenticated_client",
+            side_effect=mock_create_client_for_middleware,
+        ),
     ):
         yield
 
@@ -171,6 +182,12 @@ def reset_database_between_tests():
     Reset partiel de la DB entre chaque test pour isolation
     """
     yield
+    # Usage windows, stats, audit responses and memberships are cached per user/organization ID, reused across storages
+    UsageEngine.clear_cache()
+    StatsResponseCache.clear_cache()
+    AuditCache.clear_cache()
+    MembershipService.clear_cache()
+    EnrichmentCache.clear_cache()
 
 
 @pytest.fixture
@@ -22,6 +22,11 @@ class MockSupabaseTable:
         self.storage = storage if storage is not None else {}
         self._query_filters = []
         self._select_fields = "*"
+        self._negate_next = False
+        self._order = []
+        self._range = None
+        # update / delete are applied on execute(), once their filters are known
+        self._write = None
 
     def select(self, fields="*"):
         """Mock select method"""
@@ -43,19 +48,25 @@ class MockSupabaseTable:
             self.storage.setdefault(self.table_name, []).extend(data)
         return self
 
+    def upsert(self, data, on_conflict="id", ignore_duplicates=False):
+        """Mock upsert method (on_conflict is a single column)"""
+        table_data = self.storage.setdefault(self.table_name, [])
+        for item in data if isinstance(data, list) else [data]:
+            existing = next((row for row in table_data if row.get(on_conflict) == item.get(on_conflict)), None)
+            if existing is None:
+                table_data.append({"id": str(uuid4()), **item})
+            elif not ignore_duplicates:
+                existing.update(item)
+        return self
+
     def update(self, data):
         """Mock update method"""
-        # Apply update to filtered records
-        table_data = self.storage.get(self.table_name, [])
-        for item in table_data:
-            if self._matches_filters(item):
-                item.update(data)
+        self._write = ("update", data)
         return self
 
     def delete(self):
         """Mock delete method"""
-        table_data = self.storage.get(self.table_name, [])
-        self.storage[self.table_name] = [item for item in table_data if not self._matches_filters(item)]
+        self._write = ("delete", None)
         return self
 
     def eq(self, column, value):
@@ -73,6 +84,64 @@ class MockSupabaseTable:
         self._query_filters.append(("like", column, pattern))
         return self
 
+    def in_(self, column, values):
+        """Mock in filter"""
+        self._query_filters.append(("in", column, set(values)))
+        return self
+
+    def gte(self, column, value):
+        """Mock gte filter (ISO strings compare lexicographically)"""
+        self._query_filters.append(("gte", column, value))
+        return self
+
+    def gt(self, column, value):
+        """Mock gt filter"""
+        self._query_filters.append(("gt", column, value))
+        return self
+
+    def lte(self, column, value):
+        """Mock lte filter"""
+        self._query_filters.append(("lte", column, value))
+        return self
+
+    def lt(self, column, value):
+        """Mock lt filter"""
+        self._query_filters.append(("lt", column, value))
+        return self
+
+    @property
+    def not_(self):
+        """Mock not_ modifier (negates the next filter)"""
+        self._negate_next = True
+        return self
+
+    def is_(self, column, value):
+        """Mock is filter (only "null" is supported)"""
+        filter_type = "not_null" if self._negate_next else "null"
+        self._negate_next = False
+        self._query_filters.append((filter_type, column, value))
+        return self
+
+    def or_(self, filters):
+        """Mock or filter (PostgREST logic tree syntax: "col.op.value,and(col.op.value,...)")"""
+        self._query_filters.append(("or", None, _parse_logic_tree(filters)))
+        return self
+
+    def order(self, column, desc=False):
+        """Mock order (successive calls add tie-breakers)"""
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, count):
+        """Mock limit"""
+        self._range = (0, count - 1)
+        return self
+
+    def range(self, start, end):
+        """Mock range (inclusive bounds)"""
+        self._range = (start, end)
+        return self
+
     def execute(self):
         """Execute the query and return mock response"""
         table_data = self.storage.get(self.table_name, [])
@@ -80,9 +149,27 @@ class MockSupabaseTable:
         # Apply filters
         filtered_data = [item for item in table_data if self._matches_filters(item)]
 
+        write, self._write = self._write, None
+        if write is not None:
+            kind, data = write
+            if kind == "update":
+                for item in filtered_data:
+                    item.update(data)
+            else:
+                deleted = {id(item) for item in filtered_data}
+                self.storage[self.table_name] = [item for item in table_data if id(item) not in deleted]
+
+        for column, desc in reversed(self._order):
+            filtered_data.sort(key=lambda item: (item.get(column) is not None, item.get(column)), reverse=desc)
+        if self._range:
+            start, end = self._range
+            filtered_data = filtered_data[start : end + 1]
+
         # Reset filters for next query
         self._query_filters = []
         self._select_fields = "*"
+        self._order = []
+        self._range = None
 
         return MockSupabaseResponse(data=filtered_data)
 
@@ -105,10 +192,94 @@ class MockSupabaseTable:
 
                 if not re.match(pattern, str(item.get(column, ""))):
                     return False
+            elif filter_type == "in":
+                if item.get(column) not in value:
+                    return False
+            elif filter_type in ("gte", "gt", "lte", "lt"):
+                item_value = item.get(column)
+                if item_value is None:
+                    return False
+                if filter_type == "gte" and not item_value >= value:
+                    return False
+                if filter_type == "gt" and not item_value > value:
+                    return False
+                if filter_type == "lte" and not item_value <= value:
+                    return False
+                if filter_type == "lt" and not item_value < value:
+                    return False
+            elif filter_type == "null":
+                if item.get(column) is not None:
+                    return False
+            elif filter_type == "not_null":
+                if item.get(column) is None:
+                    return False
+            elif filter_type == "or":
+                if not _matches_logic_tree(item, value):
+                    return False
 
         return True
 
 
+def _split_top_level(expression: str) -> list[str]:
+    """Split on commas outside parentheses and quotes"""
+    parts, depth, quoted, current = [], 0, False, ""
+    for char in expression:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        if char == "," and depth == 0 and not quoted:
+            parts.append(current)
+            current = ""
+        else:
+            current += char
+    parts.append(current)
+    return parts
+
+
+def _parse_logic_tree(expression: str, operator: str = "or") -> tuple:
+    """Parse a PostgREST or/and filter string into (operator, [conditions])"""
+    conditions = []
+    for part in _split_top_level(expression):
+        for nested in ("and", "or"):
+            if part.startswith(f"{nested}(") and part.endswith(")"):
+                conditions.append(_parse_logic_tree(part[len(nested) + 1 : -1], nested))
+                break
+        else:
+            column, op, value = part.split(".", 2)
+            conditions.append((op, column, value.strip('"')))
+    return (operator, conditions)
+
+
+def _matches_logic_tree(item: dict, tree: tuple) -> bool:
+    operator, conditions = tree
+    results = []
+    for condition in conditions:
+        if condition[0] in ("and", "or"):
+            results.append(_matches_logic_tree(item, condition))
+            continue
+        op, column, value = condition
+        item_value = item.get(column)
+        if item_value is None:
+            results.append(False)
+            continue
+        if isinstance(item_value, int):
+            value = int(value)
+        results.append(
+            {
+                "eq": item_value == value,
+                "neq": item_value != value,
+                "gt": item_value > value,
+                "gte": item_value >= value,
+                "lt": item_value < value,
+                "lte": item_value <= value,
+            }[op]
+        )
+    return all(results) if operator == "and" else any(results)
+
+
 class MockSupabaseAuth:
     """Mock Supabase auth interface"""
 
@@ -148,15 +319,36 @@ class MockSupabaseAuthAdmin:
         return {"id": user_id}
 
 
+class MockSupabaseRpc:
+    """Mock Postgres function call"""
+
+    def __init__(self, data):
+        self.data = data
+
+    def execute(self):
+        return MockSupabaseResponse(self.data)
+
+
 class MockSupabaseClient:
     """Mock Supabase client"""
 
-    def __init__(self, shared_storage=None):
+    def __init__(self, shared_storage=None, rpc_handlers=None):
         self.storage = shared_storage if shared_storage is not None else {}
         self.auth = MockSupabaseAuth()
+        self.table_calls = []
+        self.rpc_handlers = rpc_handlers if rpc_handlers is not None else {}
+        self.rpc_calls = []
+
+    def rpc(self, fn: str, params: dict = None):
+        """Call a registered handler in place of a Postgres function"""
+        self.rpc_calls.append(fn)
+        if fn not in self.rpc_handlers:
+            raise Exception(f"Could not find the function public.{fn}")
+        return MockSupabaseRpc(self.rpc_handlers[fn](params or {}))
 
     def table(self, table_name: str):
         """Return a mock table"""
+        self.table_calls.append(table_name)
         return MockSupabaseTable(table_name, self.storage)
 
     def from_(self, table_name: str):
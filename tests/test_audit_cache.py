@@ -0,0 +1,169 @@
+"""
+Tests for the organization audit cache: LRU and shared tiers, closed ranges and invalidation.
+"""
+
+import time
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from config.settings import settings
+from domains.entities.team_entities import Team
+from dtos.audit_dto import ThemeStatsDTO
+from repositories.team_repository import TeamRepository
+from services.audit_cache import AuditCache
+from services.team_service import TeamService
+from tests.mocks import MockSupabaseClient
+
+ORG_ID = "org-1"
+ADMIN_ID = "admin-1"
+
+
+class DictSharedCache:
+    """Local stand-in for a shared cache (Redis)"""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        value, expires_at = self.values.get(key, (None, 0))
+        return value if expires_at > time.monotonic() else None
+
+    def set(self, key, value, ttl_seconds):
+        self.values[key] = (value, time.monotonic() + ttl_seconds)
+
+
+@pytest.fixture
+def supabase() -> MockSupabaseClient:
+    return MockSupabaseClient(
+        {
+            "user_organization_roles": [
+                {"user_id": "member-1", "organization_id": ORG_ID, "role": "member"},
+                {"user_id": ADMIN_ID, "organization_id": ORG_ID, "role": "admin"},
+            ],
+            "teams": [{"id": "team-1", "organization_id": ORG_ID, "name": "Team", "color": "#000000"}],
+            "user_team_permissions": [],
+        }
+    )
+
+
+@pytest.fixture
+def shared():
+    backend = DictSharedCache()
+    AuditCache.configure_shared(backend)
+    yield backend
+    AuditCache.configure_shared(None)
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """App with one cached audit widget counting its computations"""
+    monkeypatch.setattr(settings, "AUDIT_CACHE", True)
+    app = FastAPI()
+    app.state.computations = 0
+
+    @app.get("/organizations/{organization_id}/themes")
+    async def themes(request: Request, organization_id: str):
+        request.state.user_id = request.headers.get("x-user", ADMIN_ID)
+
+        async def compute():
+            app.state.computations += 1
+            return ThemeStatsDTO(top_themes=[], total_categorized=app.state.computations)
+
+        return await AuditCache.serve(request, organization_id, ThemeStatsDTO, compute)
+
+    return TestClient(app)
+
+
+def _themes(api, query: str = "days=30", **headers) -> int:
+    response = api.get(f"/organizations/{ORG_ID}/themes?{query}", headers=headers)
+    assert response.status_code == 200
+    return response.json()["total_categorized"]
+
+
+class TestAuditCache:
+    """Test cache keys and tiers."""
+
+    def test_reload_is_served_from_cache(self, api):
+        """Should compute a widget once for repeated identical requests."""
+        assert [_themes(api) for _ in range(3)] == [1, 1, 1]
+
+    def test_filters_and_requesters_are_keyed(self, api):
+        """Should keep team filters, date ranges and requesting users apart."""
+        _themes(api)
+        _themes(api, "days=30&team_ids=team-1")
+        _themes(api, "days=7")
+        _themes(api, **{"x-user": "admin-2"})
+
+        assert api.app.state.computations == 4
+
+    def test_closed_ranges_outlive_open_ranges(self, api, shared, monkeypatch):
+        """Should keep ranges that ended before today with the long TTL."""
+        monkeypatch.setattr(settings, "AUDIT_CACHE_TTL_SECONDS", 0)
+
+        assert [_themes(api), _themes(api)] == [1, 2]
+        closed = "start_date=2025-01-01&end_date=2025-01-31"
+        assert [_themes(api, closed), _themes(api, closed)] == [3, 3]
+        today = datetime.now().date().isoformat()
+        assert _themes(api, f"end_date={today}") != _themes(api, f"end_date={today}")
+
+    def test_closed_ranges_expire_without_shared_tier(self, api, monkeypatch):
+        """Should not keep closed ranges longer when invalidations from other processes cannot reach them."""
+        monkeypatch.setattr(settings, "AUDIT_CACHE_TTL_SECONDS", 0)
+        closed = "start_date=2025-01-01&end_date=2025-01-31"
+
+        assert [_themes(api, closed), _themes(api, closed)] == [1, 2]
+
+    def test_shared_tier_serves_other_workers(self, api, shared):
+        """Should read a result computed by another worker from the shared tier."""
+        _themes(api)
+        AuditCache.clear_cache()  # a fresh worker: empty LRU tier
+
+        assert _themes(api) == 1
+        assert api.app.state.computations == 1
+
+    def test_disabled_by_flag(self, api, monkeypatch):
+        """Should compute every request unless AUDIT_CACHE is set."""
+        monkeypatch.setattr(settings, "AUDIT_CACHE", False)
+
+        assert [_themes(api), _themes(api)] == [1, 2]
+
+
+class TestAuditCacheInvalidation:
+    """Test invalidation from enrichment writes and team changes."""
+
+    def test_enrichment_of_a_member_invalidates_organization(self, api, supabase):
+        """Should recompute once a member's enrichment has been saved."""
+        _themes(api)
+        AuditCache.invalidate_user(supabase, "member-1")
+
+        assert _themes(api) == 2
+
+    def test_enrichment_outside_organization_keeps_cache(self, api, supabase):
+        """Should not touch organizations the enriched user does not belong to."""
+        _themes(api)
+        AuditCache.invalidate_user(supabase, "outsider")
+
+        assert _themes(api) == 1
+
+    def test_invalidation_reaches_other_workers(self, api, supabase, shared):
+        """Should publish the new generation through the shared tier."""
+        _themes(api)
+        AuditCache.invalidate_user(supabase, "member-1")
+        AuditCache.clear_cache()  # another worker, still holding nothing locally
+
+        assert _themes(api) == 2
+        assert _themes(api) == 2
+
+    def test_team_membership_change_invalidates_organization(self, api, supabase, monkeypatch):
+        """Should recompute after a member leaves a team of the organization."""
+        team = Team(id="team-1", organization_id=ORG_ID, name="Team")
+        monkeypatch.setattr(TeamRepository, "get_team_by_id", lambda client, team_id: team)
+        monkeypatch.setattr(TeamRepository, "remove_user_from_team", lambda client, user_id, team_id: True)
+        _themes(api)
+
+        TeamService.remove_user_from_team(supabase, "team-1", "member-1")
+
+        assert _themes(api) == 2
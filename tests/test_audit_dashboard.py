@@ -0,0 +1,166 @@
+"""
+Tests for the composite audit dashboard: one shared read, same panels as the single endpoints.
+"""
+
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+
+from config.settings import settings
+from services.audit_analytics_service import AuditAnalyticsService
+from services.audit_dashboard_service import PANEL_TABLES, AuditDashboardService
+from services.audit_timeseries_service import AuditTimeSeriesService
+from tests.mocks import MockSupabaseClient
+
+ORG_ID = "org-1"
+START = "2025-03-01T00:00:00"
+END = "2025-03-15T00:00:00"
+USER_IDS = ["user-1", "user-2", "user-3"]
+RISK_LEVELS = ["none", "low", "high", "critical"]
+
+
+def _storage() -> dict:
+    base = datetime(2025, 2, 27)
+    chats, messages, enriched_chats, enriched_messages = [], [], [], []
+    # Rows on both sides of the range, plus one outsider's chat
+    for i in range(60):
+        user_id = USER_IDS[i % 3] if i % 11 else "outsider"
+        created_at = (base + timedelta(hours=7 * i)).isoformat()
+        chat_id = f"chat-{i // 2}"
+        if i % 2 == 0:
+            chats.append(
+                {
+                    "id": i,
+                    "user_id": user_id,
+                    "created_at": created_at,
+                    "chat_provider_id": chat_id,
+                    "provider_name": ["chatgpt", "claude", None][i % 3],
+                }
+            )
+            enriched_chats.append(
+                {
+                    "id": i,
+                    "user_id": user_id,
+                    "created_at": created_at,
+                    "quality_score": None if i % 10 == 0 else (i * 7) % 100,
+                    "clarity_score": (i * 3) % 100,
+                    "context_score": None,
+                    "specificity_score": (i * 5) % 100,
+                    "actionability_score": (i * 9) % 100,
+                    "theme": ["coding", "writing", None][i % 3],
+                    "intent": ["ask", None, "create"][i % 3],
+                }
+            )
+        messages.append(
+            {
+                "id": i,
+                "user_id": user_id,
+                "created_at": created_at + "Z",
+                "chat_provider_id": chat_id,
+                "model": ["gpt-4o", None, "claude-3"][i % 3],
+            }
+        )
+        enriched_messages.append(
+            {
+                "id": i,
+                "user_id": user_id,
+                "created_at": created_at,
+                "overall_risk_level": RISK_LEVELS[i % 4],
+                "risk_categories": {"pii": {"detected": i % 3 == 0}, "credentials": {"detected": True}},
+            }
+        )
+
+    return {
+        "user_organization_roles": [{"user_id": user_id, "organization_id": ORG_ID} for user_id in USER_IDS],
+        "teams": [
+            {"id": "team-a", "organization_id": ORG_ID, "name": "Alpha", "color": "#111111"},
+            {"id": "team-b", "organization_id": ORG_ID, "name": "Beta", "color": "#222222"},
+        ],
+        "user_team_permissions": [
+            {"team_id": "team-a", "user_id": "user-1"},
+            {"team_id": "team-a", "user_id": "user-2"},
+            {"team_id": "team-b", "user_id": "user-2"},
+        ],
+        "chats": chats,
+        "messages": messages,
+        "enriched_chats": enriched_chats,
+        "enriched_messages": enriched_messages,
+    }
+
+
+@pytest.fixture
+def client(monkeypatch) -> MockSupabaseClient:
+    monkeypatch.setattr(settings, "BULK_READ_PARALLEL_SLICES", 1)
+    return MockSupabaseClient(_storage())
+
+
+def _single_panel(client, panel: str, team_ids):
+    scope = (client, ORG_ID, START, END, 30, team_ids)
+    calls = {
+        "adoption_curve": lambda: AuditTimeSeriesService.get_adoption_curve(*scope, "week", "providers"),
+        "risk_timeline": lambda: AuditTimeSeriesService.get_risk_timeline(*scope, "week"),
+        "quality_timeline": lambda: AuditTimeSeriesService.get_quality_timeline(*scope, "week"),
+        "theme_distribution": lambda: AuditTimeSeriesService.get_theme_distribution(*scope, 5),
+        "intent_distribution": lambda: AuditTimeSeriesService.get_intent_distribution(*scope, 5),
+        "model_distribution": lambda: AuditAnalyticsService.get_model_distribution(*scope),
+        "provider_distribution": lambda: AuditAnalyticsService.get_provider_distribution(*scope),
+        "quality_metrics_timeline": lambda: AuditAnalyticsService.get_quality_timeline(*scope, "week"),
+        "quality_distribution": lambda: AuditAnalyticsService.get_quality_distribution(*scope),
+        "usage_by_hour": lambda: AuditAnalyticsService.get_usage_by_hour(*scope),
+        "risk_categories": lambda: AuditAnalyticsService.get_risk_categories(*scope),
+    }
+    return asyncio.run(calls[panel]())
+
+
+def _dashboard(client, panels, team_ids=None):
+    return asyncio.run(
+        AuditDashboardService.get_dashboard(
+            client, ORG_ID, panels, START, END, 30, team_ids, granularity="week", view_mode="providers", top_n=5
+        )
+    )
+
+
+class TestAuditDashboard:
+    """Test that panels match their own endpoints and share one read."""
+
+    @pytest.mark.parametrize("team_ids", [None, ["team-a", "team-b"]])
+    def test_panels_match_single_endpoints(self, client, team_ids):
+        """Should compute every panel exactly like its own endpoint."""
+        dashboard = _dashboard(client, list(PANEL_TABLES), team_ids)
+
+        for panel in PANEL_TABLES:
+            expected = _single_panel(client, panel, team_ids).model_dump(exclude={"generated_at"})
+            assert getattr(dashboard, panel).model_dump(exclude={"generated_at"}) == expected, panel
+
+    def test_members_and_tables_are_read_once(self, client):
+        """Should resolve members once and scan each table once for all panels."""
+        _dashboard(client, list(PANEL_TABLES), ["team-a"])
+
+        assert Counter(client.table_calls) == {
+            "user_team_permissions": 1,
+            "teams": 1,
+            "chats": 1,
+            "messages": 1,
+            "enriched_chats": 1,
+            "enriched_messages": 1,
+        }
+
+    def test_only_needed_tables_are_read(self, client):
+        """Should skip the tables no requested panel reads, and leave other panels empty."""
+        dashboard = _dashboard(client, ["risk_categories", "risk_timeline", "risk_timeline"])
+
+        assert set(client.table_calls) == {"user_organization_roles", "enriched_messages"}
+        assert dashboard.panels == ["risk_categories", "risk_timeline"]
+        assert dashboard.adoption_curve is None
+        assert dashboard.risk_timeline.data.total_risky_messages == dashboard.risk_categories.total_risky_messages
+
+    def test_unknown_panel_is_rejected(self, client):
+        """Should raise ValueError before reading anything."""
+        with pytest.raises(ValueError, match="heatmap"):
+            _dashboard(client, ["usage_by_hour", "heatmap"])
+        with pytest.raises(ValueError):
+            _dashboard(client, [])
+
+        assert client.table_calls == []
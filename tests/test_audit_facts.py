@@ -0,0 +1,310 @@
+"""
+Tests for the user_audit_daily facts: incremental writes and time-series panels read from them.
+"""
+
+import asyncio
+import re
+from collections import Counter
+from datetime import UTC, date, datetime, timedelta
+
+import pytest
+
+from config.settings import settings
+from domains.entities.enrichment_entities import EnrichedMessage, RiskCategory
+from dtos import ChatResponseDTO, MessageResponseDTO
+from repositories.audit_facts_repository import AuditFactsRepository
+from services.audit_analytics_service import AuditAnalyticsService
+from services.audit_facts_service import AuditFactsService
+from services.audit_timeseries_service import AuditTimeSeriesService
+from tests.mocks import MockSupabaseClient
+from utils.audit_facts import AUDIT_DAY_COUNTERS, build_audit_days
+
+ORG_ID = "org-1"
+USER_IDS = ["user-1", "user-2", "user-3"]
+RISK_LEVELS = ["none", "low", "high", "none", "critical"]
+
+
+def increment_handler(storage: dict):
+    """In-memory increment_user_audit_daily: adds counts and JSON counters key by key"""
+
+    def handler(params):
+        table = storage.setdefault("user_audit_daily", [])
+        for delta in params["p_rows"]:
+            row = next((r for r in table if (r["user_id"], r["day"]) == (delta["user_id"], delta["day"])), None)
+            if row is None:
+                table.append({**delta, "id": len(table) + 1})
+                continue
+            for column in ("chats", "messages", "risky_messages"):
+                row[column] += delta[column]
+            for column in AUDIT_DAY_COUNTERS:
+                row[column] = dict(Counter(row[column]) + Counter(delta[column]))
+        return None
+
+    return handler
+
+
+def _storage(base: datetime, count: int = 84) -> dict:
+    """Chats and their messages every 4 hours from base, each chat and message enriched"""
+    chats, messages, enriched_chats, enriched_messages = [], [], [], []
+    for i in range(count):
+        user_id = USER_IDS[i % 7 % 3]
+        created = base + timedelta(hours=4 * i)
+        chat_id = f"chat-{i}"
+        chats.append(
+            {
+                "id": i,
+                "user_id": user_id,
+                "created_at": created.isoformat(),
+                "chat_provider_id": chat_id,
+                "provider_name": ["chatgpt", "chatgpt", "claude", None, "chatgpt", "claude", "chatgpt"][i % 7],
+            }
+        )
+        enriched_chats.append(
+            {
+                "id": i,
+                "user_id": user_id,
+                "created_at": created.isoformat(),
+                "quality_score": None if i % 6 == 0 else (i * 37) % 100,
+                "theme": ["coding", "coding", "writing", None, "coding", "research"][i % 6],
+                "intent": ["ask", "create", "ask", None, "ask"][i % 5],
+            }
+        )
+        for m in range(1 + i % 3):
+            n = len(messages)
+            message_created = (created + timedelta(minutes=50 * m)).isoformat()
+            messages.append(
+                {
+                    "id": n,
+                    "user_id": user_id,
+                    "created_at": message_created,
+                    "chat_provider_id": chat_id,
+                    "model": ["gpt-4o", "gpt-4o", None, "claude-3", "claude-3", "gpt-4o"][n % 6],
+                }
+            )
+            enriched_messages.append(
+                {
+                    "id": n,
+                    "user_id": user_id,
+                    "created_at": message_created,
+                    "overall_risk_level": RISK_LEVELS[n % 5],
+                    "risk_categories": {"pii": {"detected": n % 2 == 0}, "credentials": {"detected": n % 3 == 0}},
+                }
+            )
+
+    return {
+        "user_organization_roles": [{"user_id": user_id, "organization_id": ORG_ID} for user_id in USER_IDS],
+        "teams": [
+            {"id": "team-a", "organization_id": ORG_ID, "name": "Alpha", "color": "#111111"},
+            {"id": "team-b", "organization_id": ORG_ID, "name": "Beta", "color": "#222222"},
+        ],
+        "user_team_permissions": [
+            {"team_id": "team-a", "user_id": "user-1"},
+            {"team_id": "team-a", "user_id": "user-2"},
+            {"team_id": "team-b", "user_id": "user-2"},
+        ],
+        "chats": chats,
+        "messages": messages,
+        "enriched_chats": enriched_chats,
+        "enriched_messages": enriched_messages,
+    }
+
+
+def _with_facts(storage: dict, before: datetime) -> MockSupabaseClient:
+    """Client whose user_audit_daily holds the rows the rebuild script writes for days before before"""
+    client = MockSupabaseClient(storage, rpc_handlers={"increment_user_audit_daily": increment_handler(storage)})
+    chat_providers = {chat["chat_provider_id"]: chat["provider_name"] for chat in storage["chats"]}
+    closed = {
+        table: [row for row in storage[table] if row["created_at"] < before.isoformat()]
+        for table in ("chats", "messages", "enriched_chats", "enriched_messages")
+    }
+    client.rpc("increment_user_audit_daily", {"p_rows": build_audit_days(**closed, chat_providers=chat_providers)})
+    client.table_calls.clear()
+    return client
+
+
+@pytest.fixture
+def client(monkeypatch) -> MockSupabaseClient:
+    monkeypatch.setattr(settings, "BULK_READ_PARALLEL_SLICES", 1)
+    return _with_facts(_storage(datetime(2025, 3, 1)), datetime(2025, 3, 15))
+
+
+def _panels(client, start: str, end: str, team_ids) -> dict:
+    scope = (client, ORG_ID, start, end, 30, team_ids)
+    calls = {
+        "adoption_chats": AuditTimeSeriesService.get_adoption_curve(*scope, "week", "chats"),
+        "adoption_messages": AuditTimeSeriesService.get_adoption_curve(*scope, "day", "messages"),
+        "adoption_providers": AuditTimeSeriesService.get_adoption_curve(*scope, "day", "providers"),
+        "adoption_models": AuditTimeSeriesService.get_adoption_curve(*scope, "month", "models"),
+        "risk_timeline": AuditTimeSeriesService.get_risk_timeline(*scope, "day"),
+        "quality_timeline": AuditTimeSeriesService.get_quality_timeline(*scope, "day"),
+        "theme_distribution": AuditTimeSeriesService.get_theme_distribution(*scope, 2),
+        "intent_distribution": AuditTimeSeriesService.get_intent_distribution(*scope, 2),
+        "model_distribution": AuditAnalyticsService.get_model_distribution(*scope),
+        "usage_by_hour": AuditAnalyticsService.get_usage_by_hour(*scope),
+    }
+    return {name: asyncio.run(call).model_dump(exclude={"generated_at"}) for name, call in calls.items()}
+
+
+class TestAuditFactsReads:
+    """Test that fact-backed panels match the raw scans."""
+
+    @pytest.mark.parametrize("team_ids", [None, ["team-a", "team-b"]])
+    @pytest.mark.parametrize("start", ["2025-03-01T00:00:00", "2025-03-03T10:00:00"])
+    def test_panels_match_raw_scans(self, client, monkeypatch, team_ids, start):
+        """Should compute every panel like its raw scan, whole days from facts and the partial first day raw."""
+        end = "2025-03-14T00:00:00"
+        raw = _panels(client, start, end, team_ids)
+        monkeypatch.setattr(settings, "AUDIT_FACTS_READS", True)
+
+        facts = _panels(client, start, end, team_ids)
+
+        for panel, expected in raw.items():
+            assert facts[panel] == expected, panel
+
+    def test_closed_days_read_only_facts(self, client, monkeypatch):
+        """Should answer a midnight-aligned past range from user_audit_daily alone."""
+        monkeypatch.setattr(settings, "AUDIT_FACTS_READS", True)
+
+        asyncio.run(
+            AuditTimeSeriesService.get_risk_timeline(
+                client, ORG_ID, "2025-03-02T00:00:00", "2025-03-10T00:00:00", 30, None, "day"
+            )
+        )
+
+        # The end bound's midnight is read raw (the range includes it)
+        assert Counter(client.table_calls) == {
+            "user_organization_roles": 1,
+            "user_audit_daily": 1,
+            "enriched_messages": 1,
+        }
+
+    def test_today_is_read_raw(self, monkeypatch):
+        """Should add today's raw rows, which the facts do not hold yet, to the closed days."""
+        monkeypatch.setattr(settings, "BULK_READ_PARALLEL_SLICES", 1)
+        now = datetime.now(UTC).replace(tzinfo=None)
+        today = datetime.combine(now.date(), datetime.min.time())
+        storage = _storage(today - timedelta(days=3), count=int((now - today).total_seconds() // 14400) + 19)
+        client = _with_facts(storage, today)
+        start = (today - timedelta(days=3)).isoformat()
+
+        raw = _panels(client, start, now.isoformat(), None)
+        monkeypatch.setattr(settings, "AUDIT_FACTS_READS", True)
+        facts = _panels(client, start, now.isoformat(), None)
+
+        assert facts == raw
+        stored = sum(row["messages"] for row in storage["user_audit_daily"])
+        assert facts["model_distribution"]["total_messages"] > stored
+
+
+def _select_policies(path: str, table: str) -> list[str]:
+    """USING clauses of the SELECT policies a SQL file creates on a table"""
+    with open(path) as f:
+        sql = " ".join(f.read().split())
+    pattern = rf'ON (?:"public"\.)?"?{table}"? FOR SELECT (?:TO \S+ )?USING \((.+?)\);'
+    return re.findall(pattern, sql)
+
+
+def _rls_visible(rows: list[dict], policies: list[str], auth_uid: str) -> list[dict]:
+    """Rows a user's client reads: policies are permissive, a row passing any of them is visible"""
+
+    def passes(row: dict, using: str) -> bool:
+        if using == "true":
+            return True
+        assert "uid" in using and "user_id" in using, using
+        return row["user_id"] == auth_uid
+
+    return [row for row in rows if any(passes(row, using) for using in policies)]
+
+
+class TestAuditFactsAccess:
+    """Test organization panels read through an admin's RLS-scoped client."""
+
+    def test_admin_sees_every_members_days(self, client, monkeypatch):
+        """Should read every member's closed days, like the raw scans of the summarized tables."""
+        storage = client.storage
+        for table in ("chats", "messages", "enriched_chats", "enriched_messages", "user_audit_daily"):
+            path = (
+                "migrations/create_user_audit_daily.sql" if table == "user_audit_daily" else "current_tables_schema.sql"
+            )
+            storage[table] = _rls_visible(storage[table], _select_policies(path, table), auth_uid="user-1")
+            assert {row["user_id"] for row in storage[table]} == set(USER_IDS), table
+        start, end = "2025-03-02T00:00:00", "2025-03-10T00:00:00"
+
+        raw = _panels(client, start, end, None)
+        monkeypatch.setattr(settings, "AUDIT_FACTS_READS", True)
+        facts = _panels(client, start, end, None)
+
+        assert facts["model_distribution"] == raw["model_distribution"]
+        assert facts["risk_timeline"] == raw["risk_timeline"]
+
+
+class TestAuditFactsWrites:
+    """Test the incremental updates on ingest and enrichment."""
+
+    @pytest.fixture
+    def client(self, monkeypatch) -> MockSupabaseClient:
+        monkeypatch.setattr(settings, "AUDIT_FACTS_WRITES", True)
+        storage = {}
+        return MockSupabaseClient(storage, rpc_handlers={"increment_user_audit_daily": increment_handler(storage)})
+
+    def test_batch_and_enrichment_add_up(self, client):
+        """Should count a saved batch and its enrichments into the same (user, day) row."""
+        chat = ChatResponseDTO(
+            id=1,
+            user_id="user-1",
+            chat_provider_id="chat-1",
+            title="Chat",
+            provider_name="claude",
+            created_at="2025-03-01T09:00:00+00:00",
+        )
+        messages = [
+            MessageResponseDTO(
+                id=i,
+                user_id="user-1",
+                message_provider_id=f"msg-{i}",
+                content="hello",
+                role="user",
+                chat_provider_id=chat_id,
+                model="claude-3",
+                created_at=f"2025-03-01T{9 + i:02d}:30:00+00:00",
+            )
+            for i, chat_id in enumerate(["chat-1", "chat-1", "chat-0"])
+        ]
+
+        AuditFactsService.record_batch(client, "user-1", messages, [chat], {"chat-1": "claude"})
+        AuditFactsService.record_enriched_message(
+            client,
+            EnrichedMessage(
+                user_id="user-1",
+                created_at="2025-03-01T12:00:00.52+00:00",
+                overall_risk_level="high",
+                risk_categories={"pii": RiskCategory(level="high", score=80.0, detected=True)},
+            ),
+        )
+
+        [row] = client.storage["user_audit_daily"]
+        assert (row["user_id"], row["day"], row["chats"], row["messages"]) == ("user-1", "2025-03-01", 1, 3)
+        assert row["messages_by_hour"] == {"9": 1, "10": 1, "11": 1}
+        # The message of a chat outside the batch and not found has no provider
+        assert row["messages_by_provider"] == {"claude": 2}
+        assert (row["risky_messages"], row["risk_levels"], row["risk_types"]) == (1, {"high": 1}, {"pii": 1})
+
+    def test_writes_disabled(self, client, monkeypatch):
+        """Should not call the database when AUDIT_FACTS_WRITES is off."""
+        monkeypatch.setattr(settings, "AUDIT_FACTS_WRITES", False)
+
+        AuditFactsService.record_enriched_message(client, EnrichedMessage(user_id="user-1", overall_risk_level="low"))
+
+        assert client.rpc_calls == []
+
+    def test_rebuild_replaces_closed_days_in_one_call(self, client):
+        """Should replace a user's closed days through one RPC call (one transaction), never delete then insert."""
+        calls = []
+        client.rpc_handlers["replace_user_audit_daily"] = calls.append
+        rows = [{"user_id": "user-1", "day": "2025-03-01", "chats": 2, "messages": 5, "risky_messages": 0}]
+
+        AuditFactsRepository.replace_user_days(client, "user-1", date(2025, 3, 2), rows)
+
+        assert client.rpc_calls == ["replace_user_audit_daily"]
+        assert client.table_calls == []
+        assert calls == [{"p_user_id": "user-1", "p_before_day": "2025-03-02", "p_rows": rows}]
@@ -0,0 +1,133 @@
+"""
+Tests for AuditRepository data fetching.
+
+Uses the in-memory MockSupabaseClient so the number of queries per table can be asserted.
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from config.settings import settings
+from repositories.audit_repository import AuditRepository
+from tests.mocks import MockSupabaseClient
+
+START = datetime(2025, 3, 8)
+END = datetime(2025, 3, 15)
+USER_IDS = ["user-1", "user-2"]
+
+
+@pytest.fixture
+def audit_client() -> MockSupabaseClient:
+    storage = {
+        "messages": [
+            # In the audit window
+            {
+                "id": 1,
+                "user_id": "user-1",
+                "chat_provider_id": "chat-a",
+                "message_provider_id": "m1",
+                "created_at": "2025-03-10T09:00:00",
+                "content": "Write a plan",
+            },
+            {
+                "id": 2,
+                "user_id": "user-1",
+                "chat_provider_id": "chat-a",
+                "message_provider_id": "m2",
+                "created_at": "2025-03-10T09:05:00",
+                "content": "More details",
+            },
+            {
+                "id": 3,
+                "user_id": "user-2",
+                "chat_provider_id": "chat-b",
+                "message_provider_id": "m3",
+                "created_at": "2025-03-12T14:00:00",
+                "content": "Summarize",
+            },
+            # In the trend window (7 days before START)
+            {
+                "id": 4,
+                "user_id": "user-2",
+                "chat_provider_id": "chat-c",
+                "message_provider_id": "m4",
+                "created_at": "2025-03-03T10:00:00",
+                "content": "Old",
+            },
+            # Another organization
+            {
+                "id": 5,
+                "user_id": "user-9",
+                "chat_provider_id": "chat-z",
+                "message_provider_id": "m5",
+                "created_at": "2025-03-10T10:00:00",
+                "content": "Other",
+            },
+        ],
+        "enriched_chats": [
+            {
+                "user_id": "user-1",
+                "chat_provider_id": "chat-a",
+                "message_provider_id": "m1",
+                "quality_score": 80,
+                "theme": "writing",
+                "intent": "create",
+                "is_work_related": True,
+            },
+            {
+                "user_id": "user-2",
+                "chat_provider_id": "chat-b",
+                "message_provider_id": "m3",
+                "quality_score": 60,
+                "theme": "analysis",
+                "intent": "summarize",
+                "is_work_related": False,
+            },
+            {
+                "user_id": "user-2",
+                "chat_provider_id": "chat-c",
+                "message_provider_id": "m4",
+                "quality_score": 40,
+                "theme": "writing",
+                "intent": "create",
+                "is_work_related": True,
+            },
+        ],
+        "enriched_messages": [],
+    }
+    return MockSupabaseClient(storage)
+
+
+class TestChatWindowResolver:
+    """Test the shared "messages in date range" stage of the audit fan-out."""
+
+    def test_resolves_current_and_trend_chat_ids(self, audit_client):
+        """Should return in-range messages plus in-range and trend chat IDs."""
+        window = asyncio.run(AuditRepository.resolve_chat_window_async(audit_client, USER_IDS, START, END))
+
+        assert sorted(m["id"] for m in window["messages"]) == [1, 2, 3]
+        assert sorted(window["chat_ids"]) == ["chat-a", "chat-b"]
+        assert window["trend_chat_ids"] == ["chat-c"]
+
+    def test_full_audit_scans_messages_once_per_window(self, audit_client, monkeypatch):
+        """Should scan messages for the audit window and the trend window only (plus the prompt content lookup)."""
+        # One keyset slice per window, so each scan is a single query on this small data set
+        monkeypatch.setattr(settings, "BULK_READ_PARALLEL_SLICES", 1)
+        asyncio.run(AuditRepository.fetch_all_audit_data_parallel(audit_client, USER_IDS, START, END))
+
+        assert audit_client.table_calls.count("messages") == 3
+
+    def test_shared_window_matches_standalone_queries(self, audit_client):
+        """Should produce the same data as each aggregation resolving its own window."""
+        audit_data = asyncio.run(AuditRepository.fetch_all_audit_data_parallel(audit_client, USER_IDS, START, END))
+
+        standalone_quality = asyncio.run(AuditRepository.get_quality_stats_async(audit_client, USER_IDS, START, END))
+        standalone_usage = asyncio.run(AuditRepository.get_usage_stats_async(audit_client, USER_IDS, START, END))
+        standalone_themes = asyncio.run(AuditRepository.get_theme_stats_async(audit_client, USER_IDS, START, END))
+
+        assert audit_data["quality"] == standalone_quality
+        assert audit_data["usage"] == standalone_usage
+        assert audit_data["themes"] == standalone_themes
+        assert [row["quality_score"] for row in audit_data["quality"]["trend"]] == [40]
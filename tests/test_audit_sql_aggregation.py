@@ -0,0 +1,258 @@
+"""
+Tests for the server-side audit KPI aggregation path.
+
+The Python aggregators are the reference implementation: the get_audit_kpis RPC is emulated
+over the mock storage with the same semantics as the SQL functions, and both paths must
+produce identical stats.
+"""
+
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+
+from config.settings import settings
+from repositories.audit_repository import AuditRepository
+from services.audit_service import AuditService
+from tests.mocks import MockSupabaseClient
+from utils.enrichment import (
+    aggregate_intent_stats,
+    aggregate_quality_stats,
+    aggregate_risk_stats,
+    aggregate_theme_stats,
+    aggregate_usage_stats,
+    intent_stats_from_summary,
+    quality_stats_from_summary,
+    risk_stats_from_summary,
+    theme_stats_from_summary,
+    usage_stats_from_summary,
+)
+
+START = datetime(2025, 3, 8)
+END = datetime(2025, 3, 15)
+USER_IDS = ["user-1", "user-2", "user-3"]
+
+
+def _emulate_get_audit_kpis(storage: dict):
+    """Python stand-in for the get_audit_kpis Postgres function"""
+
+    def handler(params: dict) -> dict:
+        user_ids = set(params["p_user_ids"])
+        start = params["p_start_date"]
+        end = params["p_end_date"]
+        trend_start = (datetime.fromisoformat(start) - timedelta(days=params["p_trend_days"])).isoformat()
+
+        messages = [m for m in storage["messages"] if m["user_id"] in user_ids]
+        window = [m for m in messages if start <= m["created_at"] <= end]
+        chat_ids = {m["chat_provider_id"] for m in window}
+        trend_chat_ids = {m["chat_provider_id"] for m in messages if trend_start <= m["created_at"] < start}
+
+        chats = [c for c in storage["enriched_chats"] if c["user_id"] in user_ids]
+        current = [c for c in chats if c["chat_provider_id"] in chat_ids]
+        trend = [c for c in chats if c["chat_provider_id"] in trend_chat_ids]
+
+        scores = sorted(c["quality_score"] for c in current if c["quality_score"] is not None)
+        trend_scores = [c["quality_score"] for c in trend if c["quality_score"] is not None]
+
+        risks = [
+            r for r in storage["enriched_messages"] if r["user_id"] in user_ids and start <= r["created_at"] <= end
+        ]
+        categories = [issue["category"].lower() for r in risks for issue in r["detected_issues"]]
+        risk_scores = [r["overall_risk_score"] for r in risks if r["overall_risk_score"] > 0]
+
+        categorized = [c for c in current if c["intent"] is not None]
+        intents = {}
+        for c in categorized:
+            if c["intent"] and c["quality_score"] is not None:
+                row = intents.setdefault(c["intent"], {"intent": c["intent"], "count": 0, "total_quality": 0})
+                row["count"] += 1
+                row["total_quality"] += c["quality_score"]
+
+        return {
+            "quality": {
+                "total_rated": len(scores),
+                "score_sum": sum(scores),
+                "median_score": scores[len(scores) // 2] if scores else None,
+                "distribution": {
+                    "excellent": sum(1 for s in scores if 80 <= s <= 100),
+                    "good": sum(1 for s in scores if 60 <= s <= 79),
+                    "medium": sum(1 for s in scores if 40 <= s <= 59),
+                    "poor": sum(1 for s in scores if not 40 <= s <= 100),
+                },
+                "trend_count": len(trend_scores),
+                "trend_sum": sum(trend_scores),
+            },
+            "risk": {
+                "total_assessed": len(risks),
+                "level_counts": dict(Counter(r["overall_risk_level"] for r in risks)),
+                "risk_score_sum": sum(risk_scores),
+                "risk_score_count": len(risk_scores),
+                "pii_count": sum(1 for c in categories if "pii" in c),
+                "credentials_count": sum(
+                    1 for c in categories if "pii" not in c and ("security" in c or "credential" in c)
+                ),
+                "sensitive_count": sum(
+                    1
+                    for c in categories
+                    if not any(k in c for k in ("pii", "security", "credential"))
+                    and ("confidential" in c or "data_leakage" in c)
+                ),
+            },
+            "usage": {
+                "total_prompts": len(window),
+                "active_users": len({m["user_id"] for m in window}),
+                "total_chats": len(current),
+                "work_related_count": sum(1 for c in current if c["is_work_related"]),
+            },
+            "themes": {
+                "current": dict(Counter(c["theme"] for c in current if c["theme"])),
+                "trend": dict(Counter(c["theme"] for c in trend if c["theme"])),
+            },
+            "intents": {"total_categorized": len(categorized), "intents": list(intents.values())},
+        }
+
+    return handler
+
+
+def _message(msg_id: int, user_id: str, chat_id: str, created_at: str) -> dict:
+    return {
+        "id": msg_id,
+        "user_id": user_id,
+        "chat_provider_id": chat_id,
+        "message_provider_id": f"m{msg_id}",
+        "created_at": created_at,
+        "content": f"Prompt {msg_id}",
+    }
+
+
+def _chat(user_id: str, chat_id: str, quality, theme, intent, work: bool) -> dict:
+    return {
+        "user_id": user_id,
+        "chat_provider_id": chat_id,
+        "message_provider_id": f"first-{chat_id}",
+        "quality_score": quality,
+        "theme": theme,
+        "intent": intent,
+        "is_work_related": work,
+        "created_at": "2025-03-10T00:00:00",
+    }
+
+
+def _risk(user_id: str, msg_id: int, level: str, score: float, categories: list[str]) -> dict:
+    return {
+        "user_id": user_id,
+        "message_provider_id": f"m{msg_id}",
+        "overall_risk_level": level,
+        "overall_risk_score": score,
+        "detected_issues": [{"category": c} for c in categories],
+        "risk_categories": {},
+        "user_whitelist": False,
+        "created_at": "2025-03-10T12:00:00",
+    }
+
+
+@pytest.fixture
+def storage() -> dict:
+    return {
+        "messages": [
+            _message(1, "user-1", "chat-a", "2025-03-08T00:00:00"),
+            _message(2, "user-1", "chat-a", "2025-03-09T10:00:00"),
+            _message(3, "user-2", "chat-b", "2025-03-11T10:00:00"),
+            _message(4, "user-2", "chat-c", "2025-03-12T10:00:00"),
+            _message(5, "user-3", "chat-d", "2025-03-14T23:00:00"),
+            _message(6, "user-3", "chat-e", "2025-03-13T08:00:00"),
+            # Trend window
+            _message(7, "user-1", "chat-f", "2025-03-02T10:00:00"),
+            _message(8, "user-2", "chat-g", "2025-03-05T10:00:00"),
+            # Outside both windows / other organization
+            _message(9, "user-1", "chat-h", "2025-02-01T10:00:00"),
+            _message(10, "user-9", "chat-z", "2025-03-10T10:00:00"),
+        ],
+        "enriched_chats": [
+            _chat("user-1", "chat-a", 92, "writing", "create", True),
+            _chat("user-2", "chat-b", 61, "analysis", "summarize", False),
+            _chat("user-2", "chat-c", 45, "writing", "create", True),
+            _chat("user-3", "chat-d", 12, "coding", "debug", True),
+            _chat("user-3", "chat-e", None, None, "", False),
+            _chat("user-1", "chat-f", 70, "coding", "debug", True),
+            _chat("user-2", "chat-g", 30, "writing", "create", False),
+            _chat("user-1", "chat-h", 99, "writing", "create", True),
+            _chat("user-9", "chat-z", 100, "sales", "create", True),
+        ],
+        "enriched_messages": [
+            _risk("user-1", 1, "high", 0.8, ["pii_email", "credential_leak"]),
+            _risk("user-2", 3, "medium", 0.45, ["confidential_doc"]),
+            _risk("user-3", 5, "none", 0.0, []),
+            _risk("user-3", 6, "critical", 0.95, ["security_token", "data_leakage", "other"]),
+        ],
+        "user_organization_roles": [{"organization_id": "org-1", "user_id": uid} for uid in USER_IDS],
+    }
+
+
+@pytest.fixture
+def client(storage) -> MockSupabaseClient:
+    return MockSupabaseClient(storage, rpc_handlers={"get_audit_kpis": _emulate_get_audit_kpis(storage)})
+
+
+class TestSummaryConverters:
+    """Test the SQL summary converters against the Python aggregators."""
+
+    def test_summary_matches_python_aggregation(self, client):
+        """Should produce the same stats from the SQL summary as from the raw rows."""
+        rows = asyncio.run(AuditRepository.fetch_all_audit_data_parallel(client, USER_IDS, START, END))
+        kpis = asyncio.run(AuditRepository.get_audit_kpis_async(client, USER_IDS, START, END))
+
+        assert quality_stats_from_summary(kpis["quality"]) == aggregate_quality_stats(rows["quality"])
+        assert risk_stats_from_summary(kpis["risk"]) == aggregate_risk_stats(rows["risk"])
+        assert usage_stats_from_summary(kpis["usage"]) == aggregate_usage_stats(rows["usage"])
+        assert theme_stats_from_summary(kpis["themes"]) == aggregate_theme_stats(rows["themes"])
+        assert intent_stats_from_summary(kpis["intents"]) == aggregate_intent_stats(rows["intents"])
+
+    def test_empty_summary_matches_empty_rows(self):
+        """Should return the same empty stats when no rows match."""
+        assert quality_stats_from_summary({"total_rated": 0}) == aggregate_quality_stats({"current": [], "trend": []})
+        assert risk_stats_from_summary({"total_assessed": 0}) == aggregate_risk_stats([])
+        assert usage_stats_from_summary({}) == aggregate_usage_stats({"messages": [], "work_classification": []})
+        assert theme_stats_from_summary({"current": {}, "trend": {}}) == aggregate_theme_stats({})
+        assert intent_stats_from_summary({"total_categorized": 0, "intents": []}) == aggregate_intent_stats([])
+
+
+class TestSqlAggregationPath:
+    """Test the repository and service wiring of the get_audit_kpis RPC."""
+
+    def test_kpis_fetched_in_one_rpc_call(self, client):
+        """Should call get_audit_kpis once and skip the trend-window scan."""
+        audit_data = asyncio.run(AuditRepository.fetch_audit_data_with_sql_kpis(client, USER_IDS, START, END))
+
+        assert client.rpc_calls == ["get_audit_kpis"]
+        assert "enriched_messages" in client.table_calls  # riskiest prompts still need rows
+        assert set(audit_data) == {"kpis", "top_users", "top_prompts", "risky_prompts"}
+
+    def test_service_sql_path_matches_python_path(self, client, monkeypatch):
+        """Should return the same audit response whichever aggregation path is used."""
+        monkeypatch.setattr(settings, "AUDIT_SQL_AGGREGATION", False)
+        python_audit = asyncio.run(
+            AuditService.get_organization_audit(client, "user-1", "org-1", START.isoformat(), END.isoformat(), 7)
+        )
+        monkeypatch.setattr(settings, "AUDIT_SQL_AGGREGATION", True)
+        sql_audit = asyncio.run(
+            AuditService.get_organization_audit(client, "user-1", "org-1", START.isoformat(), END.isoformat(), 7)
+        )
+
+        assert client.rpc_calls == ["get_audit_kpis"]
+        # Timestamps the aggregators default to datetime.now() differ between the two calls
+        exclude = {"generated_at": True, "top_prompts": {"__all__": {"created_at"}}}
+        assert sql_audit.model_dump(exclude=exclude) == python_audit.model_dump(exclude=exclude)
+
+    def test_service_falls_back_when_rpc_missing(self, storage, monkeypatch):
+        """Should aggregate in Python when the SQL functions are not deployed."""
+        monkeypatch.setattr(settings, "AUDIT_SQL_AGGREGATION", True)
+        client = MockSupabaseClient(storage)
+
+        audit = asyncio.run(
+            AuditService.get_organization_audit(client, "user-1", "org-1", START.isoformat(), END.isoformat(), 7)
+        )
+
+        assert audit.usage_stats.total_prompts == 6
+        assert audit.quality_stats.total_rated == 4
@@ -0,0 +1,99 @@
+"""
+Tests for the shared blocking-I/O executor.
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from core.executor import BlockingExecutor, offload
+
+
+@pytest.fixture
+def executor():
+    executor = BlockingExecutor(max_workers=2, queue_warning_threshold=100)
+    yield executor
+    executor.shutdown()
+
+
+class TestBlockingExecutor:
+    """Test bounded concurrency and queue-depth metrics."""
+
+    def test_runs_blocking_call_off_the_event_loop(self, executor):
+        """Should execute the callable on a worker thread and return its result."""
+        main_thread = threading.get_ident()
+
+        async def scenario():
+            return await executor.run(lambda x: (x * 2, threading.get_ident()), 21)
+
+        result, worker_thread = asyncio.run(scenario())
+        assert result == 42
+        assert worker_thread != main_thread
+
+    def test_concurrency_is_bounded(self, executor):
+        """Should never run more tasks at once than max_workers and report queue depth."""
+        release = threading.Event()
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def task():
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            release.wait(timeout=5)
+            with lock:
+                running.pop()
+
+        async def scenario():
+            tasks = [asyncio.ensure_future(executor.run(task)) for _ in range(5)]
+            await asyncio.sleep(0.1)
+            stats = executor.stats()
+            release.set()
+            await asyncio.gather(*tasks)
+            return stats
+
+        stats = asyncio.run(scenario())
+        assert max(peak) == 2
+        assert stats["active"] == 2
+        assert stats["queued"] == 3
+        assert executor.stats()["completed"] == 5
+        assert executor.stats()["queued"] == 0
+
+    def test_exceptions_propagate(self, executor):
+        """Should re-raise errors from the blocking call in the awaiting coroutine."""
+
+        def boom():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            asyncio.run(executor.run(boom))
+        assert executor.stats()["active"] == 0
+
+    def test_submit_returns_tracked_future(self, executor):
+        """Should run the callable for sync callers and count it like awaited calls."""
+        future = executor.submit(lambda x, y=0: x + y, 40, y=2)
+
+        assert future.result(timeout=5) == 42
+        assert executor.stats()["completed"] == 1
+        assert executor.stats()["queued"] == 0
+
+
+class TestOffload:
+    """Test the decorator exposing blocking functions to async code."""
+
+    def test_offloaded_function_runs_on_worker_thread(self):
+        """Should return a coroutine function that runs the original off the event loop."""
+
+        @offload
+        def lookup(key, suffix=""):
+            """Blocking lookup"""
+            return f"{key}{suffix}", threading.get_ident()
+
+        value, worker_thread = asyncio.run(lookup("team", suffix="-1"))
+
+        assert value == "team-1"
+        assert worker_thread != threading.get_ident()
+        assert lookup.__doc__ == "Blocking lookup"
+        assert lookup.blocking("team")[0] == "team"
@@ -0,0 +1,262 @@
+"""
+Tests for the keyset-paginated bulk reader.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from config.settings import settings
+from repositories.audit_repository import AuditRepository
+from repositories.bulk_reader import (
+    chunk_values,
+    execute_in_chunks,
+    fetch_all_rows,
+    fetch_all_rows_in,
+    iter_pages,
+    iter_pages_prefetched,
+    read_all,
+    read_all_in,
+    stream_rows,
+)
+from repositories.stats_repository import StatsRepository
+from tests.mocks import MockSupabaseClient
+
+START = datetime(2025, 3, 1)
+END = datetime(2025, 3, 2)
+
+
+@pytest.fixture
+def client() -> MockSupabaseClient:
+    # 50 messages, several sharing a timestamp so pages split inside a created_at tie
+    messages = [
+        {
+            "id": i,
+            "user_id": "user-1" if i % 5 else "user-2",
+            "created_at": (START + timedelta(minutes=20 * (i // 3))).isoformat(),
+            "chat_provider_id": f"chat-{i % 7}",
+        }
+        for i in range(50)
+    ]
+    return MockSupabaseClient({"messages": list(reversed(messages))})
+
+
+class TestKeysetPagination:
+    """Test page boundaries and ordering."""
+
+    def test_reads_past_page_size_without_duplicates(self, client):
+        """Should return every matching row once, in (created_at, id) order."""
+        rows = read_all(client, "messages", "id, user_id", page_size=4)
+
+        assert [row["id"] for row in rows] == list(range(50))
+
+    def test_pages_are_bounded(self, client):
+        """Should never hold more than page_size rows per page."""
+        pages = list(iter_pages(client, "messages", "id", page_size=8))
+
+        assert all(len(page) <= 8 for page in pages)
+        assert sum(len(page) for page in pages) == 50
+
+    def test_applies_filters_and_time_bounds(self, client):
+        """Should combine caller filters with [start, end) bounds."""
+        end = START + timedelta(hours=2)
+        rows = read_all(
+            client,
+            "messages",
+            "id",
+            filters=lambda query: query.eq("user_id", "user-1"),
+            start=START,
+            end=end,
+            include_end=False,
+            page_size=3,
+        )
+
+        expected = [i for i in range(50) if i % 5 and START + timedelta(minutes=20 * (i // 3)) < end]
+        assert [row["id"] for row in rows] == expected
+
+    def test_user_chats_and_messages_read_every_page(self, monkeypatch):
+        """Should return a user's chats and messages past one page instead of stopping at PostgREST max-rows."""
+        monkeypatch.setattr(settings, "BULK_READ_PAGE_SIZE", 4)
+        created = [(START + timedelta(hours=i)).isoformat() for i in range(10)]
+        client = MockSupabaseClient(
+            {
+                "chats": [
+                    {
+                        "id": i,
+                        "user_id": "user-1",
+                        "chat_provider_id": f"chat-{i}",
+                        "title": f"Chat {i}",
+                        "provider_name": "chatgpt",
+                        "created_at": created[i],
+                    }
+                    for i in range(10)
+                ],
+                "messages": [
+                    {
+                        "id": i,
+                        "user_id": "user-1",
+                        "message_provider_id": f"msg-{i}",
+                        "role": "user",
+                        "chat_provider_id": f"chat-{i}",
+                        "model": "gpt-4o",
+                        "content": "hello",
+                        "created_at": created[i],
+                    }
+                    for i in range(10)
+                ],
+            }
+        )
+
+        chats = StatsRepository.get_user_chats(client, "user-1")
+        messages = StatsRepository.get_user_messages(client, "user-1", created[3])
+
+        assert [chat.id for chat in chats] == list(range(10))
+        assert [message.id for message in messages] == list(range(3, 10))
+        # One keyset page per 4 rows: 10 chats, then the 7 messages since created[3]
+        assert client.table_calls == ["chats"] * 3 + ["messages"] * 2
+
+
+class TestPrefetchedPages:
+    """Test the blocking reader that requests the next page ahead of the caller."""
+
+    def test_returns_same_pages_as_iter_pages(self, client):
+        """Should yield exactly the pages of a plain keyset read."""
+        prefetched = list(iter_pages_prefetched(client, "messages", "id", page_size=8))
+
+        assert prefetched == list(iter_pages(client, "messages", "id", page_size=8))
+
+    def test_next_page_is_requested_before_the_caller_asks(self, client):
+        """Should have the next page in flight while the caller works on the current one."""
+        pages = iter_pages_prefetched(client, "messages", "id", page_size=10)
+        next(pages)
+
+        deadline = time.monotonic() + 2
+        while len(client.table_calls) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        pages.close()
+
+        assert len(client.table_calls) == 2
+
+    def test_stats_reads_cross_page_boundaries(self, client, monkeypatch):
+        """Should return every message once when the user spans several pages."""
+        monkeypatch.setattr(settings, "BULK_READ_PAGE_SIZE", 7)
+
+        chat_ids = StatsRepository.get_message_chat_ids(client, "user-1", START)
+
+        assert chat_ids == [f"chat-{i % 7}" for i in range(50) if i % 5]
+
+
+class TestStreamRows:
+    """Test the concurrent, time-sliced async reader."""
+
+    def test_slices_preserve_order_and_include_end(self, client):
+        """Should return the same rows as a sequential read, including rows at the end bound."""
+        end = START + timedelta(minutes=20 * 16)
+        rows = asyncio.run(
+            fetch_all_rows(client, "messages", "id", start=START, end=end, page_size=4, parallel_slices=3)
+        )
+
+        expected = [i for i in range(50) if START + timedelta(minutes=20 * (i // 3)) <= end]
+        assert [row["id"] for row in rows] == expected
+
+    def test_early_exit_cancels_readers(self, client):
+        """Should stop fetching when the consumer stops iterating."""
+
+        async def first_rows():
+            rows = []
+            stream = stream_rows(client, "messages", "id", start=START, end=END, page_size=2, prefetch_pages=1)
+            async for row in stream:
+                rows.append(row["id"])
+                if len(rows) == 3:
+                    break
+            await stream.aclose()
+            return rows
+
+        assert asyncio.run(first_rows()) == [0, 1, 2]
+        assert len(client.table_calls) < 25
+
+    def test_query_errors_propagate(self):
+        """Should raise the reader's error instead of returning partial data."""
+
+        class FailingClient(MockSupabaseClient):
+            def table(self, table_name):
+                raise RuntimeError("PostgREST unavailable")
+
+        with pytest.raises(RuntimeError, match="PostgREST unavailable"):
+            asyncio.run(fetch_all_rows(FailingClient(), "messages", "id", start=START, end=END))
+
+
+class TestChunkedInFilters:
+    """Test URL-safe splitting of large in_() value lists."""
+
+    def test_chunks_respect_encoded_length(self):
+        """Should keep each chunk's encoded list under the limit, without duplicates."""
+        values = [f"user-{i:04d}" for i in range(100)] + ["user-0001", None]
+        chunks = chunk_values(values, max_chars=120)
+
+        assert len(chunks) > 1
+        assert all(sum(len(v) + 3 for v in chunk) <= 120 for chunk in chunks)
+        assert [v for chunk in chunks for v in chunk] == [f"user-{i:04d}" for i in range(100)]
+        assert chunk_values([]) == []
+
+    def test_chunked_reads_return_every_row(self, client, monkeypatch):
+        """Should return the same rows whether the ID list is sent whole or in chunks."""
+        chat_ids = [f"chat-{i}" for i in range(7)]
+        whole = read_all_in(client, "messages", "id", "chat_provider_id", chat_ids)
+        monkeypatch.setattr(settings, "IN_FILTER_MAX_CHARS", 10)
+
+        chunked_sync = read_all_in(client, "messages", "id", "chat_provider_id", chat_ids, page_size=4)
+        chunked_async = asyncio.run(
+            fetch_all_rows_in(client, "messages", "id", "chat_provider_id", chat_ids, start=START, end=END)
+        )
+
+        assert len(whole) == 50
+        assert sorted(row["id"] for row in chunked_sync) == sorted(row["id"] for row in whole)
+        assert sorted(row["id"] for row in chunked_async) == sorted(row["id"] for row in whole)
+
+    def test_execute_in_chunks_runs_one_query_per_chunk(self, client, monkeypatch):
+        """Should run a limited query per chunk so the caller can merge the top rows."""
+        monkeypatch.setattr(settings, "IN_FILTER_MAX_CHARS", 10)
+        chat_ids = [f"chat-{i}" for i in range(7)]
+
+        rows = asyncio.run(
+            execute_in_chunks(
+                lambda chunk: client.table("messages").select("id").in_("chat_provider_id", chunk).limit(2), chat_ids
+            )
+        )
+
+        assert len(client.table_calls) == 7
+        assert len(rows) == 14
+
+    def test_top_prompts_limit_members_only(self, monkeypatch):
+        """Should fill each chunk's limit with members' chats, not chats of non-members sharing the chat IDs."""
+        monkeypatch.setattr(settings, "IN_FILTER_MAX_CHARS", 40)
+        # Chats are not scoped per user: a non-member's row can share a member's chat_provider_id
+        enriched = [
+            {"chat_provider_id": f"chat-{i}", "quality_score": 90 + i, "user_id": "outsider"} for i in range(4)
+        ] + [{"chat_provider_id": f"chat-{i}", "quality_score": 50 + i, "user_id": f"user-{i % 2}"} for i in range(4)]
+        client = MockSupabaseClient({"enriched_chats": enriched, "messages": []})
+        window = {"chat_ids": [f"chat-{i}" for i in range(4)]}
+
+        top = asyncio.run(
+            AuditRepository.get_top_prompts_async(client, ["user-0", "user-1"], START, END, 2, chat_window=window)
+        )
+
+        assert [chat["quality_score"] for chat in top["chats"]] == [53, 52]
+
+    def test_audit_results_do_not_depend_on_chunking(self, client, monkeypatch):
+        """Should compute the same audit data when member and chat lists are split."""
+        user_ids = ["user-1", "user-2"]
+        end = START + timedelta(hours=2)
+        expected = asyncio.run(AuditRepository.fetch_all_audit_data_parallel(client, user_ids, START, end))
+        monkeypatch.setattr(settings, "IN_FILTER_MAX_CHARS", 10)
+
+        chunked = asyncio.run(AuditRepository.fetch_all_audit_data_parallel(client, user_ids, START, end))
+
+        def ids(rows):
+            return sorted(row["id"] for row in rows)
+
+        assert ids(chunked["usage"]["messages"]) == ids(expected["usage"]["messages"])
+        assert len(expected["usage"]["messages"]) == 21
@@ -0,0 +1,250 @@
+"""
+Tests for the enrichment job queue: idempotent enqueue and requeue, worker processing and retries, job endpoints.
+"""
+
+import asyncio
+import importlib
+
+import pytest
+
+import middleware.auth_middleware
+import repositories.enrichment_job_repository as enrichment_job_repository
+from config.enrichment_config import enrichment_config
+from dtos.enrichment_dto import (
+    ChatEnrichmentBatchItemDTO,
+    ChatEnrichmentResponseDTO,
+    EnrichMessageRequestDTO,
+    EnrichMessageResponseDTO,
+)
+from services.enrichment_queue_service import EnrichmentQueueService, EnrichmentWorker
+from services.enrichment_service import EnrichmentService
+from tests.mocks import MockSupabaseClient
+
+
+def queue_handlers(storage: dict) -> dict:
+    """In-memory enqueue_enrichment_jobs / claim_enrichment_jobs"""
+    table = storage.setdefault("enrichment_jobs", [])
+
+    def enqueue(params):
+        jobs = []
+        for job in params["p_jobs"]:
+            key = (job["kind"], job["user_id"], job["provider_id"])
+            row = next((r for r in table if (r["kind"], r["user_id"], r["provider_id"]) == key), None)
+            if row is None:
+                row = {**job, "id": len(table) + 1}
+                table.append(row)
+            elif row["status"] not in ("done", "failed"):
+                if row not in jobs:
+                    jobs.append(row)
+                continue
+            row.update(
+                payload=job["payload"],
+                status="pending",
+                attempts=0,
+                max_attempts=params["p_max_attempts"],
+                available_at="1970-01-01T00:00:00+00:00",
+                last_error=None,
+                result=None,
+            )
+            if row not in jobs:
+                jobs.append(row)
+        return jobs
+
+    def claim(params):
+        # Every pending job is available: retry delays are not emulated
+        claimed = [row for row in table if row["status"] == "pending"][: params["p_limit"]]
+        for row in claimed:
+            row.update(status="running", attempts=row["attempts"] + 1, locked_by=params["p_worker"])
+        return [dict(row) for row in claimed]
+
+    return {"enqueue_enrichment_jobs": enqueue, "claim_enrichment_jobs": claim}
+
+
+@pytest.fixture
+def client(monkeypatch) -> MockSupabaseClient:
+    monkeypatch.setattr(enrichment_job_repository, "supabase_admin", None)
+    storage = {}
+    return MockSupabaseClient(storage, rpc_handlers=queue_handlers(storage))
+
+
+def _chat(i: int) -> ChatEnrichmentBatchItemDTO:
+    return ChatEnrichmentBatchItemDTO(user_message=f"question {i}", chat_provider_id=f"chat-{i}", user_id="user-1")
+
+
+def _message(i: int) -> EnrichMessageRequestDTO:
+    return EnrichMessageRequestDTO(content=f"message {i}", message_provider_id=f"msg-{i}", user_id="user-1")
+
+
+class TestEnqueue:
+    """Test queueing chats and messages."""
+
+    def test_enqueue_is_idempotent(self, client):
+        """Should queue a chat once and return its existing job when it is sent again."""
+        first = EnrichmentQueueService.enqueue_chats(client, "user-1", [_chat(1), _chat(2)])
+        again = EnrichmentQueueService.enqueue_chats(client, "user-1", [_chat(2), _chat(3), _chat(2)])
+
+        assert [job.provider_id for job in first] == ["chat-1", "chat-2"]
+        assert [job.provider_id for job in again] == ["chat-2", "chat-3", "chat-2"]
+        assert again[0].id == first[1].id
+        assert len(client.storage["enrichment_jobs"]) == 3
+        assert client.storage["enrichment_jobs"][0]["payload"] == {
+            "user_message": "question 1",
+            "chat_provider_id": "chat-1",
+        }
+
+    def test_provider_id_required(self, client):
+        """Should refuse a message without message_provider_id (it could not be deduplicated)."""
+        with pytest.raises(ValueError):
+            EnrichmentQueueService.enqueue_messages(client, "user-1", [EnrichMessageRequestDTO(content="hi")])
+
+    def test_other_users_are_refused(self, client):
+        """Should refuse to queue a message whose body names another user."""
+        with pytest.raises(ValueError):
+            EnrichmentQueueService.enqueue_messages(client, "user-2", [_message(1)])
+
+        assert client.storage["enrichment_jobs"] == []
+
+    def test_finished_jobs_are_queued_again(self, client, monkeypatch):
+        """Should requeue a failed or done job with its new payload and leave pending jobs as they are."""
+        monkeypatch.setattr(enrichment_config, "JOB_MAX_ATTEMPTS", 1)
+
+        def enrich_message(client, user_id, request):
+            raise RuntimeError("rate limited")
+
+        monkeypatch.setattr(EnrichmentService, "enrich_message", staticmethod(enrich_message))
+        [failed] = EnrichmentQueueService.enqueue_messages(client, "user-1", [_message(1)])
+        asyncio.run(EnrichmentWorker(client, concurrency=1, poll_seconds=0).run(drain=True))
+        [pending] = EnrichmentQueueService.enqueue_messages(client, "user-1", [_message(2)])
+
+        edited = EnrichMessageRequestDTO(content="edited", message_provider_id="msg-1", user_id="user-1")
+        requeued, unchanged = EnrichmentQueueService.enqueue_messages(client, "user-1", [edited, _message(2)])
+
+        assert requeued.id == failed.id
+        assert (requeued.status, requeued.attempts, requeued.last_error) == ("pending", 0, None)
+        assert requeued.payload["content"] == "edited"
+        assert (unchanged.id, unchanged.status) == (pending.id, "pending")
+
+
+class TestWorker:
+    """Test the worker processing queued jobs."""
+
+    def test_drain_processes_every_job(self, client, monkeypatch):
+        """Should enrich each queued chat and message once and store its response on the job."""
+        calls = []
+
+        def enrich_chat(client, user_id, request):
+            calls.append(("chat", user_id, request.chat_provider_id))
+            return ChatEnrichmentResponseDTO(is_work_related=True, theme="coding", intent="ask", raw={})
+
+        def enrich_message(client, user_id, request):
+            calls.append(("message", user_id, request.message_provider_id))
+            return EnrichMessageResponseDTO(
+                overall_risk_level="low",
+                overall_risk_score=10.0,
+                risk_categories={},
+                risk_summary=[],
+                detected_issues=[],
+            )
+
+        monkeypatch.setattr(EnrichmentService, "enrich_chat", staticmethod(enrich_chat))
+        monkeypatch.setattr(EnrichmentService, "enrich_message", staticmethod(enrich_message))
+        EnrichmentQueueService.enqueue_chats(client, "user-1", [_chat(i) for i in range(3)])
+        EnrichmentQueueService.enqueue_messages(client, "user-1", [_message(i) for i in range(4)])
+
+        worker = EnrichmentWorker(client, concurrency=3, poll_seconds=0)
+        asyncio.run(worker.run(drain=True))
+
+        assert sorted(calls) == sorted(
+            [("chat", "user-1", f"chat-{i}") for i in range(3)] + [("message", "user-1", f"msg-{i}") for i in range(4)]
+        )
+        jobs = client.storage["enrichment_jobs"]
+        assert {job["status"] for job in jobs} == {"done"}
+        assert jobs[0]["result"]["theme"] == "coding"
+        assert jobs[3]["result"]["overall_risk_level"] == "low"
+        assert (worker.processed, worker.failed) == (7, 0)
+
+    def test_failures_are_retried_then_failed(self, client, monkeypatch):
+        """Should put a failing job back in the queue until it has used max_attempts."""
+        monkeypatch.setattr(enrichment_config, "JOB_MAX_ATTEMPTS", 3)
+
+        def enrich_message(client, user_id, request):
+            raise RuntimeError("rate limited")
+
+        monkeypatch.setattr(EnrichmentService, "enrich_message", staticmethod(enrich_message))
+        EnrichmentQueueService.enqueue_messages(client, "user-1", [_message(1)])
+
+        worker = EnrichmentWorker(client, concurrency=1, poll_seconds=0)
+        asyncio.run(worker.run(drain=True))
+
+        [job] = client.storage["enrichment_jobs"]
+        assert (job["status"], job["attempts"], job["last_error"]) == ("failed", 3, "rate limited")
+        assert worker.failed == 3
+
+    def test_jobs_are_enriched_for_their_user(self, client, monkeypatch):
+        """Should save the enrichment for the job's user, never a user_id left in its payload."""
+        users = []
+
+        def enrich_message(client, user_id, request):
+            users.append((user_id, request.user_id))
+            raise RuntimeError("stop")
+
+        monkeypatch.setattr(EnrichmentService, "enrich_message", staticmethod(enrich_message))
+        EnrichmentQueueService.enqueue_messages(client, "user-1", [_message(1)])
+        client.storage["enrichment_jobs"][0]["payload"]["user_id"] = "user-2"
+        job = EnrichmentWorker(client).claim_one()
+
+        with pytest.raises(RuntimeError):
+            EnrichmentQueueService.process_job(client, job)
+
+        assert users == [("user-1", "user-1")]
+
+
+class TestJobEndpoints:
+    """Test queueing through the enrichment endpoints and polling jobs."""
+
+    def test_enqueue_requires_authentication(self, client, test_client, monkeypatch):
+        """Should refuse unauthenticated enqueues and queue through the caller's client for the caller only."""
+        # core re-exports the client as core.supabase: patch the module's attribute
+        monkeypatch.setattr(importlib.import_module("core.supabase"), "supabase", client)
+        # Jobs must be written under the caller's RLS policies, not the admin client
+        monkeypatch.setattr(enrichment_job_repository, "supabase_admin", object())
+        monkeypatch.setattr(middleware.auth_middleware, "create_authenticated_client", lambda token: client)
+        body = {"messages": [{"content": "hi", "message_provider_id": "msg-1", "user_id": "user-2"}]}
+
+        assert test_client.post("/enrichment/jobs/messages", json=body).status_code == 401
+        owner = {"Authorization": "Bearer mock_token_user-1"}
+        assert test_client.post("/enrichment/jobs/messages", json=body, headers=owner).status_code == 400
+
+        body["messages"][0].pop("user_id")
+        response = test_client.post("/enrichment/jobs/messages", json=body, headers=owner)
+
+        assert response.status_code == 202
+        [job] = response.json()["jobs"]
+        assert (job["provider_id"], job["status"], job["user_id"]) == ("msg-1", "pending", "user-1")
+        assert [row["user_id"] for row in client.storage["enrichment_jobs"]] == ["user-1"]
+
+    def test_job_reads_require_the_owner(self, client, test_client, monkeypatch):
+        """Should refuse unauthenticated job reads and only show a user their own jobs, through their client."""
+        EnrichmentQueueService.enqueue_messages(client, "user-1", [_message(1)])
+        [row] = client.storage["enrichment_jobs"]
+        # Reads must not bypass RLS with the admin client
+        monkeypatch.setattr(enrichment_job_repository, "supabase_admin", object())
+        monkeypatch.setattr(middleware.auth_middleware, "create_authenticated_client", lambda token: client)
+
+        assert test_client.get("/enrichment/jobs/1").status_code == 401
+        assert (
+            test_client.get("/enrichment/jobs", params={"kind": "message", "provider_ids": ["msg-1"]}).status_code
+            == 401
+        )
+
+        owner = {"Authorization": "Bearer mock_token_user-1"}
+        other = {"Authorization": "Bearer mock_token_user-2"}
+        status = test_client.get(f"/enrichment/jobs/{row['id']}", headers=owner)
+        assert status.status_code == 200
+        assert status.json()["kind"] == "message"
+        assert test_client.get(f"/enrichment/jobs/{row['id']}", headers=other).status_code == 404
+
+        params = {"kind": "message", "provider_ids": ["msg-1"]}
+        listed = test_client.get("/enrichment/jobs", params=params, headers=owner)
+        assert [job["id"] for job in listed.json()["jobs"]] == [row["id"]]
+        assert test_client.get("/enrichment/jobs", params=params, headers=other).json()["jobs"] == []
@@ -0,0 +1,250 @@
+"""
+Tests for enrichment: batch concurrency, the shared LLM rate limiter, the async OpenAI path and the result cache.
+"""
+
+import asyncio
+import importlib
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+import repositories.enrichment_cache_repository as enrichment_cache_repository
+import services.enrichment.rate_limiter as rate_limiter
+from config.enrichment_config import enrichment_config
+from dtos.enrichment_dto import ChatEnrichmentRequestDTO, EnrichMessageRequestDTO, EnrichMessageResponseDTO
+from repositories.enrichment_repository import EnrichmentRepository
+from services.enrichment import ClassificationService, LLMRateLimiter, classification_service, risk_assessment_service
+from services.enrichment.rate_limiter import parse_reset_duration
+from services.enrichment_cache import EnrichmentCache
+from services.enrichment_service import EnrichmentService
+from tests.mocks import MockSupabaseClient
+
+# services.enrichment re-exports the singleton under the module's name
+risk_assessment_module = importlib.import_module("services.enrichment.risk_assessment_service")
+
+
+def _risk(level: str = "low") -> EnrichMessageResponseDTO:
+    return EnrichMessageResponseDTO(
+        overall_risk_level=level, overall_risk_score=10.0, risk_categories={}, risk_summary=[], detected_issues=[]
+    )
+
+
+class TestEnrichMessageBatch:
+    """Test concurrent message batch enrichment."""
+
+    def test_bounded_concurrency_and_error_isolation(self, monkeypatch):
+        """Should run up to MESSAGE_BATCH_CONCURRENCY messages at once and isolate failures, in request order."""
+        monkeypatch.setattr(enrichment_config, "MESSAGE_BATCH_CONCURRENCY", 3)
+        in_flight = peak = 0
+
+        async def enrich_message_async(client, user_id, request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.02)
+            in_flight -= 1
+            if request.message_provider_id == "msg-4":
+                raise RuntimeError("invalid JSON")
+            return _risk()
+
+        monkeypatch.setattr(EnrichmentService, "enrich_message_async", staticmethod(enrich_message_async))
+        requests = [EnrichMessageRequestDTO(content=f"message {i}", message_provider_id=f"msg-{i}") for i in range(10)]
+
+        results = asyncio.run(EnrichmentService.enrich_message_batch(None, None, requests))
+
+        assert peak == 3
+        assert [result["message_provider_id"] for result in results] == [f"msg-{i}" for i in range(10)]
+        assert [result["success"] for result in results] == [i != 4 for i in range(10)]
+        assert results[4]["error"] == "invalid JSON"
+        assert results[0]["data"].overall_risk_level == "low"
+
+
+class FakeRawResponse:
+    def __init__(self, content: str, headers: dict):
+        self.headers = headers
+        self._content = content
+
+    def parse(self):
+        message = SimpleNamespace(content=self._content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class FakeAsyncOpenAI:
+    """Chat completions client answering with the queued responses (exceptions are raised)"""
+
+    def __init__(self, responses: list):
+        self.responses = responses
+        self.calls = 0
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(with_raw_response=SimpleNamespace(create=self._create)))
+
+    async def _create(self, **kwargs):
+        self.calls += 1
+        self.requests.append(kwargs)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def _rate_limit_error(headers: dict) -> openai.RateLimitError:
+    response = httpx.Response(429, headers=headers, request=httpx.Request("POST", "https://api.openai.com/v1"))
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+
+class TestLLMRateLimiter:
+    """Test the shared token bucket."""
+
+    def test_reservations_queue_behind_the_burst(self):
+        """Should let the burst through and space the next requests at the refill rate."""
+        limiter = LLMRateLimiter(requests_per_minute=600, burst=2)
+
+        waits = [limiter.reserve() for _ in range(4)]
+
+        assert waits[:2] == [0.0, 0.0]
+        assert waits[2] == pytest.approx(0.1, abs=0.01)
+        assert waits[3] == pytest.approx(0.2, abs=0.01)
+
+    def test_headers_drive_the_bucket(self):
+        """Should follow the account's limit and pause until the quota resets when none is left."""
+        limiter = LLMRateLimiter(requests_per_minute=60, burst=10)
+
+        limiter.update_from_headers(
+            {
+                "x-ratelimit-limit-requests": "3000",
+                "x-ratelimit-remaining-requests": "0",
+                "x-ratelimit-reset-requests": "1m30s",
+            }
+        )
+
+        assert limiter.rate == 50.0
+        assert limiter.reserve() == pytest.approx(90.0, abs=0.1)
+        assert parse_reset_duration("120ms") == pytest.approx(0.12)
+        assert parse_reset_duration("soon") is None
+
+
+class TestAsyncRiskAssessment:
+    """Test the AsyncOpenAI path of RiskAssessmentService."""
+
+    def test_rate_limited_call_is_retried_after_retry_after(self, monkeypatch):
+        """Should pause the shared limiter on a 429 and retry after the server's retry-after, without a thread."""
+        limiter = LLMRateLimiter(requests_per_minute=6000, burst=5)
+        monkeypatch.setattr(rate_limiter, "llm_rate_limiter", limiter)
+        monkeypatch.setattr(risk_assessment_module, "llm_rate_limiter", limiter)
+        client = FakeAsyncOpenAI(
+            [
+                _rate_limit_error({"retry-after": "0.05"}),
+                FakeRawResponse('{"pii": {"risk_score": 90, "detected": true}}', {"x-ratelimit-limit-requests": "60"}),
+            ]
+        )
+        monkeypatch.setattr(risk_assessment_service, "async_client", client)
+        monkeypatch.setattr(risk_assessment_service, "use_assistant", False)
+        monkeypatch.setattr(
+            risk_assessment_service, "prompt_template", "{message_content} {context} {role}", raising=False
+        )
+
+        result = asyncio.run(risk_assessment_service.assess_message_risk_async("my password is hunter2"))
+
+        assert client.calls == 2
+        assert "overall_risk_level" in result
+        # The second response set the rate from its headers
+        assert limiter.rate == 1.0
+
+
+class TestSingleCallMode:
+    """Test the single chat completion replacing assistant thread runs."""
+
+    def test_assistant_prompt_in_one_call(self, monkeypatch):
+        """Should send the assistant's instructions and prompt in one request, without creating a thread."""
+        monkeypatch.setattr(enrichment_config, "CHAT_CLASSIFICATION_ASSISTANT_ID", "asst_123")
+        monkeypatch.setattr(enrichment_config, "ASSISTANT_SINGLE_CALL", True)
+        service = ClassificationService()
+        client = FakeAsyncOpenAI([FakeRawResponse('{"is_work_related": true, "theme": "coding", "intent": "ask"}', {})])
+        # Any thread call would fail on the missing beta attribute
+        service.async_client = client
+
+        result = asyncio.run(service.classify_chat_async("How do I reverse a list?", "Use reversed()"))
+
+        assert client.calls == 1
+        [request] = client.requests
+        with open(enrichment_config.CLASSIFICATION_INSTRUCTIONS_PATH) as f:
+            assert request["messages"][0] == {"role": "system", "content": f.read()}
+        assert request["messages"][1]["content"].startswith("**USER MESSAGE:**\nHow do I reverse a list?")
+        assert result["theme"] == "coding"
+
+
+class TestEnrichmentCache:
+    """Test reusing enrichment results for identical prompts."""
+
+    @pytest.fixture
+    def client(self, monkeypatch) -> MockSupabaseClient:
+        monkeypatch.setattr(enrichment_config, "CACHE_ENABLED", True)
+        monkeypatch.setattr(enrichment_cache_repository, "supabase_admin", None)
+        return MockSupabaseClient({})
+
+    @pytest.fixture
+    def saved(self, monkeypatch) -> list:
+        """Entities passed to the repository (nothing is returned, so no audit side effects run)"""
+        saved = []
+        monkeypatch.setattr(
+            EnrichmentRepository, "save_enriched_chat", staticmethod(lambda client, user_id, e: saved.append(e))
+        )
+        monkeypatch.setattr(
+            EnrichmentRepository, "save_enriched_message", staticmethod(lambda client, user_id, e: saved.append(e))
+        )
+        return saved
+
+    def test_duplicate_chat_skips_the_llm(self, client, saved, monkeypatch):
+        """Should classify a prompt once and save the copy of a whitespace variant with its cache provenance."""
+        calls = []
+
+        def classify_chat(user_message, assistant_response=None):
+            calls.append(user_message)
+            return {"is_work_related": True, "theme": "coding", "intent": "ask", "processing_time_ms": 900}
+
+        monkeypatch.setattr(classification_service, "classify_chat", classify_chat)
+
+        first = EnrichmentService.enrich_chat(
+            client, "user-1", ChatEnrichmentRequestDTO(user_message="How do I  reverse a list?", chat_provider_id="c1")
+        )
+        second = EnrichmentService.enrich_chat(
+            client, "user-2", ChatEnrichmentRequestDTO(user_message="How do I reverse\na list? ", chat_provider_id="c2")
+        )
+
+        assert len(calls) == 1
+        assert first.theme == second.theme == "coding"
+        assert [chat.from_cache for chat in saved] == [False, True]
+        assert saved[0].cache_key == saved[1].cache_key
+        assert saved[1].processing_time_ms < 900
+        [entry] = client.storage["enrichment_cache"]
+        assert (entry["cache_key"], entry["kind"]) == (saved[0].cache_key, "chat")
+
+    def test_persistent_tier_and_prompt_version(self, client, saved, monkeypatch):
+        """Should read a result another worker stored in the table, and miss once the prompt changes."""
+        calls = 0
+
+        async def assess_message_risk_async(content, role="user", context=None):
+            nonlocal calls
+            calls += 1
+            return {"overall_risk_level": "high", "overall_risk_score": 80.0, "risk_categories": {}}
+
+        monkeypatch.setattr(risk_assessment_service, "assess_message_risk_async", assess_message_risk_async)
+        request = EnrichMessageRequestDTO(content="my password is hunter2", message_provider_id="m1", user_id="u1")
+
+        asyncio.run(EnrichmentService.enrich_message_async(client, None, request))
+        # A fresh worker: only the table holds the result
+        EnrichmentCache.clear_cache()
+        result = asyncio.run(EnrichmentService.enrich_message_async(client, None, request))
+
+        assert calls == 1
+        assert result.overall_risk_level == "high"
+        assert saved[1].from_cache
+
+        monkeypatch.setattr(risk_assessment_service, "prompt_version", "edited-prompt")
+        asyncio.run(EnrichmentService.enrich_message_async(client, None, request))
+
+        assert calls == 2
+        assert not saved[2].from_cache
+        assert saved[2].cache_key != saved[0].cache_key
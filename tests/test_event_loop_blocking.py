@@ -0,0 +1,272 @@
+"""
+Blocking-call detector for the async audit endpoints.
+
+Every query made through a slow mock client runs a fixed blocking stub (a sleep of
+BLOCKING_CALL_SECONDS) in the calling thread and records whether it ran on the event loop
+thread. A heartbeat task measures how long the loop goes without running it: an async
+endpoint that calls the sync client directly holds the loop for a whole stub call. The
+longest stall is compared to the stub's duration rather than to an absolute latency, with
+garbage collection paused while measuring. Routes are checked the same way, with the
+heartbeat running on the TestClient's event loop.
+"""
+
+import asyncio
+import gc
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+import middleware.auth_middleware
+from config.settings import settings
+from main import app
+from services.audit_analytics_service import AuditAnalyticsService
+from services.audit_service import AuditService
+from services.audit_timeseries_service import AuditTimeSeriesService
+from tests.mocks import MockSupabaseClient, MockSupabaseTable
+
+BLOCKING_CALL_SECONDS = 0.5
+# Longest loop stall allowed, as a fraction of one stub call: a query on the loop stalls it for a
+# whole call, scheduler noise on a busy runner stays far below
+MAX_LAG_RATIO = 0.8
+HEARTBEAT_SECONDS = 0.005
+
+START = datetime(2025, 3, 1)
+END = datetime(2025, 3, 3)
+ORG_ID = "org-1"
+
+
+class SlowMockTable(MockSupabaseTable):
+    """Mock table whose queries block the calling thread like a real HTTP round-trip"""
+
+    def __init__(self, table_name: str, storage: dict, loop_queries: list):
+        super().__init__(table_name, storage)
+        self.loop_queries = loop_queries
+
+    def execute(self):
+        try:
+            asyncio.get_running_loop()
+            self.loop_queries.append(self.table_name)
+        except RuntimeError:
+            pass  # worker thread, no event loop
+        time.sleep(BLOCKING_CALL_SECONDS)
+        return super().execute()
+
+
+class SlowMockClient(MockSupabaseClient):
+    """Mock client returning slow tables"""
+
+    def __init__(self, shared_storage=None):
+        super().__init__(shared_storage)
+        self.loop_queries = []
+
+    def table(self, table_name: str):
+        self.table_calls.append(table_name)
+        return SlowMockTable(table_name, self.storage, self.loop_queries)
+
+
+async def heartbeat(done: asyncio.Event | threading.Event) -> float:
+    """Tick until done is set and return the longest time the loop was held between ticks"""
+    loop = asyncio.get_running_loop()
+    stall = 0.0
+    last = loop.time()
+    while not done.is_set():
+        await asyncio.sleep(HEARTBEAT_SECONDS)
+        now = loop.time()
+        stall = max(stall, now - last - HEARTBEAT_SECONDS)
+        last = now
+    return stall
+
+
+def lag_ratio(stall: float) -> float:
+    """Loop stall measured by the heartbeat, relative to one blocking stub call"""
+    return stall / BLOCKING_CALL_SECONDS
+
+
+@pytest.fixture(autouse=True)
+def no_gc():
+    """Collect up front and pause the collector: a full collection must not count as a stall"""
+    gc.collect()
+    gc.disable()
+    yield
+    gc.enable()
+
+
+async def max_loop_stall(awaitable) -> float:
+    """Await awaitable while a heartbeat records the longest time the loop was held"""
+    done = asyncio.Event()
+    monitor = asyncio.create_task(heartbeat(done))
+    await asyncio.sleep(0)
+    try:
+        await awaitable
+    finally:
+        done.set()
+    return await monitor
+
+
+def route_loop_stall(test_client: TestClient, path: str, params: dict):
+    """GET path through the app while a heartbeat on its event loop records the longest time the loop was held"""
+    done = threading.Event()
+    monitor = test_client.portal.start_task_soon(heartbeat, done)
+    try:
+        response = test_client.get(path, params=params, headers={"Authorization": "Bearer mock_token_user-1"})
+    finally:
+        done.set()
+    return response, monitor.result()
+
+
+@pytest.fixture
+def client(monkeypatch) -> SlowMockClient:
+    # One time slice per read keeps the number of slow queries small
+    monkeypatch.setattr(settings, "BULK_READ_PARALLEL_SLICES", 1)
+    users = ["user-1", "user-2"]
+    created = (START + timedelta(hours=1)).isoformat()
+    return SlowMockClient(
+        {
+            "user_organization_roles": [{"organization_id": ORG_ID, "user_id": u} for u in users],
+            "teams": [{"id": "team-1", "organization_id": ORG_ID, "name": "Team 1", "color": "#3B82F6"}],
+            "user_team_permissions": [
+                {"id": f"perm-{u}", "team_id": "team-1", "user_id": u, "role": "member", "created_at": created}
+                for u in users
+            ],
+            "users_metadata": [{"user_id": u, "email": f"{u}@example.com", "name": u} for u in users],
+            "chats": [
+                {
+                    "id": i,
+                    "user_id": users[i % 2],
+                    "chat_provider_id": f"chat-{i}",
+                    "title": f"Chat {i}",
+                    "provider_name": "chatgpt",
+                    "created_at": created,
+                }
+                for i in range(4)
+            ],
+            "messages": [
+                {
+                    "id": i,
+                    "user_id": users[i % 2],
+                    "chat_provider_id": f"chat-{i % 4}",
+                    "role": "user",
+                    "model": "gpt-4o",
+                    "content": "hello",
+                    "message_provider_id": f"msg-{i}",
+                    "created_at": created,
+                }
+                for i in range(8)
+            ],
+            "enriched_chats": [
+                {
+                    "id": i,
+                    "user_id": users[i % 2],
+                    "chat_provider_id": f"chat-{i}",
+                    "quality_score": 60 + i,
+                    "theme": "coding",
+                    "intent": "debug",
+                    "is_work_related": True,
+                    "created_at": created,
+                }
+                for i in range(4)
+            ],
+            "enriched_messages": [
+                {
+                    "id": i,
+                    "user_id": users[i % 2],
+                    "message_provider_id": f"msg-{i}",
+                    "overall_risk_level": "high",
+                    "overall_risk_score": 70.0,
+                    "risk_categories": {},
+                    "created_at": created,
+                }
+                for i in range(2)
+            ],
+        }
+    )
+
+
+def _dates():
+    return START.isoformat(), END.isoformat(), 7
+
+
+ENDPOINTS = {
+    "organization_audit": lambda c: AuditService.get_organization_audit(c, "user-1", ORG_ID, *_dates()),
+    "quality_stats": lambda c: AuditService.get_organization_quality_stats(c, "user-1", ORG_ID, *_dates()),
+    "top_users": lambda c: AuditService.get_organization_top_users(c, "user-1", ORG_ID, *_dates()),
+    "adoption_curve": lambda c: AuditTimeSeriesService.get_adoption_curve(
+        c, ORG_ID, *_dates(), ["team-1"], "day", "messages"
+    ),
+    "risk_timeline": lambda c: AuditTimeSeriesService.get_risk_timeline(c, ORG_ID, *_dates(), None, "day"),
+    "quality_timeline": lambda c: AuditTimeSeriesService.get_quality_timeline(c, ORG_ID, *_dates(), ["team-1"], "day"),
+    "theme_distribution": lambda c: AuditTimeSeriesService.get_theme_distribution(c, ORG_ID, *_dates(), None, 5),
+    "intent_distribution": lambda c: AuditTimeSeriesService.get_intent_distribution(c, ORG_ID, *_dates(), None, 5),
+    "model_distribution": lambda c: AuditAnalyticsService.get_model_distribution(c, ORG_ID, *_dates(), None),
+    "provider_distribution": lambda c: AuditAnalyticsService.get_provider_distribution(c, ORG_ID, *_dates(), None),
+    "analytics_quality_timeline": lambda c: AuditAnalyticsService.get_quality_timeline(
+        c, ORG_ID, *_dates(), None, "day"
+    ),
+    "quality_distribution": lambda c: AuditAnalyticsService.get_quality_distribution(c, ORG_ID, *_dates(), None),
+    "usage_by_hour": lambda c: AuditAnalyticsService.get_usage_by_hour(c, ORG_ID, *_dates(), None),
+    "risk_categories": lambda c: AuditAnalyticsService.get_risk_categories(c, ORG_ID, *_dates(), None),
+}
+
+
+class TestBlockingCallDetector:
+    """Test that async audit endpoints never hold the event loop during a query."""
+
+    def test_detector_flags_sync_query_on_the_loop(self, client):
+        """Should report a stall when a coroutine calls the sync client directly."""
+
+        async def blocking_endpoint():
+            client.table("messages").select("id").execute()
+
+        stall = asyncio.run(max_loop_stall(blocking_endpoint()))
+
+        assert lag_ratio(stall) > MAX_LAG_RATIO
+        assert client.loop_queries == ["messages"]
+
+    @pytest.mark.parametrize("endpoint", sorted(ENDPOINTS))
+    def test_endpoint_does_not_block_event_loop(self, client, endpoint):
+        """Should run every query off the event loop."""
+        stall = asyncio.run(max_loop_stall(ENDPOINTS[endpoint](client)))
+
+        assert client.table_calls, f"{endpoint} made no queries"
+        assert client.loop_queries == [], f"{endpoint} queried {client.loop_queries} on the event loop"
+        assert lag_ratio(stall) < MAX_LAG_RATIO, f"{endpoint} held the event loop for {stall:.3f}s"
+
+
+ROUTES = {
+    "stats": ("/user/stats", {"recent_days": 7}),
+    "dashboard": (
+        f"/audit/organizations/{ORG_ID}/dashboard",
+        {
+            "panels": ["adoption_curve", "risk_timeline", "theme_distribution", "model_distribution"],
+            "start_date": START.date().isoformat(),
+            "end_date": END.date().isoformat(),
+        },
+    ),
+}
+
+
+@pytest.fixture
+def app_client(client, monkeypatch):
+    """TestClient whose authenticated requests query the slow client, with the app's lifespan running"""
+    monkeypatch.setattr(middleware.auth_middleware, "create_authenticated_client", lambda token: client)
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+class TestRouteBlocking:
+    """Test that async routes never hold the event loop during a query."""
+
+    @pytest.mark.parametrize("route", sorted(ROUTES))
+    def test_route_does_not_block_event_loop(self, client, app_client, route):
+        """Should serve the route with every query run off the event loop."""
+        path, params = ROUTES[route]
+
+        response, stall = route_loop_stall(app_client, path, params)
+
+        assert response.status_code == 200, response.text
+        assert client.table_calls, f"{route} made no queries"
+        assert client.loop_queries == [], f"{route} queried {client.loop_queries} on the event loop"
+        assert lag_ratio(stall) < MAX_LAG_RATIO, f"{route} held the event loop for {stall:.3f}s"
@@ -0,0 +1,142 @@
+"""
+Tests for local JWT verification and the verified-token cache.
+"""
+
+import time
+from unittest.mock import patch
+
+import jwt
+import pytest
+
+from core.jwt_verifier import JWTVerificationUnavailable, JWTVerifier
+from repositories import AuthRepository
+
+SECRET = "test-jwt-secret-with-enough-entropy-for-hs256"
+
+
+def make_token(sub: str = "user-123", exp_in: int = 3600, secret: str = SECRET, aud: str = "authenticated") -> str:
+    return jwt.encode({"sub": sub, "aud": aud, "exp": int(time.time()) + exp_in}, secret, algorithm="HS256")
+
+
+@pytest.fixture
+def verifier() -> JWTVerifier:
+    return JWTVerifier(secret=SECRET, audience="authenticated", cache_ttl_seconds=300, cache_max_size=2)
+
+
+class TestJWTVerifierLocal:
+    """Test signature, expiry and audience checks."""
+
+    def test_valid_token_returns_user_id(self, verifier):
+        """Should return the sub claim for a correctly signed token."""
+        user_id, expires_at = verifier.verify_locally(make_token())
+        assert user_id == "user-123"
+        assert expires_at > time.time()
+
+    def test_expired_token_is_rejected(self, verifier):
+        """Should raise on expired tokens."""
+        with pytest.raises(jwt.ExpiredSignatureError):
+            verifier.verify_locally(make_token(exp_in=-10))
+
+    def test_bad_signature_is_rejected(self, verifier):
+        """Should raise on tokens signed with another secret."""
+        with pytest.raises(jwt.InvalidSignatureError):
+            verifier.verify_locally(make_token(secret="another-secret-with-enough-entropy-too"))
+
+    def test_wrong_audience_is_rejected(self, verifier):
+        """Should raise on tokens issued for another audience."""
+        with pytest.raises(jwt.InvalidAudienceError):
+            verifier.verify_locally(make_token(aud="anon"))
+
+    def test_missing_secret_is_unavailable(self):
+        """Should ask for remote validation when no secret is configured."""
+        verifier = JWTVerifier(secret="", audience="authenticated", cache_ttl_seconds=300, cache_max_size=10)
+        with pytest.raises(JWTVerificationUnavailable):
+            verifier.verify_locally(make_token())
+
+
+class TestJWTVerifierCache:
+    """Test the bounded TTL cache of verified tokens."""
+
+    def test_remember_and_forget(self, verifier):
+        """Should return cached user IDs until the token is forgotten."""
+        token = make_token()
+        verifier.remember(token, "user-123", time.time() + 60)
+        assert verifier.get_cached_user_id(token) == "user-123"
+
+        verifier.forget(token)
+        assert verifier.get_cached_user_id(token) is None
+
+    def test_never_cached_beyond_expiry(self, verifier):
+        """Should not cache tokens that are already expired."""
+        token = make_token(exp_in=-1)
+        verifier.remember(token, "user-123", time.time() - 1)
+        assert verifier.get_cached_user_id(token) is None
+
+    def test_cache_is_bounded(self, verifier):
+        """Should evict the least recently used token when full."""
+        tokens = [make_token(sub=f"user-{i}") for i in range(3)]
+        for i, token in enumerate(tokens):
+            verifier.remember(token, f"user-{i}", None)
+
+        assert verifier.get_cached_user_id(tokens[0]) is None
+        assert verifier.get_cached_user_id(tokens[2]) == "user-2"
+
+
+class TestAuthServiceCurrentUser:
+    """Test AuthService.get_current_user_id with local verification and remote fallback."""
+
+    @pytest.fixture(autouse=True)
+    def local_verifier(self, verifier):
+        with patch("services.auth_service.jwt_verifier", verifier):
+            yield
+
+    def test_local_verification_skips_supabase(self):
+        """Should not call Supabase Auth for a locally valid token."""
+        from services import AuthService
+
+        with patch.object(AuthRepository, "get_current_user_id") as remote:
+            assert AuthService.get_current_user_id(make_token()) == "user-123"
+            remote.assert_not_called()
+
+    def test_expired_token_is_not_sent_remotely(self):
+        """Should reject expired tokens without a network call."""
+        from services import AuthService
+
+        with patch.object(AuthRepository, "get_current_user_id") as remote:
+            assert AuthService.get_current_user_id(make_token(exp_in=-10)) is None
+            remote.assert_not_called()
+
+    def test_unverifiable_token_falls_back_to_remote(self):
+        """Should validate remotely when local verification is unavailable, then cache it."""
+        from services import AuthService
+
+        verifier = JWTVerifier(secret="", audience="authenticated", cache_ttl_seconds=300, cache_max_size=10)
+        token = make_token()
+        with (
+            patch("services.auth_service.jwt_verifier", verifier),
+            patch.object(AuthRepository, "get_current_user_id", return_value="user-123") as remote,
+        ):
+            assert AuthService.get_current_user_id(token) == "user-123"
+            assert AuthService.get_current_user_id(token) == "user-123"
+            remote.assert_called_once()
+
+    def test_bad_signature_falls_back_to_remote(self):
+        """Should ask Supabase Auth when the signature does not match (wrong or rotated secret)."""
+        from services import AuthService
+
+        token = make_token(secret="rotated-secret-with-enough-entropy-for-hs256")
+        with patch.object(AuthRepository, "get_current_user_id", return_value="user-123") as remote:
+            assert AuthService.get_current_user_id(token) == "user-123"
+            remote.assert_called_once()
+
+    def test_signed_out_token_is_refused(self):
+        """Should refuse a locally valid token once it has been signed out."""
+        from services import AuthService
+
+        token = make_token()
+        assert AuthService.get_current_user_id(token) == "user-123"
+        with patch.object(AuthRepository, "sign_out"), patch.object(AuthRepository, "get_current_user_id") as remote:
+            AuthService.sign_out(token)
+
+            assert AuthService.get_current_user_id(token) is None
+            remote.assert_not_called()
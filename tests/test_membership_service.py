@@ -0,0 +1,104 @@
+"""
+Tests for the cached organization membership resolver and its invalidation.
+"""
+
+import asyncio
+from collections import Counter
+
+import pytest
+
+from config.settings import settings
+from repositories.team_repository import TeamRepository
+from services.membership_service import MembershipService
+from services.organization_service import OrganizationService
+from services.team_service import TeamService
+from tests.mocks import MockSupabaseClient
+
+ORG_ID = "org-1"
+
+
+@pytest.fixture
+def client() -> MockSupabaseClient:
+    return MockSupabaseClient(
+        {
+            "user_organization_roles": [
+                {"user_id": "user-1", "organization_id": ORG_ID, "role": "admin"},
+                {"user_id": "user-2", "organization_id": ORG_ID, "role": "member"},
+            ],
+            "teams": [
+                {"id": "team-a", "organization_id": ORG_ID, "name": "Alpha", "color": "#111111"},
+                {"id": "team-b", "organization_id": ORG_ID, "name": "Beta", "color": "#222222"},
+            ],
+            "user_team_permissions": [
+                {"team_id": "team-a", "user_id": "user-1"},
+                {"team_id": "team-b", "user_id": "user-2"},
+            ],
+        }
+    )
+
+
+def _user_ids(client, team_ids=None):
+    return asyncio.run(MembershipService.get_user_ids(client, ORG_ID, team_ids))
+
+
+class TestMembershipCache:
+    """Test cached lookups."""
+
+    def test_repeated_lookups_hit_the_cache(self, client):
+        """Should query members, teams and team members once each."""
+        for _ in range(3):
+            assert _user_ids(client) == ["user-1", "user-2"]
+            assert _user_ids(client, ["team-a", "team-b"]) == ["user-1", "user-2"]
+            asyncio.run(MembershipService.get_teams(client, ORG_ID))
+
+        assert Counter(client.table_calls) == {"user_organization_roles": 1, "user_team_permissions": 1, "teams": 1}
+
+    def test_only_uncached_teams_are_read(self, client):
+        """Should read just the teams missing from the cache, with an empty list for memberless teams."""
+        _user_ids(client, ["team-a"])
+        members_map = asyncio.run(MembershipService.get_team_member_ids_map(client, ["team-a", "team-b", "team-c"]))
+
+        assert members_map == {"team-a": ["user-1"], "team-b": ["user-2"], "team-c": []}
+        assert client.table_calls == ["user_team_permissions", "user_team_permissions"]
+
+    def test_zero_ttl_disables_the_cache(self, client, monkeypatch):
+        """Should query every time when MEMBERSHIP_CACHE_TTL_SECONDS is 0."""
+        monkeypatch.setattr(settings, "MEMBERSHIP_CACHE_TTL_SECONDS", 0)
+
+        _user_ids(client)
+        _user_ids(client)
+
+        assert client.table_calls == ["user_organization_roles", "user_organization_roles"]
+
+
+class TestMembershipInvalidation:
+    """Test invalidation by member and team mutations."""
+
+    def test_member_removal(self, client, monkeypatch):
+        """Should drop the organization's members and every team membership."""
+        _user_ids(client)
+        _user_ids(client, ["team-b"])
+        monkeypatch.setattr(
+            "services.organization_service.OrganizationRepository.remove_member",
+            lambda c, organization_id, user_id: client.storage["user_organization_roles"].pop() is not None,
+        )
+        client.storage["user_team_permissions"].pop()
+
+        OrganizationService.remove_member(client, ORG_ID, "user-2")
+
+        assert _user_ids(client) == ["user-1"]
+        assert _user_ids(client, ["team-b"]) == []
+
+    def test_team_member_removed(self, client, monkeypatch):
+        """Should re-read the team a user left, keeping the other teams cached."""
+        _user_ids(client, ["team-a", "team-b"])
+        team = asyncio.run(MembershipService.get_teams(client, ORG_ID))[0]
+        monkeypatch.setattr(TeamRepository, "get_team_by_id", lambda c, team_id: team)
+        monkeypatch.setattr(TeamRepository, "remove_user_from_team", lambda c, user_id, team_id: True)
+        client.storage["user_team_permissions"].clear()
+        client.table_calls.clear()
+
+        TeamService.remove_user_from_team(client, "team-a", "user-1")
+
+        assert _user_ids(client, ["team-a", "team-b"]) == ["user-2"]
+        assert client.table_calls == ["user_team_permissions"]
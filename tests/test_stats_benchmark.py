@@ -0,0 +1,96 @@
+"""
+Benchmark for StatsService.get_user_stats on a power user.
+
+Every total is accumulated in one pass over the messages, so a synthetic 100k-message
+user must stay within a CPU budget that the former quadratic recent-message lookup
+could never meet.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from config.settings import settings
+from services.stats_service import StatsService
+from tests.mocks import MockSupabaseClient
+from utils.stats_helpers import estimate_tokens, message_size_fields
+
+USER_ID = "power-user"
+MESSAGE_COUNT = 100_000
+CHAT_COUNT = 2_000
+BUDGET_SECONDS = 5.0
+
+
+def _synthetic_user(message_count: int, now: datetime) -> dict:
+    """User/assistant pairs spread over 60 days, each reply 2s after its prompt"""
+    messages = []
+    for i in range(message_count):
+        pair = i // 2
+        sent = now - timedelta(minutes=pair * 60 * 24 * 60 // (message_count // 2)) + timedelta(seconds=2 * (i % 2))
+        is_user = i % 2 == 0
+        content = "x" * (20 + i % 400)
+        messages.append(
+            {
+                "id": i,
+                "user_id": USER_ID,
+                "chat_provider_id": f"chat-{pair % CHAT_COUNT}",
+                "message_provider_id": f"msg-{i}",
+                "parent_message_provider_id": None if is_user else f"msg-{i - 1}",
+                "role": "user" if is_user else "assistant",
+                "content": content,
+                **message_size_fields(content),
+                "model": ["gpt-4o", "claude-3-sonnet", None][pair % 3],
+                "created_at": sent.isoformat(),
+            }
+        )
+    chats = [
+        {
+            "id": c,
+            "user_id": USER_ID,
+            "chat_provider_id": f"chat-{c}",
+            "title": f"Chat {c}",
+            "provider_name": "chatgpt",
+            "created_at": (now - timedelta(hours=c)).isoformat(),
+        }
+        for c in range(CHAT_COUNT)
+    ]
+    return {"messages": messages, "chats": chats}
+
+
+class TestUserStatsBenchmark:
+    """Test that user stats scale linearly with the number of messages."""
+
+    @pytest.mark.slow
+    def test_100k_message_user_within_budget(self, monkeypatch):
+        """Should compute correct stats for 100k messages within the CPU budget."""
+        # The mock filters and sorts the whole table for every keyset page: read it in one page so the
+        # budget measures the stats computation, not the mock
+        monkeypatch.setattr(settings, "BULK_READ_PAGE_SIZE", MESSAGE_COUNT + 1)
+        now = datetime.now()
+        storage = _synthetic_user(MESSAGE_COUNT, now)
+        client = MockSupabaseClient(storage)
+
+        started = time.perf_counter()
+        stats = StatsService.get_user_stats(client, USER_ID)
+        elapsed = time.perf_counter() - started
+
+        messages = storage["messages"]
+        recent_date_str = (now - timedelta(days=7)).strftime("%Y-%m-%d")
+        user_tokens = [estimate_tokens(m["content"]) for m in messages if m["role"] == "user"]
+        recent_output = sum(
+            estimate_tokens(m["content"])
+            for m in messages
+            if m["role"] == "assistant" and m["created_at"] >= recent_date_str
+        )
+
+        assert stats.total_messages == MESSAGE_COUNT
+        assert stats.token_usage.total_input == sum(user_tokens)
+        assert stats.token_usage.recent_output == recent_output
+        assert stats.thinking_time.average == 2.0
+        assert sum(usage.count for usage in stats.model_usage.values()) == MESSAGE_COUNT
+        assert set(stats.model_usage) == {"gpt-4o", "claude-3-sonnet", "unknown"}
+        assert sum(stats.messages_per_day.values()) == sum(
+            1 for m in messages if m["created_at"].split("T")[0] in stats.messages_per_day
+        )
+        assert elapsed < BUDGET_SECONDS, f"get_user_stats took {elapsed:.2f}s for {MESSAGE_COUNT} messages"
@@ -0,0 +1,132 @@
+"""
+Tests for the stats response cache: watermark keys, ETags and 304s.
+"""
+
+import pytest
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
+
+from config.settings import settings
+from services.stats_response_cache import StatsResponseCache
+from tests.mocks import MockSupabaseClient
+
+USER_ID = "user-1"
+
+
+def bump_handler(storage: dict):
+    """In-memory bump_user_stats_watermark"""
+
+    def handler(params):
+        table = storage.setdefault("user_stats_watermarks", [])
+        row = next((r for r in table if r["user_id"] == params["p_user_id"]), None)
+        if row is None:
+            row = {"user_id": params["p_user_id"], "version": 0}
+            table.append(row)
+        row["version"] += 1
+        return row["version"]
+
+    return handler
+
+
+@pytest.fixture
+def supabase() -> MockSupabaseClient:
+    storage = {"user_stats_watermarks": []}
+    return MockSupabaseClient(storage, rpc_handlers={"bump_user_stats_watermark": bump_handler(storage)})
+
+
+@pytest.fixture
+def api(supabase, monkeypatch):
+    """App with one cached endpoint counting its computations"""
+    monkeypatch.setattr(settings, "STATS_RESPONSE_CACHE", True)
+    app = FastAPI()
+    app.state.computations = 0
+
+    @app.get("/stats")
+    async def stats(request: Request, response: Response, days: int = 30):
+        request.state.user_id = request.headers.get("x-user", USER_ID)
+        request.state.supabase_client = supabase
+
+        def compute():
+            app.state.computations += 1
+            return {"days": days, "computation": app.state.computations}
+
+        return StatsResponseCache.serve(request, response, compute)
+
+    return TestClient(app)
+
+
+class TestStatsResponseCache:
+    """Test repeat views, revalidation and invalidation on ingest."""
+
+    def test_repeat_view_is_served_from_cache(self, api):
+        """Should compute once and return the same body and ETag on the next view."""
+        first = api.get("/stats")
+        second = api.get("/stats")
+
+        assert first.status_code == second.status_code == 200
+        assert first.json() == second.json() == {"days": 30, "computation": 1}
+        assert first.headers["etag"] == second.headers["etag"]
+        assert first.headers["cache-control"] == "private, no-cache"
+
+    def test_if_none_match_returns_304(self, api):
+        """Should answer a matching If-None-Match with an empty 304."""
+        etag = api.get("/stats").headers["etag"]
+
+        response = api.get("/stats", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    def test_params_and_users_get_their_own_entries(self, api):
+        """Should key responses by query parameters and user."""
+        week = api.get("/stats?days=7")
+        month = api.get("/stats?days=30")
+        other_user = api.get("/stats?days=30", headers={"x-user": "user-2", "If-None-Match": month.headers["etag"]})
+
+        assert len({week.headers["etag"], month.headers["etag"], other_user.headers["etag"]}) == 3
+        assert other_user.status_code == 200
+        assert api.app.state.computations == 3
+
+    def test_ingest_bumps_watermark(self, api, supabase):
+        """Should recompute, with a new ETag, once a batch has been saved."""
+        before = api.get("/stats")
+
+        StatsResponseCache.bump(supabase, USER_ID)
+        after = api.get("/stats", headers={"If-None-Match": before.headers["etag"]})
+
+        assert after.status_code == 200
+        assert after.headers["etag"] != before.headers["etag"]
+        assert after.json()["computation"] == 2
+        assert supabase.rpc_calls == ["bump_user_stats_watermark"]
+
+    def test_bump_from_another_worker(self, api, supabase):
+        """Should notice a watermark bumped outside this process."""
+        api.get("/stats")
+        supabase.storage["user_stats_watermarks"].append({"user_id": USER_ID, "version": 5})
+
+        assert api.get("/stats").json()["computation"] == 2
+
+    def test_missing_watermark_table_serves_uncached(self, api, supabase):
+        """Should compute every time, without ETag, when the watermark cannot be read."""
+
+        def missing_table(*args, **kwargs):
+            raise RuntimeError('relation "user_stats_watermarks" does not exist')
+
+        supabase.table = missing_table
+
+        first = api.get("/stats")
+        second = api.get("/stats")
+
+        assert second.json()["computation"] == 2
+        assert "etag" not in first.headers
+
+    def test_disabled_by_flag(self, api, monkeypatch):
+        """Should not look up the watermark unless STATS_RESPONSE_CACHE is set."""
+        monkeypatch.setattr(settings, "STATS_RESPONSE_CACHE", False)
+
+        api.get("/stats")
+        response = api.get("/stats")
+
+        assert response.json()["computation"] == 2
+        assert "etag" not in response.headers
@@ -0,0 +1,47 @@
+"""
+Tests for the pooled per-token Supabase client factory.
+"""
+
+import pytest
+
+from core.supabase import SupabaseClientFactory
+
+
+@pytest.fixture
+def factory():
+    factory = SupabaseClientFactory("http://localhost:54321", "publishable-key", max_clients=2, client_ttl_seconds=60)
+    yield factory
+    factory.close()
+
+
+class TestSupabaseClientFactory:
+    """Test client reuse and the shared HTTP transport."""
+
+    def test_same_token_reuses_client(self, factory):
+        """Should return the cached client for a token already seen."""
+        assert factory.get_client("token-a") is factory.get_client("token-a")
+
+    def test_clients_share_http_transport(self, factory):
+        """Should send each user's token over the same connection pool."""
+        client_a = factory.get_client("token-a")
+        client_b = factory.get_client("token-b")
+
+        assert client_a is not client_b
+        assert client_a.postgrest.session is client_b.postgrest.session
+        assert client_a.table("messages").select("id").request.headers["Authorization"] == "Bearer token-a"
+        assert client_b.table("messages").select("id").request.headers["Authorization"] == "Bearer token-b"
+
+    def test_least_recently_used_client_is_evicted(self, factory):
+        """Should keep at most max_clients wrappers."""
+        client_a = factory.get_client("token-a")
+        factory.get_client("token-b")
+        factory.get_client("token-c")
+
+        assert factory.get_client("token-a") is not client_a
+
+    def test_close_reopens_transport_lazily(self, factory):
+        """Should create a fresh transport after shutdown instead of failing."""
+        factory.get_client("token-a")
+        factory.close()
+
+        assert not factory.get_client("token-a").postgrest.session.is_closed
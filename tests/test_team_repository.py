@@ -0,0 +1,127 @@
+"""
+Tests for bulk team-membership loading and the audit paths that use it.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from config.settings import settings
+from repositories.team_repository import TeamRepository
+from services.audit_service import _calculate_team_stats
+from services.audit_timeseries_service import AuditTimeSeriesService
+from tests.mocks import MockSupabaseClient
+
+START = datetime(2025, 3, 1)
+END = datetime(2025, 3, 8)
+TEAM_COUNT = 40
+
+
+@pytest.fixture
+def client() -> MockSupabaseClient:
+    teams = [
+        {"id": f"team-{t:02d}", "organization_id": "org-1", "name": f"Team {t:02d}", "color": "#3B82F6"}
+        for t in range(TEAM_COUNT)
+    ]
+    # Two members per team, user-1 also belongs to every even team
+    permissions = [
+        {
+            "id": f"perm-{t:02d}-{u}",
+            "team_id": f"team-{t:02d}",
+            "user_id": f"user-{2 * t + u + 2}",
+            "role": "member",
+            "created_at": START.isoformat(),
+        }
+        for t in range(TEAM_COUNT)
+        for u in range(2)
+    ] + [
+        {
+            "id": f"perm-{t:02d}-x",
+            "team_id": f"team-{t:02d}",
+            "user_id": "user-1",
+            "role": "member",
+            "created_at": START.isoformat(),
+        }
+        for t in range(0, TEAM_COUNT, 2)
+    ]
+    messages = [
+        {"id": i, "user_id": f"user-{i % 10 + 1}", "created_at": (START + timedelta(hours=i)).isoformat()}
+        for i in range(60)
+    ]
+    enriched_chats = [
+        {
+            "id": i,
+            "user_id": f"user-{i % 6 + 1}",
+            "quality_score": 40 + i,
+            "created_at": (START + timedelta(hours=2 * i)).isoformat(),
+        }
+        for i in range(30)
+    ]
+    return MockSupabaseClient(
+        {
+            "teams": teams,
+            "user_team_permissions": permissions,
+            "users_metadata": [],
+            "messages": messages,
+            "enriched_chats": enriched_chats,
+        }
+    )
+
+
+class TestTeamMemberIdsMap:
+    """Test the bulk team -> user IDs loader."""
+
+    def test_matches_per_team_members(self, client):
+        """Should return the same members as get_team_members, in a single query."""
+        team_ids = [f"team-{t:02d}" for t in range(TEAM_COUNT)]
+        members_map = TeamRepository.get_team_member_ids_map(client, team_ids)
+
+        assert len(client.table_calls) == 1
+        for team_id in team_ids:
+            expected = {m.user_id for m in TeamRepository.get_team_members(client, team_id)}
+            assert set(members_map[team_id]) == expected
+
+    def test_teams_without_members_map_to_empty_list(self, client):
+        """Should keep requested teams with no members, and skip the query for no teams."""
+        assert TeamRepository.get_team_member_ids_map(client, ["team-missing"]) == {"team-missing": []}
+        assert TeamRepository.get_team_member_ids_map(client, []) == {}
+        assert len(client.table_calls) == 1
+
+    def test_user_ids_for_teams_are_unique(self, client):
+        """Should return each user once even when they belong to several teams."""
+        user_ids = TeamRepository.get_user_ids_for_teams(client, ["team-00", "team-02"])
+
+        assert sorted(user_ids) == ["user-1", "user-2", "user-3", "user-6", "user-7"]
+
+
+class TestAuditTeamBreakdowns:
+    """Test that team breakdowns no longer query once per team."""
+
+    def test_team_stats_query_count_does_not_grow_with_teams(self, client, monkeypatch):
+        """Should compute every team's stats with a constant number of queries."""
+        monkeypatch.setattr(settings, "BULK_READ_PARALLEL_SLICES", 1)
+        stats = asyncio.run(_calculate_team_stats(client, "org-1", START, END))
+
+        assert len(stats) == TEAM_COUNT
+        # teams, memberships, then one read each for messages and enriched_chats
+        assert client.table_calls == ["teams", "user_team_permissions", "messages", "enriched_chats"]
+
+        team_00 = next(s for s in stats if s.team_id == "team-00")
+        # team-00: user-1 (6 msgs), user-2 (6 msgs), user-3 (6 msgs)
+        assert team_00.total_prompts == 18
+        assert team_00.active_users == 3
+        expected_scores = [40 + i for i in range(30) if i % 6 + 1 in (1, 2, 3)]
+        assert team_00.average_quality == round(sum(expected_scores) / len(expected_scores), 2)
+
+    def test_quality_timeline_splits_one_read_by_team(self, client):
+        """Should give each team the scores of its own members."""
+        response = asyncio.run(
+            AuditTimeSeriesService.get_quality_timeline(
+                client, "org-1", START.isoformat(), END.isoformat(), 7, ["team-00", "team-01"], "day"
+            )
+        )
+
+        by_team = response.data.by_team
+        assert sum(point.total_rated for point in by_team["Team 00"]) == 15
+        assert sum(point.total_rated for point in by_team["Team 01"]) == 10
@@ -0,0 +1,92 @@
+"""
+Tests for the timestamp fast path and its batch day/hour helpers.
+"""
+
+from datetime import UTC, date, datetime, timedelta
+
+import pytest
+
+from services.audit_timeseries_service import _date_keys
+from utils.timestamps import day_buckets, hour_buckets, parse_timestamp
+
+POSTGREST_FORMATS = [
+    "2025-03-01T10:15:00+00:00",
+    "2025-03-01T10:15:00.123456+00:00",
+    "2025-03-01T10:15:00.44+00:00",
+    "2025-03-01T10:15:00Z",
+    "2025-03-01 10:15:00+00",
+    "2025-03-01T23:59:59.9-05:00",
+    "2025-03-01T10:15:00",
+]
+
+
+class TestParseTimestamp:
+    """Test single timestamp parsing."""
+
+    @pytest.mark.parametrize("value", POSTGREST_FORMATS)
+    def test_postgrest_formats(self, value):
+        """Should parse every format PostgREST returns without string surgery."""
+        parsed = parse_timestamp(value)
+
+        assert (parsed.year, parsed.month, parsed.day) == (2025, 3, 1)
+
+    def test_short_fraction_is_padded(self):
+        """Should read .44 as 440000 microseconds."""
+        assert parse_timestamp("2025-03-01T10:15:00.44+00:00") == datetime(2025, 3, 1, 10, 15, 0, 440000, tzinfo=UTC)
+
+    def test_offset_is_kept(self):
+        """Should keep the timestamp's own offset, not convert it."""
+        parsed = parse_timestamp("2025-03-01T23:59:59-05:00")
+
+        assert parsed.hour == 23
+        assert parsed.utcoffset() == -timedelta(hours=5)
+
+    @pytest.mark.parametrize("value", [None, "", "not a date"])
+    def test_malformed_values_fall_back_to_now(self, value):
+        """Should never raise on malformed values."""
+        assert abs(parse_timestamp(value).replace(tzinfo=None) - datetime.now()) < timedelta(minutes=1)
+
+
+class TestBatchBuckets:
+    """Test that batch conversions match per-row parsing."""
+
+    def test_day_buckets_match_parsing(self):
+        """Should give each timestamp the day parse_timestamp gives it."""
+        values = POSTGREST_FORMATS + ["2024-12-31T00:00:00+00:00", "2025-03-01"]
+
+        assert day_buckets(values) == [parse_timestamp(value).date() for value in values]
+
+    def test_hour_buckets_match_parsing(self):
+        """Should give each timestamp its day ordinal * 24 + hour."""
+        values = POSTGREST_FORMATS + ["2024-12-31T00:00:00+00:00", "2025-03-01T25:00:00+00:00"]
+
+        expected = []
+        for value in values:
+            moment = parse_timestamp(value)
+            expected.append(moment.toordinal() * 24 + moment.hour)
+
+        assert hour_buckets(values) == expected
+
+    def test_generator_input(self):
+        """Should accept any iterable, read once."""
+        moments = (datetime(2025, 3, d, 12, tzinfo=UTC).isoformat() for d in range(1, 4))
+
+        assert day_buckets(moments) == [date(2025, 3, 1), date(2025, 3, 2), date(2025, 3, 3)]
+
+
+class TestAdoptionDateKeys:
+    """Test the audit adoption curve buckets built from day buckets."""
+
+    @pytest.mark.parametrize(
+        ("granularity", "expected"),
+        [
+            ("day", [date(2025, 3, 5), date(2025, 3, 9)]),
+            ("week", [date(2025, 3, 3), date(2025, 3, 3)]),
+            ("month", [date(2025, 3, 1), date(2025, 3, 1)]),
+        ],
+    )
+    def test_granularities(self, granularity, expected):
+        """Should truncate days to their week (Monday) or month."""
+        rows = [{"created_at": "2025-03-05T08:00:00Z"}, {"created_at": "2025-03-09T23:30:00.5+00:00"}]
+
+        assert _date_keys(rows, granularity) == expected
@@ -0,0 +1,122 @@
+"""
+Tests for the usage engine: one cached window per user shared by overview, timeline and patterns.
+"""
+
+import calendar
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+
+import repositories.bulk_reader as bulk_reader
+import services.usage_engine as usage_engine
+from core.executor import BlockingExecutor
+from services.stats_service import StatsService
+from services.usage_engine import UsageEngine, bucket_label, hour_index
+from services.usage_rollup_service import UsageRollupService
+from tests.mocks import MockSupabaseClient
+from tests.test_usage_rollup import USER_ID, _history, _message_dto
+
+DAYS = 7
+
+
+@pytest.fixture
+def client() -> MockSupabaseClient:
+    return MockSupabaseClient(_history(datetime.now()))
+
+
+def _in_window(client: MockSupabaseClient, days: int = DAYS) -> list[dict]:
+    start = datetime.now() - timedelta(days=days)
+    return [m for m in client.storage["messages"] if datetime.fromisoformat(m["created_at"]) >= start]
+
+
+class TestSharedWindow:
+    """Test that the three usage views are served from a single read."""
+
+    def test_views_share_one_read(self, client):
+        """Should read messages and chats once for overview, timeline and patterns together."""
+        StatsService.get_usage_overview(client, USER_ID, days=DAYS)
+        StatsService.get_usage_timeline(client, USER_ID, days=DAYS, granularity="daily")
+        StatsService.get_usage_timeline(client, USER_ID, days=DAYS, granularity="hourly")
+        StatsService.get_usage_patterns(client, USER_ID, days=DAYS)
+
+        assert client.table_calls.count("messages") == 1
+        assert client.table_calls.count("chats") == 1
+
+    def test_saved_batch_invalidates_window(self, client):
+        """Should reload a user's window once a new batch has been saved."""
+        StatsService.get_usage_overview(client, USER_ID, days=DAYS)
+        UsageRollupService.record_batch(client, USER_ID, [_message_dto(1, "chat-1")], [])
+        StatsService.get_usage_overview(client, USER_ID, days=DAYS)
+
+        assert client.table_calls.count("messages") == 2
+
+    def test_windows_are_per_user_and_period(self, client):
+        """Should not serve one period's window for another."""
+        week = StatsService.get_usage_overview(client, USER_ID, days=DAYS)
+        day = StatsService.get_usage_overview(client, USER_ID, days=1)
+
+        assert week.summary.total_messages == len(_in_window(client))
+        assert day.summary.total_messages == len(_in_window(client, days=1))
+        assert client.table_calls.count("messages") == 2
+
+
+class TestGroupBys:
+    """Test the views against a direct pass over the raw rows."""
+
+    @pytest.mark.parametrize("granularity", ["hourly", "daily", "weekly"])
+    def test_timeline_buckets(self, client, granularity):
+        """Should count each message in the bucket of its own timestamp."""
+        expected = Counter(
+            bucket_label(hour_index(datetime.fromisoformat(m["created_at"])), granularity) for m in _in_window(client)
+        )
+
+        timeline = StatsService.get_usage_timeline(client, USER_ID, days=DAYS, granularity=granularity)
+
+        assert {p.timestamp: p.messages for p in timeline.timeline} == dict(expected)
+        assert [p.timestamp for p in timeline.timeline] == sorted(expected)
+
+    def test_patterns(self, client):
+        """Should spread messages by hour of day and weekday of their timestamps."""
+        created = [datetime.fromisoformat(m["created_at"]) for m in _in_window(client)]
+        by_hour = Counter(str(moment.hour) for moment in created)
+        by_day = Counter(calendar.day_name[moment.weekday()] for moment in created)
+
+        patterns = StatsService.get_usage_patterns(client, USER_ID, days=DAYS)
+
+        assert {hour: count for hour, count in patterns.hourly_distribution.items() if count} == dict(by_hour)
+        assert {day: count for day, count in patterns.daily_distribution.items() if count} == dict(by_day)
+
+    def test_model_breakdown(self, client):
+        """Should group tokens by model, with unnamed models reported as unknown."""
+        expected = Counter()
+        for m in _in_window(client):
+            expected[m["model"] or "unknown"] += m["estimated_tokens"]
+
+        overview = StatsService.get_usage_overview(client, USER_ID, days=DAYS)
+
+        assert {
+            model: usage.input_tokens + usage.output_tokens for model, usage in overview.model_breakdown.items()
+        } == dict(expected)
+        assert UsageEngine.get_window(client, USER_ID, DAYS).totals()["messages"] == len(_in_window(client))
+
+
+class TestExecutorUse:
+    """Test loading windows from tasks of a small shared pool."""
+
+    def test_concurrent_loads_on_a_saturated_pool_do_not_deadlock(self, client, monkeypatch):
+        """Should finish concurrent window loads running on every worker of the shared pool."""
+        pool = BlockingExecutor(max_workers=2, queue_warning_threshold=100)
+        prefetch = BlockingExecutor(max_workers=1, queue_warning_threshold=100, thread_name_prefix="prefetch-io")
+        monkeypatch.setattr(usage_engine, "prefetch_executor", prefetch)
+        monkeypatch.setattr(bulk_reader, "prefetch_executor", prefetch)
+        try:
+            futures = [
+                pool.submit(StatsService.get_usage_overview, client, USER_ID, days) for days in range(1, DAYS + 1)
+            ]
+            totals = [future.result(timeout=10).summary.total_messages for future in futures]
+        finally:
+            pool.shutdown(wait=False)
+            prefetch.shutdown(wait=False)
+
+        assert totals == [len(_in_window(client, days)) for days in range(1, DAYS + 1)]
@@ -0,0 +1,287 @@
+"""
+Tests for the user_usage_daily rollup: ingest increments and stats read from it.
+"""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from config.settings import settings
+from dtos import ChatResponseDTO, MessageResponseDTO, SaveChatDTO
+from repositories.stats_repository import StatsRepository
+from repositories.usage_rollup_repository import UsageRollupRepository
+from services.stats_service import StatsService
+from services.usage_rollup_service import UsageRollupService
+from tests.mocks import MockSupabaseClient
+from utils.stats_helpers import build_usage_days
+
+USER_ID = "user-1"
+DAYS = 10
+MODELS = ["gpt-4o", "claude-3-sonnet", None]
+
+
+def increment_handler(storage: dict):
+    """In-memory increment_user_usage_daily: adds each delta to the row with the same key"""
+
+    def handler(params):
+        table = storage.setdefault("user_usage_daily", [])
+        for delta in params["p_rows"]:
+            key = (delta["user_id"], delta["day"], delta["model"], delta["provider"])
+            row = next((r for r in table if (r["user_id"], r["day"], r["model"], r["provider"]) == key), None)
+            if row is None:
+                table.append({**delta, "id": len(table) + 1})
+                continue
+            for column in ("messages", "chats", "input_tokens", "output_tokens", "cost_usd", "energy_wh"):
+                row[column] += delta[column]
+        return None
+
+    return handler
+
+
+def replace_handler(storage: dict):
+    """In-memory replace_user_usage_daily: absolute totals for the rebuilt keys, other closed-day keys deleted"""
+
+    def handler(params):
+        before_day = params["p_before_day"]
+        rebuilt = {(r["day"], r["model"], r["provider"]): r for r in params["p_rows"] if r["day"] < before_day}
+        kept = [
+            row
+            for row in storage.get("user_usage_daily", [])
+            if row["user_id"] != params["p_user_id"] or row["day"] >= before_day
+        ]
+        storage["user_usage_daily"] = kept + [{**row, "id": 100 + i} for i, row in enumerate(rebuilt.values())]
+        return None
+
+    return handler
+
+
+def _history(now: datetime) -> dict:
+    """Three chats a day, each with user/assistant pairs, over DAYS days up to now"""
+    start = now - timedelta(days=DAYS)
+    messages, chats = [], []
+    for d in range(DAYS * 3):
+        created = start + timedelta(hours=8 * d + 1)
+        if created > now:
+            break
+        chat_id = f"chat-{d}"
+        chats.append(
+            {
+                "id": d,
+                "user_id": USER_ID,
+                "chat_provider_id": chat_id,
+                "title": f"Chat {d}",
+                "provider_name": ["chatgpt", "claude"][d % 2],
+                "created_at": created.isoformat(),
+            }
+        )
+        for i in range(2 + d % 4):
+            n = len(messages)
+            messages.append(
+                {
+                    "id": n,
+                    "user_id": USER_ID,
+                    "message_provider_id": f"msg-{n}",
+                    "chat_provider_id": chat_id,
+                    "role": "user" if i % 2 == 0 else "assistant",
+                    "model": MODELS[d % 3],
+                    "created_at": min(created + timedelta(minutes=5 * i), now).isoformat(),
+                    "char_count": 40 * (i + 1),
+                    "estimated_tokens": 10 * (i + 1),
+                }
+            )
+    return {"messages": messages, "chats": chats}
+
+
+@pytest.fixture
+def client() -> MockSupabaseClient:
+    storage = _history(datetime.now())
+    client = MockSupabaseClient(storage, rpc_handlers={"increment_user_usage_daily": increment_handler(storage)})
+
+    # Same rows the rebuild script writes: every day, recomputed from raw rows
+    messages = StatsRepository.get_messages_in_range(client, USER_ID, datetime(1970, 1, 1))
+    chats = StatsRepository.get_chats_in_range(client, USER_ID, datetime(1970, 1, 1))
+    providers = {chat.chat_provider_id: chat.provider_name for chat in chats}
+    client.rpc(
+        "increment_user_usage_daily", {"p_rows": build_usage_days(USER_ID, messages, chats, providers)}
+    ).execute()
+    client.table_calls.clear()
+    return client
+
+
+def _message_dto(i: int, chat_id: str, role: str = "user", model: str = "gpt-4o") -> MessageResponseDTO:
+    return MessageResponseDTO(
+        id=i,
+        user_id=USER_ID,
+        message_provider_id=f"new-{i}",
+        content="x" * 80,
+        role=role,
+        chat_provider_id=chat_id,
+        model=model,
+        created_at="2025-03-01T10:00:00+00:00",
+    )
+
+
+class TestBuildUsageDays:
+    """Test the per-day rows computed from raw messages and chats."""
+
+    def test_rows_add_up_to_raw_totals(self, client):
+        """Should split every message and chat into exactly one (day, model, provider) row."""
+        rows = client.storage["user_usage_daily"]
+        messages = client.storage["messages"]
+
+        assert sum(row["messages"] for row in rows) == len(messages)
+        assert sum(row["chats"] for row in rows) == len(client.storage["chats"])
+        assert sum(row["input_tokens"] + row["output_tokens"] for row in rows) == sum(
+            m["estimated_tokens"] for m in messages
+        )
+        assert len({(row["day"], row["model"], row["provider"]) for row in rows}) == len(rows)
+        assert {row["model"] for row in rows} == {"gpt-4o", "claude-3-sonnet", "unknown"}
+
+
+class TestIngestIncrements:
+    """Test that saved batches are added to the rollup."""
+
+    def test_batches_are_added_not_overwritten(self, monkeypatch):
+        """Should add each batch's deltas, resolving providers from the batch and saved chats."""
+        monkeypatch.setattr(settings, "USAGE_ROLLUP_WRITES", True)
+        storage = {
+            "chats": [
+                {"id": 1, "user_id": USER_ID, "chat_provider_id": "old", "provider_name": "claude"},
+                {"id": 2, "user_id": USER_ID, "chat_provider_id": "new", "provider_name": "chatgpt"},
+            ]
+        }
+        client = MockSupabaseClient(storage, rpc_handlers={"increment_user_usage_daily": increment_handler(storage)})
+        new_chat = ChatResponseDTO(
+            id=2,
+            user_id=USER_ID,
+            chat_provider_id="new",
+            title="New",
+            provider_name="chatgpt",
+            created_at="2025-03-01T09:00:00+00:00",
+        )
+
+        UsageRollupService.record_batch(
+            client,
+            USER_ID,
+            [_message_dto(1, "new"), _message_dto(2, "old", "assistant")],
+            [new_chat],
+            [SaveChatDTO(chat_provider_id="new", title="New", provider_name="chatgpt")],
+        )
+        UsageRollupService.record_batch(client, USER_ID, [_message_dto(3, "new")], [])
+
+        rows = {(row["provider"], row["model"]): row for row in storage["user_usage_daily"]}
+        assert rows["chatgpt", "gpt-4o"]["messages"] == 2
+        assert rows["chatgpt", "gpt-4o"]["input_tokens"] == 40
+        assert rows["claude", "gpt-4o"]["output_tokens"] == 20
+        assert rows["chatgpt", "unknown"]["chats"] == 1
+        assert {row["day"] for row in rows.values()} == {"2025-03-01"}
+        assert client.rpc_calls == ["increment_user_usage_daily"] * 2
+
+    def test_skipped_batches_and_failures_never_raise(self, monkeypatch):
+        """Should skip empty batches, and log instead of failing an already saved batch."""
+        monkeypatch.setattr(settings, "USAGE_ROLLUP_WRITES", True)
+
+        def unavailable(params):
+            raise RuntimeError("function increment_user_usage_daily does not exist")
+
+        client = MockSupabaseClient({"chats": []}, rpc_handlers={"increment_user_usage_daily": unavailable})
+
+        UsageRollupService.record_batch(client, USER_ID, [], [])
+        assert client.rpc_calls == []
+
+        UsageRollupService.record_batch(client, USER_ID, [_message_dto(1, "chat-1")], [])
+        assert client.rpc_calls == ["increment_user_usage_daily"]
+
+    def test_writes_disabled_by_flag(self, monkeypatch):
+        """Should not touch the rollup unless USAGE_ROLLUP_WRITES is set."""
+        monkeypatch.setattr(settings, "USAGE_ROLLUP_WRITES", False)
+        client = MockSupabaseClient({"chats": []}, rpc_handlers={"increment_user_usage_daily": lambda params: None})
+
+        UsageRollupService.record_batch(client, USER_ID, [_message_dto(1, "chat-1")], [])
+
+        assert client.rpc_calls == []
+        assert client.table_calls == []
+
+
+class TestRebuild:
+    """Test replacing a user's closed days with rebuilt totals."""
+
+    def test_replace_is_a_single_call(self):
+        """Should replace closed days in one RPC call (one transaction), leaving today's increments alone."""
+        storage = {
+            "user_usage_daily": [
+                {"user_id": USER_ID, "day": "2025-03-01", "model": "gpt-4o", "provider": "chatgpt", "messages": 9},
+                {"user_id": USER_ID, "day": "2025-03-01", "model": "stale", "provider": "chatgpt", "messages": 1},
+                {"user_id": USER_ID, "day": "2025-03-02", "model": "gpt-4o", "provider": "chatgpt", "messages": 4},
+                {"user_id": "user-2", "day": "2025-03-01", "model": "gpt-4o", "provider": "chatgpt", "messages": 7},
+            ]
+        }
+        client = MockSupabaseClient(storage, rpc_handlers={"replace_user_usage_daily": replace_handler(storage)})
+        rebuilt = [{"user_id": USER_ID, "day": "2025-03-01", "model": "gpt-4o", "provider": "chatgpt", "messages": 3}]
+
+        UsageRollupRepository.replace_user_days(client, USER_ID, date(2025, 3, 2), rebuilt)
+
+        assert client.rpc_calls == ["replace_user_usage_daily"]
+        assert client.table_calls == []
+        rows = {(row["user_id"], row["day"], row["model"]): row["messages"] for row in storage["user_usage_daily"]}
+        assert rows == {
+            (USER_ID, "2025-03-01", "gpt-4o"): 3,
+            (USER_ID, "2025-03-02", "gpt-4o"): 4,
+            ("user-2", "2025-03-01", "gpt-4o"): 7,
+        }
+
+
+class TestStatsFromRollup:
+    """Test that stats read from the rollup match a full raw scan."""
+
+    def _rollup_reads(self, monkeypatch):
+        monkeypatch.setattr(settings, "USAGE_ROLLUP_READS", True)
+
+        def full_scan(*args, **kwargs):
+            raise AssertionError("closed days must not be read from raw messages")
+
+        monkeypatch.setattr(StatsRepository, "get_messages_paginated", full_scan)
+
+    def test_overview_matches_raw_scan(self, client, monkeypatch):
+        """Should report the same totals and breakdowns as scanning every message."""
+        raw = StatsService.get_usage_overview(client, USER_ID, days=DAYS)
+        self._rollup_reads(monkeypatch)
+        rolled = StatsService.get_usage_overview(client, USER_ID, days=DAYS)
+
+        assert rolled.summary.total_messages == raw.summary.total_messages > 0
+        assert rolled.summary.total_tokens == raw.summary.total_tokens
+        assert rolled.summary.estimated_cost_usd == pytest.approx(raw.summary.estimated_cost_usd, abs=1e-4)
+        assert rolled.summary.energy_consumption_wh == raw.summary.energy_consumption_wh
+        assert rolled.chat_statistics == raw.chat_statistics
+        assert rolled.model_breakdown.keys() == raw.model_breakdown.keys()
+        for model, usage in raw.model_breakdown.items():
+            assert rolled.model_breakdown[model].messages == usage.messages
+            assert rolled.model_breakdown[model].cost == pytest.approx(usage.cost)
+        for provider, usage in raw.provider_breakdown.items():
+            assert rolled.provider_breakdown[provider].messages == usage.messages
+
+    @pytest.mark.parametrize("granularity", ["daily", "weekly"])
+    def test_timeline_matches_raw_scan(self, client, monkeypatch, granularity):
+        """Should build the same buckets from rollup rows plus today's raw rows."""
+        raw = StatsService.get_usage_timeline(client, USER_ID, days=DAYS, granularity=granularity)
+        self._rollup_reads(monkeypatch)
+        rolled = StatsService.get_usage_timeline(client, USER_ID, days=DAYS, granularity=granularity)
+
+        assert [p.timestamp for p in rolled.timeline] == [p.timestamp for p in raw.timeline]
+        for rolled_point, raw_point in zip(rolled.timeline, raw.timeline, strict=True):
+            assert (rolled_point.messages, rolled_point.chats, rolled_point.total_tokens) == (
+                raw_point.messages,
+                raw_point.chats,
+                raw_point.total_tokens,
+            )
+            # Points are rounded to 4 decimals, summation order may tip the last digit
+            assert rolled_point.cost_usd == pytest.approx(raw_point.cost_usd, abs=2e-4)
+            assert rolled_point.energy_wh == pytest.approx(raw_point.energy_wh, abs=2e-4)
+
+    def test_hourly_timeline_still_reads_raw_rows(self, client, monkeypatch):
+        """Should not use daily rows for hourly buckets."""
+        monkeypatch.setattr(settings, "USAGE_ROLLUP_READS", True)
+
+        StatsService.get_usage_timeline(client, USER_ID, days=DAYS, granularity="hourly")
+
+        assert "user_usage_daily" not in client.table_calls
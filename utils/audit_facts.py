@@ -0,0 +1,104 @@
+"""
+Per-user daily audit facts (user_audit_daily rows) computed from raw rows
+
+Each row holds the counters the audit time-series panels aggregate for one user and UTC day.
+The same function builds the increments on ingest and enrichment, the rows of the rebuild script,
+and the days the table does not cover yet (today, a partial first day) from raw rows, so every
+path counts a row exactly like the raw-scan panels do.
+"""
+
+from collections.abc import Iterable
+from datetime import UTC, datetime
+
+from utils.stats_helpers import usage_days
+from utils.timestamps import HOURS_PER_DAY, hour_buckets
+
+# Counters stored as JSONB objects (key -> rows), summed key by key
+AUDIT_DAY_COUNTERS = (
+    "chats_by_provider",
+    "messages_by_provider",
+    "messages_by_model",
+    "messages_by_hour",
+    "quality_scores",
+    "themes",
+    "intents",
+    "risk_levels",
+    "risk_types",
+)
+
+
+def _add(counter: dict[str, int], key: str) -> None:
+    counter[key] = counter.get(key, 0) + 1
+
+
+def build_audit_days(
+    chats: Iterable[dict] = (),
+    messages: Iterable[dict] = (),
+    enriched_chats: Iterable[dict] = (),
+    enriched_messages: Iterable[dict] = (),
+    chat_providers: dict[str, str | None] | None = None,
+) -> list[dict]:
+    """
+    user_audit_daily rows for raw rows of any users, one per (user, day) with something to count
+    Messages count under their chat's provider only when the chat is in chat_providers.
+    Only risky enriched messages (overall_risk_level other than "none") are counted.
+    """
+    chat_providers = chat_providers or {}
+    days = {}
+
+    def totals(user_id: str, day: str) -> dict:
+        key = (user_id, day)
+        if key not in days:
+            days[key] = {
+                "user_id": user_id,
+                "day": day,
+                "chats": 0,
+                "messages": 0,
+                "risky_messages": 0,
+                **{counter: {} for counter in AUDIT_DAY_COUNTERS},
+            }
+        return days[key]
+
+    chats = list(chats)
+    for chat, day in zip(chats, usage_days(chat.get("created_at") for chat in chats), strict=True):
+        row = totals(chat["user_id"], day)
+        row["chats"] += 1
+        _add(row["chats_by_provider"], chat.get("provider_name") or "Unknown")
+
+    messages = list(messages)
+    now = datetime.now(UTC).isoformat()
+    created_ats = [msg.get("created_at") or now for msg in messages]
+    for msg, day, hour in zip(messages, usage_days(created_ats), hour_buckets(created_ats), strict=True):
+        row = totals(msg["user_id"], day)
+        row["messages"] += 1
+        _add(row["messages_by_hour"], str(hour % HOURS_PER_DAY))
+        _add(row["messages_by_model"], msg.get("model") or "Unknown")
+        chat_provider_id = msg.get("chat_provider_id")
+        if chat_provider_id and chat_provider_id in chat_providers:
+            _add(row["messages_by_provider"], chat_providers[chat_provider_id] or "Unknown")
+
+    enriched_chats = list(enriched_chats)
+    for chat, day in zip(enriched_chats, usage_days(chat.get("created_at") for chat in enriched_chats), strict=True):
+        score, theme, intent = chat.get("quality_score"), chat.get("theme"), chat.get("intent")
+        if score is None and not theme and not intent:
+            continue
+        row = totals(chat["user_id"], day)
+        if score is not None:
+            _add(row["quality_scores"], str(score))
+        if theme:
+            _add(row["themes"], theme)
+        if intent:
+            _add(row["intents"], intent)
+
+    enriched_messages = [msg for msg in enriched_messages if msg.get("overall_risk_level") not in (None, "none")]
+    for msg, day in zip(enriched_messages, usage_days(msg.get("created_at") for msg in enriched_messages), strict=True):
+        row = totals(msg["user_id"], day)
+        row["risky_messages"] += 1
+        _add(row["risk_levels"], msg["overall_risk_level"])
+        risk_categories = msg.get("risk_categories")
+        if isinstance(risk_categories, dict):
+            for category, details in risk_categories.items():
+                if isinstance(details, dict) and details.get("detected"):
+                    _add(row["risk_types"], category)
+
+    return list(days.values())
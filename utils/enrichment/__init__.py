@@ -12,10 +12,16 @@ from .aggregators import (
     aggregate_top_prompts,
     aggregate_top_users,
     aggregate_usage_stats,
+    intent_stats_from_summary,
+    quality_stats_from_summary,
+    risk_stats_from_summary,
+    theme_stats_from_summary,
+    usage_stats_from_summary,
 )
 from .dto_mappers import (
     classification_to_enriched_chat,
     classification_to_response_dto,
+    enrichment_job_to_dto,
     intent_stats_to_dto,
     quality_stats_to_dto,
     risk_assessment_to_enriched_message,
@@ -44,6 +50,7 @@ __all__ = [
     "classification_to_response_dto",
     "risk_assessment_to_enriched_message",
     "risk_assessment_to_response_dto",
+    "enrichment_job_to_dto",
     "quality_stats_to_dto",
     "risk_stats_to_dto",
     "usage_stats_to_dto",
@@ -61,6 +68,12 @@ __all__ = [
     "aggregate_top_users",
     "aggregate_top_prompts",
     "aggregate_risky_prompts",
+    # SQL summary converters
+    "quality_stats_from_summary",
+    "risk_stats_from_summary",
+    "usage_stats_from_summary",
+    "theme_stats_from_summary",
+    "intent_stats_from_summary",
     # Validators
     "truncate_message",
     "validate_quality_scores",
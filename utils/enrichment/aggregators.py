@@ -297,6 +297,112 @@ def aggregate_risky_prompts(risky_prompts_data: dict) -> list[RiskyPrompt]:
     return risky_prompts
 
 
+# ==================== SQL SUMMARY CONVERTERS ====================
+# The get_audit_kpis RPC returns raw sums and counts; averages, rounding and
+# top-N selection stay here so both paths produce identical entities
+
+
+def quality_stats_from_summary(summary: dict) -> QualityStats:
+    """Build QualityStats from the audit_quality_stats SQL summary"""
+    total_rated = summary.get("total_rated") or 0
+    if not total_rated:
+        return QualityStats(average_score=0.0, total_rated=0)
+
+    avg_score = summary.get("score_sum", 0) / total_rated
+
+    trend_change = None
+    trend_count = summary.get("trend_count") or 0
+    if trend_count:
+        trend_avg = summary.get("trend_sum", 0) / trend_count
+        trend_change = ((avg_score - trend_avg) / trend_avg * 100) if trend_avg > 0 else 0
+
+    distribution = {"excellent": 0, "good": 0, "medium": 0, "poor": 0}
+    distribution.update(summary.get("distribution") or {})
+
+    return QualityStats(
+        average_score=round(avg_score, 2),
+        median_score=summary.get("median_score") or 0,
+        distribution=distribution,
+        total_rated=total_rated,
+        trend_change=round(trend_change, 2) if trend_change is not None else None,
+    )
+
+
+def risk_stats_from_summary(summary: dict) -> RiskStats:
+    """Build RiskStats from the audit_risk_stats SQL summary"""
+    total_assessed = summary.get("total_assessed") or 0
+    if not total_assessed:
+        return RiskStats()
+
+    level_counts = summary.get("level_counts") or {}
+    risk_score_count = summary.get("risk_score_count") or 0
+    avg_risk_score = float(summary.get("risk_score_sum", 0)) / risk_score_count if risk_score_count else 0.0
+
+    return RiskStats(
+        total_messages_assessed=total_assessed,
+        critical_count=level_counts.get("critical", 0),
+        high_count=level_counts.get("high", 0),
+        medium_count=level_counts.get("medium", 0),
+        low_count=level_counts.get("low", 0),
+        none_count=level_counts.get("none", 0),
+        pii_detected_count=summary.get("pii_count", 0),
+        credentials_detected_count=summary.get("credentials_count", 0),
+        sensitive_data_count=summary.get("sensitive_count", 0),
+        average_risk_score=round(avg_risk_score, 2),
+    )
+
+
+def usage_stats_from_summary(summary: dict) -> UsageStats:
+    """Build UsageStats from the audit_usage_stats SQL summary"""
+    total_prompts = summary.get("total_prompts", 0)
+    active_users = summary.get("active_users", 0)
+    total_chats = summary.get("total_chats", 0)
+    work_related_count = summary.get("work_related_count", 0)
+
+    work_percentage = (work_related_count / total_chats * 100) if total_chats else 0.0
+    avg_prompts_per_user = total_prompts / active_users if active_users > 0 else 0.0
+
+    return UsageStats(
+        total_prompts=total_prompts,
+        total_chats=total_chats,
+        active_users=active_users,
+        work_related_count=work_related_count,
+        personal_count=total_chats - work_related_count,
+        work_percentage=round(work_percentage, 2),
+        average_prompts_per_user=round(avg_prompts_per_user, 2),
+    )
+
+
+def theme_stats_from_summary(summary: dict) -> ThemeStats:
+    """Build ThemeStats from the audit_theme_stats SQL summary"""
+    theme_counts = Counter(summary.get("current") or {})
+    trend_counts = Counter(summary.get("trend") or {})
+    total = sum(theme_counts.values())
+
+    top_themes = _build_top_themes_list(theme_counts, total)
+    trend_change = _calculate_theme_trends(theme_counts, trend_counts, total, sum(trend_counts.values()))
+
+    return ThemeStats(top_themes=top_themes, total_categorized=total, trend_change=trend_change)
+
+
+def intent_stats_from_summary(summary: dict) -> IntentStats:
+    """Build IntentStats from the audit_intent_stats SQL summary"""
+    total_categorized = summary.get("total_categorized") or 0
+    if not total_categorized:
+        return IntentStats()
+
+    top_intents = [
+        {
+            "intent": row["intent"],
+            "count": row["count"],
+            "avg_quality": round(row["total_quality"] / row["count"], 2) if row["count"] > 0 else 0,
+        }
+        for row in sorted(summary.get("intents") or [], key=lambda x: x["count"], reverse=True)[:10]
+    ]
+
+    return IntentStats(top_intents=top_intents, total_categorized=total_categorized)
+
+
 # ==================== PRIVATE HELPER FUNCTIONS ====================
 
 
@@ -17,6 +17,7 @@ from domains.entities.enrichment_entities import (
     DomainExpertise,
     EnrichedChat,
     EnrichedMessage,
+    EnrichmentJob,
     FeedbackDetail,
     ProductivityIndicators,
     QualityMetrics,
@@ -37,6 +38,7 @@ from dtos.enrichment_dto import (
     ChatEnrichmentRequestDTO,
     ChatEnrichmentResponseDTO,
     DomainExpertiseDTO,
+    EnrichmentJobDTO,
     FeedbackDTO,
     ProductivityIndicatorsDTO,
     QualityMetricsDTO,
@@ -155,6 +157,23 @@ def risk_assessment_to_response_dto(risk_result: dict):
     )
 
 
+def enrichment_job_to_dto(job: EnrichmentJob) -> EnrichmentJobDTO:
+    """Transform a queued enrichment to its status DTO"""
+    return EnrichmentJobDTO(
+        id=job.id,
+        kind=job.kind,
+        provider_id=job.provider_id,
+        user_id=job.user_id,
+        status=job.status,
+        attempts=job.attempts,
+        last_error=job.last_error,
+        result=job.result,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+        completed_at=job.completed_at,
+    )
+
+
 # ==================== AUDIT MAPPERS ====================
 
 
@@ -1,4 +1,8 @@
-from datetime import datetime
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+
+from utils.timestamps import day_buckets
 
 # Energy cost constants (in joules per token)
 ENERGY_COST_PER_INPUT_TOKEN = 0.0003
@@ -25,12 +29,71 @@ def estimate_tokens(content: str | None) -> int:
     return max(1, len(str(content)) // 4)
 
 
+def message_size_fields(content: str | None) -> dict[str, int]:
+    """char_count and estimated_tokens persisted with a message so stats never read its content"""
+    return {"char_count": len(content) if content else 0, "estimated_tokens": estimate_tokens(content)}
+
+
 def calculate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
     """Calculate estimated cost for token usage"""
     costs = MODEL_COSTS.get(model, MODEL_COSTS["default"])
     return (input_tokens * costs["input"]) + (output_tokens * costs["output"])
 
 
+def message_cost_and_energy(model: str, role: str, tokens: int) -> tuple[float, float]:
+    """Cost (USD) and energy (Wh) of one message: user messages are input tokens, the rest output"""
+    if role == "user":
+        return calculate_cost(model, tokens, 0), tokens * ENERGY_COST_PER_INPUT_TOKEN / JOULES_PER_WH
+    return calculate_cost(model, 0, tokens), tokens * ENERGY_COST_PER_OUTPUT_TOKEN / JOULES_PER_WH
+
+
+def usage_days(created_ats: Iterable[str | None]) -> list[str]:
+    """UTC day (YYYY-MM-DD) each row is counted on in the usage rollup, today for rows not saved yet"""
+    today = datetime.now(UTC).strftime("%Y-%m-%d")
+    return [day.isoformat() for day in day_buckets(created_at or today for created_at in created_ats)]
+
+
+def build_usage_days(user_id: str, messages: Iterable, chats: Iterable, chat_providers: dict[str, str]) -> list[dict]:
+    """
+    user_usage_daily rows for messages and chats, one per (day, model, provider)
+    Messages count under their chat's provider, chats under model "unknown" on the day they were created
+    """
+    days = {}
+
+    def totals(day: str, model: str, provider: str) -> dict:
+        key = (day, model, provider)
+        if key not in days:
+            days[key] = {
+                "user_id": user_id,
+                "day": day,
+                "model": model,
+                "provider": provider,
+                "messages": 0,
+                "chats": 0,
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "cost_usd": 0.0,
+                "energy_wh": 0.0,
+            }
+        return days[key]
+
+    messages, chats = list(messages), list(chats)
+    for msg, day in zip(messages, usage_days(msg.created_at for msg in messages), strict=True):
+        model = msg.model or "unknown"
+        tokens = msg.estimated_tokens
+        cost, energy = message_cost_and_energy(model, msg.role, tokens)
+        row = totals(day, model, chat_providers.get(msg.chat_provider_id) or "unknown")
+        row["messages"] += 1
+        row["input_tokens" if msg.role == "user" else "output_tokens"] += tokens
+        row["cost_usd"] += cost
+        row["energy_wh"] += energy
+
+    for chat, day in zip(chats, usage_days(chat.created_at for chat in chats), strict=True):
+        totals(day, "unknown", chat.provider_name or "unknown")["chats"] += 1
+
+    return list(days.values())
+
+
 def energy_to_equivalent(wh: float) -> str:
     """Convert energy consumption to human-readable equivalent"""
     if wh < 0.05:
@@ -43,55 +106,72 @@ def energy_to_equivalent(wh: float) -> str:
         return "équivaut à quelques minutes d'ordinateur portable"
 
 
-def parse_datetime_safe(timestamp_str: str) -> datetime:
-    """Safely parse datetime string with various formats"""
-    try:
-        # Handle timezone info
-        timestamp = timestamp_str.replace("Z", "+00:00")
-
-        # If it has microseconds but incomplete (e.g., .44 instead of .440000)
-        if "." in timestamp and "+" in timestamp:
-            parts = timestamp.split("+")
-            datetime_part = parts[0]
-            timezone_part = "+" + parts[1]
-
-            if "." in datetime_part:
-                date_part, microsecond_part = datetime_part.split(".")
-                # Pad microseconds to 6 digits
-                microsecond_part = microsecond_part.ljust(6, "0")[:6]
-                timestamp = f"{date_part}.{microsecond_part}{timezone_part}"
-
-        return datetime.fromisoformat(timestamp)
-    except Exception:
-        # Fallback: try to parse without microseconds
-        try:
-            # Remove microseconds entirely
-            base_timestamp = timestamp_str.split(".")[0]
-            if "Z" in base_timestamp:
-                base_timestamp = base_timestamp.replace("Z", "+00:00")
-            elif not ("+" in base_timestamp or "-" in base_timestamp[-6:]):
-                base_timestamp += "+00:00"
-            return datetime.fromisoformat(base_timestamp)
-        except Exception:
-            # Last resort: use current time
-            return datetime.now()
-
-
-def fetch_all_paginated(repository_fn, batch_size: int = 1000):
-    """Fetch all records using pagination"""
-    offset = 0
-    all_items = []
-
-    while True:
-        batch = repository_fn(offset, batch_size)
-        if not batch:
-            break
-
-        all_items.extend(batch)
-
-        if len(batch) < batch_size:
-            break
-
-        offset += batch_size
-
-    return all_items
+@dataclass
+class UserMessageAccumulator:
+    """
+    Single-pass totals over a user's messages for StatsService.get_user_stats
+    Tokens come from the persisted estimated_tokens; messages_per_day only counts the keys it is created with
+    """
+
+    recent_date_str: str
+    messages_per_day: dict[str, int]
+    total_messages: int = 0
+    all_input: int = 0
+    all_output: int = 0
+    recent_input: int = 0
+    recent_output: int = 0
+    model_usage: dict[str, dict[str, int]] = field(default_factory=dict)
+    # message_provider_id -> created_at, and (created_at, parent id) of assistant replies
+    created_at_by_provider_id: dict[str, str | None] = field(default_factory=dict)
+    replies: list[tuple[str, str]] = field(default_factory=list)
+
+    def add(self, msg) -> None:
+        """Fold one message into every total"""
+        self.total_messages += 1
+        tokens = msg.estimated_tokens
+        created_at = msg.created_at
+        is_recent = (created_at or "") >= self.recent_date_str
+
+        model = msg.model or "unknown"
+        usage = self.model_usage.get(model)
+        if usage is None:
+            usage = self.model_usage[model] = {"count": 0, "input_tokens": 0, "output_tokens": 0}
+        usage["count"] += 1
+
+        if msg.role == "user":
+            self.all_input += tokens
+            usage["input_tokens"] += tokens
+            if is_recent:
+                self.recent_input += tokens
+        else:
+            self.all_output += tokens
+            usage["output_tokens"] += tokens
+            if is_recent:
+                self.recent_output += tokens
+
+        if created_at:
+            date = created_at.split("T")[0]
+            if date in self.messages_per_day:
+                self.messages_per_day[date] += 1
+
+        if msg.message_provider_id:
+            self.created_at_by_provider_id[msg.message_provider_id] = created_at
+        if msg.role == "assistant" and msg.parent_message_provider_id and created_at:
+            self.replies.append((created_at, msg.parent_message_provider_id))
+
+    def thinking_times(self) -> list[float]:
+        """Seconds between each assistant reply and its parent message, kept when within 0.1-60s"""
+        times = []
+        for created_at, parent_id in self.replies:
+            parent_created_at = self.created_at_by_provider_id.get(parent_id)
+            if not parent_created_at:
+                continue
+            try:
+                t1 = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+                t0 = datetime.fromisoformat(parent_created_at.replace("Z", "+00:00"))
+                diff = (t1 - t0).total_seconds()
+                if 0.1 <= diff <= 60:
+                    times.append(diff)
+            except Exception:
+                pass
+        return times
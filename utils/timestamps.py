@@ -0,0 +1,86 @@
+"""
+Timestamp parsing for rows read from PostgREST
+
+timestamptz columns come back as ISO 8601 strings ("2025-03-01T10:00:00.44+00:00"), which
+datetime.fromisoformat parses directly since Python 3.11. Aggregations that only need the day or
+the hour of each row take them from the string itself: the batch helpers convert a whole column in
+one call and parse each distinct day once. Days and hours are the timestamp's own wall-clock time,
+with no timezone conversion, the same as parse_timestamp(value).date().
+"""
+
+from collections.abc import Iterable
+from datetime import date, datetime
+
+HOURS_PER_DAY = 24
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse an ISO 8601 timestamp, falling back to a lenient parse (and then now) for malformed values"""
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return _parse_lenient(value)
+
+
+def _parse_lenient(value: str) -> datetime:
+    try:
+        # Pad incomplete microseconds (.44 instead of .440000)
+        timestamp = value.replace("Z", "+00:00")
+        if "." in timestamp and "+" in timestamp:
+            datetime_part, timezone_part = timestamp.split("+", 1)
+            if "." in datetime_part:
+                date_part, microsecond_part = datetime_part.split(".")
+                timestamp = f"{date_part}.{microsecond_part.ljust(6, '0')[:6]}+{timezone_part}"
+        return datetime.fromisoformat(timestamp)
+    except Exception:
+        # Fallback: try to parse without microseconds
+        try:
+            base_timestamp = value.split(".")[0]
+            if "Z" in base_timestamp:
+                base_timestamp = base_timestamp.replace("Z", "+00:00")
+            elif not ("+" in base_timestamp or "-" in base_timestamp[-6:]):
+                base_timestamp += "+00:00"
+            return datetime.fromisoformat(base_timestamp)
+        except Exception:
+            # Last resort: use current time
+            return datetime.now()
+
+
+def _day_and_hour(value: str, days: dict[str, date]) -> tuple[date, int] | None:
+    """Day and hour read from a "YYYY-MM-DD[T ]HH:..." string, None for any other format"""
+    if not isinstance(value, str) or len(value) < 13 or value[10] not in "T ":
+        return None
+    key = value[:10]
+    day = days.get(key)
+    try:
+        if day is None:
+            day = days[key] = date.fromisoformat(key)
+        hour = int(value[11:13])
+    except ValueError:
+        return None
+    return (day, hour) if 0 <= hour < HOURS_PER_DAY else None
+
+
+def day_buckets(values: Iterable[str]) -> list[date]:
+    """Calendar day of each timestamp"""
+    days = {}
+    buckets = []
+    for value in values:
+        fast = _day_and_hour(value, days)
+        buckets.append(fast[0] if fast else parse_timestamp(value).date())
+    return buckets
+
+
+def hour_buckets(values: Iterable[str]) -> list[int]:
+    """Hours since 0001-01-01 of each timestamp (day ordinal * 24 + hour)"""
+    days = {}
+    buckets = []
+    for value in values:
+        fast = _day_and_hour(value, days)
+        if fast:
+            day, hour = fast
+        else:
+            moment = parse_timestamp(value)
+            day, hour = moment.date(), moment.hour
+        buckets.append(day.toordinal() * HOURS_PER_DAY + hour)
+    return buckets